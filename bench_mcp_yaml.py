@@ -0,0 +1,266 @@
+"""
+Golden checks and benchmarks for generate_mcp_yaml.py.
+
+Parser: parse_mcp_servers_md() must return exactly what parse_mcp_servers_md_legacy()
+returns. The golden documents below cover the Roo layout (instructions, tools with and
+without schemas, resource templates, direct resources) plus the legacy parser's quirks.
+
+Emitter: generate_mcp_yaml() must produce byte for byte the text of
+generate_mcp_yaml_legacy(), for the golden documents and for seeded random catalogs whose
+schemas hold hostile scalars (quotes, escapes, non-ASCII, line breaks, YAML keywords, lines
+long enough to fold, odd keys, numbers). Its yaml.dump() fallback (CSafeDumper or SafeDumper)
+is held to the same output.
+
+The benchmarks then time both implementations on a synthetic catalog (10k tools by default).
+
+Usage:
+    python bench_mcp_yaml.py                       # golden checks + 10k-tool benchmark
+    python bench_mcp_yaml.py --tools 50000 --repeat 5
+    python bench_mcp_yaml.py --check-only
+
+Exits non-zero if any golden check fails.
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+
+import generate_mcp_yaml as gen
+
+SECTION_HEADER = "# Connected MCP Servers" + gen.MCP_SECTION_START
+SECTION_FOOTER = gen.MCP_SECTION_END + "\n\nYou do not need to create a server unless asked.\n"
+
+# --- Synthetic Documents ---
+def render_schema(schema: dict) -> str:
+    # Roo: JSON.stringify(inputSchema, null, 2), continuation lines indented by 4 spaces
+    return "\n    ".join(json.dumps(schema, indent=2, ensure_ascii=False).split("\n"))
+
+def make_schema(rng: random.Random, tool_index: int) -> dict:
+    properties = {}
+    for k in range(rng.randint(0, 6)):
+        kind = rng.choice(["string", "number", "boolean", "array", "object"])
+        prop = {"type": kind, "description": f"Parameter {k} of tool {tool_index}: {{value}} with \"quotes\", \\ and ünïcode"}
+        if kind == "array":
+            prop["items"] = {"type": "string", "enum": ["a", "b-c", "{d}"]}
+        elif kind == "object":
+            prop["properties"] = {"nested": {"type": "integer", "minimum": -1, "default": 3.5}}
+            prop["additionalProperties"] = False
+        properties[f"param_{k}"] = prop
+    schema = {"type": "object", "properties": properties}
+    if properties and rng.random() < 0.6:
+        schema["required"] = sorted(properties)[:rng.randint(1, len(properties))]
+    schema["$schema"] = "http://json-schema.org/draft-07/schema#"
+    return schema
+
+def make_document(servers: int = 3, tools_per_server: int = 4, seed: int = 1) -> str:
+    """A system_prompt.md in the layout Roo generates for connected servers."""
+    rng = random.Random(seed)
+    parts = [SECTION_HEADER]
+    tool_index = 0
+    for s in range(servers):
+        parts.append(f"## server-{s} (`npx -y @example/server-{s} --root C:\\\\work\\\\{s}`)\n")
+        if s % 3 == 1:
+            parts.append(f"Server {s} description\nspanning two lines.\n\n")
+        sections = []
+        if s % 4 == 2:
+            sections.append(f"### Instructions\nUse server {s} carefully.\nIt has rules.")
+        tools = []
+        for t in range(tools_per_server):
+            tool_index += 1
+            name = rng.choice(["get", "set", "list", "run"]) + f"_{s}-{t}"
+            description = f"Tool {t} of server {s}. Handles (things): well."
+            if t % 5 == 4:
+                tools.append(f"- {name}: {description}")  # no input schema
+            else:
+                extra = "\n    Second description line." if t % 3 == 0 else ""
+                tools.append(f"- {name}: {description}{extra}\n    Input Schema:\n    {render_schema(make_schema(rng, tool_index))}")
+        if tools:
+            sections.append("### Available Tools\n" + "\n\n".join(tools))
+        if s % 2 == 0:
+            sections.append(f"### Resource Templates\n- mem://{s}/{{key}} (Entry by key): Look up one entry")
+        if s % 3 != 1:
+            sections.append(f"### Direct Resources\n- file:///logs/{s}.log (Log {s}): Server log\n- mem://{s}/all (All entries): Everything")
+        parts.append("\n\n".join(sections) + "\n\n")
+    parts.append(SECTION_FOOTER)
+    return "".join(parts)
+
+GOLDEN_DOCUMENTS = {
+    "roo-layout": make_document(6, 7, seed=7),
+    "roo-layout-crlf": make_document(3, 5, seed=3).replace("\n", "\r\n"),
+    "single-server-no-footer": SECTION_HEADER + "## only (`uvx only`)\n### Available Tools\n- ping: Ping\n    Input Schema:\n    {}\n",
+    "first-tool-without-dash": SECTION_HEADER + "## s (`cmd`)\n### Available Tools\nlookup: Finds things\n- other: Other\n\n## t (`cmd2`)\nDesc.\n" + SECTION_FOOTER,
+    "hashes-in-description": SECTION_HEADER + "## s (`cmd`)\nUses C### and more.\nSecond line.\n### Available Tools\n- a: A\n" + SECTION_FOOTER,
+    "parens-in-heading": SECTION_HEADER + "## s (beta) (`cmd --x`)\nD\n\n## t   (`plain`)   \nE\n" + SECTION_FOOTER,
+    "text-before-schema": SECTION_HEADER + "## s (`cmd`)\n### Available Tools\n- a: A\n    Input Schema: see below\n    {\"type\": \"object\"}\n- b: B\n    Input Schema:\n    no json here\n" + SECTION_FOOTER,
+    "invalid-schema": SECTION_HEADER + "## s (`cmd`)\n### Available Tools\n- a: A\n    Input Schema:\n    {\"type\": object}\n- b: B\n    Input Schema:\n    {\"type\": \"object\"}\n" + SECTION_FOOTER,
+    "schema-then-text": SECTION_HEADER + "## s (`cmd`)\n### Available Tools\n- a: A\n    Input Schema:\n    {\"x\": {\"y\": [1, 2]}} trailing\n    words after\n- b: B\n" + SECTION_FOOTER,
+    "unparsed-resources": SECTION_HEADER + "## s (`cmd`)\n### Direct Resources\n- just a uri\n" + SECTION_FOOTER,
+    "empty-tools": SECTION_HEADER + "## s (`cmd`)\n### Available Tools\n\n### Direct Resources\n\n" + SECTION_FOOTER,
+    "lowercase-headings": SECTION_HEADER + "## s (`cmd`)\n### available tools\n- a: A\n### DIRECT RESOURCES\n- r://x (X): x\n" + SECTION_FOOTER,
+    "text-before-first-server": SECTION_HEADER + "Some introduction.\n\n## s (`cmd`)\nD\n" + SECTION_FOOTER,
+    "no-servers": SECTION_HEADER + "(No MCP servers currently connected)\n" + SECTION_FOOTER,
+    "no-section": "# Nothing to see here\n",
+}
+
+# --- Checks ---
+def parse_quietly(parser, document: str) -> tuple[list, str]:
+    warnings = io.StringIO()
+    with contextlib.redirect_stderr(warnings):
+        servers = parser(document)
+    return servers, warnings.getvalue()
+
+def check_parser() -> int:
+    failures = 0
+    for name, document in GOLDEN_DOCUMENTS.items():
+        expected, _ = parse_quietly(gen.parse_mcp_servers_md_legacy, document)
+        actual, _ = parse_quietly(gen.parse_mcp_servers_md, document)
+        if actual == expected:
+            tools = sum(len(server['tools']) for server in expected)
+            print(f"  ok    parser  {name} ({len(expected)} servers, {tools} tools)")
+        else:
+            failures += 1
+            print(f"  FAIL  parser  {name}")
+            print(f"        legacy: {json.dumps(expected, ensure_ascii=False)[:400]}")
+            print(f"        new:    {json.dumps(actual, ensure_ascii=False)[:400]}")
+    return failures
+
+HOSTILE_CHARACTERS = list("abc XYZ019 _-:#'\"\\{}[],&*!|>%@`?\t\n\r\x00\x07\x85\xa0\u2028\ufeffüé中😀~.=+")
+HOSTILE_SCALARS = ['', ' ', 'true', 'no', 'null', '~', '1', '1.5', '0x1F', '2001-12-14', '-', '- a', ': x', 'a: b', '#c',
+                   'a #b', "'q'", '"q"', 'x ', ' x', '<<', '---', 'a\nb', 'a\n\nb', 'a\n', ' a\nb', 'C:\\path\\x',
+                   ('word ' * 450).strip(), 'x' * 2500, ('line of text ' * 200 + '\n') * 3, ('é ' * 1100).strip(),
+                   0, -7, 12345678901234567890, 0.1, -0.0, 1e16, 1.5e-07, float('inf'), float('nan'), True, False, None]
+
+def hostile_value(rng: random.Random, depth: int = 0):
+    roll = rng.random()
+    if depth < 3 and roll < 0.15:
+        return {hostile_key(rng): hostile_value(rng, depth + 1) for _ in range(rng.randint(0, 3))}
+    if depth < 3 and roll < 0.3:
+        return [hostile_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    if roll < 0.6:
+        return rng.choice(HOSTILE_SCALARS)
+    return ''.join(rng.choice(HOSTILE_CHARACTERS) for _ in range(rng.randint(0, 40)))
+
+def hostile_key(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.05:
+        return 'k' * rng.choice([100, 122, 123, 127, 130])
+    if roll < 0.15:
+        return ''.join(rng.choice(HOSTILE_CHARACTERS) for _ in range(rng.randint(0, 12)))
+    return rng.choice(['type', 'properties', 'description', 'items', '$ref', 'enum', 'x-é'])
+
+def hostile_servers(seed: int) -> list:
+    rng = random.Random(seed)
+    return [{'name': f"s{s}", 'command': rng.choice(['npx -y x', 'C:\\bin\\x.exe', "it's", '']),
+             'description': rng.choice(HOSTILE_SCALARS[:30]) if rng.random() < 0.5 else '',
+             'tools': [{'name': f"t{t}", 'description': str(rng.choice(HOSTILE_SCALARS)),
+                        'input_schema': {'type': 'object', 'properties': {hostile_key(rng): hostile_value(rng) for _ in range(rng.randint(0, 4))}}}
+                       for t in range(rng.randint(0, 4))],
+             'resources': [{'uri': f"mem://{s}/{r}", 'description': 'Res (x)'} for r in range(rng.randint(0, 2))]}
+            for s in range(rng.randint(1, 4))]
+
+def check_scalar_analysis(fuzz: int) -> int:
+    rng = random.Random(fuzz)
+    analyzer = gen.yaml.emitter.Emitter(None)
+    samples = [value for value in HOSTILE_SCALARS if isinstance(value, str)]
+    samples += [''.join(rng.choice(HOSTILE_CHARACTERS) for _ in range(rng.randint(0, 12))) for _ in range(fuzz * 100)]
+    for text in samples:
+        reference = analyzer.analyze_scalar(text)
+        if gen.analyze_scalar(text) != (reference.multiline, reference.allow_block_plain, reference.allow_single_quoted):
+            print(f"  FAIL  analyze {text!r}: {gen.analyze_scalar(text)} vs {reference}")
+            return 1
+    print(f"  ok    analyze {len(samples)} scalars classified as Emitter.analyze_scalar() does")
+    return 0
+
+def check_emitter(fuzz: int) -> int:
+    failures = check_scalar_analysis(fuzz)
+    fallbacks = 0
+    cases = []
+    for name, document in GOLDEN_DOCUMENTS.items():
+        cases.append((name, parse_quietly(gen.parse_mcp_servers_md, document)[0]))
+    shared = {'type': 'string'}
+    cases.append(("shared-schema-node", [{'name': 's', 'command': 'c', 'description': '', 'resources': [],
+                                          'tools': [{'name': f"t{t}", 'description': 'd', 'input_schema': shared} for t in range(2)]}]))
+    cases += [(f"hostile-{seed}", hostile_servers(seed)) for seed in range(fuzz)]
+    for name, servers in cases:
+        expected = gen.generate_mcp_yaml_legacy(servers)
+        outputs = {'emitter': gen.generate_mcp_yaml(servers)}
+        if servers:
+            outputs['dump'] = gen.dump_mcp_yaml({'servers': servers})
+            try:
+                gen.McpYamlEmitter().emit({'servers': servers})
+            except gen.YamlFallback:
+                fallbacks += 1
+        bad = [path for path, output in outputs.items() if output != expected]
+        if bad:
+            failures += 1
+            print(f"  FAIL  emitter {name} ({', '.join(bad)})")
+            for path in bad:
+                diverges = next((i for i, (a, b) in enumerate(zip(outputs[path], expected)) if a != b), min(len(outputs[path]), len(expected)))
+                print(f"        {path} at {diverges}: {outputs[path][max(0, diverges - 60):diverges + 60]!r}")
+                print(f"        legacy: {expected[max(0, diverges - 60):diverges + 60]!r}")
+        elif not name.startswith("hostile-"):
+            print(f"  ok    emitter {name} ({len(expected)} bytes)")
+    print(f"  {'ok' if not failures else 'FAIL'}    emitter {fuzz} random hostile catalogs ({fallbacks} of {len(cases)} documents went through yaml.dump())")
+    return failures
+
+# --- Benchmark ---
+def best_of(repeat: int, fn, *args) -> tuple[float, object]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def benchmark_parser(tools: int, servers: int, repeat: int):
+    document = make_document(servers, max(1, tools // servers), seed=42)
+    print(f"Parser benchmark: {servers} servers, {tools} tools, {len(document) / 1048576:.1f} MB (best of {repeat})")
+    with contextlib.redirect_stderr(io.StringIO()):
+        legacy_s, expected = best_of(repeat, gen.parse_mcp_servers_md_legacy, document)
+        new_s, actual = best_of(repeat, gen.parse_mcp_servers_md, document)
+    print(f"  legacy  {legacy_s * 1000:9.1f} ms")
+    print(f"  new     {new_s * 1000:9.1f} ms   ({legacy_s / new_s:.1f}x)")
+    if actual != expected:
+        print("  FAIL  results differ on the benchmark document")
+        return 1
+    return 0
+
+def benchmark_emitter(tools: int, servers: int, repeat: int):
+    with contextlib.redirect_stderr(io.StringIO()):
+        catalog = gen.parse_mcp_servers_md(make_document(servers, max(1, tools // servers), seed=42))
+    print(f"Emitter benchmark: {servers} servers, {tools} tools (best of {repeat})")
+    legacy_s, expected = best_of(repeat, gen.generate_mcp_yaml_legacy, catalog)
+    print(f"  legacy   {legacy_s * 1000:9.1f} ms   ({len(expected) / 1048576:.1f} MB of YAML)")
+    if hasattr(gen.yaml, 'CSafeDumper'):
+        libyaml_s, _ = best_of(repeat, gen.dump_mcp_yaml, {'servers': catalog})
+        print(f"  libyaml  {libyaml_s * 1000:9.1f} ms   ({legacy_s / libyaml_s:.1f}x, yaml.dump() fallback via CSafeDumper)")
+    new_s, actual = best_of(repeat, gen.generate_mcp_yaml, catalog)
+    print(f"  new      {new_s * 1000:9.1f} ms   ({legacy_s / new_s:.1f}x)")
+    if actual != expected:
+        print("  FAIL  output differs on the benchmark catalog")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Golden checks and benchmarks for generate_mcp_yaml.py.")
+    parser.add_argument("--tools", type=int, default=10000, help="Tools in the synthetic benchmark document")
+    parser.add_argument("--servers", type=int, default=200, help="Servers the tools are spread over")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per implementation (best is reported)")
+    parser.add_argument("--fuzz", type=int, default=300, help="Random hostile catalogs for the emitter check")
+    parser.add_argument("--check-only", action="store_true", help="Run the golden checks, skip the benchmarks")
+    args = parser.parse_args()
+
+    print("Golden checks:")
+    failures = check_parser()
+    failures += check_emitter(args.fuzz)
+    if not args.check_only:
+        print()
+        failures += benchmark_parser(args.tools, args.servers, args.repeat)
+        print()
+        failures += benchmark_emitter(args.tools, args.servers, args.repeat)
+    print(f"\n{'All checks passed.' if not failures else f'{failures} check(s) failed.'}")
+    sys.exit(1 if failures else 0)
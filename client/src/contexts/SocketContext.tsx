@@ -1,4 +1,4 @@
-import React, { createContext, useContext, useEffect, useState, ReactNode } from 'react';
+import React, { createContext, useCallback, useContext, useEffect, useRef, useState, ReactNode } from 'react';
 import { io, Socket } from 'socket.io-client';
 import { useAuth } from './AuthContext';
 
@@ -8,6 +8,8 @@ interface SocketContextType {
   isConnecting: boolean;
   error: string | null;
   reconnectAttempts: number;
+  joinLobby: (lobbyId: number) => void;
+  leaveLobby: (lobbyId: number) => void;
 }
 
 const SocketContext = createContext<SocketContextType>({
@@ -16,6 +18,8 @@ const SocketContext = createContext<SocketContextType>({
   isConnecting: false,
   error: null,
   reconnectAttempts: 0,
+  joinLobby: () => {},
+  leaveLobby: () => {},
 });
 
 export const useSocket = () => {
@@ -37,6 +41,12 @@ export const SocketProvider: React.FC<SocketProviderProps> = ({ children }) => {
   const [error, setError] = useState<string | null>(null);
   const [reconnectAttempts, setReconnectAttempts] = useState(0);
   const { user } = useAuth();
+  // Lobby room to (re)join on every connect. The lobby also goes into the
+  // Engine.IO query: in cluster mode the proxy routes the socket to the worker
+  // that runs that lobby's games, so it stays there after the user leaves
+  const lobbyRef = useRef<number | null>(null);
+  const joinedRef = useRef<string | null>(null);
+  const openedForRef = useRef<string | null>(null);
 
   useEffect(() => {
     // Only connect if user is authenticated
@@ -61,16 +71,23 @@ export const SocketProvider: React.FC<SocketProviderProps> = ({ children }) => {
       auth: {
         token: token
       },
+      query: lobbyRef.current !== null ? { lobby: String(lobbyRef.current) } : {},
       autoConnect: true,
       reconnection: true,
       reconnectionAttempts: 5,
-      reconnectionDelay: 1000,
+      // Short first retry: rolling restarts hand sockets over to an instance that is already up
+      reconnectionDelay: 500,
       timeout: 10000,
     });
 
     // Connection event handlers
     newSocket.on('connect', () => {
       console.log('[SOCKET] Connected successfully:', newSocket.id);
+      openedForRef.current = newSocket.io.opts.query?.lobby ?? null;
+      if (lobbyRef.current !== null) {
+        newSocket.emit('join_lobby', lobbyRef.current);
+        joinedRef.current = `${newSocket.id}:${lobbyRef.current}`;
+      }
       setIsConnected(true);
       setIsConnecting(false);
       setError(null);
@@ -120,6 +137,18 @@ export const SocketProvider: React.FC<SocketProviderProps> = ({ children }) => {
       setError('Unable to reconnect to server. Please refresh the page.');
     });
 
+    // Cluster mode: this worker does not run the lobby. Open a new session,
+    // which the proxy routes to the lobby's worker; 'connect' joins the room
+    newSocket.on('lobby_elsewhere', (data: { lobbyId: number }) => {
+      if (openedForRef.current === String(data.lobbyId)) {
+        console.error('[SOCKET] Lobby', data.lobbyId, 'still not on this worker after reconnecting');
+        return;
+      }
+      console.log('[SOCKET] Moving to the worker of lobby', data.lobbyId);
+      joinedRef.current = null;
+      newSocket.disconnect().connect();
+    });
+
     // Authentication error handler
     newSocket.on('auth_error', (errorMessage) => {
       console.error('[SOCKET] Authentication error:', errorMessage);
@@ -139,15 +168,37 @@ export const SocketProvider: React.FC<SocketProviderProps> = ({ children }) => {
       setIsConnecting(false);
       setError(null);
       setReconnectAttempts(0);
+      joinedRef.current = null;
     };
   }, [user]); // Reconnect when user changes
 
+  const joinLobby = useCallback((lobbyId: number) => {
+    lobbyRef.current = lobbyId;
+    if (!socket) return;
+    // Any new Engine.IO session (reconnects included) is opened on this lobby's worker
+    socket.io.opts.query = { ...socket.io.opts.query, lobby: String(lobbyId) };
+    if (socket.connected && joinedRef.current !== `${socket.id}:${lobbyId}`) {
+      socket.emit('join_lobby', lobbyId);
+      joinedRef.current = `${socket.id}:${lobbyId}`;
+    }
+  }, [socket]);
+
+  const leaveLobby = useCallback((lobbyId: number) => {
+    if (lobbyRef.current === lobbyId) {
+      lobbyRef.current = null;
+      joinedRef.current = null;
+    }
+    socket?.emit('leave_lobby', lobbyId);
+  }, [socket]);
+
   const value: SocketContextType = {
     socket,
     isConnected,
     isConnecting,
     error,
     reconnectAttempts,
+    joinLobby,
+    leaveLobby,
   };
 
   return (
@@ -69,7 +69,7 @@ export default function GamePage() {
   const gameId = parseInt(params.id || '0');
   const [, setLocation] = useLocation();
   const { user } = useAuth();
-  const { socket, isConnected } = useSocket();
+  const { socket, isConnected, joinLobby } = useSocket();
   const isMobile = useIsMobile(1024);
   const { toast } = useToast();
   
@@ -205,7 +205,7 @@ export default function GamePage() {
     console.log(`[SOCKET] Game lobbyId:`, game.lobbyId);
     
     if (game.lobbyId) {
-      socket.emit('join_lobby', game.lobbyId);
+      joinLobby(game.lobbyId);
       console.log(`[SOCKET] ✅ Emitted join_lobby for lobby ${game.lobbyId}`);
     } else {
       console.error(`[SOCKET] ❌ No lobbyId available, cannot join lobby!`);
@@ -490,7 +490,7 @@ export default function GamePage() {
       socket.off('seat_left', handleSeatLeft);
       socket.off('game_reset', handleGameReset);
     };
-  }, [socket, isConnected, game?.id, game?.lobbyId]);
+  }, [socket, isConnected, game?.id, game?.lobbyId, joinLobby]);
 
   // Update pattern progress when numbers are called or cards change
   useEffect(() => {
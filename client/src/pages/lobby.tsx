@@ -77,7 +77,7 @@ const LobbyPage: React.FC = () => {
     winnerSeats: number[];
   } | null>(null);
 
-  const { socket, isConnected } = useSocket();
+  const { socket, isConnected, joinLobby, leaveLobby } = useSocket();
 const { toast } = useToast();
 const isMobile = useIsMobile(1024); // Use 1024px as breakpoint (lg in Tailwind)
 
@@ -256,8 +256,8 @@ const isMobile = useIsMobile(1024); // Use 1024px as breakpoint (lg in Tailwind)
 
     console.log('[LOBBY PAGE] Setting up Socket.io listeners for lobby:', lobby.id);
 
-    // Join the lobby room for real-time updates
-    socket.emit('join_lobby', lobby.id);
+    // Join the lobby room for real-time updates (on the lobby's worker in cluster mode)
+    joinLobby(lobby.id);
 
     // On join, attempt to get a snapshot if a game is already running
     (async () => {
@@ -408,9 +408,9 @@ const isMobile = useIsMobile(1024); // Use 1024px as breakpoint (lg in Tailwind)
       socket.off('game_paused');
       socket.off('game_resumed');
       socket.off('call_speed_changed');
-      socket.emit('leave_lobby', lobby.id);
+      leaveLobby(lobby.id);
     };
-  }, [socket, lobby?.id, user?.id, participants]);
+  }, [socket, lobby?.id, user?.id, participants, joinLobby, leaveLobby]);
 
   const fetchParticipants = async () => {
     try {
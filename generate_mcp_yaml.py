@@ -5,7 +5,10 @@ import re
 import os
 import argparse
 import glob
-import codecs
+import hashlib
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # --- YAML Custom Representers ---
 def represent_dict_block(dumper, data):
@@ -16,6 +19,10 @@ def represent_list_block(dumper, data):
     return dumper.represent_sequence('tag:yaml.org,2002:seq', data, flow_style=False)
 yaml.add_representer(list, represent_list_block, Dumper=yaml.SafeDumper)
 
+if hasattr(yaml, 'CSafeDumper'): # Same representers for the libyaml dumper, when PyYAML was built with it
+    yaml.add_representer(dict, represent_dict_block, Dumper=yaml.CSafeDumper)
+    yaml.add_representer(list, represent_list_block, Dumper=yaml.CSafeDumper)
+
 # --- Helper Functions ---
 def extract_balanced_json(text):
     """Finds the first '{' and extracts the substring until the matching '}'."""
@@ -29,10 +36,11 @@ def extract_balanced_json(text):
             if brace_level == 0: return text[start_index : start_index + i + 1]
     return None
 
-def parse_mcp_servers_md(markdown_content: str) -> list:
+def parse_mcp_servers_md_legacy(markdown_content: str) -> list:
     """
     Parses MCP server definitions from markdown content.
     Returns a list of server dictionaries.
+    Regex-based original, kept as the reference for parse_mcp_servers_md().
     """
     servers = []
     markdown_content = markdown_content.replace('\r\n', '\n') # Normalize line endings
@@ -128,8 +136,185 @@ def parse_mcp_servers_md(markdown_content: str) -> list:
 
     return servers
 
-def generate_mcp_yaml(servers: list) -> str | None:
-    """Generates the indented MCP YAML string from a list of server dicts."""
+# --- Single-Pass Parser ---
+# parse_mcp_servers_md() walks the MCP section line by line, once. A '## name (command)' line opens a
+# server, '### Available Tools' and '### Direct Resources' switch what the following lines are, and a
+# tool's input schema is decoded where it stands with JSONDecoder.raw_decode(), after which the scan
+# resumes on the line below it, so schema lines are never tokenized. Every pattern is compiled once and
+# matched against a single line. Results are those of parse_mcp_servers_md_legacy() (bench_mcp_yaml.py
+# checks this), except that schemas with unbalanced braces inside strings now parse, and that headings
+# must start a line and fit on it (the legacy regexes let a heading run across lines).
+MCP_SECTION_START = "\n\nWhen a server is connected, you can use the server's tools via the `use_mcp_tool` tool, and access the server's resources via the `access_mcp_resource` tool.\n\n"
+MCP_SECTION_END = "\n## Creating an MCP Server"
+SERVER_HEADING_RE = re.compile(r'##\s*(?P<name>.+?)\s+\((?P<command>.+?)\)\s*$')
+TOOLS_HEADING_RE = re.compile(r'### Available Tools\s*', re.IGNORECASE)
+RESOURCES_HEADING_RE = re.compile(r'### Direct Resources\s*', re.IGNORECASE)
+TOOL_START_RE = re.compile(r'\s*-\s+([\w_-]+):')
+FIRST_TOOL_RE = re.compile(r'\s*-?\s*([\w_-]+):') # The tools section's first line, even without '- '
+RESOURCE_RE = re.compile(r'-\s*(?P<uri>.+?)\s+\((?P<description>.*?)\):\s*.*')
+WHITESPACE_RE = re.compile(r'\s*')
+SCHEMA_MARKER = 'Input Schema:'
+JSON_DECODER = json.JSONDecoder()
+
+def join_stripped_lines(text: str) -> str:
+    return ' '.join(line.strip() for line in text.splitlines() if line.strip())
+
+def decode_schema(text: str, brace: int, tool: dict, server: dict) -> tuple[dict | None, int]:
+    """Decodes the JSON value starting at text[brace]; returns (value or None, end offset)."""
+    try:
+        return JSON_DECODER.raw_decode(text, brace)
+    except json.JSONDecodeError as e:
+        print(f"Warning: JSON parse error for tool '{tool['name']}' in server '{server['name']}': {e}", file=sys.stderr)
+        return None, brace
+
+def finish_tool(text: str, server: dict, tool: dict | None, end: int):
+    """Adds the tool whose block ends at text[end] to the server, as the legacy parser would."""
+    if tool is None:
+        return
+    if tool['marker'] == -1:
+        description = join_stripped_lines(text[tool['start']:end])
+        if description:
+            server['tools'].append({'name': tool['name'], 'description': description, 'input_schema': {}})
+        return
+    schema = tool['schema']
+    if schema is None and not tool['failed']:
+        # Text between the marker and the schema: find the first '{' of the block, like the legacy parser
+        brace = text.find('{', tool['marker'] + len(SCHEMA_MARKER), end)
+        if brace == -1:
+            print(f"Warning: Could not extract balanced JSON schema for tool '{tool['name']}' in server '{server['name']}'.", file=sys.stderr)
+            return
+        schema = decode_schema(text, brace, tool, server)[0]
+    if schema is not None:
+        description = join_stripped_lines(text[tool['start']:tool['marker']])
+        server['tools'].append({'name': tool['name'], 'description': description, 'input_schema': schema})
+
+def parse_mcp_servers_md(markdown_content: str) -> list:
+    """
+    Parses MCP server definitions from markdown content in a single pass.
+    Returns a list of server dictionaries.
+    """
+    servers = []
+    markdown_content = markdown_content.replace('\r\n', '\n') # Normalize line endings
+    start_index = markdown_content.find(MCP_SECTION_START)
+    if start_index == -1:
+        print("Error: Start delimiter not found in source markdown. Cannot extract MCP section.", file=sys.stderr)
+        return []
+    start_index += len(MCP_SECTION_START)
+    end_index = markdown_content.find(MCP_SECTION_END, start_index)
+    if end_index == -1:
+        print(f"Warning: End section delimiter ('{MCP_SECTION_END.strip()}') not found after start delimiter. Processing until end of content.", file=sys.stderr)
+        end_index = len(markdown_content)
+    text = markdown_content[start_index:end_index]
+    size = len(text)
+
+    server = None          # Server being built; None while skipping lines
+    state = None           # 'description', 'between', 'tools' or 'resources'
+    description_spans = [] # (start, end) of the description's pieces
+    tool = None            # {'name', 'start' (after 'name:'), 'marker' (of 'Input Schema:', -1 if none yet), 'schema', 'failed'}
+    first_tool_line = False
+    resource_lead = None   # First non-blank character of the resources section
+
+    def finish_server(end: int):
+        finish_tool(text, server, tool, end)
+        server['description'] = ' '.join(line.strip() for start, stop in description_spans
+                                         for line in text[start:stop].splitlines() if line.strip())
+        if not server['resources'] and resource_lead == '-':
+            print(f"Warning: Found 'Direct Resources' section for server '{server['name']}' but could not parse entries.", file=sys.stderr)
+        servers.append(server)
+
+    server_found = False
+    pos = 0
+    while pos < size:
+        eol = text.find('\n', pos)
+        if eol == -1:
+            eol = size
+        next_pos = eol + 1
+
+        # Any '##<whitespace>' line ends the current server; it opens the next one only if it is '## name (command)'
+        if text.startswith('##', pos) and pos + 2 < size and text[pos + 2].isspace():
+            if server is not None:
+                finish_server(pos)
+            match = SERVER_HEADING_RE.match(text, pos, eol) if eol < size else None
+            if match:
+                server_found = True
+                server = {'name': match.group('name').strip(), 'command': match.group('command').strip().strip('`'),
+                          'description': '', 'tools': [], 'resources': []}
+                state, description_spans, tool, resource_lead = 'description', [], None, None
+            else:
+                server = state = None
+            pos = next_pos
+            continue
+        if server is None:
+            pos = next_pos
+            continue
+
+        start = pos
+        if state == 'description':
+            cut = text.find('###', start, eol) # The description is everything before the first '###'
+            if cut == -1:
+                description_spans.append((start, eol))
+                pos = next_pos
+                continue
+            description_spans.append((start, cut))
+            state, start = 'between', cut
+
+        if state == 'between':
+            if text.find('###', start, eol) != -1:
+                if heading := TOOLS_HEADING_RE.search(text, start, eol):
+                    state, start, first_tool_line = 'tools', heading.end(), True
+                elif heading := RESOURCES_HEADING_RE.search(text, start, eol):
+                    state, start = 'resources', heading.end()
+            if state == 'between':
+                pos = next_pos
+                continue
+
+        if state == 'tools':
+            heading = RESOURCES_HEADING_RE.search(text, start, eol) if text.find('###', start, eol) != -1 else None
+            line_end = heading.start() if heading else eol
+            match = TOOL_START_RE.match(text, start, line_end)
+            if first_tool_line and start < line_end and not text[start:line_end].isspace():
+                first_tool_line = False
+                match = match or FIRST_TOOL_RE.match(text, start, line_end)
+            if match:
+                finish_tool(text, server, tool, start)
+                tool = {'name': match.group(1), 'start': match.end(), 'marker': -1, 'schema': None, 'failed': False}
+                start = match.end()
+            if tool is not None and tool['marker'] == -1:
+                tool['marker'] = marker = text.find(SCHEMA_MARKER, start, line_end)
+                if marker != -1 and heading is None:
+                    brace = WHITESPACE_RE.match(text, marker + len(SCHEMA_MARKER)).end()
+                    if brace < size and text[brace] == '{':
+                        tool['schema'], end = decode_schema(text, brace, tool, server)
+                        tool['failed'] = tool['schema'] is None
+                        if not tool['failed']:
+                            # Resume below the schema; the rest of its last line still belongs to this tool
+                            resume = text.find('\n', end)
+                            pos = size if resume == -1 else resume + 1
+                            continue
+            if heading is None:
+                pos = next_pos
+                continue
+            finish_tool(text, server, tool, heading.start())
+            state, start, tool = 'resources', heading.end(), None
+
+        if state == 'resources':
+            if resource_lead is None and text[start:eol].strip():
+                resource_lead = text[start:eol].lstrip()[0]
+            if match := RESOURCE_RE.search(text, start, eol):
+                server['resources'].append({'uri': match.group('uri').strip(), 'description': match.group('description').strip()})
+        pos = next_pos
+
+    if server is not None:
+        finish_server(size)
+    if not server_found and text.strip():
+        print("Warning: No servers found matching '## name (command)' pattern within extracted MCP section.", file=sys.stderr)
+
+    return servers
+
+def generate_mcp_yaml_legacy(servers: list) -> str | None:
+    """Generates the indented MCP YAML string from a list of server dicts.
+    yaml.dump()-based original, kept as the reference for generate_mcp_yaml().
+    """
     if not servers:
         return "    servers: []" # Explicitly return empty list if no servers found
 
@@ -145,115 +330,773 @@ def generate_mcp_yaml(servers: list) -> str | None:
         print(f"Error generating YAML: {e}", file=sys.stderr)
         return None
 
-def process_target_file(file_path: str, args: argparse.Namespace, mcp_yaml_content: str | None):
-    """Reads target file, performs all substitutions, and writes back."""
-    print(f"Processing: {file_path}")
-    try:
-        # Read with UTF-8, handle potential BOM
-        with codecs.open(file_path, 'r', encoding='utf-8-sig') as f:
-            content = f.read()
-
-        # 1. Basic Placeholders (Match bracketed format used in templates)
-        content = content.replace("[OS_PLACEHOLDER]", args.os or "Unknown OS")
-        content = content.replace("[SHELL_PLACEHOLDER]", args.shell or "Unknown Shell")
-        # Use arguments directly for replacement
-        content = content.replace("[HOME_PLACEHOLDER]", args.home or 'Unknown Home')
-        content = content.replace("[WORKSPACE_PLACEHOLDER]", args.workspace or 'Unknown Workspace')
-
-        # 2. MCP Block Injection/Overwrite
-        placeholder_pattern = r'#\s*\[CONNECTED_MCP_SERVERS\]' # Python regex
-        start_marker = '# MCP Server list injected by script'
-        end_marker = '# End MCP Server list'
-
-        # Pattern to find EITHER the placeholder OR the existing injected block
-        escaped_start_marker = re.escape(start_marker)
-        escaped_end_marker = re.escape(end_marker)
-        # DOTALL (?s) allows . to match newline, MULTILINE (?m) allows ^ to match start of line
-        existing_block_pattern = rf"(^[ \t]*{escaped_start_marker}.*?^[ \t]*{escaped_end_marker}[ \t]*\r?\n?)"
-        placeholder_line_pattern = rf"(^[ \t]*{placeholder_pattern}[ \t]*\r?\n?)"
-        combined_pattern = rf"{existing_block_pattern}|{placeholder_line_pattern}"
-
-        injection_possible = mcp_yaml_content is not None
-
-        match = re.search(combined_pattern, content, re.MULTILINE | re.DOTALL)
-
-        if match:
-            if injection_possible:
-                print(f"  Injecting/Overwriting MCP block in {os.path.basename(file_path)}...")
-                replacement_block = f"{start_marker}\n{mcp_yaml_content}\n{end_marker}"
-                content = re.sub(combined_pattern, replacement_block, content, count=1, flags=re.MULTILINE | re.DOTALL)
+# --- Streaming YAML Emitter ---
+# generate_mcp_yaml() must produce, byte for byte, what generate_mcp_yaml_legacy() does: yaml.dump() with
+# SafeDumper and the block representers, every line indented by 4 spaces, backslashes doubled
+# (bench_mcp_yaml.py checks this). McpYamlEmitter writes that text directly. It lays out the block
+# structure itself (indent 2, sequences inside mappings not indented, empty collections as [] / {}),
+# renders each distinct scalar once with PyYAML's own analysis and style rules, and appends the pieces
+# already indented and escaped to one buffer, joined once at the end. Scalars that would be folded at
+# the 2000 column width, and multiline ones, are written by PyYAML's Emitter methods into the same
+# buffer. What it cannot lay out (keys that need '? ' syntax, a collection reached twice, which the
+# dumper would anchor, non-JSON types) raises YamlFallback, and the document goes through yaml.dump():
+# via libyaml's CSafeDumper when available and the document avoids the cases where libyaml's output
+# differs from SafeDumper's (empty, multiline, long or non-ASCII keys, scalars long enough to fold),
+# through SafeDumper otherwise.
+YAML_INDENT = 2
+YAML_WIDTH = 2000
+MCP_YAML_PREFIX = "    "
+YAML_SIMPLE_KEY_LIMIT = 128 - len('!!str') # The emitter counts the prepared tag into a simple key's length
+LIBYAML_SAFE_KEY_LENGTH = 100
+LIBYAML_SAFE_SCALAR_LENGTH = 150
+YAML_SCALAR_TAGS = {str: 'tag:yaml.org,2002:str', bool: 'tag:yaml.org,2002:bool', int: 'tag:yaml.org,2002:int',
+                    float: 'tag:yaml.org,2002:float', type(None): 'tag:yaml.org,2002:null'}
+DOUBLE_QUOTED_ESCAPE_RE = re.compile(r'["\\]|[^\x20-\x7E]')
+# Emitter.analyze_scalar() (allow_unicode off) as patterns: characters only double quotes can hold, and what rules out plain style
+YAML_SPECIAL_CHARACTER_RE = re.compile(r'[^\n\x20-\x7E]')
+YAML_PLAIN_BLOCKER_RE = re.compile(r'\A(?:---|\.\.\.)|\A[#,\[\]{}&*!|>\'"%@`]|\A[?:-](?:[ \n]|\Z)|.:(?:[ \n]|\Z)|[ \n]#|\A[ \n]|[ \n]\Z|\n', re.DOTALL)
+LIBYAML_UNSAFE_KEY_RE = re.compile(r'[^\x20-\x7E]')
+
+class YamlFallback(Exception):
+    """The streaming emitter cannot guarantee yaml.dump()'s output for this document."""
+
+class EscapedIndentedBuffer:
+    """Write target that indents every line by MCP_YAML_PREFIX and doubles backslashes as text arrives."""
+    def __init__(self):
+        self.parts = [MCP_YAML_PREFIX]
+
+    def write(self, data: str):
+        if '\\' in data:
+            data = data.replace('\\', '\\\\')
+        if '\n' in data:
+            data = data.replace('\n', '\n' + MCP_YAML_PREFIX)
+        self.parts.append(data)
+
+    def getvalue(self) -> str:
+        text = ''.join(self.parts)
+        # yaml.dump() ends with a line break, which the legacy splitlines()/join() dropped
+        return text[:-len(MCP_YAML_PREFIX) - 1] if text.endswith('\n' + MCP_YAML_PREFIX) else text
+
+def represent_json_scalar(value) -> tuple[str, str]:
+    """(tag, text) SafeRepresenter gives a JSON scalar."""
+    kind = type(value)
+    if kind is str:
+        return YAML_SCALAR_TAGS[str], value
+    if kind is bool:
+        return YAML_SCALAR_TAGS[bool], 'true' if value else 'false'
+    if kind is int:
+        return YAML_SCALAR_TAGS[int], str(value)
+    if kind is float:
+        if value != value:
+            text = '.nan'
+        elif value in (float('inf'), float('-inf')):
+            text = '.inf' if value > 0 else '-.inf'
+        else:
+            text = repr(value).lower()
+            if '.' not in text and 'e' in text:
+                text = text.replace('e', '.0e', 1)
+        return YAML_SCALAR_TAGS[float], text
+    if value is None:
+        return YAML_SCALAR_TAGS[type(None)], 'null'
+    raise YamlFallback(f"unsupported type {kind.__name__}")
+
+def analyze_scalar(text: str) -> tuple[bool, bool, bool]:
+    """(multiline, allow_block_plain, allow_single_quoted) as Emitter.analyze_scalar() decides them."""
+    if not text:
+        return False, True, True
+    if YAML_SPECIAL_CHARACTER_RE.search(text):
+        return any(ch in text for ch in '\n\x85\u2028\u2029'), False, False
+    multiline = '\n' in text
+    allow_single_quoted = not multiline or (' \n' not in text and '\n ' not in text)
+    return multiline, YAML_PLAIN_BLOCKER_RE.search(text) is None, allow_single_quoted
+
+def escape_double_quoted(text: str) -> str:
+    def escape(match):
+        ch = match.group()
+        if ch in yaml.emitter.Emitter.ESCAPE_REPLACEMENTS:
+            return '\\' + yaml.emitter.Emitter.ESCAPE_REPLACEMENTS[ch]
+        if ch <= '\xFF':
+            return '\\x%02X' % ord(ch)
+        if ch <= '\uFFFF':
+            return '\\u%04X' % ord(ch)
+        return '\\U%08X' % ord(ch)
+    return DOUBLE_QUOTED_ESCAPE_RE.sub(escape, text)
+
+class McpYamlEmitter:
+    """Writes {'servers': [...]} the way the block-style SafeDumper does; see the section comment."""
+    def __init__(self):
+        self.buffer = EscapedIndentedBuffer()
+        self.parts = self.buffer.parts # Pieces appended here are already indented and escaped
+        self.column = 0
+        self.seen = set()
+        self.values = {}
+        self.keys = {}
+        self.breaks = {}
+        self.resolver = yaml.resolver.Resolver()
+        self.writer = None
+
+    def emit(self, data: dict) -> str:
+        self.mapping(data, 0, True)
+        return self.buffer.getvalue()
+
+    # Scalars: (style, text, rendered and escaped text or None, rendered length), cached per value
+    def analyze(self, value, simple_key: bool):
+        tag, text = represent_json_scalar(value)
+        multiline, allow_plain, allow_single_quoted = analyze_scalar(text)
+        if simple_key and (not text or multiline or len(text) >= YAML_SIMPLE_KEY_LIMIT):
+            raise YamlFallback(f"key {text[:40]!r} is not a simple key")
+        implicit = self.resolver.resolve(yaml.ScalarNode, text, (True, False)) == tag
+        if implicit and allow_plain:
+            style, rendered = '', text
+        elif tag != YAML_SCALAR_TAGS[str]:
+            raise YamlFallback(f"{text!r} would need an explicit tag")
+        elif allow_single_quoted:
+            style, rendered = "'", None if multiline else "'" + text.replace("'", "''") + "'"
+        else:
+            style, rendered = '"', '"' + escape_double_quoted(text) + '"'
+        if rendered is None:
+            return style, text, None, 0
+        return style, text, rendered.replace('\\', '\\\\'), len(rendered)
+
+    def key(self, key):
+        entry = self.keys.get(key)
+        if entry is None:
+            if type(key) is not str:
+                raise YamlFallback(f"non-string key {key!r}")
+            style, text, rendered, length = self.analyze(key, True)
+            entry = self.keys[key] = (rendered + ':', length + 1)
+        self.parts.append(entry[0])
+        self.column += entry[1]
+
+    def scalar(self, value, indent: int, whitespace: bool):
+        cache_key = (type(value), value)
+        entry = self.values.get(cache_key)
+        if entry is None:
+            entry = self.values[cache_key] = self.analyze(value, False)
+        style, text, rendered, length = entry
+        if not whitespace:
+            length += 1
+        if rendered is not None and self.column + length <= YAML_WIDTH: # Cannot fold: write it as rendered
+            self.parts.append(rendered if whitespace else ' ' + rendered)
+            self.column += length
+            return
+        # Folded or multiline: PyYAML's writer, in the emitter state the dumper would be in
+        writer = self.writer
+        if writer is None:
+            writer = self.writer = yaml.emitter.Emitter(self.buffer, indent=YAML_INDENT, width=YAML_WIDTH)
+        writer.column, writer.indent, writer.whitespace, writer.indention = self.column, indent, whitespace, False
+        if style == '':
+            writer.write_plain(text)
+        elif style == "'":
+            writer.write_single_quoted(text)
+        else:
+            writer.write_double_quoted(text)
+        self.column = writer.column
+
+    # Collections
+    def newline(self, indent: int):
+        line = self.breaks.get(indent)
+        if line is None:
+            line = self.breaks[indent] = '\n' + MCP_YAML_PREFIX + ' ' * indent
+        self.parts.append(line)
+        self.column = indent
+
+    def enter(self, collection):
+        if id(collection) in self.seen:
+            raise YamlFallback("a collection is referenced twice (the dumper would anchor it)")
+        self.seen.add(id(collection))
+
+    def mapping(self, data: dict, indent: int, inline: bool):
+        self.enter(data)
+        for key, value in data.items():
+            if inline:
+                inline = False # First key right after '- ' (or at the document start)
+            else:
+                self.newline(indent)
+            self.key(key)
+            kind = type(value)
+            if kind is dict or kind is list:
+                if not value:
+                    self.enter(value)
+                    self.parts.append(' {}' if kind is dict else ' []')
+                    self.column += 3
+                elif kind is dict:
+                    self.mapping(value, indent + YAML_INDENT, False)
+                else:
+                    self.sequence(value, indent, False) # A sequence in a mapping is not indented
+            else:
+                self.scalar(value, indent + YAML_INDENT, False)
+
+    def sequence(self, data: list, indent: int, inline: bool):
+        self.enter(data)
+        for item in data:
+            if inline:
+                inline = False
             else:
-                print(f"  Placeholder/Block found but no MCP content generated. Skipping injection in {os.path.basename(file_path)}.")
-                # Optionally remove old block even if injection fails? For now, leave it.
-                # content = re.sub(combined_pattern, "", content, count=1, flags=re.MULTILINE | re.DOTALL)
+                self.newline(indent)
+            self.parts.append('- ')
+            self.column += 2
+            kind = type(item)
+            if kind is dict or kind is list:
+                if not item:
+                    self.enter(item)
+                    self.parts.append('{}' if kind is dict else '[]')
+                    self.column += 2
+                elif kind is dict:
+                    self.mapping(item, indent + YAML_INDENT, True)
+                else:
+                    self.sequence(item, indent + YAML_INDENT, True)
+            else:
+                self.scalar(item, indent + YAML_INDENT, True)
+
+def libyaml_safe(data) -> bool:
+    """Whether CSafeDumper is known to emit data exactly as SafeDumper does."""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if type(node) is dict:
+            for key, value in node.items():
+                if type(key) is not str or not key or len(key) > LIBYAML_SAFE_KEY_LENGTH or LIBYAML_UNSAFE_KEY_RE.search(key):
+                    return False
+                stack.append(value)
+        elif type(node) is list:
+            stack.extend(node)
+        elif type(node) is str and len(node) > LIBYAML_SAFE_SCALAR_LENGTH:
+            return False # Could reach the fold width, where libyaml breaks lines differently
+    return True
+
+def dump_mcp_yaml(output_data: dict) -> str:
+    """yaml.dump() into the indenting, escaping buffer; the fallback for McpYamlEmitter."""
+    dumper = yaml.CSafeDumper if hasattr(yaml, 'CSafeDumper') and libyaml_safe(output_data) else yaml.SafeDumper
+    buffer = EscapedIndentedBuffer()
+    yaml.dump(output_data, buffer, Dumper=dumper, default_flow_style=None, sort_keys=False, indent=2, width=2000)
+    return buffer.getvalue()
+
+def generate_mcp_yaml(servers: list) -> str | None:
+    """Generates the indented MCP YAML string from a list of server dicts."""
+    if not servers:
+        return "    servers: []" # Explicitly return empty list if no servers found
+
+    output_data = {'servers': servers}
+    try:
+        return McpYamlEmitter().emit(output_data)
+    except YamlFallback:
+        pass
+    try:
+        return dump_mcp_yaml(output_data)
+    except yaml.YAMLError as e:
+        print(f"Error generating YAML: {e}", file=sys.stderr)
+        return None
+
+# --- Build Cache ---
+# Regeneration is incremental. The cache (.roo/.mcp_yaml_cache.json) remembers:
+# - the generated MCP YAML, under the hash of system_prompt.md (parsing and dumping are skipped while it is unchanged)
+# - per target, the inputs it was last rendered from (script + source + CLI arguments hash)
+#   and the hash and stat signature of what it held afterwards
+# A target whose inputs are unchanged and whose stat signature still matches is not even read. One whose
+# stat changed but whose content hash did not is not rendered. Otherwise the target is rendered in memory
+# and written (atomically) only if the result differs from what is on disk, so unchanged prompts keep
+# their mtime and editors watching .roo/ are not woken up.
+CACHE_FILE_NAME = ".mcp_yaml_cache.json"
+CACHE_VERSION = 1
+WATCH_POLL_S = 0.02
+WATCH_DEBOUNCE_MS = 100
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def generator_hash() -> str:
+    """Hash of this script, so editing the generator invalidates every cached result."""
+    try:
+        with open(os.path.abspath(__file__), 'rb') as f:
+            return sha256_bytes(f.read())
+    except OSError:
+        return "unknown"
+
+def args_hash(args: argparse.Namespace) -> str:
+    """Hash of the CLI arguments that end up in the rendered targets."""
+    values = {key: getattr(args, key) for key in ('os', 'shell', 'home', 'workspace')}
+    return sha256_bytes(json.dumps(values, sort_keys=True).encode('utf-8'))
+
+def stat_signature(file_path: str) -> list | None:
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+def atomic_write(file_path: str, data: bytes):
+    """Writes data to a temp file next to file_path and renames it over the original."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(file_path).st_mode & 0o7777) # Keep the target's permissions
+        except OSError:
+            pass
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def load_cache(cache_path: str, generator: str) -> dict:
+    """Loads the build cache; a missing, corrupt or outdated cache is simply empty."""
+    empty = {'version': CACHE_VERSION, 'generator': generator, 'source': {}, 'targets': {}}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION or cache.get('generator') != generator:
+        return empty
+    cache.setdefault('source', {})
+    cache.setdefault('targets', {})
+    return cache
+
+def save_cache(cache_path: str, cache: dict):
+    try:
+        atomic_write(cache_path, json.dumps(cache, indent=1, sort_keys=True).encode('utf-8'))
+    except OSError as e:
+        print(f"Warning: Could not write build cache {cache_path}: {e}", file=sys.stderr) # Next run is just a full one
+
+# --- Target Processing ---
+def render_target(content: str, args: argparse.Namespace, mcp_yaml_content: str | None, log) -> str:
+    """Performs all substitutions on a target's content and returns the result."""
+    file_name = log.file_name
+    # 1. Basic Placeholders (Match bracketed format used in templates)
+    content = content.replace("[OS_PLACEHOLDER]", args.os or "Unknown OS")
+    content = content.replace("[SHELL_PLACEHOLDER]", args.shell or "Unknown Shell")
+    # Use arguments directly for replacement
+    content = content.replace("[HOME_PLACEHOLDER]", args.home or 'Unknown Home')
+    content = content.replace("[WORKSPACE_PLACEHOLDER]", args.workspace or 'Unknown Workspace')
+
+    # 2. MCP Block Injection/Overwrite
+    placeholder_pattern = r'#\s*\[CONNECTED_MCP_SERVERS\]' # Python regex
+    start_marker = '# MCP Server list injected by script'
+    end_marker = '# End MCP Server list'
+
+    # Pattern to find EITHER the placeholder OR the existing injected block
+    escaped_start_marker = re.escape(start_marker)
+    escaped_end_marker = re.escape(end_marker)
+    # DOTALL (?s) allows . to match newline, MULTILINE (?m) allows ^ to match start of line
+    existing_block_pattern = rf"(^[ \t]*{escaped_start_marker}.*?^[ \t]*{escaped_end_marker}[ \t]*\r?\n?)"
+    placeholder_line_pattern = rf"(^[ \t]*{placeholder_pattern}[ \t]*\r?\n?)"
+    combined_pattern = rf"{existing_block_pattern}|{placeholder_line_pattern}"
+
+    injection_possible = mcp_yaml_content is not None
+
+    match = re.search(combined_pattern, content, re.MULTILINE | re.DOTALL)
+
+    if match:
+        if injection_possible:
+            log(f"  Injecting/Overwriting MCP block in {file_name}...")
+            # Keep the line break the match consumed, so re-running does not join the end marker to the next line
+            line_break = match.group(0)[len(match.group(0).rstrip('\r\n')):]
+            replacement_block = f"{start_marker}\n{mcp_yaml_content}\n{end_marker}{line_break}"
+            content = re.sub(combined_pattern, replacement_block, content, count=1, flags=re.MULTILINE | re.DOTALL)
         else:
-             print(f"  Placeholder or existing block not found in {os.path.basename(file_path)}. Skipping injection.")
+            log(f"  Placeholder/Block found but no MCP content generated. Skipping injection in {file_name}.")
+    else:
+        log(f"  Placeholder or existing block not found in {file_name}. Skipping injection.")
+    return content
+
+class TargetLog:
+    """Collects one target's messages so parallel workers do not interleave their output."""
+    def __init__(self, file_path: str):
+        self.file_name = os.path.basename(file_path)
+        self.lines = [f"Processing: {file_path}"]
+        self.errors = []
+
+    def __call__(self, message: str):
+        self.lines.append(message)
+
+    def error(self, message: str):
+        self.errors.append(message)
 
+def process_target_file(file_path: str, args: argparse.Namespace, mcp_yaml_content: str | None,
+                        inputs: str, entry: dict | None, force: bool = False) -> tuple[str, dict | None, TargetLog]:
+    """Brings one target up to date. Returns (status, new cache entry, log); status is updated/unchanged/cached/error."""
+    log = TargetLog(file_path)
+    try:
+        signature = stat_signature(file_path)
+        if signature is None:
+            raise FileNotFoundError(file_path)
+        cached = not force and entry is not None and entry.get('inputs') == inputs
+        if cached and entry.get('stat') == signature:
+            return 'cached', entry, log
+
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        raw_hash = sha256_bytes(raw)
+        if cached and entry.get('hash') == raw_hash:
+            return 'cached', {'inputs': inputs, 'hash': raw_hash, 'stat': signature}, log
 
-        # Write back with UTF-8 without BOM
-        with codecs.open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"  Completed: {os.path.basename(file_path)}")
+        # Read with UTF-8, handle potential BOM; write back with UTF-8 without BOM
+        content = render_target(raw.decode('utf-8-sig'), args, mcp_yaml_content, log)
+        rendered = content.encode('utf-8')
+        if rendered == raw:
+            log(f"  Unchanged: {log.file_name}")
+            return 'unchanged', {'inputs': inputs, 'hash': raw_hash, 'stat': signature}, log
+        atomic_write(file_path, rendered)
+        log(f"  Completed: {log.file_name}")
+        return 'updated', {'inputs': inputs, 'hash': sha256_bytes(rendered), 'stat': stat_signature(file_path)}, log
 
     except FileNotFoundError:
-        print(f"Error: Target file not found: {file_path}", file=sys.stderr)
+        log.error(f"Error: Target file not found: {file_path}")
     except Exception as e:
-        print(f"Error processing file {file_path}: {e}", file=sys.stderr)
+        log.error(f"Error processing file {file_path}: {e}")
+    return 'error', None, log
+
+# --- Generation ---
+def read_source(source_md_path: str) -> tuple[bytes | None, str]:
+    """Returns (system_prompt.md's bytes or None, their hash, or why there are none)."""
+    if not os.path.exists(source_md_path):
+        print(f"Warning: Source markdown file not found at {source_md_path}. Skipping MCP generation.", file=sys.stderr)
+        return None, "missing"
+    try:
+        with open(source_md_path, 'rb') as f:
+            raw = f.read()
+    except OSError as e:
+        print(f"Error during MCP generation: {e}", file=sys.stderr)
+        return None, "unreadable"
+    print(f"Reading source markdown: {source_md_path}")
+    return raw, sha256_bytes(raw)
+
+def mcp_yaml_from_markdown(raw: bytes) -> str | None:
+    """Parses system_prompt.md's bytes and generates the MCP YAML; None if there is nothing to inject."""
+    mcp_yaml_content = None
+    md_content = raw.decode('utf-8-sig')
+    print("Parsing MCP servers...")
+    parsed_servers = parse_mcp_servers_md(md_content)
+    print(f"Found {len(parsed_servers)} server(s).")
+    if parsed_servers is not None: # parse_mcp_servers_md returns [] on error/not found
+        print("Generating MCP YAML...")
+        mcp_yaml_content = generate_mcp_yaml(parsed_servers)
+        if mcp_yaml_content:
+            print("MCP YAML generated successfully.")
+        else:
+            print("Warning: Failed to generate MCP YAML.", file=sys.stderr)
+    else:
+         print("Warning: Parsing MCP servers failed.", file=sys.stderr)
+    return mcp_yaml_content
+
+def build_mcp_yaml(source_md_path: str, cache: dict, force: bool = False) -> tuple[str | None, str]:
+    """Returns (MCP YAML or None, source hash), reusing the cached YAML while the source is unchanged."""
+    raw, source_hash = read_source(source_md_path)
+    if raw is None:
+        return None, source_hash
+    cached = cache['source']
+    if not force and cached.get('hash') == source_hash and 'yaml' in cached:
+        print("Source markdown unchanged; reusing cached MCP YAML.")
+        return cached['yaml'], source_hash
+
+    try:
+        mcp_yaml_content = mcp_yaml_from_markdown(raw)
+    except Exception as e:
+        print(f"Error during MCP generation: {e}", file=sys.stderr)
+        return None, source_hash # Not cached: a transient failure should be retried
+    cache['source'] = {'hash': source_hash, 'yaml': mcp_yaml_content}
+    return mcp_yaml_content, source_hash
+
+def find_targets(roo_dir_path: str) -> list:
+    return sorted(path for path in glob.glob(os.path.join(roo_dir_path, 'system-prompt-*')) if os.path.isfile(path))
+
+def regenerate(args: argparse.Namespace, cache: dict, force: bool = False) -> dict:
+    """One incremental pass over the workspace. Returns counts per target status."""
+    started = time.perf_counter()
+    cwd = args.workspace # Use workspace passed from installer as CWD
+    source_md_path = os.path.join(cwd, "system_prompt.md")
+    roo_dir_path = os.path.join(cwd, ".roo")
+
+    mcp_yaml_content, source_hash = build_mcp_yaml(source_md_path, cache, force)
+    inputs = sha256_bytes(f"{cache['generator']}:{source_hash}:{args_hash(args)}".encode('utf-8'))
+
+    print("Processing target prompt files...")
+    target_files = find_targets(roo_dir_path)
+    if not target_files:
+         print(f"Warning: No 'system-prompt-*' files found in {roo_dir_path}", file=sys.stderr)
+
+    counts = {'updated': 0, 'unchanged': 0, 'cached': 0, 'error': 0}
+    entries = cache['targets']
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(target_files) or 1))
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(process_target_file, path, args, mcp_yaml_content, inputs,
+                               entries.get(os.path.basename(path)), force) for path in target_files]
+        for path, future in zip(target_files, futures): # Report in a stable order
+            status, entry, log = future.result()
+            counts[status] += 1
+            if status != 'cached' or args.verbose:
+                print("\n".join(log.lines))
+            for message in log.errors:
+                print(message, file=sys.stderr)
+            if entry is None:
+                entries.pop(os.path.basename(path), None)
+            else:
+                entries[os.path.basename(path)] = entry
+    known = {os.path.basename(path) for path in target_files}
+    for name in [name for name in entries if name not in known]:
+        del entries[name]
+    counts['elapsed_ms'] = (time.perf_counter() - started) * 1000
+    return counts
+
+def describe_counts(counts: dict) -> str:
+    unchanged = counts['unchanged'] + counts['cached']
+    text = f"{counts['updated']} updated, {unchanged} unchanged"
+    if counts['error']:
+        text += f", {counts['error']} failed"
+    return f"{text} in {counts['elapsed_ms']:.1f} ms"
+
+def watch(args: argparse.Namespace, cache: dict, cache_path: str):
+    """Regenerates whenever system_prompt.md (or the set of targets) changes, debounced."""
+    source_md_path = os.path.join(args.workspace, "system_prompt.md")
+    roo_dir_path = os.path.join(args.workspace, ".roo")
+    debounce_s = max(0, args.debounce) / 1000
+
+    def snapshot():
+        # Stat only: a save via rename (most editors) changes the inode, an in-place one mtime/size
+        return stat_signature(source_md_path), tuple(find_targets(roo_dir_path))
+
+    print(f"Watching {source_md_path} (debounce {args.debounce} ms, Ctrl+C to stop)...")
+    seen = snapshot()
+    changed_at = None
+    try:
+        while True:
+            time.sleep(WATCH_POLL_S)
+            current = snapshot()
+            if current != seen:
+                seen, changed_at = current, time.monotonic() # Every further change restarts the quiet period
+                continue
+            if changed_at is None or time.monotonic() - changed_at < debounce_s:
+                continue
+            changed_at = None
+            print(f"\nChange detected at {time.strftime('%H:%M:%S')}, regenerating...")
+            counts = regenerate(args, cache)
+            save_cache(cache_path, cache)
+            print(f"Regenerated: {describe_counts(counts)}.")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+# --- Batch Mode ---
+# --manifest brings many workspaces up to date in one run, so a host provisioning dozens of them starts
+# the interpreter and imports PyYAML once. The manifest is a JSON list of {"os", "shell", "home",
+# "workspace"} entries (or {"workspaces": [...]}). A key an entry leaves out falls back to the CLI
+# argument of the same name, and a relative workspace is resolved against the manifest's directory.
+# Every workspace keeps its own build cache. Each distinct system_prompt.md (by content hash) is parsed
+# and dumped once, and not at all if some workspace's cache already holds its YAML. The targets of all
+# workspaces then go to one process pool. Workers get the YAML table once, when they start, so a task
+# only carries its source hash. The targets of all workspaces run interleaved, so the time reported for a
+# workspace is its share of the work (loading it plus processing its targets), not wall time.
+MANIFEST_KEYS = ('os', 'shell', 'home', 'workspace')
+BATCH_YAML = {} # Source hash -> MCP YAML, in the pool's worker processes
+
+def load_manifest(manifest_path: str, defaults: argparse.Namespace) -> list:
+    """Reads the manifest into one args namespace per workspace. Raises ValueError if it is malformed."""
+    with open(manifest_path, 'r', encoding='utf-8-sig') as f:
+        manifest = json.load(f)
+    entries = manifest.get('workspaces') if isinstance(manifest, dict) else manifest
+    if not isinstance(entries, list):
+        raise ValueError('expected a list of workspaces, or {"workspaces": [...]}')
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    workspaces = []
+    seen = set()
+    for number, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"entry {number} is not an object")
+        values = {}
+        for key in MANIFEST_KEYS:
+            value = entry.get(key, getattr(defaults, key))
+            if not isinstance(value, str) or not value:
+                raise ValueError(f"entry {number} has no '{key}'")
+            values[key] = value
+        values['workspace'] = os.path.normpath(os.path.join(base_dir, values['workspace']))
+        identity = os.path.normcase(os.path.realpath(values['workspace']))
+        if identity in seen: # Two passes over the same .roo/ would race on its targets and cache
+            raise ValueError(f"entry {number} repeats workspace {values['workspace']}")
+        seen.add(identity)
+        workspaces.append(argparse.Namespace(**values, jobs=defaults.jobs, verbose=defaults.verbose))
+    return workspaces
+
+def init_batch_worker(yaml_by_hash: dict):
+    BATCH_YAML.update(yaml_by_hash)
+
+def process_batch_target(task: tuple) -> tuple[str, dict | None, TargetLog, float]:
+    """process_target_file() for one pooled task; also returns the time it took, in ms."""
+    file_path, args, source_hash, inputs, entry, force = task
+    started = time.perf_counter()
+    status, entry, log = process_target_file(file_path, args, BATCH_YAML.get(source_hash), inputs, entry, force)
+    return status, entry, log, (time.perf_counter() - started) * 1000
+
+def run_batch(workspaces: list, force: bool = False, jobs: int = 0) -> tuple[list, dict]:
+    """One incremental pass over every workspace. Returns (counts per workspace, batch totals)."""
+    started = time.perf_counter()
+    generator = generator_hash()
+    batch = []       # Per workspace: args, cache, cache_path, source_hash, targets, counts
+    pending = {}     # Source hash -> system_prompt.md bytes, for sources no cache has the YAML of
+    yaml_by_hash = {}
+    sources = set()
+
+    # 1. Load every workspace's cache and source
+    for args in workspaces:
+        loaded_at = time.perf_counter()
+        counts = {'workspace': args.workspace, 'failure': None, 'updated': 0, 'unchanged': 0, 'cached': 0, 'error': 0,
+                  'elapsed_ms': 0.0}
+        print(f"\nWorkspace: {args.workspace}")
+        roo_dir_path = os.path.join(args.workspace, ".roo")
+        if not os.path.isdir(roo_dir_path):
+            counts['failure'] = f"Target .roo directory not found at {roo_dir_path}"
+            print(f"Error: {counts['failure']}", file=sys.stderr)
+            batch.append({'counts': counts})
+            continue
+        cache_path = os.path.join(roo_dir_path, CACHE_FILE_NAME)
+        cache = load_cache(cache_path, generator)
+        raw, source_hash = read_source(os.path.join(args.workspace, "system_prompt.md"))
+        cached = cache['source']
+        if raw is not None:
+            sources.add(source_hash)
+            if not force and cached.get('hash') == source_hash and 'yaml' in cached:
+                yaml_by_hash.setdefault(source_hash, cached['yaml'])
+            else:
+                pending.setdefault(source_hash, raw)
+        targets = find_targets(roo_dir_path)
+        if not targets:
+            print(f"Warning: No 'system-prompt-*' files found in {roo_dir_path}", file=sys.stderr)
+        counts['elapsed_ms'] += (time.perf_counter() - loaded_at) * 1000
+        batch.append({'args': args, 'cache': cache, 'cache_path': cache_path, 'source_hash': source_hash,
+                      'targets': targets, 'counts': counts})
+
+    # 2. Parse and dump each distinct source once
+    generated = 0
+    for source_hash, raw in pending.items():
+        if source_hash in yaml_by_hash:
+            continue # Another workspace's cache already had it
+        users = [item for item in batch if item.get('source_hash') == source_hash]
+        print(f"\nGenerating MCP YAML for {len(users)} workspace(s) sharing source {source_hash[:12]}...")
+        try:
+            yaml_by_hash[source_hash] = mcp_yaml_from_markdown(raw)
+            generated += 1
+        except Exception as e:
+            print(f"Error during MCP generation: {e}", file=sys.stderr) # Not cached: retried on the next run
+    for item in batch:
+        if item.get('source_hash') in yaml_by_hash:
+            item['cache']['source'] = {'hash': item['source_hash'], 'yaml': yaml_by_hash[item['source_hash']]}
+
+    # 3. Every workspace's targets through one pool
+    tasks = []
+    owners = []
+    for item in batch:
+        if 'cache' not in item:
+            continue
+        inputs = sha256_bytes(f"{generator}:{item['source_hash']}:{args_hash(item['args'])}".encode('utf-8'))
+        entries = item['cache']['targets']
+        for path in item['targets']:
+            tasks.append((path, item['args'], item['source_hash'], inputs, entries.get(os.path.basename(path)), force))
+            owners.append(item)
+    table = {source_hash: content for source_hash, content in yaml_by_hash.items() if content is not None}
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks) or 1))
+    if jobs == 1:
+        init_batch_worker(table) # Not worth starting a pool for
+        results = [process_batch_target(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_batch_worker, initargs=(table,)) as pool:
+            results = list(pool.map(process_batch_target, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+
+    current = None
+    for item, (path, *_), (status, entry, log, elapsed_ms) in zip(owners, tasks, results):
+        counts = item['counts']
+        counts[status] += 1
+        counts['elapsed_ms'] += elapsed_ms
+        show = status != 'cached' or item['args'].verbose
+        if item is not current and (show or log.errors):
+            current = item
+            print(f"\nTargets of {item['args'].workspace}:")
+        if show:
+            print("\n".join(log.lines))
+        for message in log.errors:
+            print(message, file=sys.stderr)
+        if entry is None:
+            item['cache']['targets'].pop(os.path.basename(path), None)
+        else:
+            item['cache']['targets'][os.path.basename(path)] = entry
+
+    # 4. Drop entries of removed targets and save the caches
+    for item in batch:
+        if 'cache' not in item:
+            continue
+        entries = item['cache']['targets']
+        known = {os.path.basename(path) for path in item['targets']}
+        for name in [name for name in entries if name not in known]:
+            del entries[name]
+        save_cache(item['cache_path'], item['cache'])
+
+    totals = {'workspaces': len(batch), 'targets': len(tasks), 'sources': len(sources), 'generated': generated,
+              'jobs': jobs, 'elapsed_ms': (time.perf_counter() - started) * 1000}
+    return [item['counts'] for item in batch], totals
+
+def describe_batch(summaries: list, totals: dict) -> str:
+    lines = [f"Batch complete: {totals['workspaces']} workspace(s), {totals['targets']} target(s) on {totals['jobs']} worker(s), "
+             f"{totals['generated']} of {totals['sources']} distinct source(s) parsed, in {totals['elapsed_ms']:.1f} ms."]
+    for counts in summaries:
+        outcome = f"failed: {counts['failure']}" if counts['failure'] else describe_counts(counts)
+        lines.append(f"  {counts['workspace']}: {outcome}")
+    return "\n".join(lines)
 
 
 # --- Main Execution ---
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate MCP YAML and inject into system prompts.")
-    parser.add_argument("--os", required=True, help="Operating System name")
-    parser.add_argument("--shell", required=True, help="Default shell name")
-    parser.add_argument("--home", required=True, help="Home directory path")
-    parser.add_argument("--workspace", required=True, help="Workspace directory path")
+    parser.add_argument("--os", help="Operating System name")
+    parser.add_argument("--shell", help="Default shell name")
+    parser.add_argument("--home", help="Home directory path")
+    parser.add_argument("--workspace", help="Workspace directory path")
+    parser.add_argument("--manifest", help="JSON list of {os, shell, home, workspace} entries to process in one run; "
+                                           "the options above fill in keys an entry leaves out")
+    parser.add_argument("--force", action="store_true", help="Ignore the build cache and re-render every target")
+    parser.add_argument("--jobs", type=int, default=0, help="Targets processed in parallel (default: CPU count)")
+    parser.add_argument("--watch", action="store_true", help="Keep running and regenerate when system_prompt.md changes")
+    parser.add_argument("--debounce", type=int, default=WATCH_DEBOUNCE_MS, help=f"Quiet period in ms before a watched change is processed (default: {WATCH_DEBOUNCE_MS})")
+    parser.add_argument("--verbose", action="store_true", help="Also report targets skipped via the cache")
     args = parser.parse_args()
 
+    if args.manifest:
+        if args.watch:
+            parser.error("--watch cannot be combined with --manifest")
+        try:
+            workspaces = load_manifest(args.manifest, args)
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not read manifest {args.manifest}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Manifest: {args.manifest} ({len(workspaces)} workspace(s))")
+        summaries, totals = run_batch(workspaces, force=args.force, jobs=args.jobs)
+        print(f"\n{describe_batch(summaries, totals)}")
+        sys.exit(1 if any(counts['failure'] for counts in summaries) else 0)
+    missing = [f"--{key}" for key in MANIFEST_KEYS if not getattr(args, key)]
+    if missing:
+        parser.error(f"the following arguments are required: {', '.join(missing)} (or use --manifest)")
+
     cwd = args.workspace # Use workspace passed from installer as CWD
     source_md_path = os.path.join(cwd, "system_prompt.md")
     roo_dir_path = os.path.join(cwd, ".roo")
+    cache_path = os.path.join(roo_dir_path, CACHE_FILE_NAME)
 
     print(f"Workspace: {cwd}")
     print(f"Source MD: {source_md_path}")
     print(f"Target Dir: {roo_dir_path}")
 
-    mcp_yaml_content = None
-    if not os.path.exists(source_md_path):
-        print(f"Warning: Source markdown file not found at {source_md_path}. Skipping MCP generation.", file=sys.stderr)
-    else:
-        try:
-            print(f"Reading source markdown: {source_md_path}")
-            with codecs.open(source_md_path, 'r', encoding='utf-8-sig') as f:
-                md_content = f.read()
-            print("Parsing MCP servers...")
-            parsed_servers = parse_mcp_servers_md(md_content)
-            print(f"Found {len(parsed_servers)} server(s).")
-            if parsed_servers is not None: # parse_mcp_servers_md returns [] on error/not found
-                print("Generating MCP YAML...")
-                mcp_yaml_content = generate_mcp_yaml(parsed_servers)
-                if mcp_yaml_content:
-                    print("MCP YAML generated successfully.")
-                else:
-                    print("Warning: Failed to generate MCP YAML.", file=sys.stderr)
-            else:
-                 print("Warning: Parsing MCP servers failed.", file=sys.stderr)
-
-        except Exception as e:
-            print(f"Error during MCP generation: {e}", file=sys.stderr)
-
     if not os.path.isdir(roo_dir_path):
         print(f"Error: Target .roo directory not found at {roo_dir_path}", file=sys.stderr)
         sys.exit(1)
 
-    print("Processing target prompt files...")
-    target_files = glob.glob(os.path.join(roo_dir_path, 'system-prompt-*'))
-
-    if not target_files:
-         print(f"Warning: No 'system-prompt-*' files found in {roo_dir_path}", file=sys.stderr)
-
-    for target_file in target_files:
-        if os.path.isfile(target_file): # Ensure it's a file
-             process_target_file(target_file, args, mcp_yaml_content)
+    cache = load_cache(cache_path, generator_hash())
+    counts = regenerate(args, cache, force=args.force)
+    save_cache(cache_path, cache)
+    print(f"Processing complete: {describe_counts(counts)}.")
 
-    print("Processing complete.")
\ No newline at end of file
+    if args.watch:
+        watch(args, cache, cache_path)
\ No newline at end of file
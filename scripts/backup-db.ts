@@ -1,5 +1,6 @@
 import fs from 'fs';
 import path from 'path';
+import Database from 'better-sqlite3';
 
 const DATA_DIR = path.join(process.cwd(), 'data');
 const DB_PATH = path.join(DATA_DIR, 'bingo.db');
@@ -14,25 +15,51 @@ if (!fs.existsSync(BACKUP_DIR)) {
 const timestamp = new Date().toISOString().replace(/[:.]/g, '-');
 const backupPath = path.join(BACKUP_DIR, `bingo_backup_${timestamp}.db`);
 
-try {
+async function main() {
     // Check if database exists
     if (!fs.existsSync(DB_PATH)) {
         console.error('❌ Database file not found!');
         process.exit(1);
     }
 
-    // Copy database file
-    fs.copyFileSync(DB_PATH, backupPath);
+    // Online backup: the server keeps bingo.db open in WAL mode, so a plain
+    // file copy would miss bingo.db-wal. Copy in small steps instead.
+    const db = new Database(DB_PATH, { fileMustExist: true });
+    const started = Date.now();
+    try {
+        await db.backup(backupPath, {
+            progress({ totalPages, remainingPages }) {
+                const done = totalPages - remainingPages;
+                process.stdout.write(`\r   ${((done / totalPages) * 100).toFixed(1)}% (${done}/${totalPages} pages)`);
+                return 256;
+            }
+        });
+    } finally {
+        db.close();
+    }
+    process.stdout.write('\n');
+
+    // Make the copy a standalone file and verify it
+    const copy = new Database(backupPath);
+    const integrity = copy.pragma('integrity_check', { simple: true });
+    copy.pragma('journal_mode = DELETE');
+    copy.close();
+    if (integrity !== 'ok') {
+        throw new Error(`integrity check failed: ${integrity}`);
+    }
 
     // Get file size
     const stats = fs.statSync(backupPath);
     const sizeKB = stats.size / 1024;
+    const seconds = Math.max((Date.now() - started) / 1000, 0.001);
 
     console.log('✅ Database backup created successfully!');
     console.log(`📁 Location: ${backupPath}`);
-    console.log(`📊 Size: ${sizeKB.toFixed(1)}KB`);
+    console.log(`📊 Size: ${sizeKB.toFixed(1)}KB (${(sizeKB / 1024 / seconds).toFixed(1)}MB/s)`);
+    console.log('🔎 Integrity check: ok');
+}
 
-} catch (error) {
+main().catch((error) => {
     console.error('❌ Backup failed:', error);
     process.exit(1);
-} 
\ No newline at end of file
+});
@@ -0,0 +1,7 @@
+"""
+Support modules for the Bingo server manager (CLI and GUI).
+
+The console entry point lives in scripts/server_manager_cli.py; the Tk GUI
+(server_manager_gui.py) adds this directory to sys.path and imports the same
+modules so both front-ends share one implementation.
+"""
@@ -0,0 +1,370 @@
+"""
+Content-addressed, deduplicated snapshot store for data/bingo.db.
+
+Layout (under data/backups/store/ by default):
+
+    chunks/ab/ab12...ef.z     zlib- (or .xz lzma-) compressed chunk, named by
+                              the SHA-256 of its uncompressed bytes
+    snapshots/<id>.json       manifest: size, page/chunk size, chunk hashes
+
+A snapshot first takes a consistent copy with the online backup API (see
+dbbackup), then splits it into page-aligned chunks. Only chunks whose hash
+is not already in the store are compressed and written, so snapshots of a
+database where only a few pages changed cost only those pages. Pruning
+deletes manifests outside the retention policy and then garbage-collects
+chunks no remaining manifest references.
+
+create(), prune(), restore() and verify() hold an exclusive lock on
+store.lock. A snapshot writes its chunks before its manifest, so a prune
+running meanwhile would see them as unreferenced and delete them; a restore
+or verify would find chunks of the snapshot it is reading deleted midway.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import lzma
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from .dbbackup import BackupError, integrity_check, online_backup
+
+PAGES_PER_CHUNK = 16
+COMPRESSORS = {
+    "zlib": (".z", lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (".xz", lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+EXT_TO_CODEC = {ext: name for name, (ext, _, _) in COMPRESSORS.items()}
+DEFAULT_RETENTION = {"keep_last": 24, "keep_hourly": 48, "keep_daily": 30}
+LOCK_NAME = "store.lock"
+LOCK_TIMEOUT_S = 600.0
+LOCK_POLL_S = 0.2
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@dataclass
+class Snapshot:
+    id: str
+    created: str
+    size: int
+    page_size: int
+    chunk_size: int
+    chunks: list[str]
+    compression: str = "zlib"
+    new_chunks: int = 0
+    stored_bytes: int = 0
+    source: str = ""
+    integrity: str | None = None
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromisoformat(self.created)
+
+
+@dataclass
+class VerifyReport:
+    snapshot: str
+    missing: list[str] = field(default_factory=list)
+    corrupt: list[str] = field(default_factory=list)
+    integrity: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing and not self.corrupt and self.integrity in (None, "ok")
+
+
+class BackupStore:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.chunk_dir = self.root / "chunks"
+        self.snapshot_dir = self.root / "snapshots"
+
+    @contextmanager
+    def lock(self, timeout: float = LOCK_TIMEOUT_S, should_stop: Callable[[], bool] | None = None):
+        """Exclusive lock on the store, across processes; released by the OS if the holder dies."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.root / LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            deadline = time.monotonic() + timeout
+            while not _try_lock(fd):
+                if should_stop and should_stop():
+                    raise BackupError("Cancelled while waiting for the backup store lock")
+                if time.monotonic() > deadline:
+                    raise BackupError(f"Backup store {self.root} is busy (another snapshot or prune is running)")
+                time.sleep(LOCK_POLL_S)
+            try:
+                yield
+            finally:
+                _unlock(fd)
+        finally:
+            os.close(fd)
+
+    # --- Chunks ---------------------------------------------------------
+
+    def _chunk_path(self, digest: str, codec: str) -> Path:
+        return self.chunk_dir / digest[:2] / (digest + COMPRESSORS[codec][0])
+
+    def find_chunk(self, digest: str) -> Path | None:
+        for codec in COMPRESSORS:
+            path = self._chunk_path(digest, codec)
+            if path.exists():
+                return path
+        return None
+
+    def read_chunk(self, digest: str) -> bytes:
+        path = self.find_chunk(digest)
+        if path is None:
+            raise BackupError(f"Missing chunk {digest}")
+        data = COMPRESSORS[EXT_TO_CODEC[path.suffix]][2](path.read_bytes())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise BackupError(f"Corrupt chunk {digest}")
+        return data
+
+    def _write_chunk(self, digest: str, data: bytes, codec: str) -> int:
+        path = self._chunk_path(digest, codec)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = COMPRESSORS[codec][1](data)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, path)
+        return len(payload)
+
+    # --- Snapshots ------------------------------------------------------
+
+    def list(self) -> list[Snapshot]:
+        """All snapshots, oldest first."""
+        if not self.snapshot_dir.exists():
+            return []
+        snapshots = [Snapshot(**json.loads(p.read_text())) for p in self.snapshot_dir.glob("*.json")]
+        return sorted(snapshots, key=lambda s: (s.created, s.id))
+
+    def get(self, snapshot_id: str) -> Snapshot:
+        path = self.snapshot_dir / f"{snapshot_id}.json"
+        if not path.exists():
+            raise BackupError(f"Unknown snapshot '{snapshot_id}'")
+        return Snapshot(**json.loads(path.read_text()))
+
+    def _new_id(self, now: datetime) -> str:
+        base = now.strftime("%Y%m%d_%H%M%S")
+        candidate, n = base, 1
+        while (self.snapshot_dir / f"{candidate}.json").exists():
+            n += 1
+            candidate = f"{base}_{n}"
+        return candidate
+
+    def create(self, db_path: Path, compression: str = "zlib",
+               on_progress: Callable[[str, float], None] | None = None,
+               should_stop: Callable[[], bool] | None = None) -> Snapshot:
+        """Snapshot db_path; on_progress(phase, fraction) reports backup/chunk phases."""
+        if compression not in COMPRESSORS:
+            raise BackupError(f"Unknown compression '{compression}'")
+        with self.lock(should_stop=should_stop):
+            return self._create(db_path, compression, on_progress, should_stop)
+
+    def _create(self, db_path: Path, compression: str,
+                on_progress: Callable[[str, float], None] | None,
+                should_stop: Callable[[], bool] | None) -> Snapshot:
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(prefix="staging-", suffix=".db", dir=self.root)
+        os.close(fd)
+        staging = Path(name)
+        try:
+            online_backup(db_path, staging, verify=True, should_stop=should_stop,
+                          on_progress=(lambda p: on_progress("backup", p.fraction)) if on_progress else None)
+            conn = sqlite3.connect(f"file:{staging}?mode=ro", uri=True)
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            conn.close()
+            chunk_size = page_size * PAGES_PER_CHUNK
+            size = staging.stat().st_size
+            chunks: list[str] = []
+            new_chunks = stored = 0
+            with staging.open("rb") as f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    digest = hashlib.sha256(data).hexdigest()
+                    chunks.append(digest)
+                    if self.find_chunk(digest) is None:
+                        stored += self._write_chunk(digest, data, compression)
+                        new_chunks += 1
+                    if should_stop and should_stop():
+                        raise BackupError("Snapshot cancelled")
+                    if on_progress:
+                        on_progress("chunk", min(1.0, len(chunks) * chunk_size / size))
+        finally:
+            staging.unlink(missing_ok=True)
+
+        now = datetime.now(timezone.utc).astimezone()
+        snapshot = Snapshot(
+            id=self._new_id(now),
+            created=now.isoformat(timespec="seconds"),
+            size=size,
+            page_size=page_size,
+            chunk_size=chunk_size,
+            chunks=chunks,
+            compression=compression,
+            new_chunks=new_chunks,
+            stored_bytes=stored,
+            source=str(db_path),
+            integrity="ok",
+        )
+        # Chunks are durable before the manifest that references them appears
+        tmp = self.snapshot_dir / f"{snapshot.id}.json.tmp"
+        tmp.write_text(json.dumps(snapshot.__dict__, indent=2))
+        os.replace(tmp, self.snapshot_dir / f"{snapshot.id}.json")
+        return snapshot
+
+    def restore(self, snapshot_id: str, dest: Path, overwrite: bool = False,
+                on_progress: Callable[[float], None] | None = None) -> Snapshot:
+        with self.lock():
+            return self._restore(snapshot_id, dest, overwrite, on_progress)
+
+    def _restore(self, snapshot_id: str, dest: Path, overwrite: bool,
+                 on_progress: Callable[[float], None] | None) -> Snapshot:
+        snapshot = self.get(snapshot_id)
+        dest = Path(dest)
+        if dest.exists() and not overwrite:
+            raise BackupError(f"{dest} already exists (use --force to overwrite)")
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        partial = dest.with_name(dest.name + ".partial")
+        with partial.open("wb") as out:
+            for i, digest in enumerate(snapshot.chunks, 1):
+                out.write(self.read_chunk(digest))
+                if on_progress:
+                    on_progress(i / len(snapshot.chunks))
+        result = integrity_check(partial)
+        if result != "ok":
+            raise BackupError(f"Restored database failed integrity check ({result}); kept at {partial}")
+        # A leftover WAL from the old file would be replayed into the restored one
+        for suffix in ("-wal", "-shm"):
+            Path(str(dest) + suffix).unlink(missing_ok=True)
+        os.replace(partial, dest)
+        return snapshot
+
+    def verify(self, snapshot_ids: list[str] | None = None, deep: bool = False) -> list[VerifyReport]:
+        """Check every referenced chunk decompresses to its hash; deep also restores and runs integrity_check."""
+        with self.lock():
+            return self._verify(snapshot_ids, deep)
+
+    def _verify(self, snapshot_ids: list[str] | None, deep: bool) -> list[VerifyReport]:
+        snapshots = [self.get(i) for i in snapshot_ids] if snapshot_ids else self.list()
+        checked: dict[str, str | None] = {}  # digest -> None (ok) / "missing" / "corrupt"
+        reports = []
+        for snapshot in snapshots:
+            report = VerifyReport(snapshot.id)
+            for digest in dict.fromkeys(snapshot.chunks):
+                if digest not in checked:
+                    try:
+                        self.read_chunk(digest)
+                        checked[digest] = None
+                    except BackupError as e:
+                        checked[digest] = "missing" if str(e).startswith("Missing") else "corrupt"
+                    except (zlib.error, lzma.LZMAError):
+                        checked[digest] = "corrupt"
+                problem = checked[digest]
+                if problem == "missing":
+                    report.missing.append(digest)
+                elif problem == "corrupt":
+                    report.corrupt.append(digest)
+            if deep and not report.missing and not report.corrupt:
+                scratch = self.root / f"verify-{snapshot.id}.db"
+                try:
+                    self._restore(snapshot.id, scratch, True, None)
+                    report.integrity = "ok"
+                except BackupError as e:
+                    report.integrity = str(e)
+                finally:
+                    scratch.unlink(missing_ok=True)
+                    scratch.with_name(scratch.name + ".partial").unlink(missing_ok=True)
+            reports.append(report)
+        return reports
+
+    # --- Retention ------------------------------------------------------
+
+    @staticmethod
+    def select_kept(snapshots: list[Snapshot], keep_last: int = 0, keep_hourly: int = 0,
+                    keep_daily: int = 0, keep_weekly: int = 0) -> set[str]:
+        """IDs kept by a last/hourly/daily/weekly policy (newest per bucket)."""
+        newest_first = sorted(snapshots, key=lambda s: (s.created, s.id), reverse=True)
+        kept = {s.id for s in newest_first[:keep_last]}
+        bucket_rules = [
+            (keep_hourly, "%Y-%m-%d %H"),
+            (keep_daily, "%Y-%m-%d"),
+            (keep_weekly, "%G-W%V"),
+        ]
+        for limit, fmt in bucket_rules:
+            seen: set[str] = set()
+            for snapshot in newest_first:
+                if len(seen) >= limit:
+                    break
+                bucket = snapshot.created_at.strftime(fmt)
+                if bucket not in seen:
+                    seen.add(bucket)
+                    kept.add(snapshot.id)
+        return kept
+
+    def prune(self, keep_last: int = 0, keep_hourly: int = 0, keep_daily: int = 0,
+              keep_weekly: int = 0, dry_run: bool = False) -> tuple[list[str], int, int]:
+        """Apply the retention policy; returns (removed ids, chunks freed, bytes freed)."""
+        with self.lock():
+            return self._prune(keep_last, keep_hourly, keep_daily, keep_weekly, dry_run)
+
+    def _prune(self, keep_last: int, keep_hourly: int, keep_daily: int,
+               keep_weekly: int, dry_run: bool) -> tuple[list[str], int, int]:
+        snapshots = self.list()
+        kept = self.select_kept(snapshots, keep_last, keep_hourly, keep_daily, keep_weekly)
+        removed = [s.id for s in snapshots if s.id not in kept]
+        referenced = {d for s in snapshots if s.id in kept for d in s.chunks}
+        freed_chunks = freed_bytes = 0
+        if not dry_run:
+            for snapshot_id in removed:
+                (self.snapshot_dir / f"{snapshot_id}.json").unlink(missing_ok=True)
+        if self.chunk_dir.exists():
+            for path in self.chunk_dir.glob("*/*"):
+                digest = path.name.split(".", 1)[0]
+                if digest in referenced:
+                    continue
+                freed_chunks += 1
+                freed_bytes += path.stat().st_size
+                if not dry_run:
+                    path.unlink()
+        return removed, freed_chunks, freed_bytes
+
+    def stored_size(self) -> int:
+        if not self.chunk_dir.exists():
+            return 0
+        return sum(p.stat().st_size for p in self.chunk_dir.glob("*/*"))
@@ -0,0 +1,637 @@
+"""
+Reproducible HTTP benchmarks for the Bingo REST API.
+
+A run:
+
+1. builds (or reuses) a fixture database: the schema of the live
+   data/bingo.db, read-only, filled with deterministic rows from a seeded
+   RNG (FixtureSpec). Fixtures are cached under data/benchmarks/fixtures/
+   keyed by a hash of schema + spec, so every run starts from identical
+   bytes
+2. copies it into a throwaway directory and starts server/index.ts there
+   (the server keeps data/ and debugging/ relative to its cwd), with a
+   known JWT_SECRET so auth tokens can be minted locally instead of paying
+   for bcrypt logins
+3. per scenario: warm up, then run closed-loop workers for several rounds,
+   recording every latency, req/s per round and the RSS of the server's
+   process tree (procmon)
+4. writes a JSON result (git commit, host, config, percentiles and a
+   bounded latency sample per scenario) to data/benchmarks/
+
+compare() pools the samples of all results for the baseline and candidate
+commits and runs a one-sided Mann-Whitney U test per scenario. A scenario
+is flagged as a regression when the candidate is slower with p < alpha
+and the median moved by more than the noise threshold. Closed-loop
+latencies are somewhat autocorrelated, so keep rounds >= 3 and treat
+borderline p-values with suspicion.
+
+`--ref` benchmarks another commit from a detached git worktree (sharing
+this checkout's node_modules), which is how a baseline is produced.
+"""
+
+from __future__ import annotations
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import signal
+import sqlite3
+import subprocess
+import tempfile
+import time
+from array import array
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from .netclient import ClientError, HttpPool
+from .procmon import tree_rss_kb
+from .readiness import free_port, wait_ready
+
+BENCH_JWT_SECRET = "bingo-benchmark-secret"
+MAX_STORED_SAMPLES = 2000
+READY_TIMEOUT_S = 90.0
+STOP_TIMEOUT_S = 10.0
+RSS_SAMPLE_S = 0.5
+EPOCH_BASE = 1735689600  # 2025-01-01; fixture timestamps are offsets from it
+DEFAULT_ALPHA = 0.01
+DEFAULT_THRESHOLD = 0.05
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    path: str
+    auth: str | None = None  # None, "user" or "admin"
+
+
+SCENARIOS = [
+    Scenario("dashboard", "/api/dashboard", auth="user"),
+    Scenario("lobbies", "/api/lobbies"),
+    Scenario("lobby-games", "/api/games/{lobby_id}/games"),
+    Scenario("game-participants", "/api/games/{game_id}/participants"),
+    Scenario("snapshot", "/api/games/{lobby_id}/snapshot"),
+    Scenario("admin-wallet-transactions", "/api/admin/wallet-transactions", auth="admin"),
+]
+
+
+@dataclass
+class FixtureSpec:
+    seed: int = 1
+    users: int = 2000
+    lobbies: int = 4
+    games_per_lobby: int = 4
+    finished_games: int = 400
+    seats_per_game: int = 10
+    transactions_per_user: int = 10
+    winners: int = 400
+
+    def scaled(self, factor: float) -> FixtureSpec:
+        scale = lambda n: max(1, int(n * factor))
+        return FixtureSpec(self.seed, scale(self.users), self.lobbies, self.games_per_lobby,
+                           scale(self.finished_games), self.seats_per_game,
+                           self.transactions_per_user, scale(self.winners))
+
+
+@dataclass
+class BenchConfig:
+    scenarios: list[str] = field(default_factory=lambda: [s.name for s in SCENARIOS])
+    concurrency: int = 16
+    duration: float = 10.0  # seconds per round
+    rounds: int = 3
+    warmup: float = 3.0
+    scale: float = 1.0
+    seed: int = 1
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    path: str
+    requests: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    mean: float
+    rps: float
+    rps_rounds: list[float]
+    rss_kb_peak: int | None
+    samples: list[float]
+
+
+@dataclass
+class BenchResult:
+    id: str
+    created: float
+    commit: str | None
+    dirty: bool
+    ref: str | None
+    host: dict
+    config: dict
+    fixture: str
+    startup_s: float
+    rss_kb_idle: int | None
+    scenarios: dict[str, ScenarioResult]
+    path: str | None = None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("path")
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, path: str | None = None) -> BenchResult:
+        data = dict(data)
+        data["scenarios"] = {k: ScenarioResult(**v) for k, v in data["scenarios"].items()}
+        return cls(**data, path=path)
+
+
+# --- fixture ---------------------------------------------------------------
+
+def schema_statements(live_db: Path, migrations_dir: Path) -> list[str]:
+    """DDL of the live database (read-only), else the drizzle migrations."""
+    if live_db.exists():
+        conn = sqlite3.connect(f"file:{live_db}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+                "ORDER BY CASE type WHEN 'table' THEN 0 ELSE 1 END, name").fetchall()
+        finally:
+            conn.close()
+        if rows:
+            return [r[0] for r in rows]
+    statements = []
+    for path in sorted(migrations_dir.glob("*.sql")):
+        statements += [s.strip() for s in path.read_text().split("--> statement-breakpoint") if s.strip()]
+    if not statements:
+        raise RuntimeError(f"No schema source: {live_db} is missing and {migrations_dir} has no migrations")
+    return statements
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+
+def _insert(conn: sqlite3.Connection, table: str, rows: list[dict]) -> None:
+    """Insert the keys the table actually has, so older schemas still load."""
+    if not rows:
+        return
+    cols = [c for c in rows[0] if c in _columns(conn, table)]
+    conn.executemany(
+        f'INSERT INTO "{table}" ({", ".join(cols)}) VALUES ({", ".join("?" * len(cols))})',
+        [[row[c] for c in cols] for row in rows])
+
+
+def build_fixture(dest: Path, schema: list[str], spec: FixtureSpec) -> None:
+    rng = random.Random(spec.seed)
+    ts = lambda: EPOCH_BASE + rng.randrange(0, 180 * 86400)
+    card = lambda: json.dumps(sorted(rng.sample(range(1, 76), 5)))
+    dest.unlink(missing_ok=True)
+    conn = sqlite3.connect(dest)
+    try:
+        for statement in schema:
+            conn.execute(statement)
+        # Password hashes are never checked: benchmark clients use minted JWTs
+        users = [{"id": i, "email": f"bench{i}@bingo.test", "password": "x", "username": f"bench{i}",
+                  "balance": 1000.0, "is_admin": int(i == 1), "created_at": ts(), "updated_at": ts()}
+                 for i in range(1, spec.users + 1)]
+        _insert(conn, "users", users)
+        _insert(conn, "lobbies", [
+            {"id": i, "name": f"Bench Lobby {i}", "description": None, "entry_fee": float(5 * i),
+             "max_seats": 15, "seats_taken": 0, "max_games": spec.games_per_lobby, "status": "active",
+             "created_at": EPOCH_BASE, "updated_at": EPOCH_BASE}
+            for i in range(1, spec.lobbies + 1)])
+        games, participants, game_id = [], [], 0
+        for lobby_id in range(1, spec.lobbies + 1):
+            for number in range(1, spec.games_per_lobby + 1):
+                game_id += 1
+                games.append({"id": game_id, "lobby_id": lobby_id, "name": f"Game {number}",
+                              "game_number": number, "max_seats": 15, "seats_taken": spec.seats_per_game,
+                              "winner_id": None, "status": "waiting", "drawn_numbers": "[]",
+                              "current_number": None, "created_at": ts(), "updated_at": ts()})
+        for _ in range(spec.finished_games):
+            game_id += 1
+            drawn = rng.sample(range(1, 76), 40)
+            games.append({"id": game_id, "lobby_id": rng.randint(1, spec.lobbies), "name": "Finished",
+                          "game_number": spec.games_per_lobby + game_id, "max_seats": 15,
+                          "seats_taken": spec.seats_per_game, "winner_id": rng.randint(1, spec.users),
+                          "status": "finished", "drawn_numbers": json.dumps(drawn),
+                          "current_number": drawn[-1], "created_at": ts(), "updated_at": ts()})
+        for game in games:
+            for seat, user_id in enumerate(rng.sample(range(1, spec.users + 1), spec.seats_per_game), 1):
+                participants.append({"game_id": game["id"], "user_id": user_id, "seat_number": seat,
+                                     "card": card(), "is_winner": 0, "joined_at": ts()})
+        _insert(conn, "games", games)
+        _insert(conn, "game_participants", participants)
+        # Lobby 1 has legacy seats so the benchmark can start a game for /snapshot
+        _insert(conn, "lobby_participants", [
+            {"lobby_id": 1, "user_id": user_id, "seat_number": seat, "joined_at": EPOCH_BASE}
+            for seat, user_id in enumerate(range(2, 2 + spec.seats_per_game), 1)])
+        kinds = ("deposit", "game_entry", "game_win", "withdrawal")
+        _insert(conn, "wallet_transactions", [
+            {"user_id": user_id, "amount": round(rng.uniform(-50, 200), 2), "type": rng.choice(kinds),
+             "description": "bench", "created_at": ts()}
+            for user_id in range(1, spec.users + 1) for _ in range(spec.transactions_per_user)])
+        finished = [g for g in games if g["status"] == "finished"]
+        _insert(conn, "winners", [
+            {"game_id": game["id"], "lobby_id": game["lobby_id"], "user_id": game["winner_id"],
+             "amount": round(rng.uniform(10, 150), 2), "note": None, "created_at": game["created_at"]}
+            for game in finished[:spec.winners]])
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def ensure_fixture(cache_dir: Path, live_db: Path, migrations_dir: Path, spec: FixtureSpec) -> tuple[Path, str]:
+    schema = schema_statements(live_db, migrations_dir)
+    key = hashlib.sha256(json.dumps([schema, asdict(spec)]).encode()).hexdigest()[:16]
+    path = cache_dir / f"fixture-{key}.db"
+    if not path.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        build_fixture(tmp, schema, spec)
+        os.replace(tmp, path)
+    return path, key
+
+
+# --- auth ------------------------------------------------------------------
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def mint_token(user_id: int, email: str, secret: str = BENCH_JWT_SECRET, ttl: int = 86400) -> str:
+    """HS256 JWT equivalent to server/middleware/auth.ts generateToken."""
+    now = int(time.time())
+    header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+    payload = _b64(json.dumps({"id": user_id, "email": email, "iat": now, "exp": now + ttl},
+                              separators=(",", ":")).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64(signature)}"
+
+
+# --- server under test -----------------------------------------------------
+
+class BenchServer:
+    """The app started from `source_root` in a throwaway cwd holding the fixture."""
+
+    def __init__(self, source_root: Path, modules_root: Path, fixture: Path, port: int,
+                 log: Callable[[str], None] = print):
+        self.source_root = source_root
+        self.modules_root = modules_root
+        self.fixture = fixture
+        self.port = port
+        self.log = log
+        self.workdir: Path | None = None
+        self.proc: subprocess.Popen | None = None
+        self.startup_s = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _tsx(self) -> str:
+        name = "tsx.cmd" if os.name == "nt" else "tsx"
+        tsx = self.modules_root / "node_modules" / ".bin" / name
+        if not tsx.exists():
+            raise RuntimeError(f"{tsx} not found; run `npm install` first")
+        return str(tsx)
+
+    def start(self) -> None:
+        self.workdir = Path(tempfile.mkdtemp(prefix="bingo-bench-"))
+        (self.workdir / "data").mkdir()
+        shutil.copyfile(self.fixture, self.workdir / "data" / "bingo.db")
+        env = os.environ.copy()
+        env.update(NODE_ENV="development", PORT=str(self.port), JWT_SECRET=BENCH_JWT_SECRET)
+        env.pop("DB_LOG_QUERIES", None)
+        output = open(self.workdir / "server.out", "wb")
+        started = time.perf_counter()
+        kwargs = ({"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == "nt"
+                  else {"start_new_session": True})
+        self.proc = subprocess.Popen([self._tsx(), str(self.source_root / "server" / "index.ts")],
+                                     cwd=self.workdir, env=env, stdout=output, stderr=subprocess.STDOUT,
+                                     **kwargs)
+        output.close()
+        result = wait_ready(self.port, deadline=READY_TIMEOUT_S, alive=lambda: self.proc.poll() is None)
+        if not result.ready:
+            raise RuntimeError(f"Server {result.describe()}:\n{self.output_tail()}")
+        self.startup_s = time.perf_counter() - started
+
+    def output_tail(self, lines: int = 20) -> str:
+        try:
+            return "\n".join((self.workdir / "server.out").read_text(errors="replace").splitlines()[-lines:])
+        except OSError:
+            return ""
+
+    def rss_kb(self) -> int | None:
+        return tree_rss_kb(self.proc.pid) if self.proc else None
+
+    def stop(self) -> None:
+        if self.proc and self.proc.poll() is None:
+            if os.name == "nt":
+                subprocess.run(["taskkill", "/PID", str(self.proc.pid), "/T", "/F"], check=False,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            else:
+                os.killpg(self.proc.pid, signal.SIGTERM)
+            try:
+                self.proc.wait(STOP_TIMEOUT_S)
+            except subprocess.TimeoutExpired:
+                if os.name != "nt":
+                    os.killpg(self.proc.pid, signal.SIGKILL)
+                self.proc.wait()
+        if self.workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def __enter__(self) -> BenchServer:
+        try:
+            self.start()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# --- measurement -----------------------------------------------------------
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _thin(values: array, limit: int) -> list[float]:
+    """Evenly strided subsample, keeping run order (and so drift) intact."""
+    if len(values) <= limit:
+        return [round(v, 3) for v in values]
+    step = len(values) / limit
+    return [round(values[int(i * step)], 3) for i in range(limit)]
+
+
+async def _closed_loop(pool: HttpPool, path: str, token: str | None, seconds: float,
+                       workers: int, latencies: array | None) -> tuple[int, int]:
+    deadline = time.perf_counter() + seconds
+    counts = [0, 0]  # requests, errors
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            try:
+                response = await pool.request("GET", path, token=token)
+                ok, elapsed = response.ok, response.elapsed
+            except (ClientError, OSError, asyncio.TimeoutError):
+                ok, elapsed = False, 0.0
+            counts[0] += 1
+            if not ok:
+                counts[1] += 1
+            elif latencies is not None:
+                latencies.append(elapsed * 1000.0)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return counts[0], counts[1]
+
+
+async def _run_scenarios(server: BenchServer, scenarios: list[Scenario], config: BenchConfig,
+                         log: Callable[[str], None]) -> dict[str, ScenarioResult]:
+    pool = HttpPool(server.url, size=config.concurrency)
+    tokens = {"user": mint_token(2, "bench2@bingo.test"), "admin": mint_token(1, "bench1@bingo.test")}
+    values = {"lobby_id": 1, "game_id": 1}
+    results = {}
+    try:
+        # /snapshot needs a running game; use a slow call interval so the
+        # draw loop adds little background work
+        response = await pool.request("POST", "/api/games/1/start")
+        if response.ok:
+            await pool.request("POST", "/api/games/1/speed", {"ms": 60000})
+        else:
+            log(f"  ⚠️  Could not start a game in lobby 1 ({response.status}); snapshot will return 404s")
+        for scenario in scenarios:
+            path = scenario.path.format(**values)
+            token = tokens.get(scenario.auth) if scenario.auth else None
+            await _closed_loop(pool, path, token, config.warmup, config.concurrency, None)
+            latencies = array("d")
+            rps_rounds, requests, errors, rss_peak = [], 0, 0, server.rss_kb()
+            for round_no in range(config.rounds):
+                sampler = asyncio.get_running_loop().create_task(_sample_rss(server))
+                started = time.perf_counter()
+                done, failed = await _closed_loop(pool, path, token, config.duration, config.concurrency, latencies)
+                elapsed = time.perf_counter() - started
+                sampler.cancel()
+                peak = await asyncio.gather(sampler, return_exceptions=True)
+                if isinstance(peak[0], int):
+                    rss_peak = max(rss_peak or 0, peak[0])
+                rps_rounds.append(round((done - failed) / elapsed, 2))
+                requests += done
+                errors += failed
+            ordered = sorted(latencies)
+            results[scenario.name] = ScenarioResult(
+                name=scenario.name, path=scenario.path, requests=requests, errors=errors,
+                p50=round(_percentile(ordered, 50), 3), p95=round(_percentile(ordered, 95), 3),
+                p99=round(_percentile(ordered, 99), 3),
+                mean=round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+                rps=round(sum(rps_rounds) / len(rps_rounds), 2), rps_rounds=rps_rounds,
+                rss_kb_peak=rss_peak, samples=_thin(latencies, MAX_STORED_SAMPLES))
+            r = results[scenario.name]
+            log(f"  {scenario.name:<28} p50 {r.p50:8.2f}ms  p95 {r.p95:8.2f}ms  p99 {r.p99:8.2f}ms  "
+                f"{r.rps:8.1f} req/s  errors {errors}")
+    finally:
+        await pool.close()
+    return results
+
+
+async def _sample_rss(server: BenchServer) -> int | None:
+    peak = None
+    try:
+        while True:
+            rss = server.rss_kb()
+            if rss is not None:
+                peak = max(peak or 0, rss)
+            await asyncio.sleep(RSS_SAMPLE_S)
+    except asyncio.CancelledError:
+        return peak
+
+
+# --- history ---------------------------------------------------------------
+
+def _git(repo: Path, *args: str) -> str | None:
+    try:
+        out = subprocess.run(["git", *args], cwd=repo, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                             text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def resolve_commit(repo: Path, ref: str) -> str:
+    commit = _git(repo, "rev-parse", "--verify", f"{ref}^{{commit}}")
+    if not commit:
+        raise RuntimeError(f"Unknown git ref: {ref}")
+    return commit
+
+
+def _host_info() -> dict:
+    node = shutil.which("node")
+    version = None
+    if node:
+        try:
+            version = subprocess.run([node, "--version"], stdout=subprocess.PIPE, text=True).stdout.strip()
+        except OSError:
+            pass
+    return {"platform": platform.platform(), "python": platform.python_version(), "node": version,
+            "cpus": os.cpu_count()}
+
+
+def load_history(history_dir: Path) -> list[BenchResult]:
+    results = []
+    for path in sorted(history_dir.glob("bench-*.json")):
+        try:
+            results.append(BenchResult.from_dict(json.loads(path.read_text()), str(path)))
+        except (ValueError, TypeError, KeyError):
+            continue
+    return sorted(results, key=lambda r: r.created)
+
+
+def run_benchmark(repo: Path, history_dir: Path, config: BenchConfig, ref: str | None = None,
+                  log: Callable[[str], None] = print) -> BenchResult:
+    wanted = {s.name: s for s in SCENARIOS}
+    unknown = [n for n in config.scenarios if n not in wanted]
+    if unknown:
+        raise RuntimeError(f"Unknown scenario(s): {', '.join(unknown)} (have: {', '.join(wanted)})")
+    spec = FixtureSpec(seed=config.seed).scaled(config.scale)
+    fixture, key = ensure_fixture(history_dir / "fixtures", repo / "data" / "bingo.db",
+                                  repo / "migrations", spec)
+    log(f"📦 Fixture {fixture.name} ({fixture.stat().st_size / 1024:.0f}KB, {spec.users} users)")
+
+    worktree = None
+    source_root, commit, dirty = repo, _git(repo, "rev-parse", "HEAD"), bool(_git(repo, "status", "--porcelain"))
+    if ref:
+        commit = resolve_commit(repo, ref)
+        worktree = Path(tempfile.mkdtemp(prefix="bingo-bench-ref-"))
+        shutil.rmtree(worktree)
+        if _git(repo, "worktree", "add", "--detach", str(worktree), commit) is None:
+            raise RuntimeError(f"Could not create a worktree for {ref}")
+        source_root, dirty = worktree, False
+        if (repo / "node_modules").exists():
+            os.symlink(repo / "node_modules", worktree / "node_modules", target_is_directory=True)
+    try:
+        log(f"🚀 Starting server from {commit[:10] if commit else source_root}{' (dirty)' if dirty else ''}")
+        with BenchServer(source_root, repo, fixture, free_port(), log) as server:
+            idle = server.rss_kb()
+            log(f"   ready in {server.startup_s:.1f}s" + (f", RSS {idle / 1024:.0f}MB" if idle else ""))
+            scenarios = [wanted[n] for n in config.scenarios]
+            results = asyncio.run(_run_scenarios(server, scenarios, config, log))
+    finally:
+        if worktree:
+            _git(repo, "worktree", "remove", "--force", str(worktree))
+            shutil.rmtree(worktree, ignore_errors=True)
+
+    created = time.time()
+    stamp = datetime.fromtimestamp(created).strftime("%Y%m%d_%H%M%S")
+    result = BenchResult(
+        id=f"{stamp}-{(commit or 'nogit')[:10]}", created=created, commit=commit, dirty=dirty, ref=ref,
+        host=_host_info(), config=asdict(config), fixture=key, startup_s=round(server.startup_s, 3),
+        rss_kb_idle=idle, scenarios=results)
+    history_dir.mkdir(parents=True, exist_ok=True)
+    path = history_dir / f"bench-{result.id}.json"
+    path.write_text(json.dumps(result.to_dict(), indent=1))
+    result.path = str(path)
+    return result
+
+
+# --- comparison ------------------------------------------------------------
+
+@dataclass
+class ScenarioComparison:
+    name: str
+    baseline_p50: float
+    candidate_p50: float
+    baseline_p95: float
+    candidate_p95: float
+    baseline_rps: float
+    candidate_rps: float
+    p_slower: float
+    p_faster: float
+    verdict: str  # "regression", "improvement", "unchanged" or "missing"
+
+    @property
+    def change(self) -> float:
+        return self.candidate_p50 / self.baseline_p50 - 1 if self.baseline_p50 else 0.0
+
+
+def mann_whitney(a: list[float], b: list[float]) -> tuple[float, float]:
+    """One-sided p-values (b > a, b < a) from the normal approximation with tie correction."""
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 1.0, 1.0
+    ranked = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    ranks = [0.0] * len(ranked)
+    tie_term, i = 0.0, 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        tie_term += t ** 3 - t
+        i = j + 1
+    r2 = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 1)
+    u2 = r2 - n2 * (n2 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0, 1.0
+    z = (u2 - n1 * n2 / 2) / math.sqrt(variance)
+    upper = 0.5 * math.erfc(z / math.sqrt(2))
+    return upper, 1.0 - upper
+
+
+def _pooled(results: list[BenchResult], name: str) -> tuple[list[float], float, float, float] | None:
+    runs = [r.scenarios[name] for r in results if name in r.scenarios]
+    if not runs:
+        return None
+    samples = [v for run in runs for v in run.samples]
+    ordered = sorted(samples)
+    return samples, _percentile(ordered, 50), _percentile(ordered, 95), sum(r.rps for r in runs) / len(runs)
+
+
+def results_for(history: list[BenchResult], repo: Path, ref: str) -> list[BenchResult]:
+    commit = resolve_commit(repo, ref)
+    return [r for r in history if r.commit == commit and not r.dirty]
+
+
+def compare(baseline: list[BenchResult], candidate: list[BenchResult], alpha: float = DEFAULT_ALPHA,
+            threshold: float = DEFAULT_THRESHOLD) -> list[ScenarioComparison]:
+    names = list(dict.fromkeys(n for r in baseline + candidate for n in r.scenarios))
+    out = []
+    for name in names:
+        base, cand = _pooled(baseline, name), _pooled(candidate, name)
+        if base is None or cand is None:
+            out.append(ScenarioComparison(name, base[1] if base else 0, cand[1] if cand else 0,
+                                          base[2] if base else 0, cand[2] if cand else 0,
+                                          base[3] if base else 0, cand[3] if cand else 0, 1.0, 1.0, "missing"))
+            continue
+        p_slower, p_faster = mann_whitney(base[0], cand[0])
+        change = cand[1] / base[1] - 1 if base[1] else 0.0
+        if p_slower < alpha and change > threshold:
+            verdict = "regression"
+        elif p_faster < alpha and change < -threshold:
+            verdict = "improvement"
+        else:
+            verdict = "unchanged"
+        out.append(ScenarioComparison(name, base[1], cand[1], base[2], cand[2], base[3], cand[3],
+                                      p_slower, p_faster, verdict))
+    return out
@@ -0,0 +1,388 @@
+"""
+Multi-instance cluster: N node workers behind the reverse proxy.
+
+`server_manager_cli.py cluster run` is one long-lived process that owns PORT
+through an embedded ReverseProxy (proxy.py) and supervises N node workers on
+spare loopback ports:
+
+- every worker has its own PID file (data/cluster/worker-<n>.pid), stdout log
+  (debugging/worker-<n>.log) and WORKER_ID, which server/logger.ts adds to
+  its log file names. Each runs in its own process group so npm, the shell
+  and node stop together
+- worker 1 boots first and alone, with the usual startup cleanup; the rest
+  boot once it is ready, with SKIP_STARTUP_CLEANUP=1 so they leave its
+  games alone
+- all workers, restarts included, get the same SERVER_SESSION_ID. The client
+  clears its login whenever /api/auth/session changes, and consecutive
+  calls can reach different workers
+- SQLite: every worker opens data/bingo.db in WAL mode with
+  SQLITE_BUSY_TIMEOUT_MS, so a writer waits for the lock instead of failing
+  with SQLITE_BUSY. Only worker 1 checkpoints automatically; the others get
+  SQLITE_WAL_AUTOCHECKPOINT=0, since concurrent checkpointers only queue on
+  the same lock and redo each other's work
+- a worker that exits is restarted after BACKOFF_BASE_S, doubling per crash
+  in a row up to BACKOFF_MAX_S; the count resets once it stays up STABLE_S
+- every HEALTH_INTERVAL_S the health loop probes each worker's
+  /api/auth/session. After UNHEALTHY_AFTER failures the worker leaves the
+  proxy's rotation, after RESTART_AFTER it is restarted
+- only ready workers are proxy backends. The proxy also gets one slot per
+  worker and pins lobby lobby_id % workers to that worker's slot: the
+  lobby's REST calls, game calls and the Engine.IO session of a client in
+  that lobby (the client opens its socket with ?lobby=<id>) all reach the
+  process that runs its GameEngine and Socket.IO room. A worker that gets
+  join_lobby for a lobby it does not run (it knows WORKER_ID and
+  CLUSTER_WORKERS) answers lobby_elsewhere, and the client reconnects with
+  that lobby in the query. Other requests go to the least busy worker, and
+  Engine.IO requests stick to the worker that issued their sid
+- when a worker exits, the games of its lobbies that are still marked
+  active are marked finished, as its replacement will not run them
+- `roll` replaces the workers one at a time: the replacement boots on a new
+  port next to the old process and only takes over the slot once ready,
+  then the old one drains its in-flight requests and its games (up to the
+  drain deadline) and is stopped. A worker that is not ready is restarted
+  in place
+
+Limits: a user's socket lives on the worker of the lobby they last entered,
+so what another lobby's worker sends to their user room (balance_updated,
+game_won) does not reach them. During a roll a running game stays in the
+old process: its WebSocket clients keep receiving it until the drain ends,
+but the lobby's REST calls already go to the replacement, as with
+`restart --proxy`. While a worker is down its lobbies answer 502; the other
+lobbies are unaffected.
+"""
+
+from __future__ import annotations
+import asyncio
+import os
+import signal
+import sqlite3
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from .proctree import session_kwargs, stop_popen
+from .proxy import ReverseProxy, active_games, backend_env, finish_games, new_session_id
+from .readiness import DEFAULT_DEADLINE_S, free_port, probe_http, wait_ready
+
+DEFAULT_WORKERS = 2
+BUSY_TIMEOUT_MS = 10000
+CHECKPOINT_PAGES = 1000
+HEALTH_INTERVAL_S = 2.0
+UNHEALTHY_AFTER = 3
+RESTART_AFTER = 10
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 60.0
+STABLE_S = 60.0
+STOP_TIMEOUT_S = 10.0
+ROLL_DRAIN_S = 30.0
+POLL_S = 0.2
+
+
+def worker_env(index: int, port: int, session_id: str, workers: int) -> dict[str, str]:
+    """Environment overrides for worker `index` (1-based) of `workers` on `port`."""
+    env = backend_env(port, replacing=index > 1, session_id=session_id)
+    env.update(WORKER_ID=str(index), CLUSTER_WORKERS=str(workers), SQLITE_BUSY_TIMEOUT_MS=str(BUSY_TIMEOUT_MS),
+               SQLITE_WAL_AUTOCHECKPOINT=str(CHECKPOINT_PAGES if index == 1 else 0))
+    return env
+
+
+def backoff_delay(crashes: int) -> float:
+    return 0.0 if crashes <= 0 else min(BACKOFF_BASE_S * 2 ** (crashes - 1), BACKOFF_MAX_S)
+
+
+@dataclass
+class Worker:
+    index: int
+    pid_path: Path
+    log_path: Path
+    port: int = 0
+    state: str = "stopped"  # starting, ready, unhealthy, backoff, draining, stopped
+    proc: subprocess.Popen | None = field(default=None, repr=False)
+    started: float = 0.0
+    restarts: int = 0
+    crashes: int = 0
+    failures: int = 0
+    last_exit: int | None = None
+    latency_ms: float | None = None
+    retry_at: float = 0.0
+    replace: bool = False
+
+    @property
+    def pid(self) -> int | None:
+        return self.proc.pid if self.proc and self.proc.poll() is None else None
+
+    def to_dict(self, now: float) -> dict:
+        return {"index": self.index, "port": self.port, "pid": self.pid, "state": self.state,
+                "uptime": round(now - self.started, 1) if self.pid else None, "restarts": self.restarts,
+                "crashes": self.crashes, "failures": self.failures, "last_exit": self.last_exit,
+                "latency_ms": self.latency_ms, "retry_in": round(max(0.0, self.retry_at - now), 1),
+                "log": str(self.log_path)}
+
+
+class ClusterSupervisor:
+    """Runs the workers and the proxy in front of them in one event loop."""
+
+    def __init__(self, command: list[str], workers: int, listen_port: int, state_path: Path, run_dir: Path,
+                 log_dir: Path, cwd: Path, env: dict[str, str] | None = None, host: str = "0.0.0.0",
+                 ready_deadline: float = DEFAULT_DEADLINE_S, log: Callable[[str], None] = print,
+                 db_path: Path | None = None):
+        if workers < 1:
+            raise ValueError("A cluster needs at least one worker")
+        self.command = command
+        self.cwd = Path(cwd)
+        self.db_path = Path(db_path) if db_path else self.cwd / "data" / "bingo.db"
+        self.env = dict(os.environ if env is None else env)
+        self.session_id = self.env.get("SERVER_SESSION_ID") or new_session_id()
+        self.ready_deadline = ready_deadline
+        self.log = log
+        self.run_dir = Path(run_dir)
+        self.workers = [Worker(i, self.run_dir / f"worker-{i}.pid", Path(log_dir) / f"worker-{i}.log")
+                        for i in range(1, workers + 1)]
+        self.proxy = ReverseProxy(listen_port, None, state_path, host, log=log, db_path=self.db_path)
+        self.proxy.handlers.update(workers=self._workers_cmd, roll=self._roll_cmd)
+        self.stopping = False
+        self.rolling: asyncio.Task | None = None
+        self.started = time.time()
+
+    async def serve(self) -> None:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        serving = asyncio.create_task(self.proxy.serve())
+        first, *rest = self.workers
+        tasks = [asyncio.create_task(self._supervise(first))]
+        try:
+            # Worker 1 runs the startup cleanup; nobody else may boot during it
+            while first.state not in ("ready", "backoff") and not serving.done():
+                await asyncio.sleep(POLL_S)
+            tasks += [asyncio.create_task(self._supervise(w)) for w in rest]
+            await serving
+        finally:
+            self.stopping = True
+            if self.rolling:
+                self.rolling.cancel()
+                tasks.append(self.rolling)
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.log("cluster stopped")
+
+    def stop(self) -> None:
+        self.stopping = True
+        self.proxy.stop()
+
+    def _publish(self) -> None:
+        slots = [w.port if w.state == "ready" else None for w in self.workers]
+        self.proxy.set_backends([port for port in slots if port], slots=slots)
+
+    def _slot(self, worker: Worker) -> tuple[int, int]:
+        return worker.index - 1, len(self.workers)
+
+    # --- one worker ----------------------------------------------------------------
+
+    def _launch(self, worker: Worker, port: int, replacing: bool) -> subprocess.Popen:
+        env = {**self.env, **worker_env(worker.index, port, self.session_id, len(self.workers))}
+        if replacing:
+            env["SKIP_STARTUP_CLEANUP"] = "1"
+        worker.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(worker.log_path, "ab") as out:
+            out.write(f"\n--- worker {worker.index} on :{port} at {time.ctime()} ---\n".encode())
+            out.flush()
+            return subprocess.Popen(self.command, cwd=str(self.cwd), env=env, stdout=out,
+                                    stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, **session_kwargs())
+
+    def _spawn(self, worker: Worker) -> None:
+        worker.port = free_port()
+        worker.proc = self._launch(worker, worker.port, replacing=worker.restarts > 0 or worker.index > 1)
+        worker.pid_path.write_text(str(worker.proc.pid))
+        worker.started = time.monotonic()
+        worker.state, worker.failures, worker.latency_ms, worker.replace = "starting", 0, None, False
+        self.log(f"worker {worker.index}: started PID {worker.proc.pid} on :{worker.port}")
+
+    async def _supervise(self, worker: Worker) -> None:
+        try:
+            while not self.stopping:
+                delay = worker.retry_at - time.monotonic()
+                if delay > 0:
+                    worker.state = "backoff"
+                    await asyncio.sleep(min(delay, POLL_S))
+                    continue
+                self._spawn(worker)
+                proc = worker.proc
+                ready = await asyncio.to_thread(wait_ready, worker.port, deadline=self.ready_deadline,
+                                                alive=lambda: proc.poll() is None and not self.stopping)
+                if ready.ready:
+                    worker.state = "ready"
+                    self._publish()
+                    self.log(f"worker {worker.index}: {ready.describe()}")
+                    await self._watch(worker)
+                else:
+                    self.log(f"worker {worker.index}: {ready.describe()}")
+                await self._retire(worker)
+        finally:
+            await self._retire(worker)
+
+    async def _watch(self, worker: Worker) -> None:
+        """Health-check a ready worker until it exits, fails for good or is replaced."""
+        while not self.stopping and not worker.replace and worker.proc.poll() is None:
+            if worker.crashes and time.monotonic() - worker.started > STABLE_S:
+                worker.crashes = 0
+            started = time.monotonic()
+            try:
+                status, _ = await asyncio.to_thread(probe_http, worker.port)
+            except OSError:
+                status = None
+            if status == 200:
+                worker.latency_ms = round((time.monotonic() - started) * 1000, 1)
+                worker.failures = 0
+                if worker.state == "unhealthy":
+                    self.log(f"worker {worker.index}: healthy again")
+                    worker.state = "ready"
+                    self._publish()
+            else:
+                worker.failures += 1
+                if worker.failures == UNHEALTHY_AFTER:
+                    self.log(f"worker {worker.index}: {worker.failures} failed health checks, out of rotation")
+                    worker.state = "unhealthy"
+                    self._publish()
+                if worker.failures >= RESTART_AFTER:
+                    self.log(f"worker {worker.index}: still failing, restarting")
+                    return
+            await asyncio.sleep(HEALTH_INTERVAL_S)
+
+    async def _retire(self, worker: Worker) -> None:
+        proc = worker.proc
+        if proc is None:
+            return
+        planned = worker.replace or self.stopping
+        if worker.state in ("ready", "unhealthy"):
+            worker.state = "draining"
+            self._publish()
+        # The whole tree, also when npm already exited and left node running in its session
+        await asyncio.to_thread(stop_popen, proc, STOP_TIMEOUT_S)
+        code = proc.returncode
+        self.proxy.close_backend(worker.port)
+        worker.pid_path.unlink(missing_ok=True)
+        worker.proc, worker.last_exit = None, code
+        if self.stopping:
+            worker.state = "stopped"
+            return
+        await self._finish_games(worker, await asyncio.to_thread(active_games, self.db_path, self._slot(worker)))
+        worker.restarts += 1
+        if not planned:
+            worker.crashes += 1
+            worker.retry_at = time.monotonic() + backoff_delay(worker.crashes)
+            self.log(f"worker {worker.index}: exited with code {code}; "
+                     f"restart {worker.restarts} in {backoff_delay(worker.crashes):.0f}s")
+        else:
+            worker.retry_at = 0.0
+
+    # --- rolling restart ------------------------------------------------------------
+
+    async def roll(self, drain: float = ROLL_DRAIN_S) -> None:
+        """Replace the workers one by one, each only once its replacement is ready."""
+        for worker in self.workers:
+            if self.stopping:
+                return
+            if worker.state == "ready":
+                if not await self._replace(worker, drain):
+                    self.log("roll stopped; the remaining workers keep their current process")
+                    return
+                continue
+            # Not serving anyway: restart it in place
+            self.log(f"worker {worker.index}: rolling ({worker.state}, restarting in place)")
+            port = worker.port
+            worker.replace = True
+            worker.crashes, worker.retry_at = 0, 0.0
+            while worker.port == port or worker.state not in ("ready", "backoff"):
+                if self.stopping:
+                    return
+                await asyncio.sleep(POLL_S)
+        self.log("roll complete")
+
+    async def _replace(self, worker: Worker, drain: float) -> bool:
+        """Boot worker's replacement next to it, hand over its slot, then drain and stop the old process."""
+        port = free_port()
+        self.log(f"worker {worker.index}: rolling, starting replacement on :{port}")
+        proc = self._launch(worker, port, replacing=True)
+        try:
+            ready = await asyncio.to_thread(wait_ready, port, deadline=self.ready_deadline,
+                                            alive=lambda: proc.poll() is None and not self.stopping)
+        except BaseException:
+            await asyncio.to_thread(stop_popen, proc, STOP_TIMEOUT_S)
+            raise
+        if not ready.ready or self.stopping or worker.state not in ("ready", "unhealthy"):
+            await asyncio.to_thread(stop_popen, proc, STOP_TIMEOUT_S)
+            self.log(f"worker {worker.index}: replacement {ready.describe()}; still serving from :{worker.port}")
+            return False
+        slot = self._slot(worker)
+        games = await asyncio.to_thread(active_games, self.db_path, slot)
+        old, old_port = worker.proc, worker.port
+        worker.proc, worker.port, worker.started = proc, port, time.monotonic()
+        worker.state, worker.failures, worker.latency_ms = "ready", 0, None
+        worker.restarts += 1
+        worker.pid_path.write_text(str(proc.pid))
+        self._publish()
+        self.log(f"worker {worker.index}: replacement {ready.describe()}; draining :{old_port}"
+                 + (f" ({len(games)} game(s) in progress)" if games else ""))
+        deadline = time.monotonic() + drain
+        try:
+            while time.monotonic() < deadline and not self.stopping:
+                busy = any(c.backend == old_port and c.inflight for c in self.proxy.connections.values())
+                if not busy and not (games and games & await asyncio.to_thread(active_games, self.db_path, slot)):
+                    break
+                await asyncio.sleep(POLL_S)
+        finally:
+            # Cancelling (cluster stop) only cuts the drain short
+            self.proxy.close_backend(old_port)
+            await asyncio.to_thread(stop_popen, old, STOP_TIMEOUT_S)
+            if games:
+                await self._finish_games(worker, games & await asyncio.to_thread(active_games, self.db_path, slot))
+        return True
+
+    async def _finish_games(self, worker: Worker, game_ids: set[int]) -> None:
+        """Mark games that died with one of worker's processes finished, as a startup cleanup would."""
+        if not game_ids:
+            return
+        try:
+            await asyncio.to_thread(finish_games, self.db_path, sorted(game_ids))
+        except sqlite3.Error as e:
+            self.log(f"worker {worker.index}: could not finish game(s) {sorted(game_ids)}: {e}")
+            return
+        self.log(f"worker {worker.index}: game(s) {', '.join(map(str, sorted(game_ids)))} ended with "
+                 f"its process; marked finished")
+
+    # --- control commands ---------------------------------------------------------
+
+    def _workers_cmd(self, request: dict) -> dict:
+        now = time.monotonic()
+        ready = sum(1 for w in self.workers if w.state == "ready")
+        health = "healthy" if ready == len(self.workers) else "degraded" if ready else "down"
+        return {"ok": True, "health": health, "ready": ready, "workers": [w.to_dict(now) for w in self.workers],
+                "rolling": bool(self.rolling and not self.rolling.done()), "started": self.started,
+                "proxy": self.proxy.snapshot()}
+
+    def _roll_cmd(self, request: dict) -> dict:
+        if self.rolling and not self.rolling.done():
+            return {"ok": True, "rolling": True, "already": True}
+        self.rolling = asyncio.get_running_loop().create_task(self.roll(float(request.get("drain", ROLL_DRAIN_S))))
+        return {"ok": True, "rolling": True, "already": False}
+
+
+def run_cluster(command: list[str], workers: int, listen_port: int, state_path: Path, run_dir: Path,
+                log_dir: Path, cwd: Path, env: dict[str, str] | None = None, host: str = "0.0.0.0",
+                ready_deadline: float = DEFAULT_DEADLINE_S, log: Callable[[str], None] = print,
+                db_path: Path | None = None) -> None:
+    """Supervise until SIGTERM/SIGINT or a `stop` command (blocking)."""
+    supervisor = ClusterSupervisor(command, workers, listen_port, state_path, run_dir, log_dir, cwd, env, host,
+                                   ready_deadline, log, db_path)
+
+    async def main() -> None:
+        if os.name != "nt":
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, supervisor.stop)
+        await supervisor.serve()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,99 @@
+"""
+Client side of the proxy and cluster control sockets.
+
+`proxy run` and `cluster run` are long-lived processes that write a JSON
+state file with their control port and answer one JSON command per line on
+127.0.0.1. Looking one up and talking to it needs nothing but socket and
+json, so status checks and cron probes import this module, not proxy.py
+with its asyncio server.
+"""
+
+from __future__ import annotations
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+CLI_SCRIPT = Path(__file__).resolve().parents[1] / "server_manager_cli.py"
+CONTROL_HOST = "127.0.0.1"
+CONTROL_TIMEOUT_S = 5.0
+LAUNCH_DEADLINE_S = 10.0
+
+
+class ProxyError(Exception):
+    pass
+
+
+class ProxyControl:
+    """Blocking client for a running proxy's control socket."""
+
+    def __init__(self, control_port: int):
+        self.control_port = control_port
+
+    @classmethod
+    def find(cls, state_path: Path) -> ProxyControl | None:
+        """The proxy described by state_path, if it is running and answering."""
+        try:
+            control = cls(int(json.loads(Path(state_path).read_text())["control_port"]))
+            control.status()
+        except (OSError, ValueError, KeyError, TypeError, ProxyError):
+            return None
+        return control
+
+    def request(self, cmd: str, **params) -> dict:
+        try:
+            with socket.create_connection((CONTROL_HOST, self.control_port), timeout=CONTROL_TIMEOUT_S) as sock:
+                sock.sendall(json.dumps({"cmd": cmd, **params}).encode() + b"\n")
+                line = sock.makefile("rb").readline()
+            response = json.loads(line)
+        except (OSError, ValueError) as e:
+            raise ProxyError(f"proxy control :{self.control_port}: {e}") from e
+        if not isinstance(response, dict) or not response.get("ok"):
+            raise ProxyError(response.get("error", "bad response") if isinstance(response, dict) else "bad response")
+        return response
+
+    def status(self) -> dict:
+        return self.request("status")
+
+    def switch(self, backend_port: int, backend_pid: int | None = None) -> int:
+        """Route new requests to backend_port only; returns the previous backend port."""
+        return self.request("switch", backend=backend_port, pid=backend_pid)["previous"]
+
+    def set_backends(self, ports: list[int]) -> list[int]:
+        """Balance new requests over ports (sticky sessions stay put while their backend is listed)."""
+        return self.request("backends", ports=ports)["backends"]
+
+    def close_backend(self, backend_port: int, force: bool = True) -> int:
+        """Close sockets and idle upstream connections to backend_port (busy ones too if force)."""
+        return self.request("close", backend=backend_port, force=force)["closed"]
+
+    def stop(self) -> None:
+        self.request("stop")
+
+
+def launch_detached(cli_args: list[str], state_path: Path, log_path: Path, name: str = "Proxy",
+                    deadline: float = LAUNCH_DEADLINE_S) -> ProxyControl:
+    """Start `server_manager_cli.py <cli_args> --state <state_path>` detached; wait until it answers."""
+    state_path = Path(state_path)
+    state_path.unlink(missing_ok=True)
+    cmd = [sys.executable, str(CLI_SCRIPT), *cli_args, "--state", str(state_path)]
+    if sys.platform == "win32":
+        kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS}
+    else:
+        kwargs = {"start_new_session": True}
+    log_path = Path(log_path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "ab") as out:
+        proc = subprocess.Popen(cmd, stdout=out, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, **kwargs)
+    started = time.monotonic()
+    while time.monotonic() - started < deadline:
+        if proc.poll() is not None:
+            raise ProxyError(f"{name} exited with code {proc.returncode} (see {log_path})")
+        control = ProxyControl.find(state_path)
+        if control is not None:
+            return control
+        time.sleep(0.05)
+    proc.kill()
+    raise ProxyError(f"{name} did not answer within {deadline:.0f}s (see {log_path})")
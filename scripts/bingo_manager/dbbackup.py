@@ -0,0 +1,140 @@
+"""
+Online backups of data/bingo.db through SQLite's backup API.
+
+server/db.ts runs the database in WAL mode, so a file copy of bingo.db misses
+whatever is still in bingo.db-wal and can be torn by a concurrent checkpoint.
+sqlite3.Connection.backup copies a consistent snapshot page by page while the
+server keeps running; copying in small steps with a short sleep in between
+lets the server's writers take the lock between steps.
+
+The copy is written to a .partial file, switched to a rollback journal so it
+is a single self-contained file, checked with PRAGMA integrity_check and only
+then renamed into place.
+"""
+
+from __future__ import annotations
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_STEP_PAGES = 256
+DEFAULT_STEP_SLEEP = 0.005
+BUSY_TIMEOUT_S = 10.0
+
+
+class BackupError(RuntimeError):
+    pass
+
+
+class BackupCancelled(BackupError):
+    pass
+
+
+@dataclass
+class BackupProgress:
+    pages_done: int
+    pages_total: int
+    bytes_done: int
+    elapsed: float
+
+    @property
+    def fraction(self) -> float:
+        return self.pages_done / self.pages_total if self.pages_total else 1.0
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second copied so far."""
+        return self.bytes_done / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class BackupResult:
+    path: Path
+    size: int
+    pages: int
+    elapsed: float
+    integrity: str | None
+
+    @property
+    def throughput(self) -> float:
+        return self.size / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def verified(self) -> bool:
+        return self.integrity == "ok"
+
+
+def default_backup_path(backup_dir: Path) -> Path:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return backup_dir / f"bingo_backup_{timestamp}.db"
+
+
+def format_rate(bytes_per_second: float) -> str:
+    return f"{bytes_per_second / (1024 * 1024):.1f}MB/s"
+
+
+def integrity_check(path: Path) -> str:
+    """Run PRAGMA integrity_check on path; returns 'ok' or the first problems."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        conn.close()
+    return "; ".join(str(row[0]) for row in rows[:5])
+
+
+def online_backup(source: Path, dest: Path,
+                  step_pages: int = DEFAULT_STEP_PAGES,
+                  step_sleep: float = DEFAULT_STEP_SLEEP,
+                  verify: bool = True,
+                  on_progress: Callable[[BackupProgress], None] | None = None,
+                  should_stop: Callable[[], bool] | None = None) -> BackupResult:
+    """Copy a live SQLite database to dest without blocking its writers.
+
+    on_progress is called after every step; should_stop is polled at the
+    same points and aborts the backup (raising BackupCancelled).
+    """
+    if not source.exists():
+        raise BackupError(f"Database file not found: {source}")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    partial = dest.with_name(dest.name + ".partial")
+    partial.unlink(missing_ok=True)
+
+    src = sqlite3.connect(str(source), timeout=BUSY_TIMEOUT_S)
+    dst = sqlite3.connect(str(partial))
+    started = time.perf_counter()
+    try:
+        page_size = src.execute("PRAGMA page_size").fetchone()[0]
+
+        def progress(status: int, remaining: int, total: int) -> None:
+            if should_stop and should_stop():
+                raise BackupCancelled("Backup cancelled")
+            if on_progress:
+                done = total - remaining
+                on_progress(BackupProgress(done, total, done * page_size, time.perf_counter() - started))
+            if remaining > 0 and step_sleep > 0:
+                # backup()'s own sleep only applies after a BUSY/LOCKED step; pause between every step
+                time.sleep(step_sleep)
+
+        src.backup(dst, pages=step_pages, progress=progress, sleep=step_sleep)
+        pages = dst.execute("PRAGMA page_count").fetchone()[0]
+        # The copy inherits WAL mode from the header; make it a standalone file
+        dst.execute("PRAGMA journal_mode = DELETE")
+    except BaseException:
+        dst.close()
+        partial.unlink(missing_ok=True)
+        raise
+    finally:
+        src.close()
+    dst.close()
+    elapsed = time.perf_counter() - started
+
+    integrity = integrity_check(partial) if verify else None
+    if verify and integrity != "ok":
+        raise BackupError(f"Backup failed integrity check ({integrity}); kept at {partial}")
+    os.replace(partial, dest)
+    return BackupResult(dest, dest.stat().st_size, pages, elapsed, integrity)
@@ -0,0 +1,183 @@
+"""
+Read-only health statistics for data/bingo.db.
+
+The database is opened with a mode=ro URI and a short busy timeout, so
+collecting never takes a write lock on the live server's database. A
+collection gathers:
+
+- row counts for the tables that grow with play (TRACKED_TABLES)
+- page size, page count and freelist count, plus the size of the -wal file
+- per-table and per-index b-tree size and fill from the dbstat virtual
+  table, when the sqlite3 module was built with it
+
+Row counts are full scans, so StatsCollector caches the last result for a
+TTL (in memory, and optionally in a JSON file so repeated CLI invocations
+share it). Pollers such as the GUI refresh can call collect() as often as
+they like.
+"""
+
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+TRACKED_TABLES = ("users", "games", "game_participants", "wallet_transactions", "winners", "user_achievements")
+DEFAULT_TTL = 30.0
+BUSY_TIMEOUT_S = 2.0
+
+
+@dataclass
+class BtreeStats:
+    name: str
+    table: str
+    kind: str  # "table" or "index"
+    pages: int
+    entries: int
+    payload: int
+    unused: int
+    size: int
+
+    @property
+    def fill(self) -> float:
+        """Fraction of allocated bytes holding payload."""
+        return self.payload / self.size if self.size else 0.0
+
+
+@dataclass
+class DbStats:
+    path: str
+    collected: float
+    elapsed: float
+    db_size: int
+    wal_size: int
+    page_size: int
+    page_count: int
+    freelist_count: int
+    journal_mode: str
+    rows: dict[str, int | None] = field(default_factory=dict)
+    btrees: list[BtreeStats] = field(default_factory=list)
+    dbstat: bool = False
+    cached: bool = False
+
+    @property
+    def free_fraction(self) -> float:
+        return self.freelist_count / self.page_count if self.page_count else 0.0
+
+    def indexes(self) -> list[BtreeStats]:
+        return [b for b in self.btrees if b.kind == "index"]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> DbStats:
+        data = dict(data)
+        data["btrees"] = [BtreeStats(**b) for b in data.get("btrees", [])]
+        return cls(**data)
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def collect_stats(db_path: Path) -> DbStats:
+    """Gather statistics from db_path without writing to it."""
+    db_path = Path(db_path)
+    if not db_path.exists():
+        raise FileNotFoundError(f"Database file not found: {db_path}")
+    started = time.perf_counter()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT_S)
+    try:
+        pragma = lambda name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+        stats = DbStats(
+            path=str(db_path),
+            collected=time.time(),
+            elapsed=0.0,
+            db_size=_file_size(db_path),
+            wal_size=_file_size(Path(str(db_path) + "-wal")),
+            page_size=pragma("page_size"),
+            page_count=pragma("page_count"),
+            freelist_count=pragma("freelist_count"),
+            journal_mode=pragma("journal_mode"),
+        )
+        objects = {name: (kind, table) for kind, name, table in conn.execute(
+            "SELECT type, name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')")}
+        for table in TRACKED_TABLES:
+            stats.rows[table] = (conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                                 if table in objects else None)
+        stats.btrees = _btree_stats(conn, objects)
+        stats.dbstat = bool(stats.btrees)
+    finally:
+        conn.close()
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def _btree_stats(conn: sqlite3.Connection, objects: dict[str, tuple[str, str]]) -> list[BtreeStats]:
+    try:
+        rows = conn.execute(
+            "SELECT name, pageno, ncell, payload, unused, pgsize FROM dbstat WHERE aggregate = TRUE").fetchall()
+    except sqlite3.OperationalError:
+        try:
+            # SQLite < 3.31 has no aggregate column
+            rows = conn.execute(
+                "SELECT name, COUNT(*), SUM(ncell), SUM(payload), SUM(unused), SUM(pgsize) "
+                "FROM dbstat GROUP BY name").fetchall()
+        except sqlite3.OperationalError:
+            return []  # built without SQLITE_ENABLE_DBSTAT_VTAB
+    btrees = []
+    for name, pages, entries, payload, unused, size in rows:
+        kind, table = objects.get(name, ("index" if name.startswith("sqlite_autoindex") else "table", name))
+        btrees.append(BtreeStats(name, table, kind, pages, entries, payload, unused, size))
+    return sorted(btrees, key=lambda b: b.size, reverse=True)
+
+
+class StatsCollector:
+    """TTL cache around collect_stats; safe to call from several threads."""
+
+    def __init__(self, db_path: Path, ttl: float = DEFAULT_TTL, cache_path: Path | None = None):
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._lock = threading.Lock()
+        self._last: DbStats | None = None
+
+    def _fresh(self, stats: DbStats | None) -> bool:
+        return (stats is not None and stats.path == str(self.db_path)
+                and time.time() - stats.collected < self.ttl)
+
+    def _load_cache(self) -> DbStats | None:
+        if self.cache_path is None or not self.cache_path.exists():
+            return None
+        try:
+            return DbStats.from_dict(json.loads(self.cache_path.read_text()))
+        except (ValueError, TypeError, KeyError):
+            return None
+
+    def _store_cache(self, stats: DbStats) -> None:
+        if self.cache_path is None:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        tmp.write_text(json.dumps(stats.to_dict()))
+        os.replace(tmp, self.cache_path)
+
+    def collect(self, force: bool = False) -> DbStats:
+        with self._lock:
+            if not force:
+                for candidate in (self._last, self._load_cache()):
+                    if self._fresh(candidate):
+                        candidate.cached = True
+                        self._last = candidate
+                        return candidate
+            stats = collect_stats(self.db_path)
+            self._last = stats
+            self._store_cache(stats)
+            return stats
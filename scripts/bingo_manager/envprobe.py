@@ -0,0 +1,191 @@
+"""
+Concurrent, cached environment checks for the GUI's status panel.
+
+The environment panel shows node, npm, the SQLite file, package.json,
+node_modules and .env. These used to be checked one after another on the Tk
+thread before the window existed. Each `--version` was a blocking
+subprocess with a 5s timeout, so a slow npm (a .cmd run through cmd.exe on
+Windows, a cold disk, an antivirus scan) delayed startup by seconds.
+
+EnvironmentProbe runs every check on a thread pool and hands each result
+to a callback as soon as it completes. The caller forwards that callback to
+the Tk thread (TaskContext.call), so the cheap file checks land at once and
+the version spawns fill in when they finish.
+
+Results are cached per probe under a key that is cheap to compute:
+
+- file probes use a stat signature (exists, mtime_ns, size). The check
+  re-runs only when the file has actually changed
+- tool probes go through ToolCache, which is keyed on PATH and the binary's
+  mtime and persisted in data/.toolchain.json (shared with the console
+  CLI). A warm start spawns nothing, even in a fresh GUI process
+
+force=True skips both caches, for the "Check Dependencies" button.
+"""
+
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+from .toolchain import ToolCache
+
+MAX_WORKERS = 6
+
+
+@dataclass
+class ProbeResult:
+    name: str
+    ok: bool | None           # None: present but needs attention (warning)
+    summary: str              # short text for the status label
+    detail: str = ""          # longer line for the console
+    data: dict[str, Any] = field(default_factory=dict)
+    elapsed: float = 0.0
+    cached: bool = False
+
+
+@dataclass
+class Probe:
+    name: str
+    check: Callable[[bool], ProbeResult]          # check(force)
+    key: Callable[[], Hashable] | None = None     # None: never cached here
+
+
+def stat_key(path: Path) -> tuple:
+    """Cheap change signature of a file or directory."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (False,)
+    return (True, st.st_mtime_ns, st.st_size)
+
+
+class EnvironmentProbe:
+    """Runs probes concurrently, streaming results and caching them by key."""
+
+    def __init__(self, probes: list[Probe], max_workers: int = MAX_WORKERS):
+        self.probes = list(probes)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.probes))),
+                                        thread_name_prefix="env-probe")
+        self._cache: dict[str, tuple[Hashable, ProbeResult]] = {}
+        self._lock = threading.Lock()
+
+    def _run_one(self, probe: Probe, force: bool) -> ProbeResult:
+        started = time.perf_counter()
+        key = probe.key() if probe.key else None
+        if key is not None and not force:
+            with self._lock:
+                hit = self._cache.get(probe.name)
+            if hit and hit[0] == key:
+                result = hit[1]
+                return ProbeResult(result.name, result.ok, result.summary, result.detail, result.data,
+                                   time.perf_counter() - started, cached=True)
+        try:
+            result = probe.check(force)
+        except Exception as e:
+            result = ProbeResult(probe.name, False, "Error checking", f"{probe.name}: {e}")
+        result.elapsed = time.perf_counter() - started
+        if key is not None:
+            with self._lock:
+                self._cache[probe.name] = (key, result)
+        return result
+
+    def run(self, on_result: Callable[[ProbeResult], None] | None = None,
+            force: bool = False) -> dict[str, ProbeResult]:
+        """Run every probe; on_result(result) is called in completion order."""
+        futures = [self._pool.submit(self._run_one, probe, force) for probe in self.probes]
+        results: dict[str, ProbeResult] = {}
+        for future in as_completed(futures):
+            result = future.result()
+            results[result.name] = result
+            if on_result:
+                on_result(result)
+        return results
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# --- the status panel's probes ---
+
+def tool_probe(name: str, tools: ToolCache, locate: Callable[[], str | None] | None = None,
+               title: str | None = None, prefix: str = "") -> Probe:
+    """`name --version`, cached by ToolCache (PATH + binary mtime)."""
+    title = title or name
+
+    def check(force: bool) -> ProbeResult:
+        if force:
+            tools.forget(name)
+        tool = tools.find(name, locate)
+        if tool is None:
+            return ProbeResult(name, False, "Not found", f"{title}: Not found in PATH")
+        cached = tool.version is not None
+        try:
+            version = tools.version(tool)
+        except Exception as e:
+            return ProbeResult(name, False, "Error running", f"{title}: {e} (at {tool.path})",
+                               {"path": tool.path})
+        return ProbeResult(name, True, f"{prefix}{version}", f"{title}: {version} (at {tool.path})",
+                           {"path": tool.path, "version": version}, cached=cached)
+    return Probe(name, check)
+
+
+def database_probe(path: Path) -> Probe:
+    def check(force: bool) -> ProbeResult:
+        if not path.exists():
+            return ProbeResult("sqlite", None, "Not initialized",
+                               "SQLite Database: Not initialized (run migrations first)")
+        st = path.stat()
+        size_kb = st.st_size / 1024
+        modified = datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d %H:%M')
+        return ProbeResult("sqlite", True, f"{size_kb:.1f}KB",
+                           f"SQLite Database: {size_kb:.1f}KB (last modified: {modified})",
+                           {"size_kb": size_kb, "modified": modified})
+    return Probe("sqlite", check, lambda: stat_key(path))
+
+
+def exists_probe(name: str, path: Path, missing: str) -> Probe:
+    def check(force: bool) -> ProbeResult:
+        if path.exists():
+            return ProbeResult(name, True, "Found", f"{name}: Found")
+        return ProbeResult(name, False, "Not found", f"{name}: {missing}")
+    return Probe(name, check, lambda: stat_key(path))
+
+
+def env_file_probe(path: Path) -> Probe:
+    def check(force: bool) -> ProbeResult:
+        if not path.exists():
+            return ProbeResult(".env", False, "Not found", ".env: Not found")
+        try:
+            mock = 'USE_MOCK_DB=true' in path.read_text(errors='replace')
+        except OSError as e:
+            return ProbeResult(".env", None, "Read error", f".env: {e}")
+        mode = "Mock DB Mode" if mock else "SQLite Mode"
+        return ProbeResult(".env", True, mode, f".env: Found ({mode})", {"mock": mock})
+    return Probe(".env", check, lambda: stat_key(path))
+
+
+def default_probes(root: Path, tools: ToolCache,
+                   locate: Callable[[str], str | None] | None = None) -> list[Probe]:
+    """node, npm, data/bingo.db, package.json, node_modules and .env under root."""
+    def finder(name: str) -> Callable[[], str | None] | None:
+        return (lambda: locate(name)) if locate else None
+
+    root = Path(root)
+    return [
+        tool_probe("node", tools, finder("node"), title="Node.js"),
+        tool_probe("npm", tools, finder("npm"), prefix="v"),
+        database_probe(root / 'data' / 'bingo.db'),
+        exists_probe("package.json", root / 'package.json', "Not found"),
+        exists_probe("node_modules", root / 'node_modules', "Not found (run 'npm install')"),
+        env_file_probe(root / '.env'),
+    ]
@@ -0,0 +1,516 @@
+"""
+Synthetic player load against a running Bingo server.
+
+Each virtual user follows the path a real player takes:
+
+1. POST /api/auth/register (falling back to /api/auth/login when the
+   account already exists from an earlier run)
+2. open a Socket.IO connection with the JWT and emit join_lobby, which
+   subscribes it to the lobby_<id> room
+3. GET /api/games/:lobbyId/games and POST /api/games/:id/join for a free
+   seat in a waiting game
+4. listen for game_started / number_called and POST
+   /api/games/:lobbyId/claim once every number on its card is drawn
+
+Users are spawned over a ramp (linear, or in --ramp-steps equal steps),
+then held for the configured duration. Everything runs in one asyncio loop
+with the stdlib clients from netclient, so the per-user cost is a socket, a
+reader task and a few small objects; 5k+ users fit in one process as long
+as the file descriptor limit allows (raise_fd_limit lifts the soft limit).
+
+Reported figures:
+
+- request latency percentiles per endpoint, with 4xx counted as
+  rejections (seat taken, game full) and transport failures / 5xx as errors
+- socket event lag: receive time minus the calledAt stamp the server puts
+  on number_called. Both clocks are the wall clock, so run the generator
+  on the server host (or a host with synced time) for meaningful numbers
+- broadcast spread: first-to-last receipt of the same number across users
+- generator loop lag, so a saturated load generator is not mistaken for a
+  slow server
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import random
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .netclient import ClientError, HttpPool, SocketIOClient
+
+DEFAULT_PASSWORD = "loadtest-password"
+DEFAULT_PREFIX = "lt"
+LOOP_TICK_S = 0.1
+SEAT_ATTEMPTS = 3
+MAX_SEAT = 15
+
+
+@dataclass
+class LoadConfig:
+    url: str
+    users: int = 100
+    ramp: float = 30.0
+    ramp_steps: int = 0  # 0 = linear ramp
+    duration: float = 60.0
+    lobbies: list[int] = field(default_factory=list)  # empty = every lobby from /api/lobbies
+    password: str = DEFAULT_PASSWORD
+    prefix: str = DEFAULT_PREFIX
+    join_seats: bool = True
+    start_games: bool = False
+    call_ms: int | None = None
+    poll: float = 0.0  # seconds between snapshot polls per user; 0 disables
+    http_connections: int = 256
+    seed: int | None = None
+
+    def start_offset(self, index: int) -> float:
+        """Seconds after the start at which user `index` is spawned."""
+        if self.users <= 1 or self.ramp <= 0:
+            return 0.0
+        if self.ramp_steps > 0:
+            step = index * self.ramp_steps // self.users
+            return self.ramp * step / self.ramp_steps
+        return self.ramp * index / self.users
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def distribution(values) -> dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1],
+    }
+
+
+class LoadMetrics:
+    """Shared counters; values are ms, stored in compact float arrays."""
+
+    def __init__(self):
+        self.latency: dict[str, array] = {}
+        self.requests: Counter = Counter()
+        self.rejections: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.events: Counter = Counter()
+        self.event_lag = array("d")
+        self.loop_lag = array("d")
+        self.call_gaps = array("d")
+        # (gameId, order) -> [first receipt, last receipt]; per-game last calledAt
+        self._receipts: dict[tuple, list[float]] = {}
+        self._last_called: dict[int, tuple[int, float]] = {}
+        self.connected = 0
+        self.peak_connected = 0
+        self.seated = 0
+        self.claims: Counter = Counter()
+
+    def record(self, endpoint: str, status: int | None, elapsed: float) -> None:
+        self.requests[endpoint] += 1
+        self.latency.setdefault(endpoint, array("d")).append(elapsed * 1000.0)
+        if status is None or status >= 500:
+            self.errors[endpoint] += 1
+        elif status >= 400:
+            self.rejections[endpoint] += 1
+
+    def number_called(self, data: dict, received_ms: float) -> None:
+        called_at = data.get("calledAt")
+        if not isinstance(called_at, (int, float)):
+            return
+        self.event_lag.append(received_ms - called_at)
+        key = (data.get("gameId"), data.get("order"))
+        seen = self._receipts.get(key)
+        if seen is None:
+            self._receipts[key] = [received_ms, received_ms]
+            game_id, order = key
+            previous = self._last_called.get(game_id)
+            if previous is not None and isinstance(order, int) and order == previous[0] + 1:
+                self.call_gaps.append(called_at - previous[1])
+            self._last_called[game_id] = (order, called_at)
+        else:
+            seen[1] = received_ms
+
+    def socket_up(self) -> None:
+        self.connected += 1
+        self.peak_connected = max(self.peak_connected, self.connected)
+
+    def socket_down(self) -> None:
+        self.connected -= 1
+
+    def spread(self) -> list[float]:
+        return [last - first for first, last in self._receipts.values()]
+
+
+@dataclass
+class LoadReport:
+    config: dict
+    started: float
+    elapsed: float
+    users: int
+    logged_in: int
+    peak_connected: int
+    seated: int
+    requests: dict[str, dict]
+    errors: dict[str, int]
+    rejections: dict[str, int]
+    events: dict[str, int]
+    claims: dict[str, int]
+    event_lag: dict[str, float]
+    broadcast_spread: dict[str, float]
+    call_interval: dict[str, float]
+    loop_lag: dict[str, float]
+    cpu_s: float
+    rss_kb: int | None
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    @property
+    def total_requests(self) -> int:
+        return sum(d["count"] for d in self.requests.values())
+
+    @property
+    def error_rate(self) -> float:
+        total = self.total_requests
+        return sum(self.errors.values()) / total if total else 0.0
+
+    def lines(self) -> list[str]:
+        out = [
+            f"Users: {self.logged_in}/{self.users} logged in, peak {self.peak_connected} sockets, "
+            f"{self.seated} seated",
+            f"Requests: {self.total_requests} in {self.elapsed:.1f}s "
+            f"({self.total_requests / self.elapsed if self.elapsed else 0:.1f}/s), "
+            f"errors {sum(self.errors.values())} ({self.error_rate:.2%}), "
+            f"rejections {sum(self.rejections.values())}",
+            "",
+            f"{'endpoint':<40} {'count':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'err':>5} {'4xx':>5}",
+        ]
+        for endpoint, d in sorted(self.requests.items()):
+            out.append(f"{endpoint:<40} {d['count']:>7} {d['p50']:>8.1f} {d['p95']:>8.1f} "
+                       f"{d['p99']:>8.1f} {d['max']:>8.1f} {self.errors.get(endpoint, 0):>5} "
+                       f"{self.rejections.get(endpoint, 0):>5}")
+        out.append("")
+        for label, d in (("number_called lag", self.event_lag),
+                         ("broadcast spread", self.broadcast_spread),
+                         ("call interval", self.call_interval),
+                         ("generator loop lag", self.loop_lag)):
+            if d.get("count"):
+                out.append(f"{label + ' (ms)':<26} p50 {d['p50']:8.1f}  p95 {d['p95']:8.1f}  "
+                           f"p99 {d['p99']:8.1f}  max {d['max']:8.1f}  n={d['count']}")
+            else:
+                out.append(f"{label + ' (ms)':<26} no samples")
+        if self.events:
+            out.append("Events: " + ", ".join(f"{k}={v}" for k, v in sorted(self.events.items())))
+        if self.claims:
+            out.append("Claims: " + ", ".join(f"{k}={v}" for k, v in sorted(self.claims.items())))
+        rss = f", RSS {self.rss_kb / 1024:.0f}MB" if self.rss_kb else ""
+        per_user = (self.rss_kb or 0) / self.users if self.users else 0
+        out.append(f"Generator: CPU {self.cpu_s:.1f}s{rss}"
+                   + (f" (~{per_user:.0f}KB/user)" if self.rss_kb else ""))
+        return out
+
+
+def raise_fd_limit(wanted: int) -> int | None:
+    """Lift the soft RLIMIT_NOFILE towards `wanted`; returns the new soft limit."""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+    if target > soft:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError):
+            pass
+    return soft
+
+
+def _usage() -> tuple[float, int | None]:
+    try:
+        import resource
+    except ImportError:
+        return time.process_time(), None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss
+
+
+class VirtualUser:
+    __slots__ = ("index", "lobby_id", "runner", "token", "user_id", "socket",
+                 "seat", "card", "claimed", "game_id")
+
+    def __init__(self, index: int, lobby_id: int, runner: LoadRunner):
+        self.index = index
+        self.lobby_id = lobby_id
+        self.runner = runner
+        self.token: str | None = None
+        self.user_id: int | None = None
+        self.socket: SocketIOClient | None = None
+        self.seat: int | None = None
+        self.card: list[int] | None = None
+        self.claimed = False
+        self.game_id: int | None = None
+
+    async def run(self, stop: asyncio.Event) -> None:
+        runner = self.runner
+        if not await self.login():
+            return
+        runner.logged_in += 1
+        self.socket = SocketIOClient(runner.config.url, auth={"token": self.token},
+                                     on_event=self.on_event, on_close=self.on_close)
+        try:
+            await self.socket.connect()
+        except (ClientError, OSError, asyncio.TimeoutError) as e:
+            runner.metrics.errors[f"socket connect ({type(e).__name__})"] += 1
+            self.socket = None
+            return
+        runner.metrics.socket_up()
+        try:
+            await self.socket.emit("join_lobby", {"lobbyId": self.lobby_id})
+            if runner.config.join_seats:
+                await self.take_seat()
+            if runner.config.poll > 0:
+                await self.poll(stop)
+            else:
+                await stop.wait()
+        finally:
+            await self.socket.close()
+
+    async def login(self) -> bool:
+        cfg = self.runner.config
+        name = f"{cfg.prefix}{self.index}"
+        email = f"{name}@loadtest.local"
+        response = await self.runner.request("POST", "/api/auth/register", "POST /api/auth/register",
+                                             {"email": email, "password": cfg.password, "username": name})
+        if response is not None and response.status == 409:
+            response = await self.runner.request("POST", "/api/auth/login", "POST /api/auth/login",
+                                                 {"identifier": email, "email": email,
+                                                  "password": cfg.password})
+        if response is None or not response.ok:
+            return False
+        body = response.json() or {}
+        self.token = body.get("token")
+        self.user_id = (body.get("user") or {}).get("id")
+        return bool(self.token)
+
+    async def take_seat(self) -> None:
+        runner = self.runner
+        response = await runner.request("GET", f"/api/games/{self.lobby_id}/games", "GET /api/games/:lobbyId/games")
+        if response is None or not response.ok:
+            return
+        games = [g for g in response.json() or []
+                 if g.get("status") == "waiting" and g.get("seatsTaken", 0) < g.get("maxSeats", MAX_SEAT)]
+        if not games:
+            runner.metrics.rejections["no waiting game"] += 1
+            return
+        rng = runner.rng
+        game = rng.choice(games)
+        for seat in rng.sample(range(1, MAX_SEAT + 1), SEAT_ATTEMPTS):
+            response = await runner.request("POST", f"/api/games/{game['id']}/join", "POST /api/games/:id/join",
+                                            {"seatNumber": seat}, token=self.token)
+            if response is not None and response.ok:
+                self.seat = seat
+                self.game_id = game["id"]
+                runner.metrics.seated += 1
+                return
+            if response is None or response.status >= 500:
+                return
+
+    async def poll(self, stop: asyncio.Event) -> None:
+        interval = self.runner.config.poll
+        # Spread polls so users spawned together do not poll in lockstep
+        delay = self.runner.rng.uniform(0, interval)
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+            await self.runner.request("GET", f"/api/games/{self.lobby_id}/snapshot",
+                                      "GET /api/games/:lobbyId/snapshot")
+            delay = interval
+
+    def on_close(self, reason: str) -> None:
+        metrics = self.runner.metrics
+        metrics.socket_down()
+        if reason != "client close" and not self.runner.stopping:
+            metrics.errors[f"socket dropped ({reason})"] += 1
+
+    def on_event(self, event: str, data) -> None:
+        metrics = self.runner.metrics
+        metrics.events[event] += 1
+        if not isinstance(data, dict):
+            return
+        if event == "number_called":
+            metrics.number_called(data, time.time() * 1000.0)
+            drawn = data.get("drawnNumbers")
+            if (self.card and not self.claimed and isinstance(drawn, list)
+                    and set(self.card).issubset(drawn)):
+                self.claimed = True
+                self.runner.spawn(self.claim())
+        elif event == "game_started" and self.seat is not None:
+            cards = data.get("cards")
+            if isinstance(cards, dict):
+                card = cards.get(str(self.seat))
+            elif isinstance(cards, list) and self.seat < len(cards):
+                card = cards[self.seat]
+            else:
+                card = None
+            self.card = card if isinstance(card, list) else None
+            self.claimed = False
+
+    async def claim(self) -> None:
+        response = await self.runner.request(
+            "POST", f"/api/games/{self.lobby_id}/claim", "POST /api/games/:lobbyId/claim",
+            {"userId": self.user_id, "seatNumber": self.seat, "numbers": self.card})
+        if response is None:
+            self.runner.metrics.claims["failed"] += 1
+        else:
+            self.runner.metrics.claims["accepted" if response.ok else "rejected"] += 1
+
+
+class LoadRunner:
+    def __init__(self, config: LoadConfig, log: Callable[[str], None] = print):
+        self.config = config
+        self.log = log
+        self.metrics = LoadMetrics()
+        self.rng = random.Random(config.seed)
+        self.http: HttpPool | None = None
+        self.logged_in = 0
+        self.stopping = False
+        self._background: set[asyncio.Task] = set()
+
+    def spawn(self, coro) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def request(self, method: str, path: str, endpoint: str, body=None, token: str | None = None):
+        """Timed request; returns None on transport failure (already counted)."""
+        started = time.perf_counter()
+        try:
+            response = await self.http.request(method, path, body, token=token)
+        except (ClientError, OSError, asyncio.TimeoutError, ValueError) as e:
+            self.metrics.record(endpoint, None, time.perf_counter() - started)
+            self.metrics.errors[f"{type(e).__name__}"] += 1
+            return None
+        self.metrics.record(endpoint, response.status, response.elapsed)
+        return response
+
+    async def _resolve_lobbies(self) -> list[int]:
+        if self.config.lobbies:
+            return list(self.config.lobbies)
+        response = await self.request("GET", "/api/lobbies", "GET /api/lobbies")
+        if response is None or not response.ok:
+            raise ClientError(f"Could not list lobbies from {self.config.url}/api/lobbies")
+        try:
+            ids = [int(lobby["id"]) for lobby in response.json() or []]
+        except (ValueError, KeyError, TypeError, json.JSONDecodeError):
+            ids = []
+        if not ids:
+            raise ClientError("Server returned no lobbies; seed the database or pass --lobby")
+        return ids
+
+    async def _loop_lag(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(LOOP_TICK_S)
+            self.metrics.loop_lag.append((time.perf_counter() - before - LOOP_TICK_S) * 1000.0)
+
+    async def _progress(self, stop: asyncio.Event, started: float, interval: float = 5.0) -> None:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+            except asyncio.TimeoutError:
+                m = self.metrics
+                self.log(f"  t+{time.monotonic() - started:5.0f}s  logged in {self.logged_in}, "
+                         f"sockets {m.connected}, seated {m.seated}, requests {sum(m.requests.values())}, "
+                         f"errors {sum(m.errors.values())}, events {sum(m.events.values())}")
+
+    async def _start_games(self, lobbies: list[int]) -> None:
+        for lobby_id in lobbies:
+            # Speed can only be set on a running game, so it follows the start
+            response = await self.request("POST", f"/api/games/{lobby_id}/start", "POST /api/games/:lobbyId/start")
+            if response is not None and not response.ok:
+                self.log(f"  lobby {lobby_id}: start refused ({response.status})")
+            if self.config.call_ms:
+                await self.request("POST", f"/api/games/{lobby_id}/speed", "POST /api/games/:lobbyId/speed",
+                                   {"ms": self.config.call_ms})
+
+    async def run(self) -> LoadReport:
+        cfg = self.config
+        raise_fd_limit(cfg.users * 2 + cfg.http_connections + 256)
+        cpu_before, _ = _usage()
+        self.http = HttpPool(cfg.url, size=cfg.http_connections)
+        stop = asyncio.Event()
+        started_wall = time.time()
+        started = time.monotonic()
+        helpers = [self.spawn(self._loop_lag(stop)), self.spawn(self._progress(stop, started))]
+        users: list[asyncio.Task] = []
+        try:
+            lobbies = await self._resolve_lobbies()
+            self.log(f"Ramping {cfg.users} users over {cfg.ramp:.0f}s across lobbies {lobbies}")
+            for index in range(cfg.users):
+                delay = started + cfg.start_offset(index) - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                user = VirtualUser(index, lobbies[index % len(lobbies)], self)
+                users.append(asyncio.get_running_loop().create_task(user.run(stop)))
+            self.log(f"All users spawned; holding for {cfg.duration:.0f}s")
+            if cfg.start_games:
+                await self._start_games(lobbies)
+            await asyncio.sleep(cfg.duration)
+        finally:
+            self.stopping = True
+            stop.set()
+            if users:
+                results = await asyncio.gather(*users, return_exceptions=True)
+                for result in results:
+                    if isinstance(result, Exception):
+                        self.metrics.errors[f"user task ({type(result).__name__})"] += 1
+            for task in list(self._background):
+                task.cancel()
+            await asyncio.gather(*helpers, *self._background, return_exceptions=True)
+            await self.http.close()
+        cpu_after, rss_kb = _usage()
+        m = self.metrics
+        return LoadReport(
+            config=dict(cfg.__dict__),
+            started=started_wall,
+            elapsed=time.monotonic() - started,
+            users=cfg.users,
+            logged_in=self.logged_in,
+            peak_connected=m.peak_connected,
+            seated=m.seated,
+            requests={endpoint: distribution(values) for endpoint, values in m.latency.items()},
+            errors=dict(m.errors),
+            rejections=dict(m.rejections),
+            events=dict(m.events),
+            claims=dict(m.claims),
+            event_lag=distribution(m.event_lag),
+            broadcast_spread=distribution(m.spread()),
+            call_interval=distribution(m.call_gaps),
+            loop_lag=distribution(m.loop_lag),
+            cpu_s=cpu_after - cpu_before,
+            rss_kb=rss_kb,
+        )
+
+
+def run_load(config: LoadConfig, log: Callable[[str], None] = print) -> LoadReport:
+    return asyncio.run(LoadRunner(config, log).run())
@@ -0,0 +1,230 @@
+"""
+Compression and retention for the session logs in debugging/.
+
+server/logger.ts opens a new server-<ts>.log and console-<ts>.log (plus a
+-w<N> suffix per cluster worker) on every boot and never rotates them, and
+the GUI spills its console to gui-console-<ts>.log. Pretty-printed JSON
+compresses about 10:1, so old sessions are worth keeping. They just should
+not be kept raw, and not forever.
+
+LogArchiver.run() does one pass:
+
+1. classify: a session log is active, and never touched, if it is the
+   newest file of its series (kind + worker), was modified within quiet_s,
+   or (on Linux) is open in some process according to /proc/*/fd. Everything
+   else is inactive
+2. compress: inactive .log files are gzipped on a thread pool (zlib
+   releases the GIL). Each goes to <name>.log.gz.tmp, keeps the original
+   mtime, is checked against the source size (gzip ISIZE) and that the
+   source did not change meanwhile, then renamed into place. Only after
+   that is the original removed
+3. retain: archives and inactive logs older than max_age are deleted, then
+   the oldest inactive files go until the series fit in budget_bytes.
+   Active logs are never deleted, even if they alone exceed the budget.
+   The sidecar query index (debugging/.index) of a deleted log goes too
+
+Archives stay readable: logtail.open_log() stream-decompresses them for
+`logs --file` and `logs query`, and MappedLog inflates them for the GUI
+viewer. The sidecar index is keyed on the uncompressed name, so an
+archived session can be queried without re-indexing.
+"""
+
+from __future__ import annotations
+import gzip
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from .logindex import index_path_for
+from .logtail import ARCHIVE_SUFFIX, gzip_size, is_archive
+from .proctree import open_paths
+
+SESSION_RE = re.compile(r"^(?P<kind>server|console|gui-console)-(?P<stamp>.+?)(?P<worker>-w\d+)?\.log(?:\.gz)?$")
+DEFAULT_BUDGET_MB = 512
+DEFAULT_MAX_AGE_DAYS = 30.0
+DEFAULT_WORKERS = 2
+QUIET_S = 10 * 60
+COMPRESS_LEVEL = 6
+COPY_CHUNK = 1024 * 1024
+TMP_SUFFIX = ".tmp"
+
+
+@dataclass
+class SessionLog:
+    path: Path
+    series: str
+    size: int          # bytes on disk
+    mtime: float
+    active: bool = False
+
+    @property
+    def archived(self) -> bool:
+        return is_archive(self.path)
+
+
+@dataclass
+class ArchiveReport:
+    compressed: list[tuple[str, int, int]] = field(default_factory=list)   # name, before, after
+    deleted: list[tuple[str, int, str]] = field(default_factory=list)      # name, size, reason
+    failed: list[tuple[str, str]] = field(default_factory=list)
+    active: list[str] = field(default_factory=list)
+    bytes_before: int = 0
+    bytes_after: int = 0
+    elapsed: float = 0.0
+
+    def describe(self) -> str:
+        saved = sum(before - after for _, before, after in self.compressed)
+        text = (f"{len(self.compressed)} compressed ({saved / 1048576:.1f}MB saved), {len(self.deleted)} deleted, "
+                f"{self.bytes_before / 1048576:.1f}MB → {self.bytes_after / 1048576:.1f}MB in {self.elapsed:.1f}s")
+        if self.failed:
+            text += f", {len(self.failed)} failed"
+        return text
+
+
+def scan(directory: Path, quiet_s: float = QUIET_S, now: float | None = None) -> list[SessionLog]:
+    """Every session log in directory, oldest first, with `active` filled in."""
+    now = time.time() if now is None else now
+    logs = []
+    for path in directory.iterdir():
+        match = SESSION_RE.match(path.name)
+        if not match:
+            continue
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        logs.append(SessionLog(path, match.group("kind") + (match.group("worker") or ""), st.st_size, st.st_mtime))
+    logs.sort(key=lambda log: (log.mtime, log.path.name))
+    newest: dict[str, SessionLog] = {}
+    for log in logs:
+        newest[log.series] = log
+    held = open_paths([log.path for log in logs if not log.archived]) or set()
+    for log in logs:
+        log.active = (log is newest[log.series] or now - log.mtime < quiet_s
+                      or os.path.realpath(log.path) in held)
+    return logs
+
+
+def compress(path: Path, level: int = COMPRESS_LEVEL) -> Path:
+    """Gzip path next to itself and remove it; returns the archive path."""
+    before = path.stat()
+    target = path.with_name(path.name + ARCHIVE_SUFFIX)
+    tmp = target.with_name(target.name + TMP_SUFFIX)
+    try:
+        with path.open("rb") as src, tmp.open("wb") as raw:
+            with gzip.GzipFile(filename=path.name, mode="wb", compresslevel=level, fileobj=raw,
+                               mtime=int(before.st_mtime)) as gz:
+                shutil.copyfileobj(src, gz, COPY_CHUNK)
+            raw.flush()
+            os.fsync(raw.fileno())
+        after = path.stat()
+        if (after.st_size, after.st_mtime_ns) != (before.st_size, before.st_mtime_ns):
+            raise OSError(f"{path.name} changed while being compressed")
+        if gzip_size(tmp) != before.st_size & 0xFFFFFFFF:
+            raise OSError(f"{tmp.name}: size check failed")
+        os.utime(tmp, ns=(before.st_atime_ns, before.st_mtime_ns))
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    path.unlink()
+    return target
+
+
+def _remove(log: SessionLog) -> None:
+    log.path.unlink(missing_ok=True)
+    index = index_path_for(log.path)
+    live = log.path.with_name(log.path.name.removesuffix(ARCHIVE_SUFFIX))
+    if not live.exists() and not live.with_name(live.name + ARCHIVE_SUFFIX).exists():
+        index.unlink(missing_ok=True)
+
+
+class LogArchiver:
+    """One configurable compress-and-retain pass over a log directory."""
+
+    def __init__(self, directory: Path, budget_bytes: int = DEFAULT_BUDGET_MB * 1048576,
+                 max_age_s: float = DEFAULT_MAX_AGE_DAYS * 86400, workers: int = DEFAULT_WORKERS,
+                 quiet_s: float = QUIET_S, level: int = COMPRESS_LEVEL):
+        self.directory = Path(directory)
+        self.budget_bytes = budget_bytes
+        self.max_age_s = max_age_s
+        self.workers = max(1, workers)
+        self.quiet_s = quiet_s
+        self.level = level
+
+    def _sweep_tmp(self) -> None:
+        # Left behind by a pass that was killed mid-write (a fresh one may be another pass's)
+        for tmp in self.directory.glob(f"*{ARCHIVE_SUFFIX}{TMP_SUFFIX}"):
+            try:
+                if time.time() - tmp.stat().st_mtime > self.quiet_s:
+                    tmp.unlink()
+            except OSError:
+                pass
+
+    def run(self, dry_run: bool = False, log: Callable[[str], None] | None = None,
+            should_stop: Callable[[], bool] | None = None) -> ArchiveReport:
+        started = time.monotonic()
+        report = ArchiveReport()
+        if not self.directory.is_dir():
+            return report
+        if not dry_run:
+            self._sweep_tmp()
+        logs = scan(self.directory, self.quiet_s)
+        report.bytes_before = sum(item.size for item in logs)
+        report.active = [item.path.name for item in logs if item.active]
+
+        pending = [item for item in logs if not item.active and not item.archived]
+        if dry_run:
+            report.compressed = [(item.path.name, item.size, 0) for item in pending]
+        elif pending:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="log-archive") as pool:
+                futures = {pool.submit(compress, item.path, self.level): item for item in pending}
+                for future in as_completed(futures):
+                    item = futures[future]
+                    if future.cancelled():
+                        continue
+                    try:
+                        target = future.result()
+                    except Exception as e:
+                        report.failed.append((item.path.name, str(e)))
+                        if log:
+                            log(f"⚠️ {item.path.name}: {e}")
+                        continue
+                    before, item.path, item.size = item.size, target, target.stat().st_size
+                    report.compressed.append((target.name, before, item.size))
+                    if log:
+                        log(f"🗜️ {target.name}: {before / 1048576:.1f}MB → {item.size / 1048576:.1f}MB")
+                    if should_stop and should_stop():
+                        for other in futures:
+                            other.cancel()
+
+        now = time.time()
+        kept = []
+        for item in logs:
+            if not item.active and now - item.mtime > self.max_age_s:
+                report.deleted.append((item.path.name, item.size, f"older than {self.max_age_s / 86400:g} days"))
+            else:
+                kept.append(item)
+        total = sum(item.size for item in kept)
+        for item in list(kept):  # oldest first
+            if total <= self.budget_bytes:
+                break
+            if item.active:
+                continue
+            kept.remove(item)
+            total -= item.size
+            report.deleted.append((item.path.name, item.size, f"over the {self.budget_bytes / 1048576:g}MB budget"))
+        if not dry_run:
+            by_name = {item.path.name: item for item in logs}
+            for name, _, reason in report.deleted:
+                _remove(by_name[name])
+                if log:
+                    log(f"🗑️ {name} ({reason})")
+        report.bytes_after = total
+        report.elapsed = time.monotonic() - started
+        return report
@@ -0,0 +1,301 @@
+"""
+Indexed structured queries over debugging/server-*.log.
+
+server/logger.ts writes one record per console call:
+
+    [2025-08-30T06:40:00.123Z] [LOG] [GAME ENGINE] Emitting player_won event: {
+      "gameId": 12,
+      ...
+    }
+
+Objects are JSON.stringify'd with indentation, so a record spans every line
+up to the next "[timestamp] [LEVEL]" header. Each log gets a sidecar SQLite
+index in debugging/.index/ holding the byte offset, length, timestamp and
+level of every record, plus an inverted table of tokens (lobby/game/user/seat
+ids and snake_case event names). Queries resolve to offsets in the sidecar
+and then seek straight to the matching records in the log.
+
+The index is updated incrementally: only bytes appended since the last run
+are parsed, starting again from the last record in case it gained more
+continuation lines. Offsets are into the uncompressed text, so the sidecar
+of server-<ts>.log keeps serving server-<ts>.log.gz once the archiver has
+compressed it; records are then read with forward seeks through the gzip
+stream.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from .logtail import ARCHIVE_SUFFIX, log_size, open_log
+
+INDEX_VERSION = "1"
+INDEX_DIRNAME = ".index"
+SIGNATURE_BYTES = 1024
+READ_CHUNK = 4 * 1024 * 1024
+
+HEADER_RE = re.compile(rb"^\[(\d{4}-\d\d-\d\dT[0-9:.]+Z?)\] \[([A-Z]+)\] ")
+ID_RE = re.compile(r"\b(lobby|game|user|seat)(?:_?id)?[\"']?\s*[:=_ #]\s*[\"']?(\d+)", re.IGNORECASE)
+EVENT_RE = re.compile(r"\b[a-z][a-z0-9]*(?:_[a-z0-9]+)+\b")
+RELATIVE_RE = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+RELATIVE_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS records (
+    offset INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL,
+    ts INTEGER,
+    level TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_ts ON records (ts);
+CREATE INDEX IF NOT EXISTS records_level_ts ON records (level, ts);
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    PRIMARY KEY (token, offset)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tokens_offset ON tokens (offset);
+"""
+
+
+@dataclass
+class LogRecord:
+    file: str
+    offset: int
+    timestamp: str
+    level: str
+    message: str
+
+    def payload(self):
+        """Reassemble the JSON object logged after the message text, if any."""
+        for opener in ("{", "["):
+            start = self.message.find(opener)
+            while start != -1:
+                try:
+                    value, _ = json.JSONDecoder().raw_decode(self.message, start)
+                    return value
+                except ValueError:
+                    start = self.message.find(opener, start + 1)
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "file": self.file,
+            "offset": self.offset,
+            "timestamp": self.timestamp,
+            "level": self.level,
+            "message": self.message,
+            "payload": self.payload(),
+        }
+
+    def __str__(self) -> str:
+        return f"[{self.timestamp}] [{self.level}] {self.message}"
+
+
+def parse_time(value: str, now: datetime | None = None) -> int:
+    """Parse an ISO timestamp or a relative age such as 15m / 2h / 1d to epoch ms."""
+    value = value.strip()
+    match = RELATIVE_RE.match(value)
+    if match:
+        now = now or datetime.now(timezone.utc)
+        delta = timedelta(**{RELATIVE_UNITS[match.group(2)]: float(match.group(1))})
+        return int((now - delta).timestamp() * 1000)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def extract_tokens(message: str) -> set[str]:
+    """Tokens indexed for a record: normalised ids (lobby:3) and event names."""
+    tokens = {f"{key.lower()}:{num}" for key, num in ID_RE.findall(message)}
+    tokens.update(EVENT_RE.findall(message))
+    return tokens
+
+
+def normalize_id(value: str) -> str:
+    """Accept lobby:3, lobby=3, lobbyId:3 or lobby_3 for --id filters."""
+    match = ID_RE.match(value.replace("=", ":"))
+    if not match:
+        raise ValueError(f"Unrecognised id filter '{value}' (expected e.g. lobby:3 or game:12)")
+    return f"{match.group(1).lower()}:{match.group(2)}"
+
+
+def index_path_for(log_path: Path) -> Path:
+    name = log_path.name.removesuffix(ARCHIVE_SUFFIX)  # an archive shares its log's index
+    return log_path.parent / INDEX_DIRNAME / f"{name}.sqlite"
+
+
+class LogIndex:
+    """Sidecar index for a single log file."""
+
+    def __init__(self, log_path: Path):
+        self.log_path = log_path
+        self.index_path = index_path_for(log_path)
+        self.index_path.parent.mkdir(exist_ok=True)
+        self.conn = sqlite3.connect(str(self.index_path))
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "LogIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _meta(self) -> dict[str, str]:
+        return dict(self.conn.execute("SELECT key, value FROM meta"))
+
+    def _signature(self, f) -> str:
+        f.seek(0)
+        return hashlib.sha1(f.read(SIGNATURE_BYTES)).hexdigest()
+
+    def _reset(self) -> None:
+        self.conn.executescript("DELETE FROM records; DELETE FROM tokens; DELETE FROM meta;")
+
+    def update(self, rebuild: bool = False) -> int:
+        """Bring the index up to date with the log. Returns bytes parsed."""
+        size = log_size(self.log_path)
+        meta = self._meta()
+        with open_log(self.log_path) as f:
+            head_len = min(size, SIGNATURE_BYTES)
+            indexed_until = int(meta.get("indexed_until", 0))
+            stale = (
+                rebuild
+                or meta.get("version") != INDEX_VERSION
+                or size < indexed_until
+                # The head keeps changing until the file is SIGNATURE_BYTES long
+                or (indexed_until >= SIGNATURE_BYTES and meta.get("signature") != self._signature(f))
+            )
+            resume = int(meta.get("resume", 0))
+            if stale:
+                self._reset()
+                resume = 0
+            elif size == indexed_until:
+                return 0
+            with self.conn:
+                self.conn.execute("DELETE FROM records WHERE offset >= ?", (resume,))
+                self.conn.execute("DELETE FROM tokens WHERE offset >= ?", (resume,))
+                end, last_start = self._parse_from(f, resume)
+                signature = self._signature(f) if head_len else ""
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [("version", INDEX_VERSION), ("indexed_until", str(end)),
+                     ("resume", str(last_start)), ("signature", signature)],
+                )
+        return end - resume
+
+    def _parse_from(self, f, start: int) -> tuple[int, int]:
+        """Parse complete lines from `start`; return (end offset, last record start)."""
+        f.seek(start)
+        pos = start
+        carry = b""
+        current: list | None = None  # [offset, ts_text, level, body_parts]
+        last_start = start
+        records: list[tuple] = []
+        tokens: list[tuple] = []
+
+        def flush(end: int) -> None:
+            offset, ts_text, level, parts = current
+            message = b"".join(parts).decode("utf-8", errors="ignore")
+            try:
+                ts = parse_time(ts_text)
+            except ValueError:
+                ts = None
+            records.append((offset, end - offset, ts, level))
+            tokens.extend((tok, offset) for tok in extract_tokens(message))
+            if len(records) >= 5000:
+                self._flush_rows(records, tokens)
+
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            data = carry + chunk
+            cut = data.rfind(b"\n")
+            if cut == -1:
+                carry = data
+                continue
+            carry = data[cut + 1:]
+            for line in data[:cut + 1].splitlines(keepends=True):
+                match = HEADER_RE.match(line)
+                if match:
+                    if current is not None:
+                        flush(pos)
+                    current = [pos, match.group(1).decode(), match.group(2).decode(), [line[match.end():]]]
+                    last_start = pos
+                elif current is not None:
+                    current[3].append(line)
+                pos += len(line)
+        if current is not None:
+            flush(pos)
+        self._flush_rows(records, tokens)
+        return pos, last_start
+
+    def _flush_rows(self, records: list[tuple], tokens: list[tuple]) -> None:
+        self.conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)", records)
+        self.conn.executemany("INSERT OR IGNORE INTO tokens VALUES (?, ?)", tokens)
+        records.clear()
+        tokens.clear()
+
+    def query(self, since: int | None = None, until: int | None = None,
+              levels: list[str] | None = None, tokens: list[str] | None = None) -> Iterator[LogRecord]:
+        clauses: list[str] = []
+        params: list = []
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if levels:
+            clauses.append(f"level IN ({','.join('?' * len(levels))})")
+            params.extend(level.upper() for level in levels)
+        for token in tokens or []:
+            clauses.append("offset IN (SELECT offset FROM tokens WHERE token = ?)")
+            params.append(token)
+        sql = "SELECT offset, length FROM records"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY offset"
+        with open_log(self.log_path) as f:
+            for offset, length in self.conn.execute(sql, params):
+                f.seek(offset)
+                raw = f.read(length)
+                match = HEADER_RE.match(raw)
+                if not match:
+                    continue
+                yield LogRecord(
+                    file=self.log_path.name,
+                    offset=offset,
+                    timestamp=match.group(1).decode(),
+                    level=match.group(2).decode(),
+                    message=raw[match.end():].decode("utf-8", errors="ignore").rstrip("\r\n"),
+                )
+
+
+def query_logs(log_paths: list[Path], since: int | None = None, until: int | None = None,
+               levels: list[str] | None = None, tokens: list[str] | None = None,
+               grep: str | None = None, limit: int | None = None,
+               rebuild: bool = False) -> Iterator[LogRecord]:
+    """Update each log's sidecar index and yield matching records in file order."""
+    emitted = 0
+    for path in log_paths:
+        with LogIndex(path) as index:
+            index.update(rebuild=rebuild)
+            for record in index.query(since, until, levels, tokens):
+                if grep and grep not in record.message:
+                    continue
+                yield record
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    return
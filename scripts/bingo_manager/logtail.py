@@ -0,0 +1,184 @@
+"""
+Seek-based log tailing and follow mode for debugging/server-*.log.
+
+server/logger.ts appends pretty-printed JSON on every console.log, so session
+logs grow to hundreds of MB. Nothing here reads a file front to back:
+- tail_lines() walks backwards from EOF in fixed-size blocks until it has
+  seen enough newlines, so the cost is proportional to the lines requested.
+- LogFollower remembers its byte offset and only reads what was appended.
+  When logger.ts starts a new session file it switches to it without
+  re-reading the old one.
+
+Old sessions may have been gzipped in place by the log archiver
+(server-<ts>.log.gz). open_log() and log_size() hide the difference for the
+readers here and in logindex/logview: an archive is stream-decompressed,
+and its uncompressed size comes from the gzip trailer.
+"""
+
+from __future__ import annotations
+import gzip
+import os
+import struct
+import time
+from collections import deque
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+
+BLOCK_SIZE = 64 * 1024
+SERVER_LOG_PATTERN = "server-*.log"
+ARCHIVE_SUFFIX = ".gz"
+
+
+def is_archive(path: Path) -> bool:
+    return Path(path).name.endswith(ARCHIVE_SUFFIX)
+
+
+def open_log(path: Path) -> BinaryIO:
+    """Binary reader for a log or its .gz archive (decompressed on the fly)."""
+    return gzip.open(path, "rb") if is_archive(path) else Path(path).open("rb")
+
+
+def gzip_size(path: Path) -> int:
+    """Uncompressed size recorded in a gzip trailer (ISIZE, i.e. modulo 4GB)."""
+    with Path(path).open("rb") as f:
+        f.seek(-4, os.SEEK_END)
+        return struct.unpack("<I", f.read(4))[0]
+
+
+def log_size(path: Path) -> int:
+    """Uncompressed size of a log or its archive."""
+    return gzip_size(path) if is_archive(path) else Path(path).stat().st_size
+
+
+def session_logs(directory: Path, pattern: str = SERVER_LOG_PATTERN) -> list[Path]:
+    """Every log matching pattern, live or archived, oldest session first."""
+    paths = list(directory.glob(pattern)) + list(directory.glob(pattern + ARCHIVE_SUFFIX))
+    return sorted(paths, key=lambda p: p.name)
+
+
+def newest_log(directory: Path, pattern: str = SERVER_LOG_PATTERN) -> Path | None:
+    """Return the most recently modified log matching pattern, if any."""
+    newest: Path | None = None
+    newest_mtime = -1.0
+    for path in directory.glob(pattern):
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            continue
+        if mtime > newest_mtime:
+            newest, newest_mtime = path, mtime
+    return newest
+
+
+def tail_lines(path: Path, count: int, block_size: int = BLOCK_SIZE) -> list[str]:
+    """Return the last `count` lines of `path` without reading the whole file."""
+    if count <= 0:
+        return []
+    if is_archive(path):
+        # gzip cannot seek backwards cheaply; stream it, keeping only the tail
+        with open_log(path) as f:
+            kept = deque(f, maxlen=count)
+        return [line.decode("utf-8", errors="ignore").rstrip("\r\n") for line in kept]
+    blocks: list[bytes] = []
+    newlines = 0
+    with path.open("rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        # One newline more than requested guarantees the first kept line is whole
+        while pos > 0 and newlines <= count:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            block = f.read(size)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+    data = b"".join(reversed(blocks))
+    return data.decode("utf-8", errors="ignore").splitlines()[-count:]
+
+
+class LogFollower:
+    """Incrementally read new lines from the newest log in a directory.
+
+    poll() never blocks: it returns whatever complete lines were appended
+    since the previous call. A trailing partial line is buffered until its
+    newline arrives. Truncation restarts from offset 0, and a newer session
+    file (logger.ts rotates per boot) is picked up after the current one has
+    been drained.
+    """
+
+    def __init__(self, directory: Path, pattern: str = SERVER_LOG_PATTERN,
+                 path: Path | None = None, from_end: bool = True,
+                 on_switch: Callable[[Path], None] | None = None):
+        self.directory = directory
+        self.pattern = pattern
+        self.on_switch = on_switch
+        self.path: Path | None = None
+        self._fh = None
+        self._pending = b""
+        target = path or newest_log(directory, pattern)
+        if target is not None:
+            self._open(target, from_end)
+
+    def _open(self, path: Path, from_end: bool) -> None:
+        self.close()
+        self.path = path
+        self._fh = path.open("rb")
+        if from_end:
+            self._fh.seek(0, os.SEEK_END)
+        self._pending = b""
+        if self.on_switch:
+            self.on_switch(path)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def _read_new(self) -> list[str]:
+        assert self._fh is not None and self.path is not None
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return []
+        if size < self._fh.tell():
+            # File was truncated or replaced in place
+            self._fh.seek(0)
+            self._pending = b""
+        chunk = self._fh.read()
+        if not chunk:
+            return []
+        data = self._pending + chunk
+        cut = data.rfind(b"\n")
+        if cut == -1:
+            self._pending = data
+            return []
+        self._pending = data[cut + 1:]
+        return data[:cut].decode("utf-8", errors="ignore").splitlines()
+
+    def poll(self) -> list[str]:
+        """Return complete lines appended since the last poll."""
+        lines: list[str] = []
+        if self._fh is not None:
+            lines.extend(self._read_new())
+        latest = newest_log(self.directory, self.pattern)
+        # Session files are named by start time, so only ever move forward
+        if latest is not None and (self.path is None or latest.name > self.path.name):
+            if self._fh is not None:
+                # Drain what the old session wrote before it went quiet
+                lines.extend(self._read_new())
+                if self._pending:
+                    lines.append(self._pending.decode("utf-8", errors="ignore"))
+            self._open(latest, from_end=False)
+            lines.extend(self._read_new())
+        return lines
+
+    def follow(self, interval: float = 0.5) -> Iterator[str]:
+        """Yield lines forever, polling every `interval` seconds when idle."""
+        try:
+            while True:
+                lines = self.poll()
+                if not lines:
+                    time.sleep(interval)
+                    continue
+                yield from lines
+        finally:
+            self.close()
@@ -0,0 +1,143 @@
+"""
+Memory-mapped, line-indexed access to large log files for the GUI viewer.
+
+The GUI never loads a whole log: it maps the file and asks for pages of
+lines around a byte offset. Line numbers come from a compact block index
+(newline count before every 64 KB block) that build_index() fills in on a
+background task; it is only needed for "line N of M" and goto-line, so the
+first page can be shown before indexing finishes. Searches run over the
+mapping in bounded chunks so they can report progress and be cancelled.
+
+An archived session (.log.gz) is stream-decompressed into an anonymous
+temporary file, which is then mapped like any other log. The temporary
+file disappears when the view is closed. Opening one takes time
+proportional to its size, so the GUI does it on a task.
+"""
+
+from __future__ import annotations
+import mmap
+import shutil
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Callable
+
+from .logtail import is_archive, open_log
+
+BLOCK_SIZE = 64 * 1024
+SEARCH_CHUNK = 8 * 1024 * 1024
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+INFLATE_CHUNK = 1024 * 1024
+
+
+class MappedLog:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        if is_archive(self.path):
+            self._file = tempfile.TemporaryFile(prefix="bingo-log-")
+            with open_log(self.path) as src:
+                shutil.copyfileobj(src, self._file, INFLATE_CHUNK)
+            self._file.flush()
+            self.size = self._file.tell()
+        else:
+            self._file = self.path.open("rb")
+            self.size = self.path.stat().st_size
+        # mmap cannot map an empty file
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self.block_lines = array("Q")  # newlines before the start of each block
+        self.indexed_bytes = 0
+        self.total_lines: int | None = None if self.size else 0
+
+    def close(self) -> None:
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self._file.close()
+
+    # --- Line index -----------------------------------------------------
+
+    def build_index(self, should_stop: Callable[[], bool] | None = None,
+                    on_progress: Callable[[float], None] | None = None) -> int | None:
+        """Count newlines per block; returns total lines (None if stopped)."""
+        if self.mm is None:
+            return 0
+        lines = 0
+        for start in range(0, self.size, BLOCK_SIZE):
+            self.block_lines.append(lines)
+            lines += self.mm[start:start + BLOCK_SIZE].count(b"\n")
+            self.indexed_bytes = min(start + BLOCK_SIZE, self.size)
+            if (start // BLOCK_SIZE) % 256 == 255:
+                if should_stop and should_stop():
+                    return None
+                if on_progress:
+                    on_progress(self.indexed_bytes / self.size)
+        # A final line without a trailing newline still counts
+        if self.mm[self.size - 1:self.size] != b"\n":
+            lines += 1
+        self.total_lines = lines
+        return lines
+
+    def line_number(self, offset: int) -> int | None:
+        """0-based line containing offset, or None while that part is unindexed."""
+        if self.mm is None:
+            return 0
+        if offset >= self.indexed_bytes and self.total_lines is None:
+            return None
+        block = min(offset // BLOCK_SIZE, len(self.block_lines) - 1)
+        start = block * BLOCK_SIZE
+        return self.block_lines[block] + self.mm[start:offset].count(b"\n")
+
+    # --- Paging ---------------------------------------------------------
+
+    def line_start(self, offset: int) -> int:
+        if self.mm is None or offset <= 0:
+            return 0
+        return self.mm.rfind(b"\n", 0, offset) + 1
+
+    def read_lines(self, offset: int, count: int) -> tuple[bytes, int, int]:
+        """Read up to count lines from offset; returns (data, end offset, lines)."""
+        if self.mm is None:
+            return b"", 0, 0
+        pos = offset
+        read = 0
+        while read < count and pos < self.size:
+            nl = self.mm.find(b"\n", pos, min(self.size, offset + MAX_PAGE_BYTES))
+            pos = self.size if nl == -1 else nl + 1
+            read += 1
+            if nl == -1 or pos - offset >= MAX_PAGE_BYTES:
+                pos = min(pos, offset + MAX_PAGE_BYTES)
+                break
+        return self.mm[offset:pos], pos, read
+
+    def read_lines_before(self, offset: int, count: int) -> tuple[bytes, int, int]:
+        """Read up to count whole lines ending at offset; returns (data, start, lines)."""
+        if self.mm is None:
+            return b"", 0, 0
+        pos = offset
+        read = 0
+        while read < count and pos > 0 and offset - pos < MAX_PAGE_BYTES:
+            pos = self.mm.rfind(b"\n", 0, pos - 1) + 1
+            read += 1
+        return self.mm[pos:offset], pos, read
+
+    # --- Search ---------------------------------------------------------
+
+    def find(self, needle: bytes, start: int = 0,
+             should_stop: Callable[[], bool] | None = None,
+             on_progress: Callable[[float], None] | None = None) -> int:
+        """Offset of the next occurrence of needle at or after start, else -1."""
+        if self.mm is None or not needle:
+            return -1
+        pos = max(0, start)
+        while pos < self.size:
+            # Overlap chunks so a match straddling the boundary is not missed
+            end = min(self.size, pos + SEARCH_CHUNK + len(needle) - 1)
+            found = self.mm.find(needle, pos, end)
+            if found != -1:
+                return found
+            pos += SEARCH_CHUNK
+            if should_stop and should_stop():
+                return -1
+            if on_progress:
+                on_progress(min(pos, self.size) / self.size)
+        return -1
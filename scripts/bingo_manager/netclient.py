@@ -0,0 +1,301 @@
+"""
+Minimal asyncio HTTP/1.1 and Socket.IO clients for load generation.
+
+Only the standard library is used, and per-client state is kept to a
+StreamReader/StreamWriter pair and one reader task, so a single process can
+hold thousands of Socket.IO connections. The protocol support is just what
+server/index.ts needs:
+
+- HttpPool: keep-alive HTTP/1.1 connections shared by many virtual users,
+  JSON bodies, Content-Length or chunked responses.
+- SocketIOClient: Engine.IO v4 straight over a WebSocket (no long-polling
+  upgrade), Socket.IO v5 connect with an auth payload, emit, event
+  callbacks and server-initiated ping/pong.
+"""
+
+from __future__ import annotations
+import asyncio
+import base64
+import json
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+HTTP_TIMEOUT_S = 30.0
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class ClientError(Exception):
+    pass
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    body: bytes
+    elapsed: float
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+def split_url(url: str) -> tuple[str, int, str]:
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "ws"):
+        raise ClientError(f"Only plain http:// targets are supported, got {url}")
+    return parts.hostname or "127.0.0.1", parts.port or 80, parts.path.rstrip("/")
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> tuple[int, dict[str, str]]:
+    raw = await reader.readuntil(b"\r\n\r\n")
+    if len(raw) > MAX_HEADER_BYTES:
+        raise ClientError("Response headers too large")
+    lines = raw.decode("latin-1").split("\r\n")
+    try:
+        status = int(lines[0].split(" ", 2)[1])
+    except (IndexError, ValueError):
+        raise ClientError(f"Malformed status line: {lines[0]!r}")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+    return status, headers
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> bytes:
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        parts = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                await reader.readuntil(b"\r\n")
+                return b"".join(parts)
+            parts.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    length = int(headers.get("content-length", 0))
+    return await reader.readexactly(length) if length else b""
+
+
+class HttpPool:
+    """A bounded pool of keep-alive connections to one host."""
+
+    def __init__(self, base_url: str, size: int = 64, timeout: float = HTTP_TIMEOUT_S):
+        self.host, self.port, self.prefix = split_url(base_url)
+        self.timeout = timeout
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def request(self, method: str, path: str, body: Any = None,
+                      token: str | None = None) -> HttpResponse:
+        async with self._slots:
+            # A pooled connection may have been closed by the server's keep-alive
+            # timeout; retry once on a fresh connection in that case
+            for attempt in (0, 1):
+                reused = bool(self._idle)
+                conn = self._idle.pop() if reused else await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout)
+                try:
+                    response, keep = await asyncio.wait_for(
+                        self._send(conn, method, path, body, token), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    conn[1].close()
+                    if reused and attempt == 0:
+                        continue
+                    raise ClientError(f"{method} {path}: {e.__class__.__name__}") from e
+                except BaseException:
+                    conn[1].close()
+                    raise
+                if keep:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                return response
+        raise AssertionError("unreachable")
+
+    async def _send(self, conn, method: str, path: str, body: Any,
+                    token: str | None) -> tuple[HttpResponse, bool]:
+        reader, writer = conn
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = [f"{method} {self.prefix}{path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                "Connection: keep-alive", "Accept: application/json"]
+        if payload:
+            head += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+        elif method in ("POST", "PUT", "PATCH"):
+            head.append("Content-Length: 0")
+        if token:
+            head.append(f"Authorization: Bearer {token}")
+        started = time.perf_counter()
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+        status, headers = await _read_headers(reader)
+        data = await _read_body(reader, headers)
+        keep = headers.get("connection", "").lower() != "close"
+        return HttpResponse(status, data, time.perf_counter() - started), keep
+
+    async def close(self) -> None:
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+# --- WebSocket / Engine.IO / Socket.IO ------------------------------------
+
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+def _mask(payload: bytes, key: bytes) -> bytes:
+    if not payload:
+        return payload
+    n = len(payload)
+    repeated = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(n, "big")
+
+
+class SocketIOClient:
+    """One Socket.IO connection; handlers are plain callables (event, data)."""
+
+    def __init__(self, base_url: str, auth: dict | None = None,
+                 on_event: Callable[[str, Any], None] | None = None,
+                 on_close: Callable[[str], None] | None = None):
+        self.host, self.port, _ = split_url(base_url)
+        self.auth = auth
+        self.on_event = on_event
+        self.on_close = on_close
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+        self.sid: str | None = None
+        self.connected = False
+        self._task: asyncio.Task | None = None
+
+    async def connect(self, timeout: float = HTTP_TIMEOUT_S) -> None:
+        await asyncio.wait_for(self._connect(), timeout)
+        self._task = asyncio.get_running_loop().create_task(self._read_loop())
+
+    async def _connect(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((
+            f"GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode("latin-1"))
+        await self.writer.drain()
+        status, _ = await _read_headers(self.reader)
+        if status != 101:
+            raise ClientError(f"WebSocket upgrade refused ({status})")
+        opened = await self._recv_text()
+        if not opened.startswith("0"):
+            raise ClientError(f"Unexpected Engine.IO open packet {opened[:40]!r}")
+        await self._send_text("40" + (json.dumps(self.auth) if self.auth else ""))
+        while True:
+            packet = await self._recv_text()
+            if packet.startswith("40"):
+                self.sid = json.loads(packet[2:] or "{}").get("sid")
+                self.connected = True
+                return
+            if packet.startswith("44"):
+                message = json.loads(packet[2:] or "{}").get("message", "connect_error")
+                raise ClientError(f"Socket.IO connect refused: {message}")
+            if packet == "2":
+                await self._send_text("3")
+
+    async def emit(self, event: str, data: Any = None) -> None:
+        await self._send_text("42" + json.dumps([event] if data is None else [event, data]))
+
+    async def close(self) -> None:
+        if self.writer is None:
+            return
+        if self._task is not None:
+            self._task.cancel()
+        try:
+            if self.connected:
+                await self._send_text("41")
+            await self._send_frame(OP_CLOSE, struct.pack(">H", 1000))
+        except (ConnectionError, RuntimeError):
+            pass
+        self.writer.close()
+        self.connected = False
+
+    # --- framing ------------------------------------------------------
+
+    async def _send_frame(self, opcode: int, payload: bytes) -> None:
+        key = os.urandom(4)
+        n = len(payload)
+        if n < 126:
+            header = struct.pack(">BB", 0x80 | opcode, 0x80 | n)
+        elif n < 1 << 16:
+            header = struct.pack(">BBH", 0x80 | opcode, 0x80 | 126, n)
+        else:
+            header = struct.pack(">BBQ", 0x80 | opcode, 0x80 | 127, n)
+        self.writer.write(header + key + _mask(payload, key))
+        await self.writer.drain()
+
+    async def _send_text(self, text: str) -> None:
+        await self._send_frame(OP_TEXT, text.encode())
+
+    async def _recv_frame(self) -> tuple[int, bytes]:
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", await self.reader.readexactly(8))[0]
+        key = await self.reader.readexactly(4) if second & 0x80 else None
+        payload = await self.reader.readexactly(length)
+        if key:
+            payload = _mask(payload, key)
+        return first, payload
+
+    async def _recv_text(self) -> str:
+        parts: list[bytes] = []
+        while True:
+            first, payload = await self._recv_frame()
+            opcode = first & 0x0F
+            if opcode == OP_PING:
+                await self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_CLOSE:
+                raise ConnectionResetError("WebSocket closed by server")
+            if opcode in (OP_TEXT, OP_CONT, OP_BINARY):
+                parts.append(payload)
+                if first & 0x80:
+                    return b"".join(parts).decode("utf-8", errors="replace")
+
+    async def _read_loop(self) -> None:
+        reason = "closed"
+        try:
+            while True:
+                packet = await self._recv_text()
+                kind = packet[:1]
+                if kind == "2":
+                    await self._send_text("3")
+                elif kind == "4" and packet[1:2] == "2":
+                    if self.on_event:
+                        # Namespace-less EVENT: 42["name", data]; ack ids are not used
+                        body = packet[2:].lstrip("0123456789")
+                        event = json.loads(body)
+                        self.on_event(event[0], event[1] if len(event) > 1 else None)
+                elif kind == "4" and packet[1:2] == "1":
+                    reason = "server disconnect"
+                    return
+                elif kind == "1":
+                    reason = "engine.io close"
+                    return
+        except asyncio.CancelledError:
+            reason = "client close"
+            raise
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            reason = e.__class__.__name__
+        finally:
+            self.connected = False
+            if self.on_close:
+                self.on_close(reason)
@@ -0,0 +1,372 @@
+"""
+Resource monitor for the managed server's process tree (Linux /proc).
+
+`npm run dev` starts a shell, npm, cross-env and the tsx/node processes
+that actually serve requests, so the PID in .server_pid is only the root.
+Each sample walks that tree and reads, per process:
+
+- /proc/<pid>/stat   utime + stime ticks (CPU%), state, ppid, start time
+- /proc/<pid>/status VmRSS and Threads
+- /proc/<pid>/io     read_bytes / write_bytes (needs same uid; optional,
+                     some kernels and sandboxes do not provide it)
+- /proc/<pid>/fd     open descriptor count
+
+CPU% is the tick delta between samples per (pid, start time), so a reused
+PID never produces a bogus spike, and can exceed 100% when node uses more
+than one core. Totals go into a SampleRing (fixed-size arrays, one per
+metric) for live views, and optionally into a SeriesFile: fixed-width
+binary records appended to disk, about 3.5MB per day at 1s, for runs too
+long for memory.
+
+Other platforms have no /proc; `supported()` is False there and sampling
+returns None.
+"""
+
+from __future__ import annotations
+import os
+import struct
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+PROC = Path("/proc")
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+DEFAULT_INTERVAL = 1.0
+DEFAULT_CAPACITY = 600
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def supported() -> bool:
+    return (PROC / "self" / "stat").exists()
+
+
+@dataclass
+class ProcInfo:
+    pid: int
+    ppid: int
+    name: str
+    state: str
+    ticks: int
+    start: int
+    rss_kb: int = 0
+    threads: int = 0
+    fds: int | None = None
+    read_bytes: int | None = None
+    write_bytes: int | None = None
+    cpu_percent: float = 0.0
+    cmdline: str = ""
+
+
+@dataclass
+class TreeSample:
+    time: float
+    root: int
+    cpu_percent: float
+    rss_kb: int
+    fds: int
+    threads: int
+    procs: int
+    read_bytes: int
+    write_bytes: int
+    read_rate: float = 0.0
+    write_rate: float = 0.0
+    io: bool = True
+    processes: list[ProcInfo] = field(default_factory=list)
+
+
+def _stat(pid: int) -> tuple[str, list[str]] | None:
+    try:
+        raw = (PROC / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+    # comm may contain spaces and parentheses; it ends at the last ')'
+    close = raw.rfind(")")
+    return raw[raw.find("(") + 1:close], raw[close + 2:].split()
+
+
+def _children_files(pid: int) -> list[int] | None:
+    tasks = PROC / str(pid) / "task"
+    kids, found = [], False
+    try:
+        for task in tasks.iterdir():
+            try:
+                kids += [int(p) for p in (task / "children").read_text().split()]
+                found = True
+            except FileNotFoundError:
+                return None  # kernel built without CONFIG_PROC_CHILDREN
+            except OSError:
+                continue
+    except OSError:
+        return []
+    return kids if found else None
+
+
+def _parent_map() -> dict[int, list[int]]:
+    children: dict[int, list[int]] = {}
+    for entry in PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+        stat = _stat(int(entry.name))
+        if stat:
+            children.setdefault(int(stat[1][1]), []).append(int(entry.name))
+    return children
+
+
+def descendants(root: int) -> list[int]:
+    """root and every live descendant, root first."""
+    if not (PROC / str(root)).exists():
+        return []
+    parent_map = None
+    out, stack, seen = [], [root], set()
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        out.append(pid)
+        kids = _children_files(pid) if parent_map is None else None
+        if kids is None:
+            if parent_map is None:
+                parent_map = _parent_map()
+            kids = parent_map.get(pid, [])
+        stack.extend(kids)
+    return out
+
+
+def read_process(pid: int) -> ProcInfo | None:
+    stat = _stat(pid)
+    if stat is None:
+        return None
+    name, fields = stat
+    info = ProcInfo(pid=pid, ppid=int(fields[1]), name=name, state=fields[0],
+                    ticks=int(fields[11]) + int(fields[12]), start=int(fields[19]))
+    base = PROC / str(pid)
+    try:
+        for line in (base / "status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                info.rss_kb = int(line.split()[1])
+            elif line.startswith("Threads:"):
+                info.threads = int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        for line in (base / "io").read_text().splitlines():
+            key, _, value = line.partition(":")
+            if key == "read_bytes":
+                info.read_bytes = int(value)
+            elif key == "write_bytes":
+                info.write_bytes = int(value)
+    except OSError:
+        pass
+    try:
+        info.fds = len(os.listdir(base / "fd"))
+    except OSError:
+        pass
+    try:
+        info.cmdline = " ".join((base / "cmdline").read_bytes().decode(errors="replace").replace("\0", " ").split())
+    except OSError:
+        pass
+    return info
+
+
+def tree_rss_kb(pid: int) -> int | None:
+    """Summed VmRSS of pid and its descendants; None without /proc."""
+    if not supported():
+        return None
+    total = 0
+    for child in descendants(pid):
+        info = read_process(child)
+        if info:
+            total += info.rss_kb
+    return total
+
+
+class TreeSampler:
+    """Turns successive tree reads into rates (CPU%, bytes/s)."""
+
+    def __init__(self):
+        self._ticks: dict[tuple[int, int], int] = {}
+        self._io: dict[tuple[int, int], tuple[int, int]] = {}
+        self._last: float | None = None
+
+    def sample(self, root: int) -> TreeSample | None:
+        now = time.monotonic()
+        processes = [p for p in map(read_process, descendants(root)) if p]
+        if not processes:
+            return None
+        elapsed = now - self._last if self._last is not None else 0.0
+        ticks, io, read_delta, write_delta = {}, {}, 0, 0
+        has_io = any(p.read_bytes is not None for p in processes)
+        for p in processes:
+            key = (p.pid, p.start)
+            ticks[key] = p.ticks
+            if key in self._ticks and elapsed > 0:
+                p.cpu_percent = (p.ticks - self._ticks[key]) / CLK_TCK / elapsed * 100.0
+            if p.read_bytes is not None:
+                io[key] = (p.read_bytes, p.write_bytes or 0)
+                if key in self._io:
+                    read_delta += max(0, p.read_bytes - self._io[key][0])
+                    write_delta += max(0, (p.write_bytes or 0) - self._io[key][1])
+        self._ticks, self._io, self._last = ticks, io, now
+        return TreeSample(
+            time=time.time(), root=root,
+            cpu_percent=sum(p.cpu_percent for p in processes),
+            rss_kb=sum(p.rss_kb for p in processes),
+            fds=sum(p.fds or 0 for p in processes),
+            threads=sum(p.threads for p in processes),
+            procs=len(processes),
+            read_bytes=sum(p.read_bytes or 0 for p in processes),
+            write_bytes=sum(p.write_bytes or 0 for p in processes),
+            read_rate=read_delta / elapsed if elapsed > 0 else 0.0,
+            write_rate=write_delta / elapsed if elapsed > 0 else 0.0,
+            io=has_io, processes=processes)
+
+    def reset(self) -> None:
+        self._ticks.clear()
+        self._io.clear()
+        self._last = None
+
+
+# --- storage ---------------------------------------------------------------
+
+METRICS = ("time", "cpu_percent", "rss_kb", "fds", "threads", "procs", "read_rate", "write_rate")
+
+
+class SampleRing:
+    """Last `capacity` samples, one preallocated double array per metric."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._columns = {name: array("d", bytes(8 * capacity)) for name in METRICS}
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, sample: TreeSample) -> None:
+        with self._lock:
+            for name, column in self._columns.items():
+                column[self._next] = getattr(sample, name)
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def values(self, name: str) -> list[float]:
+        with self._lock:
+            column = self._columns[name]
+            if self._count < self.capacity:
+                return column[:self._count].tolist()
+            return column[self._next:].tolist() + column[:self._next].tolist()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._next = self._count = 0
+
+
+class SeriesFile:
+    """Append-only fixed-width records: <time, cpu%, rss, fds, threads, procs, read/s, write/s>."""
+
+    MAGIC = b"BINGOTS1"
+    RECORD = struct.Struct("<dfQIHHff")
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new = not self.path.exists() or self.path.stat().st_size == 0
+        self._fh = open(self.path, "ab")
+        if new:
+            self._fh.write(self.MAGIC)
+            self._fh.flush()
+
+    def append(self, sample: TreeSample) -> None:
+        self._fh.write(self.RECORD.pack(sample.time, sample.cpu_percent, sample.rss_kb, sample.fds,
+                                        min(sample.threads, 0xFFFF), min(sample.procs, 0xFFFF),
+                                        sample.read_rate, sample.write_rate))
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+    @classmethod
+    def read(cls, path: Path) -> dict[str, list[float]]:
+        data = Path(path).read_bytes()
+        if not data.startswith(cls.MAGIC):
+            raise ValueError(f"{path} is not a monitor series file")
+        body = data[len(cls.MAGIC):]
+        usable = len(body) - len(body) % cls.RECORD.size  # drop a torn final record
+        columns: dict[str, list[float]] = {name: [] for name in METRICS}
+        for record in cls.RECORD.iter_unpack(body[:usable]):
+            for name, value in zip(METRICS, record):
+                columns[name].append(value)
+        return columns
+
+
+def sparkline(values: list[float], width: int, lo: float | None = None, hi: float | None = None) -> str:
+    """Unicode block sparkline of the last `width` buckets (max per bucket)."""
+    if not values or width <= 0:
+        return ""
+    if len(values) > width:
+        step = len(values) / width
+        values = [max(values[int(i * step):max(int((i + 1) * step), int(i * step) + 1)]) for i in range(width)]
+    lo = min(values) if lo is None else lo
+    hi = max(values) if hi is None else hi
+    span = hi - lo
+    top = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[0 if span <= 0 else min(top, max(0, int((v - lo) / span * top + 0.5)))]
+                   for v in values)
+
+
+class ProcessMonitor:
+    """Samples the tree under root_pid() on a daemon thread."""
+
+    def __init__(self, root_pid: Callable[[], int | None], interval: float = DEFAULT_INTERVAL,
+                 capacity: int = DEFAULT_CAPACITY, series_path: Path | None = None):
+        self.root_pid = root_pid
+        self.interval = interval
+        self.ring = SampleRing(capacity)
+        self.series = SeriesFile(series_path) if series_path else None
+        self.sampler = TreeSampler()
+        self.latest: TreeSample | None = None
+        self._root: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self) -> TreeSample | None:
+        root = self.root_pid()
+        if root != self._root:
+            # A new server process: old history would mislead leak spotting
+            self._root = root
+            self.sampler.reset()
+            self.ring.clear()
+        sample = self.sampler.sample(root) if root else None
+        self.latest = sample
+        if sample:
+            self.ring.append(sample)
+            if self.series:
+                self.series.append(sample)
+        return sample
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except OSError:
+                self.latest = None
+            self._stop.wait(self.interval)
+
+    def start(self) -> ProcessMonitor:
+        if supported() and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="procmon", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+        if self.series:
+            self.series.close()
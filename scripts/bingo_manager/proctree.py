@@ -0,0 +1,316 @@
+"""
+Process-tree shutdown and orphan reaping for the managed server (Linux /proc).
+
+`npm run dev` is a chain: (sh ->) npm -> sh -> cross-env -> tsx -> node.
+SIGTERM to the PID the manager spawned reaches npm only; npm does not
+always forward it, so the node grandchild that actually holds PORT and
+data/bingo.db survives, re-parented to init. The next start then fails to
+bind or waits on the SQLite lock. That is why restarts used to need sleeps.
+
+The fix has three parts:
+
+- spawn: the server starts in its own session (start_new_session, on
+  Windows CREATE_NEW_PROCESS_GROUP), so the spawned PID is also the
+  process-group and session id of everything below it
+- stop: the tree is snapshotted before any signal is sent. It includes
+  every /proc descendant plus every process still in the group or session,
+  which catches children that were already re-parented. Each process is
+  recorded as (pid, start time), so a PID reused meanwhile is never
+  signalled. Everything gets SIGTERM. Whatever is still there at the
+  deadline gets SIGKILL, group-wide. On Windows, `taskkill /T` and then
+  `/F` do the same job
+- reap: find_orphans() lists node processes that are not part of a
+  managed tree, listen on our port (/proc/net/tcp{,6} LISTEN sockets
+  matched to /proc/<pid>/fd inodes) or hold the database, its -wal or its
+  -shm open, and were actually orphaned: their session leader is gone, or
+  the topmost process of their session was re-parented to init or a
+  subreaper (systemd --user, tini, ...). These are left over from a crashed
+  manager or a killed terminal; `reap` terminates them the same way. A
+  server still owned by a live GUI or terminal is never selected
+
+Without /proc (macOS, Windows) the tree is the root PID alone and
+find_orphans() returns nothing.
+"""
+
+from __future__ import annotations
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from .procmon import PROC, descendants, supported
+
+TERM_TIMEOUT_S = 10.0
+POLL_S = 0.1
+NODE_NAMES = ("node", "nodejs", "tsx", "npm", "npx")
+REAPER_NAMES = ("systemd", "init", "tini", "dumb-init", "docker-init")
+TCP_LISTEN = "0A"
+
+
+def session_kwargs() -> dict:
+    """Popen kwargs that make the child the leader of its own group/session."""
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _ids(pid: int) -> tuple[str, int, int, int, int] | None:
+    """(comm, ppid, pgid, sid, start ticks) from /proc/<pid>/stat."""
+    try:
+        raw = (PROC / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+    close = raw.rfind(")")
+    fields = raw[close + 2:].split()
+    if fields[0] == "Z":
+        return None  # a zombie holds nothing; its parent just has not reaped it
+    return raw[raw.find("(") + 1:close], int(fields[1]), int(fields[2]), int(fields[3]), int(fields[19])
+
+
+def _cmdline(pid: int) -> str:
+    try:
+        raw = (PROC / str(pid) / "cmdline").read_bytes()
+    except OSError:
+        return ""
+    return " ".join(raw.decode(errors="replace").replace("\0", " ").split())
+
+
+def _pids() -> list[int]:
+    try:
+        return [int(entry.name) for entry in PROC.iterdir() if entry.name.isdigit()]
+    except OSError:
+        return []
+
+
+def snapshot(root: int) -> dict[int, int]:
+    """{pid: start ticks} for root's descendants and its group/session members."""
+    if not supported():
+        return {root: 0}
+    members: dict[int, int] = {}
+    for pid in descendants(root):
+        if ids := _ids(pid):
+            members[pid] = ids[4]
+    for pid in _pids():
+        if pid not in members and (ids := _ids(pid)) and root in (ids[2], ids[3]):
+            members[pid] = ids[4]
+    return members
+
+
+def _alive(members: dict[int, int]) -> dict[int, int]:
+    """The members whose (pid, start time) still matches a live process."""
+    if not supported():
+        return {pid: start for pid, start in members.items() if _exists(pid)}
+    return {pid: start for pid, start in members.items() if (ids := _ids(pid)) and ids[4] == start}
+
+
+def _exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _signal(members: dict[int, int], group: int | None, sig: int) -> None:
+    if group is not None:
+        try:
+            os.killpg(group, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+    for pid in _alive(members):
+        try:
+            os.kill(pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+@dataclass
+class StopResult:
+    root: int
+    pids: list[int] = field(default_factory=list)
+    killed: list[int] = field(default_factory=list)   # needed SIGKILL
+    survivors: list[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def describe(self) -> str:
+        text = f"{len(self.pids)} process(es) stopped in {self.elapsed:.1f}s"
+        if self.killed:
+            text += f", {len(self.killed)} after SIGKILL"
+        if self.survivors:
+            text += f", {len(self.survivors)} still running ({', '.join(map(str, self.survivors))})"
+        return text
+
+
+def terminate_tree(root: int, timeout: float = TERM_TIMEOUT_S, proc: subprocess.Popen | None = None,
+                   sleep: Callable[[float], None] = time.sleep) -> StopResult:
+    """SIGTERM root's whole tree, SIGKILL whatever is left after timeout.
+
+    proc, when given, is root's Popen and is waited on so it does not stay
+    a zombie (which would also read as alive).
+    """
+    started = time.monotonic()
+    result = StopResult(root)
+    if sys.platform == "win32":
+        # Without a Popen to wait on there is no safe liveness check (os.kill(pid, 0) is CTRL_C_EVENT)
+        if proc is not None:
+            subprocess.run(["taskkill", "/T", "/PID", str(root)], capture_output=True)
+        if not _wait_popen(proc, timeout):
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(root)], capture_output=True)
+            result.killed = [root]
+        result.pids, result.elapsed = [root], time.monotonic() - started
+        return result
+
+    members = snapshot(root)
+    result.pids = sorted(members)
+    ids = _ids(root)
+    group = root if ids is None or ids[2] == root else None  # only signal a group root leads
+    _signal(members, group, signal.SIGTERM)
+    deadline = started + timeout
+    while True:
+        if proc is not None:
+            proc.poll()
+        left = _alive(members)
+        if not left or time.monotonic() >= deadline:
+            break
+        sleep(POLL_S)
+    if left:
+        result.killed = sorted(left)
+        _signal(left, group, signal.SIGKILL)
+        if proc is not None:
+            _wait_popen(proc, 1.0)
+        for _ in range(20):
+            if not (left := _alive(left)):
+                break
+            sleep(POLL_S / 2)
+        result.survivors = sorted(left)
+    if proc is not None:
+        _wait_popen(proc, 1.0)
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def _wait_popen(proc: subprocess.Popen | None, timeout: float) -> bool:
+    if proc is None:
+        return False
+    try:
+        proc.wait(timeout)
+        return True
+    except subprocess.TimeoutExpired:
+        return False
+
+
+def stop_popen(proc: subprocess.Popen, timeout: float = TERM_TIMEOUT_S,
+               sleep: Callable[[float], None] = time.sleep) -> StopResult | None:
+    """terminate_tree() for a child we spawned; None if it had already exited."""
+    if proc.poll() is not None and not (supported() and snapshot(proc.pid)):
+        return None
+    return terminate_tree(proc.pid, timeout, proc=proc, sleep=sleep)
+
+
+# --- orphans ---
+
+@dataclass
+class Orphan:
+    pid: int
+    name: str
+    cmdline: str
+    reasons: list[str] = field(default_factory=list)
+
+
+def _fd_targets(pid: int) -> list[str]:
+    """What pid's descriptors point at (paths, socket:[inode], ...); [] if not ours to read."""
+    base = PROC / str(pid) / "fd"
+    try:
+        fds = os.listdir(base)
+    except OSError:
+        return []
+    targets = []
+    for fd in fds:
+        try:
+            targets.append(os.readlink(base / fd))
+        except OSError:
+            continue
+    return targets
+
+
+def open_paths(paths: list[Path]) -> set[str] | None:
+    """The real paths among `paths` that some process has open (None without /proc)."""
+    if not supported():
+        return None
+    wanted = {os.path.realpath(p) for p in paths}
+    found: set[str] = set()
+    for pid in _pids():
+        found.update(target for target in _fd_targets(pid) if target in wanted)
+    return found
+
+
+def _listen_inodes(port: int) -> set[str]:
+    inodes = set()
+    for table in ("tcp", "tcp6"):
+        try:
+            lines = (PROC / "net" / table).read_text().splitlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            if len(fields) > 9 and fields[3] == TCP_LISTEN and int(fields[1].rsplit(":", 1)[1], 16) == port:
+                inodes.add(f"socket:[{fields[9]}]")
+    return inodes
+
+
+def _is_node(name: str, cmdline: str) -> bool:
+    argv0 = os.path.basename(cmdline.split(" ", 1)[0]) if cmdline else ""
+    return any(candidate in (name, argv0) for candidate in NODE_NAMES)
+
+
+def _orphaned(pid: int, ids: tuple[str, int, int, int, int]) -> str | None:
+    """Why pid counts as orphaned, or None while its session still has a live owner."""
+    sid = ids[3]
+    if sid not in (0, pid) and _ids(sid) is None:
+        return f"session leader {sid} gone"
+    # Climb to the topmost process of pid's session and look at who adopted it
+    for _ in range(64):
+        parent = ids[1]
+        parent_ids = _ids(parent) if parent > 1 else None
+        if parent == 1 or (parent_ids is not None and parent_ids[0] in REAPER_NAMES):
+            return f"re-parented to PID {parent}"
+        if parent_ids is None or parent_ids[3] != sid:
+            return None
+        ids = parent_ids
+    return None
+
+
+def find_orphans(port: int | None, db_path: Path | None, managed: list[int] = ()) -> list[Orphan]:
+    """Orphaned node processes outside the managed trees bound to port or holding db_path open."""
+    if not supported():
+        return []
+    exclude = {os.getpid()}
+    for root in managed:
+        exclude.update(snapshot(root))
+    inodes = _listen_inodes(port) if port else set()
+    db_files = {}
+    if db_path is not None:
+        db = os.path.realpath(db_path)
+        db_files = {db: db_path.name, db + "-wal": f"{db_path.name}-wal", db + "-shm": f"{db_path.name}-shm"}
+    orphans = []
+    for pid in _pids():
+        if pid in exclude or not (ids := _ids(pid)):
+            continue
+        cmdline = _cmdline(pid)
+        if not _is_node(ids[0], cmdline):
+            continue
+        reasons = []
+        for target in _fd_targets(pid):
+            if target in inodes and f"listening on :{port}" not in reasons:
+                reasons.append(f"listening on :{port}")
+            elif target in db_files and f"holds {db_files[target]}" not in reasons:
+                reasons.append(f"holds {db_files[target]}")
+        if reasons and (why := _orphaned(pid, ids)):
+            orphans.append(Orphan(pid, ids[0], cmdline, [why, *reasons]))
+    return orphans
@@ -0,0 +1,735 @@
+"""
+Zero-downtime restarts through a local reverse proxy on the public port.
+
+A plain restart stops node, waits for the port and boots a new instance:
+every Socket.IO connection drops and the site is unreachable for the whole
+boot. With the proxy in front, node listens on a spare loopback port and the
+proxy owns PORT, so a rolling restart can overlap the two instances:
+
+1. the replacement starts on a free port and is probed with wait_ready().
+   It gets SKIP_STARTUP_CLEANUP=1 so its startup cleanup does not finish
+   the games the old instance is still running, and the old instance's
+   session id (SERVER_SESSION_ID), so clients do not take the switch for a
+   server restart and log out
+2. the proxy switches: requests from now on go to the new backend, even on
+   keep-alive connections opened before the switch
+3. the old backend drains until no request to it is in flight and the
+   games that were active at the switch have ended, or the drain deadline
+   passes. WebSockets do not hold the drain up by themselves; their games
+   are what matters
+4. the proxy closes whatever is left (Socket.IO clients reconnect straight
+   to the ready instance), the old instance gets SIGTERM, and games it was
+   still running are marked finished, as its own cleanup would have done
+
+HTTP/1.1 is relayed request by request. Each client connection keeps at
+most one upstream connection per backend, and WebSocket upgrades are piped
+as raw bytes. With several backends (the cluster supervisor in cluster.py)
+a request goes to the backend with the fewest requests in flight and
+sockets open, with two exceptions:
+
+- Engine.IO requests carrying a sid stick to the backend that issued it:
+  long-polling and the WebSocket upgrade must reach the process that holds
+  the session. The sid is read from the handshake response on its way
+  through
+- a game, its Socket.IO room and its timers live in one node process, so
+  the supervisor gives the proxy one slot per worker and every lobby is
+  pinned to slot lobby_id % slots. That covers /api/lobbies/<id>/...,
+  /api/games/<lobbyId>/<action>, /api/games/<gameId>/... (game ids are
+  mapped to their lobby through the database), the admin lobby and game
+  routes, and Engine.IO handshakes whose query names a lobby: the client
+  opens its socket with ?lobby=<id> for the lobby it is in, so join_lobby
+  and the lobby broadcasts happen on the lobby's worker (a worker asked to
+  join a lobby it does not run makes the client reconnect). While a lobby's
+  worker is out of rotation its requests get 502 rather than a worker
+  that does not hold its game
+
+The proxy runs as its own process (`server_manager_cli.py proxy run`) so
+the CLI and the GUI can both drive it: pids and ports are kept in a JSON
+state file and commands go over a loopback control socket, one JSON object
+per line (the client side is in control.py).
+"""
+
+from __future__ import annotations
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import signal
+import socket
+import sqlite3
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+from urllib.parse import unquote
+
+from .control import CONTROL_HOST, CONTROL_TIMEOUT_S, ProxyControl, ProxyError, launch_detached
+from .proctree import stop_popen
+from .readiness import DEFAULT_DEADLINE_S, ReadyResult, free_port, probe_http, wait_ready
+
+BACKEND_HOST = "127.0.0.1"
+DEFAULT_DRAIN_S = 30.0
+DRAIN_POLL_S = 0.2
+HEAD_TIMEOUT_S = 10.0
+KEEPALIVE_TIMEOUT_S = 65.0
+STICKY_TTL_S = 120.0
+SNIFF_BYTES = 512
+CHUNK_BYTES = 64 * 1024
+CONNECT_TIMEOUT_S = 5.0
+BUSY_TIMEOUT_S = 2.0
+BAD_GATEWAY = (b"HTTP/1.1 502 Bad Gateway\r\nContent-Type: text/plain\r\nContent-Length: 24\r\n"
+               b"Connection: close\r\n\r\nBingo server unavailable")
+SID_RE = re.compile(rb'"sid"\s*:\s*"([^"]+)"')
+# /api/games/<n>/<action> takes a lobby id for these actions and a game id otherwise
+LOBBY_GAME_ACTIONS = ("games", "start", "stop", "snapshot", "pause", "resume", "speed", "claim")
+LOBBY_PATH_RE = re.compile(r"^/api/(?:lobbies(?:/admin)?|admin/lobbies|admin/distribute-prize|admin/prize-pool)"
+                           r"/(\d+)(?:/|$)")
+GAME_PATH_RE = re.compile(r"^/api/(?:admin/)?games/(\d+)(?:/([^/]*))?")
+GAME_CACHE_SIZE = 4096
+
+
+def new_session_id() -> str:
+    """A server session id in the format server/index.ts generates."""
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    return f"{int(time.time() * 1000)}-{''.join(random.choices(digits, k=11))}"
+
+
+def lobby_slot(lobby_id: int, slots: int) -> int:
+    """Index of the cluster worker slot that owns lobby_id."""
+    return lobby_id % slots
+
+
+def backend_env(port: int, replacing: bool = False, session_id: str | None = None) -> dict[str, str]:
+    """Environment overrides for a node instance behind the proxy.
+
+    session_id becomes SERVER_SESSION_ID: the client logs out whenever
+    /api/auth/session changes, so processes serving the same users share it.
+    """
+    env = {"PORT": str(port), "BIND_HOST": BACKEND_HOST}
+    if replacing:
+        env["SKIP_STARTUP_CLEANUP"] = "1"
+    if session_id:
+        env["SERVER_SESSION_ID"] = session_id
+    return env
+
+
+# --- proxy server ------------------------------------------------------------
+
+@dataclass
+class Connection:
+    id: int
+    peer: str
+    writer: asyncio.StreamWriter
+    backend: int = 0
+    kind: str = "http"
+    inflight: bool = False
+    requests: int = 0
+    opened: float = field(default_factory=time.monotonic)
+    last_active: float = field(default_factory=time.monotonic)
+    bytes_up: int = 0
+    bytes_down: int = 0
+    upstreams: dict[int, tuple[asyncio.StreamReader, asyncio.StreamWriter]] = field(default_factory=dict)
+
+    def drop_upstream(self, backend: int) -> None:
+        upstream = self.upstreams.pop(backend, None)
+        if upstream:
+            upstream[1].close()
+
+    def close(self) -> None:
+        self.writer.close()
+        for backend in list(self.upstreams):
+            self.drop_upstream(backend)
+
+    def to_dict(self, now: float) -> dict:
+        return {"id": self.id, "peer": self.peer, "backend": self.backend, "kind": self.kind,
+                "inflight": self.inflight, "requests": self.requests,
+                "age": round(now - self.opened, 3), "idle": round(now - self.last_active, 3),
+                "bytes_up": self.bytes_up, "bytes_down": self.bytes_down}
+
+
+def _parse_head(raw: bytes) -> tuple[str, dict[str, str]]:
+    lines = raw.decode("latin-1").split("\r\n")
+    headers: dict[str, str] = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            key = name.strip().lower()
+            headers[key] = f"{headers[key]}, {value.strip()}" if key in headers else value.strip()
+    return lines[0], headers
+
+
+def _socketio_sid(target: str) -> tuple[bool, str | None]:
+    """(is an Engine.IO request, its sid if any) for a request target."""
+    path, _, query = target.partition("?")
+    if not path.startswith("/socket.io/"):
+        return False, None
+    for pair in query.split("&"):
+        key, _, value = pair.partition("=")
+        if key == "sid" and value:
+            return True, unquote(value)
+    return True, None
+
+
+def _lobby_target(target: str, socketio: bool) -> tuple[str, int] | None:
+    """("lobby", id) or ("game", id) when the request belongs to one lobby's worker."""
+    path, _, query = target.partition("?")
+    if socketio:
+        for pair in query.split("&"):
+            key, _, value = pair.partition("=")
+            if key == "lobby" and value.isdigit():
+                return "lobby", int(value)
+        return None
+    if match := LOBBY_PATH_RE.match(path):
+        return "lobby", int(match.group(1))
+    if match := GAME_PATH_RE.match(path):
+        admin = path.startswith("/api/admin/")
+        if not admin and match.group(2) in LOBBY_GAME_ACTIONS:
+            return "lobby", int(match.group(1))
+        return "game", int(match.group(1))
+    return None
+
+
+def game_lobby(db_path: Path, game_id: int) -> int | None:
+    """The lobby a game belongs to (read-only; None if unknown or unreadable)."""
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT_S)
+        try:
+            row = conn.execute("SELECT lobby_id FROM games WHERE id = ?", (game_id,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _keep_alive(version: str, headers: dict[str, str]) -> bool:
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        return "keep-alive" in connection
+    return "close" not in connection
+
+
+def _nodelay(writer: asyncio.StreamWriter) -> None:
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+
+
+class ReverseProxy:
+    """Accepts on listen_port and relays requests to the live backends."""
+
+    def __init__(self, listen_port: int, backend_port: int | None, state_path: Path, host: str = "0.0.0.0",
+                 backend_pid: int | None = None, log: Callable[[str], None] = print, db_path: Path | None = None):
+        self.listen_port = listen_port
+        self.backends: list[int] = [backend_port] if backend_port else []
+        self.slots: list[int | None] = []  # per cluster worker; None while it is out of rotation
+        self.db_path = db_path
+        self.game_lobbies: dict[int, int] = {}
+        self.backend_pid = backend_pid
+        self.state_path = Path(state_path)
+        self.host = host
+        self.log = log
+        self.control_port: int | None = None
+        self.connections: dict[int, Connection] = {}
+        self.sticky: dict[str, tuple[int, float]] = {}
+        self.load: dict[int, int] = {}
+        self.requests: dict[int, int] = {}
+        self.accepted = 0
+        self.failed = 0
+        self.started = time.time()
+        self.handlers: dict[str, Callable[[dict], dict]] = {}
+        self._ids = itertools.count(1)
+        self._turn = itertools.count()
+        self._purged = time.monotonic()
+        self._stopped: asyncio.Event | None = None
+
+    @property
+    def backend_port(self) -> int | None:
+        return self.backends[0] if self.backends else None
+
+    async def serve(self) -> None:
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_server(self._handle, self.host, self.listen_port)
+        control = await asyncio.start_server(self._control, CONTROL_HOST, 0)
+        self.control_port = control.sockets[0].getsockname()[1]
+        self._write_state()
+        self.log(f"proxy :{self.listen_port} -> {self._describe_backends()} (control :{self.control_port})")
+        try:
+            async with server, control:
+                await self._stopped.wait()
+        finally:
+            for conn in list(self.connections.values()):
+                conn.close()
+            self.state_path.unlink(missing_ok=True)
+            self.log("proxy stopped")
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def set_backends(self, ports: list[int], backend_pid: int | None = None,
+                     slots: list[int | None] | None = None) -> None:
+        """Backends in rotation; slots, when given, pins every lobby to one of them."""
+        if ports != self.backends:
+            self.backends = list(ports)
+            self.log(f"backends {self._describe_backends()}")
+        self.slots = list(slots) if slots else []
+        self.backend_pid = backend_pid
+        if self._stopped is not None and not self._stopped.is_set():
+            self._write_state()
+
+    def _describe_backends(self) -> str:
+        return ", ".join(f":{port}" for port in self.backends) or "(none)"
+
+    def _write_state(self) -> None:
+        state = {"pid": os.getpid(), "listen_port": self.listen_port, "control_port": self.control_port,
+                 "backend_port": self.backend_port, "backends": self.backends, "slots": self.slots,
+                 "backend_pid": self.backend_pid, "started": self.started}
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, self.state_path)
+
+    # --- routing ---------------------------------------------------------------
+
+    def route(self, sid: str | None, lobby: int | None = None) -> int | None:
+        if not self.backends:
+            return None
+        if sid:
+            entry = self.sticky.get(sid)
+            if entry and entry[0] in self.backends:
+                return entry[0]
+            if entry:
+                # Its backend is gone; the new one answers "unknown sid" and the client reconnects
+                del self.sticky[sid]
+        if lobby is not None and self.slots:
+            return self.slots[lobby_slot(lobby, len(self.slots))]
+        if len(self.backends) == 1:
+            return self.backends[0]
+        # Fewest requests in flight plus open sockets; ties rotate
+        turn = next(self._turn)
+        n = len(self.backends)
+        return min(self.backends, key=lambda port: (self.load.get(port, 0), (self.backends.index(port) - turn) % n))
+
+    async def lobby_of(self, target: str, socketio: bool) -> int | None:
+        """The lobby whose worker must serve target, if it is pinned to one."""
+        found = _lobby_target(target, socketio) if self.slots else None
+        if found is None:
+            return None
+        kind, key = found
+        if kind == "lobby":
+            return key
+        if key not in self.game_lobbies and self.db_path is not None:
+            lobby = await asyncio.to_thread(game_lobby, self.db_path, key)
+            if lobby is None:
+                return None  # unknown game: any worker answers 404
+            if len(self.game_lobbies) >= GAME_CACHE_SIZE:
+                self.game_lobbies.clear()
+            self.game_lobbies[key] = lobby
+        return self.game_lobbies.get(key)
+
+    def stick(self, sid: str, backend: int) -> None:
+        now = time.monotonic()
+        self.sticky[sid] = (backend, now)
+        if now - self._purged > STICKY_TTL_S:
+            self._purged = now
+            self.sticky = {s: e for s, e in self.sticky.items() if now - e[1] < STICKY_TTL_S}
+
+    def _busy(self, backend: int, delta: int) -> None:
+        self.load[backend] = self.load.get(backend, 0) + delta
+
+    def close_backend(self, backend: int, force: bool = True) -> int:
+        """Close sockets to backend and idle upstream connections to it (busy ones too if force)."""
+        closed = 0
+        for conn in list(self.connections.values()):
+            busy = conn.backend == backend and (conn.inflight or conn.kind == "ws")
+            if busy and (force or conn.kind == "ws"):
+                conn.close()
+                closed += 1
+            elif not busy and backend in conn.upstreams:
+                conn.drop_upstream(backend)
+                closed += 1
+        if closed:
+            self.log(f"closed {closed} connection(s) to :{backend}")
+        return closed
+
+    # --- relaying ----------------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        conn = Connection(next(self._ids), f"{peer[0]}:{peer[1]}" if peer else "?", writer)
+        self.accepted += 1
+        self.connections[conn.id] = conn
+        _nodelay(writer)
+        try:
+            timeout = HEAD_TIMEOUT_S
+            while True:
+                try:
+                    raw = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    return
+                timeout = KEEPALIVE_TIMEOUT_S
+                if not await self._exchange(conn, reader, writer, raw):
+                    return
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            if conn.inflight or conn.kind == "ws":
+                self._busy(conn.backend, -1)
+            self.connections.pop(conn.id, None)
+            conn.close()
+
+    async def _upstream(self, conn: Connection, backend: int, fresh: bool = False):
+        upstream = conn.upstreams.get(backend)
+        if upstream and (fresh or upstream[0].at_eof() or upstream[1].is_closing()):
+            conn.drop_upstream(backend)
+            upstream = None
+        if upstream is None:
+            upstream = await asyncio.wait_for(asyncio.open_connection(BACKEND_HOST, backend), CONNECT_TIMEOUT_S)
+            _nodelay(upstream[1])
+            conn.upstreams[backend] = upstream
+        return upstream
+
+    async def _exchange(self, conn: Connection, reader: asyncio.StreamReader,
+                        writer: asyncio.StreamWriter, raw: bytes) -> bool:
+        """Relay one request and its response; False when the connection should end."""
+        request_line, headers = _parse_head(raw)
+        method, target, version = (request_line.split(" ") + ["", "", ""])[:3]
+        socketio, sid = _socketio_sid(target)
+        backend = self.route(sid, await self.lobby_of(target, socketio))
+        if backend is None:
+            self.failed += 1
+            writer.write(BAD_GATEWAY)
+            await writer.drain()
+            return False
+        conn.backend, conn.inflight = backend, True
+        conn.requests += 1
+        conn.last_active = time.monotonic()
+        self._busy(backend, 1)
+        self.requests[backend] = self.requests.get(backend, 0) + 1
+        if "websocket" in headers.get("upgrade", "").lower():
+            try:
+                up_reader, up_writer = await self._upstream(conn, backend)
+            except (OSError, asyncio.TimeoutError):
+                self.failed += 1
+                writer.write(BAD_GATEWAY)
+                await writer.drain()
+                return False
+            # Counted in load until it closes, but not in flight: it never holds up a drain
+            conn.kind, conn.inflight = "ws", False
+            if sid:
+                self.stick(sid, backend)
+            up_writer.write(raw)
+            conn.bytes_up += len(raw)
+            await asyncio.gather(self._pipe(reader, up_writer, conn, upstream=True),
+                                 self._pipe(up_reader, writer, conn, upstream=False))
+            return False
+
+        bodiless = "content-length" not in headers and "transfer-encoding" not in headers
+        # node may close an idle keep-alive upstream just as a request goes out on
+        # it; a bodiless request is safe to retry once on a fresh connection
+        for attempt in (0, 1):
+            reused = attempt == 0 and backend in conn.upstreams
+            try:
+                up_reader, up_writer = await self._upstream(conn, backend, fresh=attempt > 0)
+            except (OSError, asyncio.TimeoutError):
+                self.failed += 1
+                writer.write(BAD_GATEWAY)
+                await writer.drain()
+                return False
+            try:
+                up_writer.write(raw)
+                if "content-length" in headers:
+                    await self._copy(reader, up_writer, conn, True, int(headers["content-length"]))
+                elif "chunked" in headers.get("transfer-encoding", "").lower():
+                    await self._copy_chunked(reader, up_writer, conn, True)
+                await up_writer.drain()
+                while True:
+                    status_raw = await up_reader.readuntil(b"\r\n\r\n")
+                    status_line, response_headers = _parse_head(status_raw)
+                    status = int(status_line.split(" ")[1])
+                    if status >= 200:
+                        break
+                    writer.write(status_raw)  # 100 Continue
+                break
+            except (ConnectionError, asyncio.IncompleteReadError):
+                conn.drop_upstream(backend)
+                if not (reused and bodiless):
+                    raise
+        conn.bytes_up += len(raw)
+        writer.write(status_raw)
+        conn.bytes_down += len(status_raw)
+        capture = bytearray() if socketio and sid is None else None
+        keep = _keep_alive(version, headers)
+        if method == "HEAD" or status in (204, 304):
+            pass
+        elif "chunked" in response_headers.get("transfer-encoding", "").lower():
+            await self._copy_chunked(up_reader, writer, conn, False, capture)
+        elif "content-length" in response_headers:
+            await self._copy(up_reader, writer, conn, False, int(response_headers["content-length"]), capture)
+        else:
+            await self._copy(up_reader, writer, conn, False, None)
+            keep = False
+        await writer.drain()
+        if capture and (match := SID_RE.search(capture)):
+            self.stick(match.group(1).decode(), backend)
+        elif sid:
+            self.stick(sid, backend)
+        if not _keep_alive("HTTP/1.1", response_headers):
+            conn.drop_upstream(backend)
+            keep = False
+        conn.inflight = False
+        conn.last_active = time.monotonic()
+        self._busy(backend, -1)
+        return keep
+
+    async def _copy(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, conn: Connection,
+                    upstream: bool, length: int | None, capture: bytearray | None = None) -> None:
+        """Copy length bytes, or everything until EOF when length is None."""
+        remaining = length
+        while remaining is None or remaining > 0:
+            data = await reader.read(CHUNK_BYTES if remaining is None else min(remaining, CHUNK_BYTES))
+            if not data:
+                if remaining is None:
+                    return
+                raise asyncio.IncompleteReadError(b"", remaining)
+            if remaining is not None:
+                remaining -= len(data)
+            conn.last_active = time.monotonic()
+            if upstream:
+                conn.bytes_up += len(data)
+            else:
+                conn.bytes_down += len(data)
+            if capture is not None and len(capture) < SNIFF_BYTES:
+                capture += data[:SNIFF_BYTES - len(capture)]
+            writer.write(data)
+            await writer.drain()
+
+    async def _copy_chunked(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, conn: Connection,
+                            upstream: bool, capture: bytearray | None = None) -> None:
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            writer.write(line)
+            size = int(line.split(b";")[0].strip(), 16)
+            if size == 0:
+                while line != b"\r\n":  # trailers, then the final blank line
+                    line = await reader.readuntil(b"\r\n")
+                    writer.write(line)
+                return
+            await self._copy(reader, writer, conn, upstream, size + 2, capture)
+
+    async def _pipe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                    conn: Connection, upstream: bool) -> None:
+        try:
+            await self._copy(reader, writer, conn, upstream, None)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            # Pass the half-close on; the other direction finishes on its own
+            try:
+                if writer.can_write_eof():
+                    writer.write_eof()
+            except (OSError, RuntimeError):
+                pass
+
+    # --- control socket -----------------------------------------------------
+
+    async def _control(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            line = await asyncio.wait_for(reader.readline(), CONTROL_TIMEOUT_S)
+            response = self.command(json.loads(line))
+        except (ValueError, KeyError, TypeError, asyncio.TimeoutError) as e:
+            response = {"ok": False, "error": f"{e.__class__.__name__}: {e}"}
+        try:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    def command(self, request: dict) -> dict:
+        cmd = request["cmd"]
+        if cmd == "status":
+            return self.snapshot()
+        if cmd == "switch":
+            previous = self.backend_port
+            self.set_backends([int(request["backend"])], request.get("pid"))
+            return {"ok": True, "previous": previous}
+        if cmd == "backends":
+            self.set_backends([int(port) for port in request["ports"]])
+            return {"ok": True, "backends": self.backends}
+        if cmd == "close":
+            return {"ok": True, "closed": self.close_backend(int(request["backend"]), bool(request.get("force", True)))}
+        if cmd == "stop":
+            asyncio.get_running_loop().call_soon(self.stop)
+            return {"ok": True}
+        if cmd in self.handlers:
+            return self.handlers[cmd](request)
+        raise KeyError(f"unknown command {cmd!r}")
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {"ok": True, "pid": os.getpid(), "listen_port": self.listen_port,
+                "control_port": self.control_port, "backend_port": self.backend_port,
+                "backends": self.backends, "slots": self.slots, "backend_pid": self.backend_pid,
+                "started": self.started, "accepted": self.accepted, "failed": self.failed, "sticky_sessions": len(self.sticky),
+                "requests": {str(port): n for port, n in self.requests.items()},
+                "connections": [c.to_dict(now) for c in self.connections.values()]}
+
+
+def run_proxy(listen_port: int, backend_port: int, state_path: Path, host: str = "0.0.0.0",
+              backend_pid: int | None = None, log: Callable[[str], None] = print) -> None:
+    """Serve until SIGTERM/SIGINT or a `stop` command (blocking)."""
+    proxy = ReverseProxy(listen_port, backend_port, state_path, host, backend_pid, log)
+
+    async def main() -> None:
+        if os.name != "nt":
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, proxy.stop)
+        await proxy.serve()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+def launch_proxy(listen_port: int, backend_port: int, state_path: Path, log_path: Path,
+                 backend_pid: int | None = None) -> ProxyControl:
+    """Start `server_manager_cli.py proxy run` detached."""
+    args = ["proxy", "run", "--listen", str(listen_port), "--backend", str(backend_port)]
+    if backend_pid:
+        args += ["--backend-pid", str(backend_pid)]
+    return launch_detached(args, state_path, log_path)
+
+
+# --- rolling restart ------------------------------------------------------------
+
+def active_games(db_path: Path, slot: tuple[int, int] | None = None) -> set[int]:
+    """Ids of games currently marked active (read-only; empty if unreadable).
+
+    slot=(index, slots) keeps only the games of lobbies pinned to that slot.
+    """
+    if not Path(db_path).exists():
+        return set()
+    sql, params = "SELECT id FROM games WHERE status = 'active'", ()
+    if slot is not None:
+        sql, params = sql + " AND lobby_id % ? = ?", (slot[1], slot[0])
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT_S)
+        try:
+            return {row[0] for row in conn.execute(sql, params)}
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return set()
+
+
+def finish_games(db_path: Path, game_ids: list[int]) -> int:
+    """Mark games finished the way the server's startup cleanup does."""
+    if not game_ids:
+        return 0
+    conn = sqlite3.connect(str(db_path), timeout=BUSY_TIMEOUT_S)
+    try:
+        with conn:
+            marks = ",".join("?" * len(game_ids))
+            cursor = conn.execute(f"UPDATE games SET status = 'finished', current_number = NULL "
+                                  f"WHERE status = 'active' AND id IN ({marks})", game_ids)
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+
+def stop_process(proc: subprocess.Popen, timeout: float = 5.0) -> None:
+    """Stop a spawned backend and its whole process tree (SIGTERM, then SIGKILL)."""
+    stop_popen(proc, timeout)
+
+
+@dataclass
+class RolloutResult:
+    old_port: int
+    new_port: int
+    new_pid: int
+    ready: ReadyResult
+    drained: bool = False
+    drain_s: float = 0.0
+    closed: int = 0
+    cut_games: list[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def describe(self) -> str:
+        drain = "drained" if self.drained else "drain deadline reached"
+        return (f":{self.old_port} → :{self.new_port} in {self.elapsed:.1f}s (new instance ready in "
+                f"{self.ready.elapsed:.1f}s, {drain} after {self.drain_s:.1f}s, "
+                f"{self.closed} connection(s) handed over)")
+
+
+def rolling_restart(control: ProxyControl, spawn: Callable[[dict[str, str]], subprocess.Popen],
+                    retire: Callable[[], None], db_path: Path, drain: float = DEFAULT_DRAIN_S,
+                    ready_deadline: float = DEFAULT_DEADLINE_S, log: Callable[[str], None] = print,
+                    sleep: Callable[[float], None] = time.sleep,
+                    on_switch: Callable[[subprocess.Popen], None] | None = None) -> RolloutResult:
+    """Replace the proxied backend without refusing connections.
+
+    spawn(env_overrides) starts the replacement; on_switch(proc) runs once
+    traffic goes to it and retire() stops the old instance once drained. If
+    the replacement never becomes ready it is stopped, the proxy is left
+    untouched and ProxyError is raised.
+    """
+    started = time.monotonic()
+    old_port = control.status()["backend_port"]
+    try:
+        session_id = probe_http(old_port)[1] if old_port else None
+    except OSError:
+        session_id = None
+    if not session_id:
+        log(f"Could not read the session id of :{old_port}; clients will be logged out by the switch")
+    new_port = free_port()
+    log(f"Starting replacement instance on :{new_port}")
+    proc = spawn(backend_env(new_port, replacing=True, session_id=session_id))
+    try:
+        ready = wait_ready(new_port, deadline=ready_deadline, alive=lambda: proc.poll() is None, sleep=sleep)
+    except BaseException:
+        stop_process(proc)
+        raise
+    if not ready.ready:
+        stop_process(proc)
+        raise ProxyError(f"Replacement {ready.describe()}; still serving from :{old_port}")
+    log(f"Replacement {ready.describe()}")
+
+    games = active_games(db_path)
+    control.switch(new_port, proc.pid)
+    if on_switch:
+        on_switch(proc)
+    result = RolloutResult(old_port, new_port, proc.pid, ready)
+    log(f"New requests now go to :{new_port}; draining :{old_port}"
+        + (f" ({len(games)} game(s) in progress)" if games else ""))
+    drain_started = time.monotonic()
+    try:
+        while True:
+            busy = [c for c in control.status()["connections"] if c["backend"] == old_port and c["inflight"]]
+            running = games & active_games(db_path) if games else set()
+            if not busy and not running:
+                result.drained = True
+                break
+            if time.monotonic() - drain_started >= drain:
+                break
+            sleep(DRAIN_POLL_S)
+    finally:
+        # Cancelling (Ctrl+C, the GUI's cancel) only cuts the drain short
+        result.drain_s = time.monotonic() - drain_started
+        result.closed = control.close_backend(old_port)
+        retire()
+        result.cut_games = sorted(games & active_games(db_path)) if games else []
+        if result.cut_games:
+            finish_games(db_path, result.cut_games)
+            log(f"Drain cut off game(s) {', '.join(map(str, result.cut_games))}; marked finished")
+    result.elapsed = time.monotonic() - started
+    return result
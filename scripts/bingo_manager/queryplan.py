@@ -0,0 +1,381 @@
+"""
+Query plan advisor for data/bingo.db.
+
+shared/schema.ts declares no secondary indexes, so lookups such as
+game_participants by game_id turn into full table scans as tables grow.
+advise() replays a workload of representative SQL against a private copy
+of the database:
+
+1. EXPLAIN QUERY PLAN every statement and flag full scans (SCAN <table>
+   without an index) of tables above a row threshold, plus temp b-trees
+   built for ORDER BY.
+2. Derive candidate indexes from the statement's equality/range predicates
+   and ORDER BY columns on the scanned table, then keep only candidates
+   that actually change the plan, by creating each one on the copy and
+   explaining again.
+3. Time every statement before and after the proposed indexes exist (writes
+   run inside a rolled-back transaction, so they measure index maintenance
+   without changing the copy).
+
+The live database is only ever read through the online backup API.
+
+A workload is either a .sql file (see scripts/db_workload.sql; "-- params:"
+and "-- weight:" comments bind values and weight statements) or the
+"Query: ... -- params: [...]" lines drizzle-orm logs when the server runs
+with DB_LOG_QUERIES=1.
+"""
+
+from __future__ import annotations
+import json
+import re
+import sqlite3
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .dbbackup import online_backup
+
+DEFAULT_MIN_ROWS = 1000
+DEFAULT_REPEAT = 20
+
+QUERY_LOG_RE = re.compile(r"\bQuery: (.+?)(?: -- params: (\[.*\]))?\s*$")
+SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\S+)(?: AS (\S+))?(.*)$")
+IDENT = r'"?(\w+)"?'
+PREDICATE_RE = re.compile(rf'(?:{IDENT}\.)?{IDENT}\s*(=|==|IS|IN|<=|>=|<|>|BETWEEN)\s', re.IGNORECASE)
+ORDER_BY_RE = re.compile(r"\border\s+by\s+(.+?)(?:\blimit\b|\boffset\b|$)", re.IGNORECASE | re.DOTALL)
+TABLE_REF_RE = re.compile(rf'\b(?:from|join)\s+{IDENT}(?:\s+(?:as\s+)?(?!where|inner|left|cross|join|on|order|group|limit){IDENT})?',
+                          re.IGNORECASE)
+RANGE_OPS = {"<", ">", "<=", ">=", "BETWEEN"}
+
+
+@dataclass
+class Statement:
+    sql: str
+    params: list = field(default_factory=list)
+    weight: int = 1
+    source: str = ""
+
+    @property
+    def is_select(self) -> bool:
+        return self.sql.lstrip().lower().startswith(("select", "with"))
+
+    def short(self, width: int = 100) -> str:
+        text = " ".join(self.sql.split())
+        return text if len(text) <= width else text[:width - 3] + "..."
+
+
+@dataclass
+class Finding:
+    table: str
+    kind: str  # "scan" or "temp-btree"
+    detail: str
+    rows: int
+
+
+@dataclass(frozen=True)
+class IndexProposal:
+    table: str
+    columns: tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        return f"idx_{self.table}_{'_'.join(self.columns)}"
+
+    @property
+    def ddl(self) -> str:
+        cols = ", ".join(f'"{c}"' for c in self.columns)
+        return f'CREATE INDEX IF NOT EXISTS "{self.name}" ON "{self.table}" ({cols});'
+
+
+@dataclass
+class Timing:
+    median_ms: float
+    p95_ms: float
+
+
+@dataclass
+class StatementReport:
+    statement: Statement
+    plan_before: list[str]
+    findings: list[Finding]
+    proposals: list[IndexProposal] = field(default_factory=list)
+    plan_after: list[str] = field(default_factory=list)
+    before: Timing | None = None
+    after: Timing | None = None
+    error: str | None = None
+
+    @property
+    def speedup(self) -> float | None:
+        if not self.before or not self.after or not self.after.median_ms:
+            return None
+        return self.before.median_ms / self.after.median_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "sql": self.statement.sql,
+            "params": self.statement.params,
+            "weight": self.statement.weight,
+            "plan_before": self.plan_before,
+            "plan_after": self.plan_after,
+            "findings": [f.__dict__ for f in self.findings],
+            "proposals": [p.name for p in self.proposals],
+            "before": self.before.__dict__ if self.before else None,
+            "after": self.after.__dict__ if self.after else None,
+            "speedup": self.speedup,
+            "error": self.error,
+        }
+
+
+@dataclass
+class AdviceReport:
+    statements: list[StatementReport]
+    proposals: list[IndexProposal]
+    row_counts: dict[str, int]
+    min_rows: int
+
+    def to_dict(self) -> dict:
+        return {
+            "min_rows": self.min_rows,
+            "row_counts": self.row_counts,
+            "proposals": [{"name": p.name, "table": p.table, "columns": list(p.columns), "ddl": p.ddl}
+                          for p in self.proposals],
+            "statements": [s.to_dict() for s in self.statements],
+        }
+
+
+# --- Workloads ----------------------------------------------------------
+
+def load_workload(path: Path) -> list[Statement]:
+    """Parse a .sql workload; see scripts/db_workload.sql for the format."""
+    statements: list[Statement] = []
+    params: list = []
+    weight = 1
+    buffer = ""
+    for number, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines(), 1):
+        stripped = line.strip()
+        if not buffer and stripped.startswith("--"):
+            comment = stripped[2:].strip()
+            if comment.lower().startswith("params:"):
+                params = json.loads(comment[7:])
+            elif comment.lower().startswith("weight:"):
+                weight = int(comment[7:])
+            continue
+        if not stripped and not buffer:
+            continue
+        buffer += line + "\n"
+        if sqlite3.complete_statement(buffer):
+            statements.append(Statement(buffer.strip().rstrip(";").strip(), params, weight, f"{path}:{number}"))
+            buffer, params, weight = "", [], 1
+    if buffer.strip():
+        statements.append(Statement(buffer.strip().rstrip(";"), params, weight, f"{path}:end"))
+    return statements
+
+
+def load_query_log(paths: list[Path]) -> list[Statement]:
+    """Statements captured by drizzle's query logger, weighted by frequency."""
+    seen: dict[str, Statement] = {}
+    for path in paths:
+        with Path(path).open(encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if "Query: " not in line:
+                    continue
+                match = QUERY_LOG_RE.search(line)
+                if not match:
+                    continue
+                sql = match.group(1).strip()
+                if sql in seen:
+                    seen[sql].weight += 1
+                    continue
+                try:
+                    params = json.loads(match.group(2)) if match.group(2) else []
+                except ValueError:
+                    params = []
+                seen[sql] = Statement(sql, params, 1, Path(path).name)
+    return sorted(seen.values(), key=lambda s: s.weight, reverse=True)
+
+
+# --- Plans ------------------------------------------------------------------
+
+def _bind(stmt: Statement) -> list:
+    """Bind values for every placeholder (missing ones default to 1)."""
+    count = stmt.sql.count("?")
+    values = list(stmt.params[:count])
+    return values + [1] * (count - len(values))
+
+
+def explain(conn: sqlite3.Connection, stmt: Statement) -> list[str]:
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {stmt.sql}", _bind(stmt)).fetchall()
+    return [row[3] for row in rows]
+
+
+def table_aliases(sql: str) -> dict[str, str]:
+    """Map alias (and table name) -> table for tables in FROM/JOIN clauses."""
+    aliases = {}
+    for table, alias in TABLE_REF_RE.findall(sql):
+        aliases[table.lower()] = table
+        if alias:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def find_issues(plan: list[str], aliases: dict[str, str], row_counts: dict[str, int],
+                min_rows: int) -> list[Finding]:
+    findings = []
+    for detail in plan:
+        match = SCAN_RE.match(detail)
+        if match:
+            name, alias, rest = match.groups()
+            if "INDEX" in rest:
+                continue  # scanning an index in order, not the table
+            table = aliases.get((alias or name).lower(), name)
+            rows = row_counts.get(table, 0)
+            if rows >= min_rows:
+                findings.append(Finding(table, "scan", detail, rows))
+        elif detail.startswith("USE TEMP B-TREE FOR ORDER BY"):
+            # Attributed to the outermost (first FROM) table
+            table = next(iter(aliases.values()), "?")
+            rows = row_counts.get(table, 0)
+            if rows >= min_rows:
+                findings.append(Finding(table, "temp-btree", detail, rows))
+    return findings
+
+
+def candidate_indexes(stmt: Statement, table: str, columns: set[str]) -> list[IndexProposal]:
+    """Candidates from equality, then range, then ORDER BY columns of table."""
+    aliases = table_aliases(stmt.sql)
+    own_names = {name for name, target in aliases.items() if target == table}
+    equality: list[str] = []
+    ranges: list[str] = []
+    for qualifier, column, op in PREDICATE_RE.findall(stmt.sql):
+        if qualifier and qualifier.lower() not in own_names:
+            continue
+        if column not in columns:
+            continue
+        target = ranges if op.upper() in RANGE_OPS else equality
+        if column not in equality and column not in ranges:
+            target.append(column)
+    ordering: list[str] = []
+    order = ORDER_BY_RE.search(stmt.sql)
+    if order:
+        for qualifier, column in re.findall(rf"(?:{IDENT}\.)?{IDENT}", order.group(1)):
+            if column.lower() in ("asc", "desc", "nulls", "first", "last"):
+                continue
+            if (not qualifier or qualifier.lower() in own_names) and column in columns:
+                ordering.append(column)
+
+    candidates: list[tuple[str, ...]] = []
+    if equality or ranges or ordering:
+        candidates.append(tuple(dict.fromkeys(equality + ranges[:1] + ordering)))
+    candidates.extend((column,) for column in equality)
+    if ranges:
+        candidates.append((ranges[0],))
+    return [IndexProposal(table, cols) for cols in dict.fromkeys(candidates) if cols]
+
+
+def existing_index_prefixes(conn: sqlite3.Connection) -> set[tuple[str, tuple[str, ...]]]:
+    """(table, leading columns) for every index, including primary keys."""
+    prefixes = set()
+    for table, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"):
+        for _, index, *_ in conn.execute(f'PRAGMA index_list("{table}")'):
+            cols = tuple(row[2] for row in conn.execute(f'PRAGMA index_info("{index}")'))
+            for i in range(1, len(cols) + 1):
+                prefixes.add((table, cols[:i]))
+    return prefixes
+
+
+def _plan_uses(plan: list[str], proposal: IndexProposal) -> bool:
+    return any(proposal.name in detail for detail in plan)
+
+
+# --- Benchmarks -------------------------------------------------------------
+
+def time_statement(conn: sqlite3.Connection, stmt: Statement, repeat: int) -> Timing:
+    params = _bind(stmt)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if stmt.is_select:
+            conn.execute(stmt.sql, params).fetchall()
+        else:
+            # Measure the write (and its index maintenance) without keeping it
+            conn.execute("BEGIN")
+            try:
+                conn.execute(stmt.sql, params)
+            finally:
+                conn.execute("ROLLBACK")
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return Timing(statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))])
+
+
+# --- Advisor ----------------------------------------------------------------
+
+def advise(db_path: Path, statements: list[Statement], min_rows: int = DEFAULT_MIN_ROWS,
+           repeat: int = DEFAULT_REPEAT, analyze: bool = False, log=print) -> AdviceReport:
+    with tempfile.TemporaryDirectory(prefix="bingo-advise-") as tmp:
+        copy = Path(tmp) / "advise.db"
+        online_backup(Path(db_path), copy, step_pages=-1, verify=False)
+        conn = sqlite3.connect(str(copy), isolation_level=None)
+        try:
+            return _advise(conn, statements, min_rows, repeat, analyze, log)
+        finally:
+            conn.close()
+
+
+def _advise(conn: sqlite3.Connection, statements: list[Statement], min_rows: int, repeat: int,
+            analyze: bool, log) -> AdviceReport:
+    tables = [name for name, in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    row_counts = {t: conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in tables}
+    columns = {t: {row[1] for row in conn.execute(f'PRAGMA table_info("{t}")')} for t in tables}
+    if analyze:
+        conn.execute("ANALYZE")
+    existing = existing_index_prefixes(conn)
+
+    reports: list[StatementReport] = []
+    for stmt in statements:
+        try:
+            plan = explain(conn, stmt)
+        except sqlite3.Error as e:
+            reports.append(StatementReport(stmt, [], [], error=str(e)))
+            continue
+        findings = find_issues(plan, table_aliases(stmt.sql), row_counts, min_rows)
+        report = StatementReport(stmt, plan, findings)
+        reports.append(report)
+        for table in dict.fromkeys(f.table for f in findings):
+            for proposal in candidate_indexes(stmt, table, columns.get(table, set())):
+                if (table, proposal.columns) in existing:
+                    continue
+                # What-if: keep the candidate only if the planner picks it
+                conn.execute(proposal.ddl)
+                try:
+                    used = _plan_uses(explain(conn, stmt), proposal)
+                finally:
+                    conn.execute(f'DROP INDEX "{proposal.name}"')
+                if used:
+                    report.proposals.append(proposal)
+                    break
+
+    proposals = list(dict.fromkeys(p for r in reports for p in r.proposals))
+    # A composite index also serves lookups on its leading columns
+    covering = {p: next((o for o in proposals if o.table == p.table and len(o.columns) > len(p.columns)
+                         and o.columns[:len(p.columns)] == p.columns), p) for p in proposals}
+    proposals = [p for p in proposals if covering[p] is p]
+    for report in reports:
+        report.proposals = list(dict.fromkeys(covering[p] for p in report.proposals))
+
+    timed = [r for r in reports if r.error is None]
+    log(f"⏱️  Timing {len(timed)} statement(s) x{repeat} before indexes...")
+    for report in timed:
+        report.before = time_statement(conn, report.statement, repeat)
+    for proposal in proposals:
+        conn.execute(proposal.ddl)
+    if analyze and proposals:
+        conn.execute("ANALYZE")
+    log(f"⏱️  Timing again with {len(proposals)} proposed index(es)...")
+    for report in timed:
+        report.plan_after = explain(conn, report.statement)
+        report.after = time_statement(conn, report.statement, repeat)
+    return AdviceReport(reports, proposals, row_counts, min_rows)
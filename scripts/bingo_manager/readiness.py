@@ -0,0 +1,213 @@
+"""
+Readiness probing for the Node server.
+
+Startup takes anywhere from ~2s to 20s depending on the vite dev build, so
+fixed sleeps either waste time or declare success too early. wait_ready()
+goes through two phases, each retried with exponential backoff under one
+overall deadline:
+
+1. TCP: a non-blocking connect to PORT (select() on writability, then
+   SO_ERROR), which is cheap enough to retry every few tens of ms
+2. HTTP: GET /api/auth/session must answer 200 with a sessionId. The id
+   changes on every boot, so a restart can insist on a *new* id and never
+   mistake the old instance for the new one
+
+A liveness callback (usually `lambda: proc.poll() is None`) ends the wait
+as soon as the process dies instead of running out the deadline.
+
+wait_port_released() is the counterpart for stops and restarts: it polls
+until the port can be bound again (POSIX binds with SO_REUSEADDR, as node
+does, so lingering TIME_WAIT sockets do not count as "in use").
+
+`sleep` is injectable so GUI tasks can pass their cancellable ctx.sleep.
+"""
+
+from __future__ import annotations
+import errno
+import http.client
+import json
+import os
+import select
+import socket
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_PORT = 5000
+HEALTH_PATH = "/api/auth/session"
+DEFAULT_DEADLINE_S = 60.0
+INITIAL_DELAY_S = 0.05
+MAX_DELAY_S = 1.0
+BACKOFF = 1.6
+CONNECT_TIMEOUT_S = 0.5
+HTTP_TIMEOUT_S = 2.0
+
+
+def read_env_port(env_file: Path, default: int = DEFAULT_PORT) -> int:
+    """PORT from a .env file (falling back to the environment, then default)."""
+    port = os.environ.get("PORT")
+    try:
+        for line in Path(env_file).read_text(errors="replace").splitlines():
+            key, sep, value = line.partition("=")
+            if sep and key.strip() == "PORT":
+                port = value.strip().strip('"').strip("'")
+    except OSError:
+        pass
+    try:
+        return int(port) if port else default
+    except ValueError:
+        return default
+
+
+def port_open(port: int, host: str = "127.0.0.1", timeout: float = CONNECT_TIMEOUT_S) -> bool:
+    """True if something accepts TCP connections on host:port."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        code = sock.connect_ex((host, port))
+        if code == 0:
+            return True
+        if code not in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, getattr(errno, "WSAEWOULDBLOCK", -1)):
+            return False
+        _, writable, failed = select.select([], [sock], [sock], timeout)
+        if not writable and not failed:
+            return False
+        return sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def port_free(port: int, host: str = "0.0.0.0") -> bool:
+    """True if the port could be bound right now (nobody is listening on it)."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        if os.name != "nt":
+            # On Windows SO_REUSEADDR would allow binding over a live listener
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    """A port the OS considers free right now (bind to 0 and release it)."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def probe_http(port: int, host: str = "127.0.0.1", path: str = HEALTH_PATH,
+               timeout: float = HTTP_TIMEOUT_S) -> tuple[int, str | None]:
+    """(status, sessionId) from the health endpoint; raises OSError if unreachable."""
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request("GET", path, headers={"Accept": "application/json"})
+        response = conn.getresponse()
+        body = response.read()
+    except http.client.HTTPException as e:
+        raise OSError(str(e)) from e
+    finally:
+        conn.close()
+    session = None
+    if response.status == 200:
+        try:
+            session = (json.loads(body) or {}).get("sessionId")
+        except (ValueError, AttributeError):
+            pass
+    return response.status, session
+
+
+@dataclass
+class ReadyResult:
+    ready: bool
+    port: int
+    elapsed: float
+    port_open_after: float | None = None
+    session_id: str | None = None
+    attempts: int = 0
+    reason: str = ""
+
+    def describe(self) -> str:
+        if not self.ready:
+            return f"not ready after {self.elapsed:.1f}s ({self.reason})"
+        tcp = f", port open after {self.port_open_after:.1f}s" if self.port_open_after is not None else ""
+        return f"ready on :{self.port} in {self.elapsed:.1f}s{tcp}"
+
+
+def wait_ready(port: int, host: str = "127.0.0.1", deadline: float = DEFAULT_DEADLINE_S,
+               path: str = HEALTH_PATH, alive: Callable[[], bool] | None = None,
+               previous_session: str | None = None, sleep: Callable[[float], None] = time.sleep,
+               on_phase: Callable[[str, float], None] | None = None) -> ReadyResult:
+    """Block until host:port answers the health probe, the process dies or deadline passes."""
+    started = time.monotonic()
+    result = ReadyResult(ready=False, port=port, elapsed=0.0)
+    delay = INITIAL_DELAY_S
+    phase = None
+
+    def enter(name: str) -> None:
+        nonlocal phase, delay
+        if phase != name:
+            phase = name
+            delay = INITIAL_DELAY_S  # back off afresh in each phase
+            if on_phase:
+                on_phase(name, time.monotonic() - started)
+
+    while True:
+        elapsed = time.monotonic() - started
+        if alive is not None and not alive():
+            result.reason = "process exited"
+            break
+        if elapsed > deadline:
+            detail = f": {result.reason}" if result.reason else ""
+            result.reason = f"timed out in phase {phase or 'tcp'}{detail}"
+            break
+        result.attempts += 1
+        if not port_open(port, host):
+            enter("tcp")
+        else:
+            if result.port_open_after is None:
+                result.port_open_after = elapsed
+            enter("http")
+            try:
+                status, session = probe_http(port, host, path)
+            except OSError:
+                status, session = None, None
+            if status == 200 and (previous_session is None or session != previous_session):
+                result.ready = True
+                result.session_id = session
+                break
+            if status == 200:
+                result.reason = "old instance still answering"
+        remaining = deadline - (time.monotonic() - started)
+        sleep(max(0.0, min(delay, remaining)))
+        delay = min(delay * BACKOFF, MAX_DELAY_S)
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def wait_port_released(port: int, deadline: float = 15.0, sleep: Callable[[float], None] = time.sleep) -> float | None:
+    """Seconds until the port could be bound again, or None on timeout."""
+    started = time.monotonic()
+    delay = INITIAL_DELAY_S
+    while True:
+        if port_free(port):
+            return time.monotonic() - started
+        if time.monotonic() - started > deadline:
+            return None
+        sleep(delay)
+        delay = min(delay * BACKOFF, MAX_DELAY_S / 2)
+
+
+def current_session(port: int, host: str = "127.0.0.1") -> str | None:
+    """sessionId of whatever is serving on the port now, if anything."""
+    try:
+        status, session = probe_http(port, host, timeout=CONNECT_TIMEOUT_S)
+    except OSError:
+        return None
+    return session if status == 200 else None
@@ -0,0 +1,273 @@
+"""
+Background task executor for the server manager GUI.
+
+Tk is single threaded: anything that blocks in a button handler (npm install,
+drizzle-kit push, sleeps while ports are released) freezes the window. Work is
+submitted here instead and runs on a small thread pool. Each task gets a
+TaskContext with its own CancelToken; everything it wants to show (console
+lines, progress, status text, UI callbacks) is posted to a queue which the GUI
+drains on the Tk thread. Nothing in this module touches Tk.
+"""
+
+from __future__ import annotations
+import os
+import signal
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+class TaskCancelled(BaseException):
+    """Raised inside a task when its CancelToken has been triggered.
+
+    Derives from BaseException (like asyncio.CancelledError) so the broad
+    `except Exception` handlers in task bodies do not swallow it.
+    """
+
+
+class CancelToken:
+    """Cooperative cancellation flag with callbacks (used to kill children)."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Register callback; returns a function that unregisters it."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+
+                def remove() -> None:
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+                return remove
+        callback()
+        return lambda: None
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise TaskCancelled()
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep that returns early (raising TaskCancelled) on cancellation."""
+        if self._event.wait(seconds):
+            raise TaskCancelled()
+
+
+@dataclass
+class TaskEvent:
+    """Message posted from a worker to the GUI pump.
+
+    kind is one of "progress" (value, label), "status" (text), "call"
+    (fn, args, kwargs) or "finished" (result, error, cancelled).
+    """
+    task: str
+    kind: str
+    data: dict = field(default_factory=dict)
+
+
+def kill_process_tree(proc: subprocess.Popen) -> None:
+    """Forcefully stop a child started by TaskContext.run and its descendants."""
+    if proc.poll() is not None:
+        return
+    if sys.platform == "win32":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)], capture_output=True)
+    else:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            proc.kill()
+
+
+class TaskContext:
+    """Handle given to a running task for output, progress and cancellation."""
+
+    def __init__(self, name: str, token: CancelToken, post: Callable[[Any], None]):
+        self.name = name
+        self.token = token
+        self._post = post
+
+    def log(self, text: str) -> None:
+        self._post(text if text.endswith("\n") else text + "\n")
+
+    def progress(self, value: float, label: str | None = None) -> None:
+        self._post(TaskEvent(self.name, "progress", {"value": value, "label": label}))
+
+    def status(self, text: str) -> None:
+        self._post(TaskEvent(self.name, "status", {"text": text}))
+
+    def call(self, fn: Callable, *args, **kwargs) -> None:
+        """Run fn(*args, **kwargs) on the GUI thread (dialogs, widget updates)."""
+        self._post(TaskEvent(self.name, "call", {"fn": fn, "args": args, "kwargs": kwargs}))
+
+    def sleep(self, seconds: float) -> None:
+        self.token.sleep(seconds)
+
+    def run(self, cmd: list[str], timeout: float | None = None, cwd: str | None = None,
+            env: dict | None = None, echo: bool = True) -> tuple[int, list[str]]:
+        """Run cmd, streaming each output line to the console as it arrives.
+
+        Returns (returncode, lines). Raises subprocess.TimeoutExpired when the
+        timeout elapses and TaskCancelled when the task is cancelled; in both
+        cases the whole child process tree is killed first.
+        """
+        self.token.raise_if_cancelled()
+        kwargs: dict[str, Any] = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        proc = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            **kwargs,
+        )
+        timed_out = threading.Event()
+
+        def expire() -> None:
+            timed_out.set()
+            kill_process_tree(proc)
+
+        timer = threading.Timer(timeout, expire) if timeout else None
+        unregister = self.token.on_cancel(lambda: kill_process_tree(proc))
+        lines: list[str] = []
+        try:
+            if timer:
+                timer.daemon = True
+                timer.start()
+            assert proc.stdout is not None
+            for line in proc.stdout:
+                line = line.rstrip()
+                lines.append(line)
+                if echo:
+                    self.log(line)
+            returncode = proc.wait()
+        finally:
+            if timer:
+                timer.cancel()
+            unregister()
+            if proc.stdout:
+                proc.stdout.close()
+        self.token.raise_if_cancelled()
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return returncode, lines
+
+
+@dataclass
+class TaskHandle:
+    name: str
+    token: CancelToken
+    future: Future
+
+    def cancel(self) -> None:
+        self.token.cancel()
+
+
+class TaskExecutor:
+    """Thread pool that runs GUI tasks and reports through `post`.
+
+    Only one task per name runs at a time; submitting a duplicate while the
+    first is active is rejected so a double-clicked button cannot run two
+    migrations against the same database.
+    """
+
+    def __init__(self, post: Callable[[Any], None], max_workers: int = 4):
+        self._post = post
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gui-task")
+        self._active: dict[str, TaskHandle] = {}
+        self._lock = threading.Lock()
+
+    def is_running(self, name: str) -> bool:
+        with self._lock:
+            return name in self._active
+
+    @property
+    def active(self) -> list[str]:
+        with self._lock:
+            return list(self._active)
+
+    def submit(self, name: str, fn: Callable[..., Any], *args,
+               on_done: Callable[[Any, BaseException | None, bool], None] | None = None) -> TaskHandle | None:
+        """Run fn(ctx, *args) in the pool.
+
+        on_done(result, error, cancelled) is invoked on the GUI thread once
+        the task finishes.
+        """
+        with self._lock:
+            if name in self._active:
+                self._post(f"⏳ '{name}' is already running\n")
+                return None
+            token = CancelToken()
+            ctx = TaskContext(name, token, self._post)
+            future = self._pool.submit(self._run, ctx, fn, args, on_done)
+            handle = TaskHandle(name, token, future)
+            self._active[name] = handle
+        return handle
+
+    def _run(self, ctx: TaskContext, fn: Callable, args: tuple, on_done) -> Any:
+        result = error = None
+        cancelled = False
+        try:
+            result = fn(ctx, *args)
+        except TaskCancelled:
+            cancelled = True
+            ctx.log(f"🛑 {ctx.name} cancelled")
+        except BaseException as e:
+            error = e
+        finally:
+            with self._lock:
+                self._active.pop(ctx.name, None)
+            self._post(TaskEvent(ctx.name, "finished",
+                                 {"result": result, "error": error, "cancelled": cancelled}))
+            if on_done:
+                ctx.call(on_done, result, error, cancelled)
+        return result
+
+    def cancel(self, name: str) -> bool:
+        with self._lock:
+            handle = self._active.get(name)
+        if handle:
+            handle.cancel()
+        return handle is not None
+
+    def cancel_all(self) -> list[str]:
+        with self._lock:
+            handles = list(self._active.values())
+        for handle in handles:
+            handle.cancel()
+        return [h.name for h in handles]
+
+    def shutdown(self) -> None:
+        self.cancel_all()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,118 @@
+"""
+Cached toolchain discovery (npm, node and friends).
+
+Finding npm is a PATH search and learning its version means spawning it,
+which costs about 300ms (more on Windows, where npm is a .cmd run through
+cmd.exe). The manager used to do both on every start, twice. ToolCache keeps
+the answers in a small JSON file (data/.toolchain.json) keyed on:
+
+- the PATH they were found under: a different PATH (a venv, nvm use, a cron
+  job's minimal environment) may resolve to a different binary
+- the binary's mtime: upgrading node or npm rewrites it
+
+A hit costs one stat() call. Versions are only probed when asked for and
+are cached alongside the path. The file is rewritten atomically and a
+corrupt or unreadable cache is just a miss. One cache may be shared by
+threads (the GUI probes node and npm concurrently); the version spawn runs
+outside the lock.
+"""
+
+from __future__ import annotations
+import json
+import os
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+VERSION_TIMEOUT_S = 10.0
+
+
+@dataclass
+class Tool:
+    name: str
+    path: str
+    version: str | None = None
+    cached: bool = False
+
+
+class ToolCache:
+    """Tool paths and versions, remembered across runs."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: dict[str, dict] | None = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            try:
+                entries = json.loads(self.path.read_text())
+                self._entries = entries if isinstance(entries, dict) else {}
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._load(), indent=1, sort_keys=True))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass  # a read-only checkout still works, just uncached
+
+    @staticmethod
+    def _mtime(path: str) -> int | None:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def find(self, name: str, locate: Callable[[], str | None] | None = None) -> Tool | None:
+        """Path of `name` (via locate(), default shutil.which), from the cache when still valid."""
+        search_path = os.environ.get("PATH", "")
+        with self._lock:
+            entry = self._load().get(name)
+            if entry and entry.get("search_path") == search_path and self._mtime(entry["path"]) == entry.get("mtime"):
+                self.hits += 1
+                return Tool(name, entry["path"], entry.get("version"), cached=True)
+            self.misses += 1
+        found = (locate or (lambda: shutil.which(name)))()
+        with self._lock:
+            if not found:
+                self._load().pop(name, None)
+                self._save()
+                return None
+            self._load()[name] = {"path": found, "search_path": search_path, "mtime": self._mtime(found)}
+            self._save()
+        return Tool(name, found)
+
+    def version(self, tool: Tool, args: tuple[str, ...] = ("--version",)) -> str:
+        """`tool --version`, spawned only when the cache has no answer for this binary."""
+        if tool.version:
+            return tool.version
+        result = subprocess.run([tool.path, *args], check=True, capture_output=True, text=True,
+                                timeout=VERSION_TIMEOUT_S)
+        tool.version = result.stdout.strip() or result.stderr.strip()
+        with self._lock:
+            entry = self._load().get(tool.name)
+            if entry and entry["path"] == tool.path:
+                entry["version"] = tool.version
+                self._save()
+        return tool.version
+
+    def forget(self, name: str) -> None:
+        """Drop one tool so the next find() searches and probes it again."""
+        with self._lock:
+            if self._load().pop(name, None) is not None:
+                self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+            self.path.unlink(missing_ok=True)
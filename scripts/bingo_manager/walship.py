@@ -0,0 +1,736 @@
+"""
+Continuous WAL shipping and point-in-time restore for data/bingo.db.
+
+server/db.ts runs the database with journal_mode=WAL, so every committed
+transaction is first appended to bingo.db-wal as a run of frames (24-byte
+header + one page image) ending in a commit frame. WalShipper tails that
+file: each poll stats the WAL, reads only what was appended since the last
+poll, takes the frames SQLite has committed and buffers whole
+transactions. Which frames are committed comes from the wal-index header
+in bingo.db-shm (mxFrame, salts and the checksum of the last commit frame),
+which SQLite itself publishes only after the frames are written, so no
+page has to be checksummed; the frames' salts are checked, and the stored
+checksum of the last commit frame must match the index. When the index
+cannot be read or is from another WAL cycle, every frame is validated
+with the cumulative checksum instead, so a frame that is still being
+written is never shipped. Buffers are flushed every few seconds as zlib-compressed
+segments together with the time each commit was observed.
+
+Checkpoint coordination: once a checkpoint has copied every frame into the
+database, the next writer restarts the WAL and overwrites it from the top.
+The shipper keeps a read transaction open at all times, which stops SQLite
+from backfilling or restarting past what it has read. When the WAL grows
+past a threshold the shipper takes the write lock (BEGIN IMMEDIATE), ships
+the remaining frames, drops its read transaction, runs a PASSIVE checkpoint
+and re-opens the read transaction before letting writers back in. Every
+frame is therefore archived before it can be overwritten.
+
+Archive layout (data/backups/wal/ by default):
+
+    generations/<id>/base.db.z          full copy taken via the backup API
+    generations/<id>/segments/N.wal.z   shipped frames
+    generations/<id>/index.jsonl        one line per segment (commit times)
+    generations/<id>/state.json         WAL position, for resuming
+
+A new generation (fresh base copy) starts whenever continuity with the WAL
+cannot be proven: first run, or the WAL was reset while nobody was
+watching. Restoring to a time T decompresses the newest base taken at or
+before T and replays every commit observed at or before T.
+"""
+
+from __future__ import annotations
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import sys
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from .dbbackup import BackupError, integrity_check, online_backup
+
+WAL_HEADER_SIZE = 32
+FRAME_HEADER_SIZE = 24
+WAL_MAGIC = (0x377F0682, 0x377F0683)
+WAL_INDEX_VERSION = 3007000
+WAL_INDEX_HEADER_SIZE = 48
+WAL_INDEX_READ_ATTEMPTS = 3
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_FLUSH_INTERVAL = 2.0
+DEFAULT_FLUSH_BYTES = 4 * 1024 * 1024
+DEFAULT_CHECKPOINT_BYTES = 4 * 1024 * 1024
+MIN_CHECKPOINT_INTERVAL = 10.0
+BUSY_TIMEOUT_S = 10.0
+COMPRESS_LEVEL = 6
+COPY_CHUNK = 1024 * 1024
+READ_FRAMES = 16
+
+
+class WalShipError(BackupError):
+    pass
+
+
+def wal_checksum(data: bytes, s1: int, s2: int, big_endian: bool) -> tuple[int, int]:
+    """SQLite's WAL checksum (walChecksumBytes) over data, seeded with (s1, s2)."""
+    words = struct.unpack(f"{'>' if big_endian else '<'}{len(data) // 4}I", data)
+    for x0, x1 in zip(words[0::2], words[1::2]):
+        s1 = (s1 + x0 + s2) & 0xFFFFFFFF
+        s2 = (s2 + x1 + s1) & 0xFFFFFFFF
+    return s1, s2
+
+
+@dataclass
+class WalHeader:
+    magic: int
+    page_size: int
+    checkpoint_seq: int
+    salt1: int
+    salt2: int
+    checksum: tuple[int, int]
+
+    @property
+    def big_endian(self) -> bool:
+        return self.magic & 1 == 1
+
+    @property
+    def salts(self) -> tuple[int, int]:
+        return self.salt1, self.salt2
+
+    @classmethod
+    def parse(cls, data: bytes) -> WalHeader | None:
+        """Parse the 32-byte WAL header; None if absent or not yet valid."""
+        if len(data) < WAL_HEADER_SIZE:
+            return None
+        magic, _version, page_size, seq, salt1, salt2, c1, c2 = struct.unpack(">8I", data[:WAL_HEADER_SIZE])
+        if magic not in WAL_MAGIC:
+            return None
+        if wal_checksum(data[:24], 0, 0, magic & 1 == 1) != (c1, c2):
+            return None
+        return cls(magic, page_size, seq, salt1, salt2, (c1, c2))
+
+
+@dataclass
+class WalIndexHeader:
+    mx_frame: int
+    page_size: int
+    frame_checksum: tuple[int, int]
+    salts: tuple[int, int]
+
+    @classmethod
+    def parse(cls, data: bytes) -> WalIndexHeader | None:
+        """Parse the wal-index header (two native-endian copies, as walIndexTryHdr reads them); None if torn or unset."""
+        if len(data) < 2 * WAL_INDEX_HEADER_SIZE:
+            return None
+        first, second = data[:WAL_INDEX_HEADER_SIZE], data[WAL_INDEX_HEADER_SIZE:2 * WAL_INDEX_HEADER_SIZE]
+        if first != second:
+            return None  # Caught mid-update
+        version, _unused, _change, is_init, _big_end, page_size, mx_frame, _pages, f1, f2 = struct.unpack_from("=3I2BH4I", first)
+        c1, c2 = struct.unpack_from("=2I", first, 40)
+        if version != WAL_INDEX_VERSION or not is_init:
+            return None
+        if wal_checksum(first[:40], 0, 0, sys.byteorder == "big") != (c1, c2):
+            return None
+        page_size = 65536 if page_size == 1 else page_size
+        return cls(mx_frame, page_size, (f1, f2), struct.unpack_from(">2I", first, 32))  # Salts are raw WAL bytes
+
+    @classmethod
+    def read(cls, shm_path: Path) -> WalIndexHeader | None:
+        for _ in range(WAL_INDEX_READ_ATTEMPTS):
+            try:
+                with shm_path.open("rb") as f:
+                    data = f.read(2 * WAL_INDEX_HEADER_SIZE)
+            except OSError:
+                return None
+            header = cls.parse(data)
+            if header is not None:
+                return header
+        return None
+
+
+class WalTail:
+    """Reads the committed frames appended to a WAL file since the last read."""
+
+    def __init__(self, wal_path: Path):
+        self.path = Path(wal_path)
+        self.shm_path = self.path.with_name(self.path.name.removesuffix("-wal") + "-shm")
+        self.header: WalHeader | None = None
+        self.offset = 0
+        self.checksum = (0, 0)
+        self.bytes_read = 0
+
+    def position(self) -> dict:
+        return {
+            "salts": list(self.header.salts) if self.header else None,
+            "offset": self.offset,
+            "checksum": list(self.checksum),
+        }
+
+    def matches(self, position: dict) -> bool:
+        """True if the WAL still has the same salts and at least position's frames."""
+        header = self._read_header()
+        return (header is not None and position.get("salts") == list(header.salts)
+                and self.path.stat().st_size >= position["offset"])
+
+    def resume(self, position: dict) -> None:
+        self.header = self._read_header()
+        self.offset = position["offset"]
+        self.checksum = tuple(position["checksum"])
+
+    def _read_header(self) -> WalHeader | None:
+        try:
+            with self.path.open("rb") as f:
+                return WalHeader.parse(f.read(WAL_HEADER_SIZE))
+        except FileNotFoundError:
+            return None
+
+    def read(self) -> tuple[bytes, list[int], bool]:
+        """Return (frames, commit frame counts, reset).
+
+        frames holds whole transactions only; commit frame counts are the
+        1-based index of each commit frame within it. reset is True when the
+        WAL was restarted (new salts) since the previous read.
+        """
+        try:
+            f = self.path.open("rb")
+        except FileNotFoundError:
+            return b"", [], False
+        with f:
+            header = WalHeader.parse(f.read(WAL_HEADER_SIZE))
+            if header is None:
+                return b"", [], False
+            reset = False
+            if self.header is None or header.salts != self.header.salts:
+                reset = self.header is not None
+                self.header = header
+                self.offset = WAL_HEADER_SIZE
+                self.checksum = header.checksum
+            f.seek(self.offset)
+            index = WalIndexHeader.read(self.shm_path)
+            if index is not None and index.salts == header.salts and index.page_size == header.page_size:
+                shipped = self._read_indexed(f, header, index)
+                if shipped is not None:
+                    return shipped + (reset,)
+                f.seek(self.offset)
+            data, commits = self._read_verified(f, header)
+        return data, commits, reset
+
+    def _read_indexed(self, f, header: WalHeader, index: WalIndexHeader) -> tuple[bytes, list[int]] | None:
+        """Read up to the index's last commit frame; None if the frames do not agree with the index."""
+        frame_size = FRAME_HEADER_SIZE + header.page_size
+        first = (self.offset - WAL_HEADER_SIZE) // frame_size  # Frames already shipped
+        if index.mx_frame <= first:
+            return b"", []
+        data = f.read((index.mx_frame - first) * frame_size)
+        self.bytes_read += len(data)
+        if len(data) != (index.mx_frame - first) * frame_size:
+            return None
+        commits: list[int] = []
+        for count, pos in enumerate(range(0, len(data), frame_size), 1):
+            pgno, db_size, salt1, salt2 = struct.unpack_from(">4I", data, pos)
+            if (salt1, salt2) != header.salts or pgno == 0:
+                return None
+            if db_size:
+                commits.append(count)
+        # mxFrame is always a commit frame, and SQLite recorded its checksum in the index
+        checksum = struct.unpack_from(">2I", data, len(data) - frame_size + 16)
+        if not commits or commits[-1] != len(data) // frame_size or checksum != index.frame_checksum:
+            return None
+        self.offset += len(data)
+        self.checksum = checksum
+        return data, commits
+
+    def _read_verified(self, f, header: WalHeader) -> tuple[bytes, list[int]]:
+        """Read whole transactions, validating every frame with the cumulative checksum."""
+        frame_size = FRAME_HEADER_SIZE + header.page_size
+        checksum = self.checksum
+        commits: list[int] = []
+        committed_checksum = checksum
+        count = 0
+        pos = 0
+        data = bytearray()
+        # Read in bounded chunks and stop at the first invalid frame: after a
+        # restart the rest of the file is stale frames from the previous cycle
+        valid = True
+        while valid:
+            chunk = f.read(READ_FRAMES * frame_size)
+            self.bytes_read += len(chunk)
+            data += chunk
+            while pos + frame_size <= len(data):
+                pgno, db_size, salt1, salt2, c1, c2 = struct.unpack_from(">6I", data, pos)
+                if (salt1, salt2) != header.salts or pgno == 0:
+                    valid = False
+                    break
+                checksum = wal_checksum(data[pos:pos + 8], *checksum, header.big_endian)
+                checksum = wal_checksum(data[pos + FRAME_HEADER_SIZE:pos + frame_size], *checksum,
+                                        header.big_endian)
+                if checksum != (c1, c2):
+                    valid = False
+                    break
+                count += 1
+                pos += frame_size
+                if db_size:
+                    commits.append(count)
+                    committed_checksum = checksum
+            if len(chunk) < READ_FRAMES * frame_size:
+                break
+        shipped = commits[-1] * frame_size if commits else 0
+        self.offset += shipped
+        self.checksum = committed_checksum
+        return bytes(data[:shipped]), commits
+
+
+def iter_frames(data: bytes, page_size: int):
+    """Yield (page number, db size after commit or 0, page) for shipped frames."""
+    frame_size = FRAME_HEADER_SIZE + page_size
+    for pos in range(0, len(data) - frame_size + 1, frame_size):
+        pgno, db_size = struct.unpack_from(">2I", data, pos)
+        yield pgno, db_size, data[pos + FRAME_HEADER_SIZE:pos + frame_size]
+
+
+@dataclass
+class Generation:
+    id: str
+    path: Path
+    created: float
+    page_size: int
+    base_size: int
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self.created)
+
+    def segments(self) -> list[dict]:
+        index = self.path / "index.jsonl"
+        if not index.exists():
+            return []
+        segments = []
+        for line in index.read_text().splitlines():
+            # A crash mid-append can leave a torn last line; its segment is unreferenced
+            try:
+                segments.append(json.loads(line))
+            except ValueError:
+                break
+        return segments
+
+    def last_commit(self) -> float:
+        segments = self.segments()
+        return segments[-1]["last_ts"] if segments else self.created
+
+
+@dataclass
+class RestoreResult:
+    generation: str
+    path: Path
+    commits: int
+    restored_to: float
+    integrity: str
+
+
+class WalArchive:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.generation_dir = self.root / "generations"
+
+    def generations(self) -> list[Generation]:
+        """All complete generations, oldest first."""
+        if not self.generation_dir.exists():
+            return []
+        generations = []
+        for meta_path in self.generation_dir.glob("*/meta.json"):
+            meta = json.loads(meta_path.read_text())
+            generations.append(Generation(path=meta_path.parent, **meta))
+        return sorted(generations, key=lambda g: (g.created, g.id))
+
+    def new_generation(self, db_path: Path, page_size: int | None = None) -> Generation:
+        now = datetime.now()
+        base_id = gen_id = now.strftime("%Y%m%d_%H%M%S")
+        n = 1
+        while (self.generation_dir / gen_id).exists():
+            n += 1
+            gen_id = f"{base_id}_{n}"
+        path = self.generation_dir / gen_id
+        (path / "segments").mkdir(parents=True)
+        staging = path / "base.db"
+        # One step: a stepped copy restarts every time the server commits
+        result = online_backup(db_path, staging, step_pages=-1, verify=True)
+        if page_size is None:
+            conn = sqlite3.connect(f"file:{staging}?mode=ro", uri=True)
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            conn.close()
+        compressor = zlib.compressobj(COMPRESS_LEVEL)
+        with staging.open("rb") as src, (path / "base.db.z").open("wb") as out:
+            while chunk := src.read(COPY_CHUNK):
+                out.write(compressor.compress(chunk))
+            out.write(compressor.flush())
+            out.flush()
+            os.fsync(out.fileno())
+        staging.unlink()
+        generation = Generation(gen_id, path, time.time(), page_size, result.size)
+        meta = {k: v for k, v in asdict(generation).items() if k != "path"}
+        (path / "meta.json").write_text(json.dumps(meta, indent=2))
+        return generation
+
+    def write_segment(self, generation: Generation, seq: int, frames: bytes,
+                      commits: list[tuple[int, float]]) -> int:
+        """Durably store a segment and append it to the index; returns stored bytes."""
+        name = f"{seq:08d}.wal.z"
+        target = generation.path / "segments" / name
+        tmp = target.with_name(name + ".tmp")
+        payload = zlib.compress(frames, COMPRESS_LEVEL)
+        with tmp.open("wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, target)
+        entry = {
+            "seq": seq,
+            "file": name,
+            "frames": len(frames) // (FRAME_HEADER_SIZE + generation.page_size),
+            "commits": [[end, ts] for end, ts in commits],
+            "first_ts": commits[0][1],
+            "last_ts": commits[-1][1],
+            "raw": len(frames),
+            "stored": len(payload),
+        }
+        with (generation.path / "index.jsonl").open("a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return len(payload)
+
+    def prune(self, keep: int) -> list[str]:
+        """Delete all but the newest `keep` generations."""
+        generations = self.generations()
+        removed = generations[:-keep] if keep > 0 else []
+        for generation in removed:
+            shutil.rmtree(generation.path, ignore_errors=True)
+        return [g.id for g in removed]
+
+    def stored_size(self, generation: Generation) -> int:
+        return sum(p.stat().st_size for p in generation.path.rglob("*") if p.is_file())
+
+    def restore(self, dest: Path, target: float | None = None, overwrite: bool = False,
+                on_progress: Callable[[float], None] | None = None) -> RestoreResult:
+        """Rebuild the database as of `target` (epoch seconds; None = latest)."""
+        dest = Path(dest)
+        if dest.exists() and not overwrite:
+            raise WalShipError(f"{dest} already exists (use --force to overwrite)")
+        candidates = [g for g in self.generations() if target is None or g.created <= target]
+        if not candidates:
+            raise WalShipError("No WAL archive generation covers that time")
+        generation = candidates[-1]
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        partial = dest.with_name(dest.name + ".partial")
+        decompressor = zlib.decompressobj()
+        with (generation.path / "base.db.z").open("rb") as src, partial.open("wb") as out:
+            while chunk := src.read(COPY_CHUNK):
+                out.write(decompressor.decompress(chunk))
+            out.write(decompressor.flush())
+
+        page_size = generation.page_size
+        applied = 0
+        restored_to = generation.created
+        segments = generation.segments()
+        with partial.open("r+b") as out:
+            for i, segment in enumerate(segments, 1):
+                limit = 0
+                for end, ts in segment["commits"]:
+                    if target is not None and ts > target:
+                        break
+                    limit, restored_to = end, ts
+                    applied += 1
+                if limit:
+                    data = zlib.decompress((generation.path / "segments" / segment["file"]).read_bytes())
+                    frames = data[:limit * (FRAME_HEADER_SIZE + page_size)]
+                    for pgno, db_size, page in iter_frames(frames, page_size):
+                        out.seek((pgno - 1) * page_size)
+                        out.write(page)
+                        if db_size:
+                            out.truncate(db_size * page_size)
+                if on_progress:
+                    on_progress(i / len(segments))
+                if limit < segment["frames"]:
+                    break
+            # Page 1 from the WAL says "WAL mode"; make the copy a standalone file
+            # like online_backup does (file format read/write version = legacy)
+            out.seek(18)
+            if out.read(2) == b"\x02\x02":
+                out.seek(18)
+                out.write(b"\x01\x01")
+
+        result = integrity_check(partial)
+        if result != "ok":
+            raise WalShipError(f"Restored database failed integrity check ({result}); kept at {partial}")
+        for suffix in ("-wal", "-shm"):
+            Path(str(dest) + suffix).unlink(missing_ok=True)
+        os.replace(partial, dest)
+        return RestoreResult(generation.id, dest, applied, restored_to, result)
+
+
+@dataclass
+class ShipStats:
+    started: float = field(default_factory=time.monotonic)
+    cpu_start: float = field(default_factory=time.process_time)
+    polls: int = 0
+    reads: int = 0
+    bytes_read: int = 0
+    frames: int = 0
+    commits: int = 0
+    segments: int = 0
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+    checkpoints: int = 0
+    wal_resets: int = 0
+    generations: int = 0
+
+    @property
+    def cpu_percent(self) -> float:
+        wall = time.monotonic() - self.started
+        return 100 * (time.process_time() - self.cpu_start) / wall if wall > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        data = {k: v for k, v in asdict(self).items() if k not in ("started", "cpu_start")}
+        data["uptime"] = round(time.monotonic() - self.started, 1)
+        data["cpu_percent"] = round(self.cpu_percent, 3)
+        return data
+
+    def summary(self) -> str:
+        ratio = self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.0
+        return (f"{self.commits} commits, {self.frames} frames in {self.segments} segments "
+                f"({self.stored_bytes / 1024:.1f}KB stored, {ratio:.1f}x), {self.checkpoints} checkpoints, "
+                f"read {self.bytes_read / 1024:.1f}KB over {self.reads}/{self.polls} polls, "
+                f"cpu {self.cpu_percent:.2f}%")
+
+
+class WalShipper:
+    """Long-running shipper of bingo.db-wal frames into a WalArchive."""
+
+    def __init__(self, db_path: Path, archive_dir: Path,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 flush_bytes: int = DEFAULT_FLUSH_BYTES,
+                 checkpoint_bytes: int = DEFAULT_CHECKPOINT_BYTES,
+                 log: Callable[[str], None] = print):
+        self.db_path = Path(db_path)
+        self.archive = WalArchive(archive_dir)
+        self.tail = WalTail(Path(str(db_path) + "-wal"))
+        self.poll_interval = poll_interval
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.checkpoint_bytes = checkpoint_bytes
+        self.log = log
+        self.stats = ShipStats()
+        self.generation: Generation | None = None
+        self.seq = 0
+        self.pending: list[bytes] = []
+        self.pending_commits: list[tuple[int, float]] = []
+        self.pending_frames = 0
+        self.pending_since: float | None = None
+        self.reset_safe = False
+        self.last_checkpoint = 0.0
+        self.last_stat: tuple[int, int] | None = None
+        self.reader: sqlite3.Connection | None = None
+        self.locker: sqlite3.Connection | None = None
+
+    # --- Connections ----------------------------------------------------
+
+    def open(self) -> None:
+        if not self.db_path.exists():
+            raise WalShipError(f"Database file not found: {self.db_path}")
+        self.reader = sqlite3.connect(str(self.db_path), timeout=BUSY_TIMEOUT_S, isolation_level=None)
+        self.locker = sqlite3.connect(str(self.db_path), timeout=BUSY_TIMEOUT_S, isolation_level=None)
+        mode = self.reader.execute("PRAGMA journal_mode").fetchone()[0]
+        if mode.lower() != "wal":
+            self.close()
+            raise WalShipError(f"{self.db_path} is in {mode} mode; start the server once to switch it to WAL")
+        self._begin_read()
+
+    def _begin_read(self) -> None:
+        # Any read pins a WAL read mark until COMMIT
+        self.reader.execute("BEGIN")
+        self.reader.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+    def _end_read(self) -> None:
+        self.reader.execute("COMMIT")
+
+    def close(self) -> None:
+        if self.generation is not None and self.reader is not None:
+            self.flush()
+        for conn in (self.reader, self.locker):
+            if conn is not None:
+                conn.close()
+        self.reader = self.locker = None
+
+    # --- Generations ----------------------------------------------------
+
+    def _state_path(self) -> Path:
+        return self.generation.path / "state.json"
+
+    def _save_state(self) -> None:
+        state = {"seq": self.seq, "position": self.tail.position()}
+        tmp = self._state_path().with_suffix(".tmp")
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, self._state_path())
+
+    def resume_or_start(self) -> None:
+        """Continue the newest generation if the WAL still lines up with it."""
+        generations = self.archive.generations()
+        if generations:
+            latest = generations[-1]
+            state_path = latest.path / "state.json"
+            if state_path.exists():
+                state = json.loads(state_path.read_text())
+                if state["position"]["salts"] and self.tail.matches(state["position"]):
+                    self.generation = latest
+                    self.seq = state["seq"]
+                    self.tail.resume(state["position"])
+                    self.log(f"▶️  Resuming generation {latest.id} at WAL offset {self.tail.offset}")
+                    return
+        self.start_generation("no resumable generation" if generations else "first run")
+
+    def start_generation(self, reason: str) -> None:
+        self.flush()
+        # Skip whatever is in the WAL now: the base copy taken next includes it
+        self.tail.read()
+        page_size = self.tail.header.page_size if self.tail.header else None
+        self.log(f"🧱 Starting new generation ({reason}): base copy of {self.db_path}")
+        self.generation = self.archive.new_generation(self.db_path, page_size)
+        self.seq = 0
+        self.reset_safe = False
+        self.stats.generations += 1
+        # Transactions committed while the base was copied may or may not be in
+        # it; replaying them is idempotent and makes the base a consistent floor
+        frames, commits, reset = self.tail.read()
+        if reset:
+            raise WalShipError("WAL was reset while the base copy was taken")
+        self._buffer(frames, commits, self.generation.created)
+        self.flush()
+        self._save_state()
+        self.log(f"✅ Generation {self.generation.id}: base {self.generation.base_size / 1024:.1f}KB")
+
+    # --- Shipping -------------------------------------------------------
+
+    def _buffer(self, frames: bytes, commits: list[int], observed: float) -> None:
+        if not frames:
+            return
+        if self.pending_since is None:
+            self.pending_since = time.monotonic()
+        self.pending.append(frames)
+        self.pending_commits.extend((self.pending_frames + end, observed) for end in commits)
+        self.pending_frames += commits[-1]
+        self.stats.frames += commits[-1]
+        self.stats.commits += len(commits)
+
+    def poll(self) -> bool:
+        """Read newly committed frames; returns True if anything was read."""
+        self.stats.polls += 1
+        try:
+            st = self.tail.path.stat()
+        except FileNotFoundError:
+            return False
+        key = (st.st_size, st.st_mtime_ns)
+        if key == self.last_stat:
+            return False
+        self.last_stat = key
+        self.stats.reads += 1
+        before = self.tail.bytes_read
+        frames, commits, reset = self.tail.read()
+        self.stats.bytes_read += self.tail.bytes_read - before
+        if reset:
+            self.stats.wal_resets += 1
+            if not self.reset_safe:
+                # Frames may have been overwritten before they were read
+                self.start_generation("WAL reset outside a coordinated checkpoint")
+                return True
+            self.reset_safe = False
+        self._buffer(frames, commits, time.time())
+        return bool(frames)
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        self.seq += 1
+        frames = b"".join(self.pending)
+        stored = self.archive.write_segment(self.generation, self.seq, frames, self.pending_commits)
+        self.stats.segments += 1
+        self.stats.raw_bytes += len(frames)
+        self.stats.stored_bytes += stored
+        self.pending, self.pending_commits = [], []
+        self.pending_frames = 0
+        self.pending_since = None
+        self._save_state()
+
+    def flush_due(self) -> bool:
+        if not self.pending:
+            return False
+        return (time.monotonic() - self.pending_since >= self.flush_interval
+                or sum(len(p) for p in self.pending) >= self.flush_bytes)
+
+    def checkpoint_due(self) -> bool:
+        return (self.tail.offset >= self.checkpoint_bytes
+                and time.monotonic() - self.last_checkpoint >= MIN_CHECKPOINT_INTERVAL)
+
+    def checkpoint(self) -> bool:
+        """Ship everything under the write lock, then let SQLite checkpoint."""
+        self.last_checkpoint = time.monotonic()
+        try:
+            self.locker.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            self.log(f"⚠️  Checkpoint skipped, write lock unavailable: {e}")
+            return False
+        try:
+            self.last_stat = None
+            self.poll()
+            self.flush()
+            self._end_read()
+            try:
+                busy, wal_frames, copied = self.reader.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            finally:
+                self._begin_read()
+        finally:
+            self.locker.execute("COMMIT")
+        # Nothing new could be written while the lock was held, so a restart
+        # from here on only discards frames that are already archived
+        self.reset_safe = True
+        self.stats.checkpoints += 1
+        return not busy and wal_frames == copied
+
+    def run(self, should_stop: Callable[[], bool] | None = None, stats_interval: float = 60.0,
+            status_path: Path | None = None) -> None:
+        self.open()
+        try:
+            self.resume_or_start()
+            next_stats = time.monotonic() + stats_interval
+            while not (should_stop and should_stop()):
+                self.poll()
+                if self.flush_due():
+                    self.flush()
+                if self.checkpoint_due():
+                    self.checkpoint()
+                if time.monotonic() >= next_stats:
+                    next_stats = time.monotonic() + stats_interval
+                    self.log(f"📈 {self.stats.summary()}")
+                    if status_path:
+                        self.write_status(status_path)
+                time.sleep(self.poll_interval)
+        finally:
+            self.close()
+            if status_path:
+                self.write_status(status_path)
+
+    def write_status(self, path: Path) -> None:
+        status = {
+            "pid": os.getpid(),
+            "updated": time.time(),
+            "generation": self.generation.id if self.generation else None,
+            "position": self.tail.position(),
+            "stats": self.stats.to_dict(),
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(status, indent=2))
+        os.replace(tmp, path)
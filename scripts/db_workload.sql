@@ -0,0 +1,74 @@
+-- Representative queries issued by the server, in the form drizzle-orm
+-- generates them. Used by `server_manager_cli.py db-advise` when no
+-- --workload/--from-logs is given.
+--
+-- Statements end with ';'. A "-- params: [...]" comment (JSON array) binds
+-- values for the next statement's ? placeholders; "-- weight: N" says how
+-- often it runs relative to the others.
+
+-- Game engine: load a game and its seated players (every draw / claim)
+-- params: [1]
+-- weight: 20
+select "id", "lobby_id", "name", "game_number", "max_seats", "seats_taken", "winner_id", "status", "drawn_numbers", "current_number", "created_at", "updated_at" from "games" where "games"."id" = ?;
+
+-- params: [1]
+-- weight: 20
+select "id", "game_id", "user_id", "seat_number", "card", "is_winner", "joined_at" from "game_participants" where "game_participants"."game_id" = ?;
+
+-- Win claims: the claimer's seat and card
+-- params: [1, 1]
+-- weight: 5
+select "id", "lobby_id", "user_id", "seat_number", "joined_at" from "lobby_participants" where ("lobby_participants"."lobby_id" = ? and "lobby_participants"."user_id" = ?);
+
+-- params: [1, 1]
+-- weight: 5
+select "id", "game_id", "user_id", "seat_number", "card", "is_winner", "joined_at" from "game_participants" where ("game_participants"."game_id" = ? and "game_participants"."user_id" = ?);
+
+-- Lobby pages: games in a lobby, and the lobby's current game
+-- params: [1]
+-- weight: 10
+select "id", "lobby_id", "name", "game_number", "max_seats", "seats_taken", "winner_id", "status", "drawn_numbers", "current_number", "created_at", "updated_at" from "games" where "games"."lobby_id" = ? order by "games"."game_number";
+
+-- params: [1, "active"]
+-- weight: 10
+select "id", "lobby_id", "name", "game_number", "status" from "games" where ("games"."lobby_id" = ? and "games"."status" = ?);
+
+-- params: [1]
+-- weight: 10
+select "id", "lobby_id", "user_id", "seat_number", "joined_at" from "lobby_participants" where "lobby_participants"."lobby_id" = ?;
+
+-- Game join/leave: the user's seat in a game
+-- params: [1, 1]
+-- weight: 5
+select "id" from "game_participants" where ("game_participants"."game_id" = ? and "game_participants"."user_id" = ?);
+
+-- Wallet history and admin wallet views
+-- params: [1]
+-- weight: 5
+select "id", "user_id", "amount", "type", "description", "created_at" from "wallet_transactions" where "wallet_transactions"."user_id" = ? order by "wallet_transactions"."created_at" desc limit 50;
+
+-- params: [1]
+-- weight: 1
+delete from "wallet_transactions" where "wallet_transactions"."user_id" = ?;
+
+-- Winners board and a user's wins
+-- weight: 5
+select "id", "game_id", "lobby_id", "user_id", "amount", "note", "created_at" from "winners" order by "winners"."created_at" desc limit 20;
+
+-- params: [1]
+-- weight: 2
+select "id", "game_id", "amount", "created_at" from "winners" where "winners"."user_id" = ?;
+
+-- Achievements and notification preferences
+-- params: [1]
+-- weight: 3
+select "id", "user_id", "achievement_id", "unlocked_at", "progress", "is_new" from "user_achievements" where "user_achievements"."user_id" = ?;
+
+-- params: [1, "pattern_indicator_popup"]
+-- weight: 3
+select "id", "user_id", "notification_type", "is_dismissed", "dismissed_at" from "user_notification_preferences" where ("user_notification_preferences"."user_id" = ? and "user_notification_preferences"."notification_type" = ?);
+
+-- Writes: index maintenance shows up here after indexes are added
+-- params: [1, -5, "game_entry", "Joined game"]
+-- weight: 5
+insert into "wallet_transactions" ("id", "user_id", "amount", "type", "description", "created_at") values (null, ?, ?, ?, ?, strftime('%s', 'now'));
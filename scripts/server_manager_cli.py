@@ -7,14 +7,89 @@ Features
 - Pre‑flight checks (python/node/npm/sqlite DB path)
 - Start/stop/status for the Node server (`npm run dev`)
 - Persist server PID in .server_pid for reliable stop/status
-- Simple log viewer (tails most recent debugging/server-*.log if present)
+- Readiness probing: start/restart return as soon as PORT accepts
+  connections and /api/auth/session answers, reporting time-to-ready;
+  stop/restart wait for the port to actually be released
+- Zero-downtime restarts (start --proxy): an asyncio reverse proxy owns PORT
+  and node runs on a spare loopback port; restart boots a replacement,
+  switches new connections to it once ready and drains the old instance
+  before SIGTERM, so players only see a sub-second socket reconnect
+- Cluster mode (cluster start --workers N): a supervisor runs N node workers
+  behind the proxy with per-worker PID/log files, restarts crashed workers
+  with exponential backoff and health-checks each one. Every lobby is pinned
+  to one worker (its REST calls and its players' sockets), other requests
+  go to the least busy one; workers share bingo.db with a busy timeout and
+  a single WAL checkpointer
+- Resource monitor (top): CPU%, RSS, fds, threads and disk I/O of the whole
+  server process tree from /proc, live in curses with sparklines, with an
+  optional on-disk time series for long runs
+- Log viewer: seek-based tail of the newest debugging/server-*.log, with
+  --follow to stream new lines across session rotations
+- Online SQLite backup (backup API, stepped so the live server keeps writing)
+- Incremental, deduplicated snapshots of the database (snapshot create/list/
+  restore/prune/verify) in data/backups/store
+- Continuous WAL shipping (wal-ship) into data/backups/wal with point-in-time
+  restore to any timestamp
+- Database statistics (db-stats): row counts, page/freelist/WAL sizes and
+  per-index b-tree usage, read-only and cached with a TTL
+- Query plan advisor (db-advise): replays a SQL workload with EXPLAIN QUERY
+  PLAN on a copy of the database, proposes indexes and benchmarks them
+- Load generator (loadtest): thousands of asyncio virtual players that
+  register, join seats, listen on lobby rooms and claim wins, reporting
+  request latency percentiles, socket event lag and error rates
+- Benchmark suite (bench): REST scenarios against a throwaway server on a
+  seeded fixture database, JSON history in data/benchmarks and a compare
+  command that flags statistically significant regressions
+- Log queries by time range, level and lobby/game id via a per-file sidecar
+  index (logs query)
+- Log archiving (logs archive): inactive session logs are gzipped on a
+  worker pool and pruned by age and a total byte budget; logs --file and
+  logs query read the archives transparently
+- Process-tree shutdown: the server runs in its own session; stop/restart
+  snapshot every descendant and group member from /proc, SIGTERM them all and
+  SIGKILL whatever is left at the deadline, so node never outlives npm. reap
+  stops orphaned node processes still bound to PORT or holding bingo.db open
+- Fast startup: each subcommand imports only what it uses, npm's path and
+  version are cached in data/.toolchain.json (keyed on PATH and the npm
+  binary's mtime), and --timings shows where the startup time goes
 
 Usage examples
   python scripts/server_manager_cli.py start
   python scripts/server_manager_cli.py stop
+  python scripts/server_manager_cli.py restart
+  python scripts/server_manager_cli.py start --proxy
+  python scripts/server_manager_cli.py restart --drain 60
+  python scripts/server_manager_cli.py proxy status
+  python scripts/server_manager_cli.py cluster start --workers 4
+  python scripts/server_manager_cli.py cluster status
+  python scripts/server_manager_cli.py cluster restart --drain 20
+  python scripts/server_manager_cli.py ready --wait 30
   python scripts/server_manager_cli.py status
+  python scripts/server_manager_cli.py top --interval 0.5
+  python scripts/server_manager_cli.py top --record data/monitor/soak.ts
+  python scripts/server_manager_cli.py top --replay data/monitor/soak.ts
   python scripts/server_manager_cli.py logs --lines 150
+  python scripts/server_manager_cli.py logs --follow
+  python scripts/server_manager_cli.py logs query --level ERROR --since 2h
+  python scripts/server_manager_cli.py logs query --id game:12 --term number_called
+  python scripts/server_manager_cli.py logs archive --budget-mb 256 --max-age-days 14
+  python scripts/server_manager_cli.py logs --file server-2025-08-30T06-40-00.log.gz --lines 50
+  python scripts/server_manager_cli.py backup
+  python scripts/server_manager_cli.py snapshot create
+  python scripts/server_manager_cli.py snapshot prune --keep-last 24 --keep-daily 30
+  python scripts/server_manager_cli.py wal-ship
+  python scripts/server_manager_cli.py wal-ship restore --to 2025-08-30T06:40:00 --dest restored.db
+  python scripts/server_manager_cli.py db-stats --json
+  python scripts/server_manager_cli.py db-advise
+  python scripts/server_manager_cli.py db-advise --from-logs --sql data/proposed_indexes.sql
+  python scripts/server_manager_cli.py loadtest --users 2000 --ramp 60 --duration 120
+  python scripts/server_manager_cli.py loadtest --users 500 --lobby 1 --start-games --call-ms 1000
+  python scripts/server_manager_cli.py bench run
+  python scripts/server_manager_cli.py bench run --ref main --scenario dashboard --scenario lobbies
+  python scripts/server_manager_cli.py bench compare main
   python scripts/server_manager_cli.py env
+  python scripts/server_manager_cli.py --timings status
+  python scripts/server_manager_cli.py reap --dry-run
   python scripts/server_manager_cli.py cleanup
 
 Notes
@@ -23,28 +98,111 @@ Notes
 """
 
 from __future__ import annotations
+import sys
+from time import monotonic, perf_counter, sleep
+
+# Taken before the other imports so --timings can show what they cost
+STARTED = perf_counter()
+STARTED_MODULES = len(sys.modules)
+
 import argparse
+import json
 import os
 import platform
 import shutil
-import signal
 import subprocess
-import sys
+from datetime import datetime
 from pathlib import Path
-from time import sleep
+from typing import TYPE_CHECKING
+
+from bingo_manager.control import ProxyControl, launch_detached
+
+if TYPE_CHECKING:
+    from bingo_manager.procmon import ProcessMonitor
+    from bingo_manager.toolchain import Tool, ToolCache
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 PID_FILE = REPO_ROOT / ".server_pid"
 DEBUG_DIR = REPO_ROOT / "debugging"
 DATA_DIR = REPO_ROOT / "data"
 DB_FILE = DATA_DIR / "bingo.db"
+BACKUP_DIR = DATA_DIR / "backups"
+SNAPSHOT_STORE = BACKUP_DIR / "store"
+WAL_ARCHIVE = BACKUP_DIR / "wal"
+WAL_SHIP_PID = WAL_ARCHIVE / "wal-ship.pid"
+WAL_SHIP_STATUS = WAL_ARCHIVE / "status.json"
+DB_STATS_CACHE = DATA_DIR / ".db-stats.json"
+BENCH_DIR = DATA_DIR / "benchmarks"
+MONITOR_DIR = DATA_DIR / "monitor"
+DEFAULT_WORKLOAD = REPO_ROOT / "scripts" / "db_workload.sql"
+ENV_FILE = REPO_ROOT / ".env"
+PROXY_STATE = REPO_ROOT / ".server_proxy.json"
+PROXY_LOG = DEBUG_DIR / "proxy.log"
+TOOLCHAIN_CACHE = DATA_DIR / ".toolchain.json"
+CLUSTER_STATE = REPO_ROOT / ".server_cluster.json"
+CLUSTER_LOG = DEBUG_DIR / "cluster.log"
+CLUSTER_DIR = DATA_DIR / "cluster"
+COMMANDS = ("start", "stop", "restart", "ready", "status", "proxy", "cluster", "top", "logs", "backup", "snapshot",
+            "wal-ship", "db-stats", "db-advise", "loadtest", "bench", "env", "reap", "cleanup")
 
 
 def is_windows() -> bool:
     return platform.system().lower().startswith("win")
 
 
-def which_npm() -> str:
+class Timings:
+    """Where one CLI run spent its time, for --timings."""
+
+    def __init__(self, started: float, modules: int):
+        self.last = started
+        self.modules = modules
+        self.phases: list[tuple[str, float, int]] = []
+        self.details: list[tuple[str, float]] = []
+
+    def mark(self, label: str) -> None:
+        """Close the phase that began at the previous mark."""
+        now, modules = perf_counter(), len(sys.modules)
+        self.phases.append((label, now - self.last, modules - self.modules))
+        self.last, self.modules = now, modules
+
+    def add(self, label: str, seconds: float) -> None:
+        self.details.append((label, seconds))
+
+    def report(self) -> str:
+        lines = ["⏱️  Startup timings"]
+        if (boot := interpreter_startup()) is not None:
+            lines.append(f"   {'interpreter':<14} {boot * 1000:8.1f} ms  (from /proc, ±10ms)")
+        for label, seconds, modules in self.phases:
+            lines.append(f"   {label:<14} {seconds * 1000:8.1f} ms" + (f"  ({modules} modules imported)" if modules else ""))
+        lines.append(f"   {'total':<14} {(perf_counter() - STARTED) * 1000:8.1f} ms")
+        lines += [f"     {label}: {seconds * 1000:.1f} ms" for label, seconds in self.details]
+        return "\n".join(lines)
+
+
+def interpreter_startup() -> float | None:
+    """Seconds between process start and this module's first line (Linux only)."""
+    try:
+        ticks = int(Path("/proc/self/stat").read_text().rsplit(")", 1)[1].split()[19])
+        uptime = float(Path("/proc/uptime").read_text().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    age = uptime - ticks / os.sysconf("SC_CLK_TCK")
+    return max(0.0, age - (perf_counter() - STARTED))
+
+
+TIMINGS = Timings(STARTED, STARTED_MODULES)
+_TOOL_CACHE: ToolCache | None = None
+
+
+def tool_cache() -> ToolCache:
+    global _TOOL_CACHE
+    if _TOOL_CACHE is None:
+        from bingo_manager.toolchain import ToolCache
+        _TOOL_CACHE = ToolCache(TOOLCHAIN_CACHE)
+    return _TOOL_CACHE
+
+
+def locate_npm() -> str | None:
     # Prefer portable discovery; fall back to common install path on Windows
     npm = shutil.which("npm.cmd" if is_windows() else "npm")
     if npm:
@@ -53,22 +211,42 @@ def which_npm() -> str:
         candidate = Path("C:/Program Files/nodejs/npm.cmd")
         if candidate.exists():
             return str(candidate)
-    raise RuntimeError("npm executable not found. Ensure Node.js is installed and in PATH.")
+    return None
+
+
+def npm_tool() -> Tool:
+    started = perf_counter()
+    tool = tool_cache().find("npm", locate_npm)
+    TIMINGS.add(f"npm lookup ({'cached' if tool and tool.cached else 'searched PATH'})", perf_counter() - started)
+    if tool is None:
+        raise RuntimeError("npm executable not found. Ensure Node.js is installed and in PATH.")
+    return tool
+
+
+def which_npm() -> str:
+    return npm_tool().path
+
+
+def npm_version() -> str:
+    tool = npm_tool()
+    started, cached = perf_counter(), tool.version is not None
+    version = tool_cache().version(tool)
+    TIMINGS.add(f"npm --version ({'cached' if cached else 'spawned'})", perf_counter() - started)
+    return version
 
 
 def preflight() -> None:
     print("🔍 Pre-flight checks...")
     print(f"OS: {platform.system()} {platform.release()}")
     print(f"Python: {sys.version.split()[0]}")
-    # Node/npm
-    npm = which_npm()
+    # Node/npm (path and version are cached until PATH or the npm binary changes)
     try:
-        subprocess.run([npm, "--version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    except subprocess.CalledProcessError as e:
+        version = npm_version()
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError) as e:
         print("❌ npm not available:", e)
         raise
     else:
-        print("✅ npm available:", subprocess.run([npm, "--version"], stdout=subprocess.PIPE).stdout.decode().strip())
+        print("✅ npm available:", version)
     # Ensure dirs
     DEBUG_DIR.mkdir(exist_ok=True)
     DATA_DIR.mkdir(exist_ok=True)
@@ -106,67 +284,841 @@ def process_alive(pid: int) -> bool:
         return False
 
 
-def start_server(env: str = "development") -> None:
-    preflight()
-    if (pid := read_pid()) and process_alive(pid):
-        print(f"⚠️  Server already running with PID {pid}")
-        return
+def terminate_pid(pid: int) -> None:
+    """SIGTERM the server's whole process tree, SIGKILL what outlives the deadline."""
+    from bingo_manager.proctree import terminate_tree
+    print(f"   {terminate_tree(pid).describe()}")
+
+
+def npm_command(env: str) -> list[str]:
+    return [which_npm(), "run", "start" if env.lower() == "production" else "dev"]
+
 
-    npm = which_npm()
-    use_script = "start" if env.lower() == "production" else "dev"
-    print(f"🚀 Starting server (npm run {use_script})...")
+def spawn_server(env: str, overrides: dict[str, str] | None = None) -> subprocess.Popen:
+    from bingo_manager.proctree import session_kwargs
+    command = npm_command(env)
+    print(f"🚀 Starting server (npm run {command[-1]})...")
     # Use env vars cross‑platform
     env_map = os.environ.copy()
     env_map["NODE_ENV"] = env
+    env_map.update(overrides or {})
     # Spawn from repo root to ensure package.json is visible
-    proc = subprocess.Popen([npm, "run", use_script], cwd=str(REPO_ROOT), env=env_map)
+    # Own session: stop signals the group, so the node grandchild cannot outlive npm
+    return subprocess.Popen(command, cwd=str(REPO_ROOT), env=env_map, **session_kwargs())
+
+
+def start_server(env: str, timeout: float, wait: bool = True,
+                 proxy: bool = False, previous_session: str | None = None) -> None:
+    from bingo_manager.proxy import backend_env, launch_proxy
+    from bingo_manager.readiness import HEALTH_PATH, free_port, port_free, wait_ready
+    preflight()
+    if (pid := read_pid()) and process_alive(pid):
+        print(f"⚠️  Server already running with PID {pid}")
+        return
+    if ProxyControl.find(CLUSTER_STATE):
+        print("⚠️  The cluster is running (see `cluster status`)")
+        return
+    port = server_port()
+    control = ProxyControl.find(PROXY_STATE)
+    if control is None and not port_free(port):
+        print(f"⚠️  Port {port} is already in use; the {'proxy' if proxy else 'new server'} may fail to bind")
+    if control is None and proxy:
+        control = launch_proxy(port, free_port(), PROXY_STATE, PROXY_LOG)
+        print(f"🔀 Proxy listening on :{port} (log {PROXY_LOG})")
+
+    # Behind the proxy node gets a spare loopback port and the proxy keeps PORT
+    target = free_port() if control else port
+    proc = spawn_server(env, backend_env(target) if control else None)
     write_pid(proc.pid)
-    print(f"✅ Server process started (PID {proc.pid}). Waiting for initialization...")
-    sleep(1.0)
+    if control:
+        control.switch(target, proc.pid)
+    print(f"✅ Server process started (PID {proc.pid}). Waiting for it to answer on port {target}...")
+    if not wait:
+        return
+    phases = {"tcp": "waiting for port", "http": f"port open, probing {HEALTH_PATH}"}
+    result = wait_ready(target, deadline=timeout, alive=lambda: proc.poll() is None,
+                        previous_session=previous_session,
+                        on_phase=lambda phase, t: print(f"   {t:5.1f}s {phases[phase]}"))
+    if result.ready:
+        print(f"🟢 Server {result.describe()}" + (f", proxied on :{port}" if control else ""))
+        return
+    if proc.poll() is not None:
+        remove_pid()
+        raise RuntimeError(f"Server exited with code {proc.returncode} before becoming ready")
+    print(f"⚠️  Server {result.describe()}; it is still running (PID {proc.pid})")
 
 
-def stop_server() -> None:
+def stop_server(timeout: float = 15.0, keep_proxy: bool = False) -> None:
+    from bingo_manager.readiness import wait_port_released
+    if not keep_proxy and (cluster := ProxyControl.find(CLUSTER_STATE)):
+        stop_cluster(cluster, timeout)
+        if not read_pid():
+            return
+    control = ProxyControl.find(PROXY_STATE)
+    # Behind the proxy it is node's own loopback port that has to be released
+    port = control.status()["backend_port"] if control and keep_proxy else server_port()
     pid = read_pid()
+    stopped = False
     if not pid:
         print("ℹ️  No PID file. Server may not be running.")
-        return
-    if not process_alive(pid):
+    elif not process_alive(pid):
         print("ℹ️  PID not alive. Cleaning up PID file.")
         remove_pid()
+    else:
+        print(f"🛑 Stopping server PID {pid}...")
+        try:
+            terminate_pid(pid)
+            stopped = True
+        finally:
+            remove_pid()
+    if control and not keep_proxy:
+        print("🛑 Stopping proxy...")
+        control.stop()
+        stopped = True
+    if not stopped:
         return
-    print(f"🛑 Stopping server PID {pid}...")
-    try:
-        if is_windows():
-            subprocess.run(["taskkill", "/PID", str(pid), "/T", "/F"], check=False)
-        else:
-            os.kill(pid, signal.SIGTERM)
-    finally:
-        remove_pid()
-    print("✅ Server stopped.")
+    released = wait_port_released(port, deadline=timeout)
+    if released is None:
+        print(f"⚠️  Port {port} still in use after {timeout:.0f}s")
+    else:
+        print(f"✅ Server stopped (port {port} released after {released:.1f}s).")
+
+
+def restart_server(env: str, timeout: float, drain: float, cold: bool = False) -> None:
+    from bingo_manager.proxy import rolling_restart
+    from bingo_manager.readiness import current_session
+    if cluster := ProxyControl.find(CLUSTER_STATE):
+        roll_cluster(cluster, drain, timeout)
+        return
+    control = ProxyControl.find(PROXY_STATE)
+    old_pid = read_pid()
+    if control is None or cold or not (old_pid and process_alive(old_pid)):
+        # Without the proxy the new instance takes over PORT: only a new session id proves it is the one answering
+        shared = "SERVER_SESSION_ID" in os.environ
+        previous = current_session(server_port()) if control is None and not shared else None
+        stop_server(keep_proxy=True)
+        start_server(env, timeout, previous_session=previous)
+        return
+
+    def retire() -> None:
+        if process_alive(old_pid):
+            print(f"🛑 Stopping old instance PID {old_pid}")
+            terminate_pid(old_pid)
+
+    print(f"🔁 Rolling restart behind the proxy on :{server_port()} (drain up to {drain:.0f}s)")
+    result = rolling_restart(control, lambda overrides: spawn_server(env, overrides), retire, DB_FILE,
+                             drain=drain, ready_deadline=timeout, log=lambda text: print(f"   {text}"),
+                             on_switch=lambda proc: write_pid(proc.pid))
+    print(f"🟢 Rolled over {result.describe()}")
+
+
+def ready(timeout: float = 0.0) -> None:
+    from bingo_manager.readiness import HEALTH_PATH, port_open, probe_http, wait_ready
+    port = server_port()
+    if timeout <= 0:
+        if not port_open(port):
+            raise RuntimeError(f"Nothing listening on port {port}")
+        status_code, session = probe_http(port)
+        if status_code != 200:
+            raise RuntimeError(f"{HEALTH_PATH} answered {status_code}")
+        print(f"🟢 Ready on :{port} (session {session})")
+        return
+    result = wait_ready(port, deadline=timeout)
+    if not result.ready:
+        raise RuntimeError(f"Server {result.describe()}")
+    print(f"🟢 Server {result.describe()}")
 
 
 def status() -> None:
     pid = read_pid()
+    cluster = ProxyControl.find(CLUSTER_STATE)
     if pid and process_alive(pid):
+        from bingo_manager.procmon import ProcessMonitor, supported
         print(f"🟢 Server running (PID {pid})")
-    else:
+        sample = ProcessMonitor(lambda: pid).sample() if supported() else None
+        if sample:
+            print(f"   {sample.procs} processes, RSS {sample.rss_kb / 1024:.1f}MB, "
+                  f"{sample.threads} threads, {sample.fds} fds")
+    elif cluster is None:
         print("🔴 Server not running")
+    if control := ProxyControl.find(PROXY_STATE):
+        print("   " + proxy_summary(control.status()))
+    if cluster:
+        state = cluster.request("workers")
+        print(cluster_summary(state))
+        print_workers(state)
+
+
+def proxy_summary(state: dict) -> str:
+    counts: dict[int, int] = {}
+    for conn in state["connections"]:
+        counts[conn["backend"]] = counts.get(conn["backend"], 0) + 1
+    backends = ", ".join(f":{port} {n}" for port, n in sorted(counts.items())) or "none"
+    return (f"🔀 Proxy :{state['listen_port']} → :{state['backend_port']} (PID {state['pid']}), "
+            f"{state['accepted']} accepted, {state['failed']} failed, open connections: {backends}")
+
+
+def proxy_cmd(args: argparse.Namespace) -> None:
+    from bingo_manager.proxy import run_proxy
+    action = args.proxy_cmd or "status"
+    if action == "run":
+        run_proxy(args.listen or server_port(), args.backend, Path(args.state), args.host, args.backend_pid,
+                  log=lambda text: print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {text}", flush=True))
+        return
+    control = ProxyControl.find(PROXY_STATE)
+    if control is None:
+        print("🔴 Proxy not running (start it with `start --proxy`)")
+        return
+    if action == "stop":
+        control.stop()
+        print("✅ Proxy stopped; the server keeps running on its loopback port")
+        return
+    state = control.status()
+    print(proxy_summary(state))
+    for conn in sorted(state["connections"], key=lambda c: c["age"], reverse=True):
+        print(f"  #{conn['id']:<6} {conn['peer']:<22} :{conn['backend']:<6} {conn['kind']:<4} "
+              f"age {conn['age']:8.1f}s  idle {conn['idle']:7.1f}s  "
+              f"↑{format_bytes(conn['bytes_up'])} ↓{format_bytes(conn['bytes_down'])}")
+
+
+def cluster_summary(state: dict) -> str:
+    icon = {"healthy": "🟢", "degraded": "🟡", "down": "🔴"}[state["health"]]
+    proxy = state["proxy"]
+    return (f"{icon} Cluster {state['health']}: {state['ready']}/{len(state['workers'])} workers ready behind "
+            f":{proxy['listen_port']} (supervisor PID {proxy['pid']}), {proxy['accepted']} accepted, "
+            f"{proxy['failed']} failed, {proxy['sticky_sessions']} sticky sessions"
+            + (", rolling restart in progress" if state["rolling"] else ""))
+
+
+def print_workers(state: dict) -> None:
+    requests = state["proxy"]["requests"]
+    for w in state["workers"]:
+        uptime = f"{w['uptime']:.0f}s" if w["uptime"] is not None else "-"
+        latency = f"{w['latency_ms']:.0f}ms" if w["latency_ms"] is not None else "-"
+        notes = [f"last exit {w['last_exit']}"] if w["last_exit"] is not None else []
+        if w["state"] == "backoff":
+            notes.append(f"retry in {w['retry_in']:.0f}s")
+        print(f"  worker {w['index']:<2} {w['state']:<9} PID {w['pid'] or '-':<7} :{w['port']:<6} "
+              f"up {uptime:>6}  probe {latency:>6}  {requests.get(str(w['port']), 0):>7} req  "
+              f"{w['restarts']} restarts" + (f" ({', '.join(notes)})" if notes else ""))
+
+
+def wait_cluster(control: ProxyControl, timeout: float) -> dict:
+    """Poll the supervisor until every worker is ready and no roll is running."""
+    started = monotonic()
+    last = None
+    while True:
+        state = control.request("workers")
+        line = f"{state['ready']}/{len(state['workers'])} workers ready" + (", rolling" if state["rolling"] else "")
+        if line != last:
+            print(f"   {monotonic() - started:5.1f}s {line}")
+            last = line
+        if state["health"] == "healthy" and not state["rolling"]:
+            return state
+        if monotonic() - started > timeout:
+            print(f"⚠️  Not all workers ready after {timeout:.0f}s; the supervisor keeps trying")
+            return state
+        sleep(0.5)
+
+
+def start_cluster(workers: int, env: str, timeout: float) -> None:
+    from bingo_manager.readiness import port_free
+    preflight()
+    if ProxyControl.find(CLUSTER_STATE):
+        print("⚠️  Cluster already running (see `cluster status`)")
+        return
+    if ((pid := read_pid()) and process_alive(pid)) or ProxyControl.find(PROXY_STATE):
+        raise RuntimeError("A single server instance is running; stop it first")
+    port = server_port()
+    if not port_free(port):
+        print(f"⚠️  Port {port} is already in use; the cluster may fail to bind")
+    control = launch_detached(["cluster", "run", "--workers", str(workers), "--listen", str(port), "--env", env,
+                               "--timeout", str(timeout)], CLUSTER_STATE, CLUSTER_LOG, name="Cluster supervisor")
+    print(f"🔀 Cluster supervisor on :{port} starting {workers} workers (log {CLUSTER_LOG})")
+    # Worker 1 boots alone (startup cleanup), the others after it
+    state = wait_cluster(control, timeout * 2)
+    print(cluster_summary(state))
+    print_workers(state)
+
+
+def stop_cluster(control: ProxyControl, timeout: float = 15.0) -> None:
+    state = control.request("workers")
+    pids = [w["pid"] for w in state["workers"] if w["pid"]]
+    print(f"🛑 Stopping cluster ({len(pids)} workers)...")
+    control.stop()
+    started = monotonic()
+    while any(process_alive(pid) for pid in pids + [state["proxy"]["pid"]]):
+        if monotonic() - started > timeout:
+            print(f"⚠️  Cluster processes still running after {timeout:.0f}s")
+            return
+        sleep(0.2)
+    print(f"✅ Cluster stopped in {monotonic() - started:.1f}s")
+
+
+def roll_cluster(control: ProxyControl, drain: float, timeout: float) -> None:
+    state = control.request("workers")
+    print(f"🔁 Rolling restart of {len(state['workers'])} workers (drain up to {drain:.0f}s each)")
+    if control.request("roll", drain=drain)["already"]:
+        print("ℹ️  A rolling restart is already in progress")
+    state = wait_cluster(control, (timeout + drain) * len(state["workers"]))
+    print(cluster_summary(state))
+    print_workers(state)
+
+
+def cluster_cmd(args: argparse.Namespace) -> None:
+    from bingo_manager.cluster import run_cluster
+    action = args.cluster_cmd or "status"
+    if action == "run":
+        run_cluster(npm_command(args.env), args.workers, args.listen or server_port(), Path(args.state),
+                    CLUSTER_DIR, DEBUG_DIR, REPO_ROOT, env={**os.environ, "NODE_ENV": args.env}, host=args.host,
+                    ready_deadline=args.timeout,
+                    log=lambda text: print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {text}", flush=True), db_path=DB_FILE)
+        return
+    if action == "start":
+        start_cluster(args.workers, args.env, args.timeout)
+        return
+    control = ProxyControl.find(CLUSTER_STATE)
+    if control is None:
+        print("🔴 Cluster not running (start it with `cluster start --workers N`)")
+        return
+    if action == "stop":
+        stop_cluster(control, args.timeout)
+    elif action == "restart":
+        roll_cluster(control, args.drain, args.timeout)
+    else:
+        state = control.request("workers")
+        print(cluster_summary(state))
+        print_workers(state)
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}GB"
+
+
+def monitor_lines(monitor: ProcessMonitor, width: int) -> list[str]:
+    from bingo_manager.procmon import sparkline
+    sample = monitor.latest
+    if sample is None:
+        pid = read_pid()
+        return [f"🔴 Server not running{f' (stale PID {pid})' if pid else ''}; waiting..."]
+    spark_w = max(10, width - 26)
+    ring = monitor.ring
+    cpu = ring.values("cpu_percent")
+    lines = [
+        f"PID {sample.root}  {sample.procs} processes  every {monitor.interval:g}s  "
+        f"{len(ring)}/{ring.capacity} samples",
+        f"CPU  {sample.cpu_percent:7.1f}%   {sparkline(cpu, spark_w, lo=0)}",
+        f"RSS  {sample.rss_kb / 1024:7.1f}MB  {sparkline(ring.values('rss_kb'), spark_w)}",
+        f"FDs  {sample.fds:8}   {sparkline(ring.values('fds'), spark_w)}",
+        f"Thr  {sample.threads:8}   {sparkline(ring.values('threads'), spark_w)}",
+        (f"Disk read {format_bytes(sample.read_rate)}/s  write {format_bytes(sample.write_rate)}/s  "
+         f"(total {format_bytes(sample.read_bytes)} / {format_bytes(sample.write_bytes)})"
+         if sample.io else "Disk I/O: /proc/<pid>/io not readable"),
+        "",
+        f"{'PID':>7} {'PPID':>7} S {'CPU%':>6} {'RSS MB':>8} {'FDs':>5} {'THR':>4}  COMMAND",
+    ]
+    for p in sorted(sample.processes, key=lambda p: p.rss_kb, reverse=True):
+        fds = "?" if p.fds is None else p.fds
+        lines.append(f"{p.pid:>7} {p.ppid:>7} {p.state} {p.cpu_percent:6.1f} {p.rss_kb / 1024:8.1f} "
+                     f"{fds:>5} {p.threads:>4}  {p.cmdline or p.name}")
+    return lines
+
+
+def replay_series(path: Path, width: int = 60) -> None:
+    from bingo_manager.procmon import SeriesFile, sparkline
+    data = SeriesFile.read(path)
+    times = data["time"]
+    if not times:
+        print("ℹ️  No samples in", path)
+        return
+    span = times[-1] - times[0]
+    print(f"📈 {path}: {len(times)} samples over {span / 60:.1f} min "
+          f"({datetime.fromtimestamp(times[0]):%Y-%m-%d %H:%M:%S} → {datetime.fromtimestamp(times[-1]):%H:%M:%S})")
+    for label, name, scale, unit in (("CPU", "cpu_percent", 1, "%"), ("RSS", "rss_kb", 1 / 1024, "MB"),
+                                     ("FDs", "fds", 1, ""), ("Thr", "threads", 1, ""),
+                                     ("Read/s", "read_rate", 1 / 1024, "KB"), ("Write/s", "write_rate", 1 / 1024, "KB")):
+        values = data[name]
+        print(f"  {label:<8} min {min(values) * scale:9.1f}{unit:<2} avg {sum(values) / len(values) * scale:9.1f}{unit:<2} "
+              f"max {max(values) * scale:9.1f}{unit:<2} {sparkline(values, width)}")
+    rss = data["rss_kb"]
+    if span > 0 and len(rss) > 1:
+        # Least-squares slope: a steady climb under constant load suggests a leak
+        mean_t = sum(times) / len(times)
+        mean_r = sum(rss) / len(rss)
+        num = sum((t - mean_t) * (r - mean_r) for t, r in zip(times, rss))
+        den = sum((t - mean_t) ** 2 for t in times)
+        print(f"  RSS trend {num / den * 3600 / 1024:+.1f}MB/hour" if den else "")
+
+
+def top(interval: float, capacity: int, record: str | None = None,
+        once: bool = False) -> None:
+    from bingo_manager.procmon import ProcessMonitor, supported
+    if not supported():
+        raise RuntimeError("top needs Linux /proc; not available on this platform")
+    series = None
+    if record is not None:
+        series = Path(record) if record else MONITOR_DIR / f"server-{datetime.now():%Y%m%d_%H%M%S}.ts"
+        print(f"📝 Recording to {series}")
+    monitor = ProcessMonitor(lambda: (pid if (pid := read_pid()) and process_alive(pid) else None),
+                             interval=interval, capacity=capacity, series_path=series)
+    try:
+        if once:
+            # CPU% needs two samples
+            monitor.sample()
+            sleep(interval)
+            monitor.sample()
+            print("\n".join(monitor_lines(monitor, shutil.get_terminal_size().columns)))
+            return
+        if not sys.stdout.isatty():
+            while True:
+                sample = monitor.sample()
+                if sample:
+                    print(f"{datetime.now():%H:%M:%S} cpu {sample.cpu_percent:.1f}% rss {sample.rss_kb / 1024:.1f}MB "
+                          f"fds {sample.fds} threads {sample.threads} procs {sample.procs} "
+                          f"read {format_bytes(sample.read_rate)}/s write {format_bytes(sample.write_rate)}/s", flush=True)
+                else:
+                    print(f"{datetime.now():%H:%M:%S} server not running", flush=True)
+                sleep(interval)
+        import curses
+
+        def loop(screen) -> None:
+            curses.curs_set(0)
+            screen.timeout(int(interval * 1000))
+            while True:
+                monitor.sample()
+                height, width = screen.getmaxyx()
+                screen.erase()
+                screen.addnstr(0, 0, "Bingo server top — q to quit", width - 1, curses.A_BOLD)
+                for row, line in enumerate(monitor_lines(monitor, width)[:height - 2], start=2):
+                    screen.addnstr(row, 0, line, width - 1)
+                screen.refresh()
+                if screen.getch() in (ord("q"), ord("Q"), 27):
+                    return
 
+        curses.wrapper(loop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.stop()
 
-def tail_logs(lines: int = 200) -> None:
+
+def tail_logs(lines: int = 200, follow: bool = False, interval: float = 0.5, file: str | None = None) -> None:
+    from bingo_manager.logtail import LogFollower, is_archive, newest_log, tail_lines
     if not DEBUG_DIR.exists():
         print("No debugging directory found.")
         return
-    server_logs = sorted(DEBUG_DIR.glob("server-*.log"), key=lambda p: p.stat().st_mtime, reverse=True)
-    if not server_logs:
+    if file:
+        target = DEBUG_DIR / file
+        if not target.exists() and (DEBUG_DIR / f"{file}.gz").exists():
+            target = DEBUG_DIR / f"{file}.gz"  # archived since it was listed
+        if not target.exists():
+            raise FileNotFoundError(f"No such log: {target}")
+        if follow and is_archive(target):
+            raise ValueError(f"{target.name} is archived; it will not grow, drop --follow")
+    else:
+        target = newest_log(DEBUG_DIR)
+    if target is None and not follow:
         print("No server logs found in", DEBUG_DIR)
         return
-    target = server_logs[0]
-    print(f"📄 Tailing {target} (last {lines} lines)\n")
-    with target.open("r", encoding="utf-8", errors="ignore") as f:
-        content = f.read().splitlines()
-        for line in content[-lines:]:
+    if target is not None:
+        print(f"📄 Tailing {target} (last {lines} lines)\n")
+        for line in tail_lines(target, lines):
             print(line)
+    if not follow:
+        return
+
+    def announce(path: Path) -> None:
+        if path != target:
+            print(f"\n📄 New session log: {path}\n", flush=True)
+
+    follower = LogFollower(DEBUG_DIR, path=target, on_switch=announce)
+    if target is None:
+        print(f"⏳ Waiting for a server log in {DEBUG_DIR} ...", flush=True)
+    try:
+        for line in follower.follow(interval=interval):
+            print(line, flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+def query_log_records(args: argparse.Namespace) -> None:
+    from bingo_manager.logindex import normalize_id, parse_time, query_logs
+    from bingo_manager.logtail import newest_log, session_logs
+    if args.all:
+        targets = session_logs(DEBUG_DIR) if DEBUG_DIR.exists() else []
+    elif args.file or args.log_file:  # `logs --file X query` searches X too
+        name = args.file or args.log_file
+        targets = [DEBUG_DIR / name]
+        if not targets[0].exists():
+            targets = [DEBUG_DIR / f"{name}.gz"]
+    else:
+        newest = newest_log(DEBUG_DIR) if DEBUG_DIR.exists() else None
+        targets = [newest] if newest else []
+    targets = [t for t in targets if t.exists()]
+    if not targets:
+        print("No server logs found in", DEBUG_DIR)
+        return
+    tokens = [normalize_id(v) for v in args.id] + [t.lower() for t in args.term]
+    records = query_logs(
+        targets,
+        since=parse_time(args.since) if args.since else None,
+        until=parse_time(args.until) if args.until else None,
+        levels=args.level,
+        tokens=tokens,
+        grep=args.grep,
+        limit=args.limit,
+        rebuild=args.rebuild,
+    )
+    count = 0
+    for record in records:
+        count += 1
+        if args.json:
+            print(json.dumps(record.to_dict()))
+        else:
+            print(record)
+    if not args.json:
+        print(f"\n🔎 {count} matching record(s) in {len(targets)} file(s)")
+
+
+def archive_logs(args: argparse.Namespace) -> None:
+    from bingo_manager.logarchive import LogArchiver
+    archiver = LogArchiver(DEBUG_DIR, budget_bytes=int(args.budget_mb * 1048576), max_age_s=args.max_age_days * 86400,
+                           workers=args.workers)
+    while True:
+        report = archiver.run(dry_run=args.dry_run, log=lambda text: print(f"   {text}", flush=True))
+        if args.dry_run:
+            for name, size, _ in report.compressed:
+                print(f"🗜️  would compress {name} ({format_bytes(size)})")
+            for name, size, reason in report.deleted:
+                print(f"🗑️  would delete {name} ({format_bytes(size)}, {reason}; sizes before compression)")
+            print(f"ℹ️  {len(report.active)} active log(s) left alone: {', '.join(report.active) or '-'}")
+        else:
+            print(f"📦 Logs: {report.describe()}", flush=True)
+        if not args.watch:
+            return
+        try:
+            sleep(args.watch)
+        except KeyboardInterrupt:
+            return
+
+
+def backup_db(dest: str | None = None, step_pages: int = 256, sleep_ms: float = 5.0,
+              verify: bool = True) -> None:
+    from bingo_manager.dbbackup import BackupProgress, default_backup_path, format_rate, online_backup
+    target = Path(dest) if dest else default_backup_path(BACKUP_DIR)
+    print(f"💾 Online backup of {DB_FILE}")
+    print(f"   → {target}")
+
+    def report(progress: BackupProgress) -> None:
+        print(f"\r   {progress.fraction:6.1%}  {progress.pages_done}/{progress.pages_total} pages"
+              f"  {format_rate(progress.throughput)}", end="", flush=True)
+
+    result = online_backup(DB_FILE, target, step_pages=step_pages, step_sleep=sleep_ms / 1000,
+                           verify=verify, on_progress=report)
+    print()
+    print(f"✅ Backup complete: {result.size / 1024:.1f}KB, {result.pages} pages in "
+          f"{result.elapsed:.2f}s ({format_rate(result.throughput)})")
+    if result.verified:
+        print("🔎 Integrity check: ok")
+    else:
+        print("⚠️  Integrity check skipped")
+
+
+def snapshot_cmd(args: argparse.Namespace) -> None:
+    from bingo_manager.backupstore import BackupStore
+    store = BackupStore(SNAPSHOT_STORE)
+    action = args.snapshot_cmd or "list"
+    if action == "create":
+        print(f"📸 Snapshot of {DB_FILE}")
+        snap = store.create(DB_FILE, compression=args.compression)
+        print(f"✅ Snapshot {snap.id}: {snap.size / 1024:.1f}KB database, "
+              f"{snap.new_chunks}/{len(snap.chunks)} new chunks, {snap.stored_bytes / 1024:.1f}KB written")
+    elif action == "list":
+        snapshots = store.list()
+        if not snapshots:
+            print("No snapshots in", SNAPSHOT_STORE)
+            return
+        for snap in snapshots:
+            print(f"  {snap.id:<20} {snap.created}  {snap.size / 1024:>9.1f}KB  "
+                  f"+{snap.stored_bytes / 1024:.1f}KB ({snap.new_chunks} new chunks)")
+        print(f"\n📦 {len(snapshots)} snapshot(s), {store.stored_size() / 1024:.1f}KB stored")
+    elif action == "restore":
+        snap = store.restore(args.id, Path(args.dest), overwrite=args.force)
+        print(f"✅ Restored snapshot {snap.id} to {args.dest} (integrity ok)")
+    elif action == "prune":
+        removed, chunks, freed = store.prune(args.keep_last, args.keep_hourly, args.keep_daily,
+                                             args.keep_weekly, dry_run=args.dry_run)
+        verb = "Would remove" if args.dry_run else "Removed"
+        print(f"🧹 {verb} {len(removed)} snapshot(s), {chunks} chunk(s), {freed / 1024:.1f}KB")
+        for snapshot_id in removed:
+            print("  -", snapshot_id)
+    elif action == "verify":
+        failed = 0
+        for report in store.verify(args.ids or None, deep=args.deep):
+            if report.ok:
+                print(f"✅ {report.snapshot}")
+            else:
+                failed += 1
+                print(f"❌ {report.snapshot}: {len(report.missing)} missing, {len(report.corrupt)} corrupt chunk(s)"
+                      + (f", integrity: {report.integrity}" if report.integrity not in (None, "ok") else ""))
+        if failed:
+            raise RuntimeError(f"{failed} snapshot(s) failed verification")
+
+
+def wal_ship_cmd(args: argparse.Namespace) -> None:
+    from bingo_manager.logindex import parse_time
+    from bingo_manager.walship import WalArchive, WalShipper
+    archive = WalArchive(WAL_ARCHIVE)
+    action = args.wal_cmd or "run"
+    if action == "run":
+        WAL_ARCHIVE.mkdir(parents=True, exist_ok=True)
+        if WAL_SHIP_PID.exists():
+            pid = int(WAL_SHIP_PID.read_text().strip() or 0)
+            if pid and process_alive(pid):
+                raise RuntimeError(f"wal-ship already running (PID {pid})")
+        WAL_SHIP_PID.write_text(str(os.getpid()))
+        shipper = WalShipper(DB_FILE, WAL_ARCHIVE, poll_interval=args.poll, flush_interval=args.flush_interval,
+                             checkpoint_bytes=int(args.checkpoint_mb * 1024 * 1024),
+                             log=lambda text: print(text, flush=True))
+        print(f"🚚 Shipping {DB_FILE}-wal to {WAL_ARCHIVE} (Ctrl+C to stop)", flush=True)
+        try:
+            shipper.run(stats_interval=args.stats_interval, status_path=WAL_SHIP_STATUS)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            WAL_SHIP_PID.unlink(missing_ok=True)
+        print(f"✅ Stopped: {shipper.stats.summary()}")
+    elif action == "status":
+        if not WAL_SHIP_STATUS.exists():
+            print("No wal-ship status in", WAL_ARCHIVE)
+            return
+        status = json.loads(WAL_SHIP_STATUS.read_text())
+        running = WAL_SHIP_PID.exists() and process_alive(status["pid"])
+        print(f"{'🟢 Running' if running else '🔴 Not running'} (PID {status['pid']}), generation {status['generation']}")
+        for key, value in status["stats"].items():
+            print(f"  {key}: {value}")
+    elif action == "list":
+        generations = archive.generations()
+        if not generations:
+            print("No WAL archive generations in", WAL_ARCHIVE)
+            return
+        for gen in generations:
+            segments = gen.segments()
+            commits = sum(len(seg["commits"]) for seg in segments)
+            last = datetime.fromtimestamp(gen.last_commit()).isoformat(timespec="seconds")
+            print(f"  {gen.id:<20} {gen.created_at.isoformat(timespec='seconds')} → {last}  "
+                  f"{commits} commits in {len(segments)} segments, {archive.stored_size(gen) / 1024:.1f}KB")
+    elif action == "restore":
+        target = parse_time(args.to) / 1000 if args.to else None
+        result = archive.restore(Path(args.dest), target, overwrite=args.force)
+        when = datetime.fromtimestamp(result.restored_to).isoformat(timespec="milliseconds")
+        print(f"✅ Restored generation {result.generation} + {result.commits} commits to {result.path}")
+        print(f"   State as of {when} (integrity {result.integrity})")
+    elif action == "prune":
+        removed = archive.prune(args.keep)
+        print(f"🧹 Removed {len(removed)} generation(s)")
+        for gen_id in removed:
+            print("  -", gen_id)
+
+
+def db_stats(as_json: bool, refresh: bool, ttl: float) -> None:
+    from bingo_manager.dbstats import StatsCollector
+    stats = StatsCollector(DB_FILE, ttl=ttl, cache_path=DB_STATS_CACHE).collect(force=refresh)
+    if as_json:
+        print(json.dumps(stats.to_dict(), indent=2))
+        return
+    age = datetime.now().timestamp() - stats.collected
+    source = f"cached, {age:.0f}s old" if stats.cached else f"collected in {stats.elapsed * 1000:.0f}ms"
+    print(f"📊 {DB_FILE} ({source})")
+    print(f"  Size: {stats.db_size / 1024:.1f}KB, WAL {stats.wal_size / 1024:.1f}KB ({stats.journal_mode})")
+    print(f"  Pages: {stats.page_count:,} × {stats.page_size}B, freelist {stats.freelist_count:,} "
+          f"({stats.free_fraction:.1%})")
+    print("  Rows:")
+    for table, rows in stats.rows.items():
+        print(f"    {table:<22} {rows:>10,}" if rows is not None else f"    {table:<22} {'(missing)':>10}")
+    if not stats.dbstat:
+        print("  B-tree usage: unavailable (sqlite3 built without dbstat)")
+        return
+    print("  B-tree usage (largest first):")
+    for btree in stats.btrees:
+        print(f"    {btree.kind:<5} {btree.name:<40} {btree.pages:>6} pages {btree.size / 1024:>9.1f}KB "
+              f"{btree.fill:>5.0%} full  {btree.entries:>8,} cells")
+
+
+def db_advise(args: argparse.Namespace) -> None:
+    from bingo_manager.queryplan import advise, load_query_log, load_workload
+    if not DB_FILE.exists():
+        raise RuntimeError(f"Database file not found: {DB_FILE}")
+    if args.from_logs:
+        logs = sorted(DEBUG_DIR.glob("server-*.log"))
+        statements = load_query_log(logs)
+        if not statements:
+            raise RuntimeError("No captured queries in server logs; start the server with DB_LOG_QUERIES=1")
+        source = f"{len(logs)} server log(s)"
+    else:
+        workload = Path(args.workload) if args.workload else DEFAULT_WORKLOAD
+        statements = load_workload(workload)
+        source = str(workload)
+    log = (lambda text: None) if args.json else print
+    log(f"🧭 Advising on {len(statements)} statement(s) from {source} (copy of {DB_FILE})")
+    report = advise(DB_FILE, statements, min_rows=args.min_rows, repeat=args.repeat, analyze=args.analyze, log=log)
+    if args.sql:
+        Path(args.sql).write_text("".join(p.ddl + "\n" for p in report.proposals))
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+        return
+
+    print()
+    for item in report.statements:
+        stmt = item.statement
+        print(f"• [x{stmt.weight}] {stmt.short()}")
+        if item.error:
+            print(f"    ❌ {item.error}")
+            continue
+        for finding in item.findings:
+            label = "full scan" if finding.kind == "scan" else "sort"
+            print(f"    ⚠️  {label} of {finding.table} ({finding.rows:,} rows): {finding.detail}")
+        for proposal in item.proposals:
+            print(f"    💡 {proposal.name}")
+        if item.plan_after != item.plan_before:
+            print(f"    plan: {' | '.join(item.plan_before)}  →  {' | '.join(item.plan_after)}")
+        if item.before and item.after:
+            speedup = f"  ({item.speedup:.1f}x)" if item.speedup else ""
+            print(f"    latency: {item.before.median_ms:.3f}ms → {item.after.median_ms:.3f}ms median, "
+                  f"p95 {item.before.p95_ms:.3f}ms → {item.after.p95_ms:.3f}ms{speedup}")
+    print()
+    if not report.proposals:
+        print(f"✅ No full scans of tables with ≥{report.min_rows:,} rows")
+        return
+    print(f"💡 Proposed indexes ({len(report.proposals)}):")
+    for proposal in report.proposals:
+        print(f"  {proposal.ddl}")
+    if args.sql:
+        print(f"\n📝 Written to {args.sql}")
+
+
+def server_port() -> int:
+    """PORT from .env (as written by the GUI), else the server's default."""
+    from bingo_manager.readiness import read_env_port
+    return read_env_port(ENV_FILE)
+
+
+def loadtest(args: argparse.Namespace) -> None:
+    from bingo_manager.loadtest import LoadConfig, run_load
+    config = LoadConfig(
+        url=(args.url or f"http://127.0.0.1:{server_port()}").rstrip("/"),
+        users=args.users,
+        ramp=args.ramp,
+        ramp_steps=args.ramp_steps,
+        duration=args.duration,
+        lobbies=args.lobby,
+        password=args.password,
+        prefix=args.prefix,
+        join_seats=not args.no_seats,
+        start_games=args.start_games,
+        call_ms=args.call_ms,
+        poll=args.poll,
+        http_connections=args.connections,
+        seed=args.seed,
+    )
+    log = (lambda text: None) if args.json else print
+    log(f"🚦 Load test against {config.url}: {config.users} users, ramp {config.ramp:.0f}s"
+        f"{f' in {config.ramp_steps} steps' if config.ramp_steps else ''}, hold {config.duration:.0f}s")
+    report = run_load(config, log=log)
+    if args.report:
+        Path(args.report).write_text(json.dumps(report.to_dict(), indent=2))
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+        return
+    print()
+    for line in report.lines():
+        print(" ", line)
+    if args.report:
+        print(f"\n📝 Report written to {args.report}")
+
+
+def bench_cmd(args: argparse.Namespace) -> None:
+    from bingo_manager.benchmark import BenchConfig, SCENARIOS, compare, load_history, results_for, run_benchmark
+    action = args.bench_cmd or "run"
+    if action == "run":
+        config = BenchConfig(
+            scenarios=args.scenario or [s.name for s in SCENARIOS],
+            concurrency=args.concurrency,
+            duration=args.duration,
+            rounds=args.rounds,
+            warmup=args.warmup,
+            scale=args.scale,
+            seed=args.seed,
+        )
+        result = run_benchmark(REPO_ROOT, BENCH_DIR, config, ref=args.ref)
+        print(f"✅ Result {result.id} written to {result.path}")
+    elif action == "list":
+        history = load_history(BENCH_DIR)
+        if not history:
+            print("ℹ️  No benchmark results yet in", BENCH_DIR)
+            return
+        for result in history:
+            when = datetime.fromtimestamp(result.created).strftime("%Y-%m-%d %H:%M")
+            commit = (result.commit or "?")[:10] + ("+dirty" if result.dirty else "")
+            p50s = ", ".join(f"{name} {s.p50:.1f}ms" for name, s in result.scenarios.items())
+            print(f"{result.id:<28} {when}  {commit:<16} {p50s}")
+    elif action == "compare":
+        history = load_history(BENCH_DIR)
+        baseline = results_for(history, REPO_ROOT, args.baseline)
+        if not baseline:
+            raise RuntimeError(f"No clean results for {args.baseline}; run `bench run --ref {args.baseline}` first")
+        if args.candidate:
+            candidate = results_for(history, REPO_ROOT, args.candidate)
+        else:
+            candidate = [history[-1]] if history and history[-1] not in baseline else []
+        if not candidate:
+            raise RuntimeError("No candidate results; run `bench run` first")
+        label = args.candidate or candidate[0].id
+        print(f"📈 {label} vs {args.baseline} ({len(candidate)} vs {len(baseline)} run(s), "
+              f"alpha {args.alpha}, threshold {args.threshold:.0%})")
+        rows = compare(baseline, candidate, alpha=args.alpha, threshold=args.threshold)
+        marks = {"regression": "❌", "improvement": "✅", "unchanged": "  ", "missing": "❔"}
+        for row in rows:
+            if row.verdict == "missing":
+                print(f"{marks[row.verdict]} {row.name:<28} not in both runs")
+                continue
+            p = row.p_slower if row.change >= 0 else row.p_faster
+            print(f"{marks[row.verdict]} {row.name:<28} p50 {row.baseline_p50:8.2f} → {row.candidate_p50:8.2f}ms "
+                  f"({row.change:+.1%}, p={p:.3g})  p95 {row.baseline_p95:8.2f} → {row.candidate_p95:8.2f}ms  "
+                  f"req/s {row.baseline_rps:.0f} → {row.candidate_rps:.0f}")
+        regressions = [row.name for row in rows if row.verdict == "regression"]
+        if regressions:
+            print(f"❌ Regressions: {', '.join(regressions)}")
+            sys.exit(2)
+        print("✅ No significant regressions")
+
+
+def reap(port: int | None, dry_run: bool, timeout: float) -> None:
+    from bingo_manager.proctree import find_orphans, terminate_tree
+    from bingo_manager.procmon import supported
+    if not supported():
+        print("ℹ️  reap needs Linux /proc")
+        return
+    port = port or server_port()
+    managed = [pid for pid in (read_pid(),) if pid and process_alive(pid)]
+    for state_path in (PROXY_STATE, CLUSTER_STATE):
+        if control := ProxyControl.find(state_path):
+            managed.append(int(control.status()["pid"]))
+    orphans = find_orphans(port, DB_FILE, managed)
+    if not orphans:
+        print(f"✅ No orphaned node processes on :{port} or {DB_FILE.name}")
+        return
+    for orphan in orphans:
+        print(f"🧟 PID {orphan.pid} ({orphan.name}) {', '.join(orphan.reasons)}: {orphan.cmdline[:100]}")
+    if dry_run:
+        print(f"ℹ️  {len(orphans)} orphan(s) found; run without --dry-run to stop them")
+        return
+    for orphan in orphans:
+        print(f"🛑 Stopping PID {orphan.pid}: {terminate_tree(orphan.pid, timeout).describe()}")
 
 
 def cleanup() -> None:
@@ -175,40 +1127,316 @@ def cleanup() -> None:
     print("🧹 Cleanup done (PID file removed).")
 
 
-def env_info() -> None:
+def env_info(refresh: bool = False) -> None:
+    if refresh:
+        tool_cache().clear()
     print("Environment Info:")
     print("  OS:", platform.platform())
     print("  Python:", sys.version.replace("\n", " "))
     print("  Repo Root:", REPO_ROOT)
-    print("  npm:", which_npm())
+    tool = npm_tool()
+    print("  npm:", tool.path, f"(v{npm_version()}{', cached' if tool.cached else ''})")
+    print("  Toolchain cache:", TOOLCHAIN_CACHE)
     print("  DB:", DB_FILE)
 
 
-def main() -> None:
+def build_parser(only: str | None = None) -> argparse.ArgumentParser:
+    """The CLI parser; with `only`, just that subcommand (and only the modules its defaults come from)."""
     parser = argparse.ArgumentParser(description="Bingo server manager (console)")
+    parser.add_argument("--timings", action="store_true", help="Print where startup time went (to stderr)")
     sub = parser.add_subparsers(dest="cmd")
 
-    sub.add_parser("start").add_argument("--env", default="development")
-    sub.add_parser("stop")
-    sub.add_parser("status")
-    logs_p = sub.add_parser("logs")
-    logs_p.add_argument("--lines", type=int, default=200)
-    sub.add_parser("env")
-    sub.add_parser("cleanup")
+    def wants(name: str) -> bool:
+        return only is None or only == name
+
+    if wants("start"):
+        from bingo_manager.readiness import DEFAULT_DEADLINE_S
+        start_p = sub.add_parser("start")
+        start_p.add_argument("--env", default="development")
+        start_p.add_argument("--timeout", type=float, default=DEFAULT_DEADLINE_S, help="Seconds to wait for readiness")
+        start_p.add_argument("--no-wait", action="store_true", help="Return once the process is spawned")
+        start_p.add_argument("--proxy", action="store_true",
+                             help="Put the reverse proxy on PORT and run node behind it (enables rolling restarts)")
+    if wants("stop"):
+        sub.add_parser("stop", help="Stop the server (and the proxy or cluster, if running)")
+    if wants("restart"):
+        from bingo_manager.proxy import DEFAULT_DRAIN_S
+        from bingo_manager.readiness import DEFAULT_DEADLINE_S
+        restart_p = sub.add_parser("restart", help="Rolling restart behind the proxy; otherwise stop, wait for the "
+                                                   "port to be released, start and wait for readiness")
+        restart_p.add_argument("--env", default="development")
+        restart_p.add_argument("--timeout", type=float, default=DEFAULT_DEADLINE_S)
+        restart_p.add_argument("--drain", type=float, default=DEFAULT_DRAIN_S,
+                               help="Max seconds the old instance keeps its connections and games")
+        restart_p.add_argument("--cold", action="store_true", help="Stop then start even when the proxy is running")
+    if wants("ready"):
+        from bingo_manager.readiness import HEALTH_PATH
+        ready_p = sub.add_parser("ready", help=f"Probe {HEALTH_PATH} on the .env PORT")
+        ready_p.add_argument("--wait", type=float, default=0.0, metavar="SECONDS",
+                             help="Keep probing (with backoff) for up to this long")
+    if wants("status"):
+        sub.add_parser("status")
+    if wants("proxy"):
+        proxy_p = sub.add_parser("proxy", help="Reverse proxy used for zero-downtime restarts")
+        proxy_sub = proxy_p.add_subparsers(dest="proxy_cmd")
+        proxy_sub.add_parser("status", help="Backends and open connections (default)")
+        proxy_sub.add_parser("stop", help="Stop the proxy, leaving node running")
+        proxy_run_p = proxy_sub.add_parser("run", help="Run the proxy in the foreground (start --proxy does this)")
+        proxy_run_p.add_argument("--listen", type=int, help="Public port (default: PORT from .env)")
+        proxy_run_p.add_argument("--host", default="0.0.0.0")
+        proxy_run_p.add_argument("--backend", type=int, required=True, help="Loopback port of the node instance")
+        proxy_run_p.add_argument("--backend-pid", type=int)
+        proxy_run_p.add_argument("--state", default=str(PROXY_STATE), help="State file for the CLI and GUI")
+    if wants("cluster"):
+        from bingo_manager.cluster import DEFAULT_WORKERS, ROLL_DRAIN_S
+        from bingo_manager.readiness import DEFAULT_DEADLINE_S
+        cluster_p = sub.add_parser("cluster", help="N node workers behind the proxy, supervised")
+        cluster_sub = cluster_p.add_subparsers(dest="cluster_cmd")
+        cluster_start_p = cluster_sub.add_parser("start", help="Start the supervisor and its workers")
+        cluster_start_p.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+        cluster_start_p.add_argument("--env", default="development")
+        cluster_start_p.add_argument("--timeout", type=float, default=DEFAULT_DEADLINE_S,
+                                     help="Seconds to wait for each worker's readiness")
+        cluster_sub.add_parser("status", help="Aggregate and per-worker health (default)")
+        cluster_stop_p = cluster_sub.add_parser("stop", help="Stop the supervisor and every worker")
+        cluster_stop_p.add_argument("--timeout", type=float, default=15.0)
+        cluster_restart_p = cluster_sub.add_parser("restart", help="Replace the workers one at a time")
+        cluster_restart_p.add_argument("--drain", type=float, default=ROLL_DRAIN_S,
+                                       help="Max seconds each worker gets to finish in-flight requests")
+        cluster_restart_p.add_argument("--timeout", type=float, default=DEFAULT_DEADLINE_S)
+        cluster_run_p = cluster_sub.add_parser("run",
+                                               help="Run the supervisor in the foreground (cluster start does this)")
+        cluster_run_p.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+        cluster_run_p.add_argument("--listen", type=int, help="Public port (default: PORT from .env)")
+        cluster_run_p.add_argument("--host", default="0.0.0.0")
+        cluster_run_p.add_argument("--env", default="development")
+        cluster_run_p.add_argument("--timeout", type=float, default=DEFAULT_DEADLINE_S)
+        cluster_run_p.add_argument("--state", default=str(CLUSTER_STATE), help="State file for the CLI")
+    if wants("top"):
+        from bingo_manager.procmon import DEFAULT_CAPACITY, DEFAULT_INTERVAL
+        top_p = sub.add_parser("top", help="Live CPU/RSS/fd/thread/I/O monitor of the server process tree")
+        top_p.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Seconds between samples")
+        top_p.add_argument("--history", type=int, default=DEFAULT_CAPACITY, help="Samples kept for the sparklines")
+        top_p.add_argument("--record", nargs="?", const="", metavar="FILE",
+                           help="Append samples to an on-disk series (default file under data/monitor/)")
+        top_p.add_argument("--replay", metavar="FILE", help="Summarize a recorded series instead of sampling")
+        top_p.add_argument("--once", action="store_true", help="Print one sample and exit")
+    if wants("logs"):
+        logs_p = sub.add_parser("logs")
+        logs_p.add_argument("--lines", type=int, default=200)
+        logs_p.add_argument("--follow", "-f", action="store_true", help="Keep streaming new lines")
+        logs_p.add_argument("--interval", type=float, default=0.5, help="Follow poll interval (seconds)")
+        logs_p.add_argument("--file", dest="log_file",
+                            help="Log file name in debugging/, archived (.gz) or not (default: newest)")
+        logs_sub = logs_p.add_subparsers(dest="logs_cmd")
+        query_p = logs_sub.add_parser("query", help="Search records via the sidecar index")
+        query_p.add_argument("--file", help="Log file name in debugging/ (default: newest server log)")
+        query_p.add_argument("--all", action="store_true", help="Search every server-*.log, archives included")
+        query_p.add_argument("--since", help="ISO timestamp or relative age (15m, 2h, 1d)")
+        query_p.add_argument("--until", help="ISO timestamp or relative age")
+        query_p.add_argument("--level", action="append", default=[], help="LOG, ERROR, WARN or DEBUG (repeatable)")
+        query_p.add_argument("--id", action="append", default=[],
+                             help="Id filter such as lobby:3 or game:12 (repeatable)")
+        query_p.add_argument("--term", action="append", default=[],
+                             help="Event name such as number_called (repeatable)")
+        query_p.add_argument("--grep", help="Substring filter applied to matching records")
+        query_p.add_argument("--limit", type=int)
+        query_p.add_argument("--json", action="store_true", help="Emit JSON lines with parsed payloads")
+        query_p.add_argument("--rebuild", action="store_true", help="Rebuild the index from scratch")
+        from bingo_manager.logarchive import DEFAULT_BUDGET_MB, DEFAULT_MAX_AGE_DAYS, DEFAULT_WORKERS
+        archive_p = logs_sub.add_parser("archive", help="Compress inactive session logs and apply retention")
+        archive_p.add_argument("--budget-mb", type=float, default=DEFAULT_BUDGET_MB,
+                               help="Total size allowed for session logs in debugging/")
+        archive_p.add_argument("--max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS,
+                               help="Delete inactive logs and archives older than this")
+        archive_p.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Parallel compressors")
+        archive_p.add_argument("--dry-run", action="store_true", help="Only show what would happen")
+        archive_p.add_argument("--watch", type=float, metavar="SECONDS",
+                               help="Keep running, one pass every SECONDS")
+    if wants("backup"):
+        backup_p = sub.add_parser("backup", help="Online backup of data/bingo.db")
+        backup_p.add_argument("--dest", help="Backup file (default: data/backups/bingo_backup_<timestamp>.db)")
+        backup_p.add_argument("--step-pages", type=int, default=256, help="Pages copied per step")
+        backup_p.add_argument("--sleep-ms", type=float, default=5.0, help="Pause between steps so writers get the lock")
+        backup_p.add_argument("--no-verify", action="store_true", help="Skip PRAGMA integrity_check on the copy")
+    if wants("snapshot"):
+        from bingo_manager.backupstore import DEFAULT_RETENTION
+        snap_p = sub.add_parser("snapshot", help="Incremental deduplicated database snapshots")
+        snap_sub = snap_p.add_subparsers(dest="snapshot_cmd")
+        create_p = snap_sub.add_parser("create")
+        create_p.add_argument("--compression", choices=["zlib", "lzma"], default="zlib")
+        snap_sub.add_parser("list")
+        restore_p = snap_sub.add_parser("restore")
+        restore_p.add_argument("id")
+        restore_p.add_argument("--dest", required=True, help="Where to write the restored database")
+        restore_p.add_argument("--force", action="store_true", help="Overwrite dest if it exists")
+        prune_p = snap_sub.add_parser("prune")
+        for name, default in [("last", DEFAULT_RETENTION["keep_last"]), ("hourly", DEFAULT_RETENTION["keep_hourly"]),
+                              ("daily", DEFAULT_RETENTION["keep_daily"]), ("weekly", 0)]:
+            prune_p.add_argument(f"--keep-{name}", type=int, default=default)
+        prune_p.add_argument("--dry-run", action="store_true")
+        verify_p = snap_sub.add_parser("verify")
+        verify_p.add_argument("ids", nargs="*", help="Snapshot ids (default: all)")
+        verify_p.add_argument("--deep", action="store_true", help="Also restore and run integrity_check")
+    if wants("wal-ship"):
+        wal_p = sub.add_parser("wal-ship", help="Continuous WAL shipping with point-in-time restore")
+        wal_sub = wal_p.add_subparsers(dest="wal_cmd")
+        run_p = wal_sub.add_parser("run", help="Ship WAL frames until interrupted (default)")
+        run_p.add_argument("--poll", type=float, default=0.5, help="WAL poll interval (seconds)")
+        run_p.add_argument("--flush-interval", type=float, default=2.0,
+                           help="Max seconds before buffered commits are archived")
+        run_p.add_argument("--checkpoint-mb", type=float, default=4.0,
+                           help="Coordinate a checkpoint once the WAL holds this much")
+        run_p.add_argument("--stats-interval", type=float, default=60.0, help="Seconds between overhead reports")
+        # Bare `wal-ship` runs the daemon with run's defaults
+        wal_p.set_defaults(poll=0.5, flush_interval=2.0, checkpoint_mb=4.0, stats_interval=60.0)
+        wal_sub.add_parser("status")
+        wal_sub.add_parser("list")
+        wal_restore_p = wal_sub.add_parser("restore")
+        wal_restore_p.add_argument("--to", help="ISO timestamp or relative age (15m, 2h); default: latest")
+        wal_restore_p.add_argument("--dest", required=True, help="Where to write the restored database")
+        wal_restore_p.add_argument("--force", action="store_true", help="Overwrite dest if it exists")
+        wal_prune_p = wal_sub.add_parser("prune")
+        wal_prune_p.add_argument("--keep", type=int, default=3, help="Generations to keep")
+    if wants("db-stats"):
+        from bingo_manager.dbstats import DEFAULT_TTL
+        stats_p = sub.add_parser("db-stats", help="Read-only database statistics")
+        stats_p.add_argument("--json", action="store_true")
+        stats_p.add_argument("--refresh", action="store_true", help="Ignore the cached result")
+        stats_p.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="Seconds a cached result stays valid")
+    if wants("db-advise"):
+        from bingo_manager.queryplan import DEFAULT_MIN_ROWS, DEFAULT_REPEAT
+        advise_p = sub.add_parser("db-advise", help="Query plan advisor: flag scans and benchmark candidate indexes")
+        advise_p.add_argument("--workload", help="SQL workload file (default: scripts/db_workload.sql)")
+        advise_p.add_argument("--from-logs", action="store_true",
+                              help="Replay queries captured in debugging/server-*.log (server run with DB_LOG_QUERIES=1)")
+        advise_p.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS,
+                              help="Only flag scans of tables this large")
+        advise_p.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per statement")
+        advise_p.add_argument("--analyze", action="store_true", help="Run ANALYZE on the copy first")
+        advise_p.add_argument("--sql", help="Write the proposed CREATE INDEX statements to this file")
+        advise_p.add_argument("--json", action="store_true")
+    if wants("loadtest"):
+        from bingo_manager.loadtest import DEFAULT_PASSWORD, DEFAULT_PREFIX
+        load_p = sub.add_parser("loadtest", help="Simulate players over HTTP and Socket.IO")
+        load_p.add_argument("--url", help="Server base URL (default: http://127.0.0.1:<PORT from .env>)")
+        load_p.add_argument("--users", type=int, default=100)
+        load_p.add_argument("--ramp", type=float, default=30.0, help="Seconds over which users are spawned")
+        load_p.add_argument("--ramp-steps", type=int, default=0,
+                            help="Spawn in this many equal steps (default: linear)")
+        load_p.add_argument("--duration", type=float, default=60.0, help="Seconds to hold full load after the ramp")
+        load_p.add_argument("--lobby", type=int, action="append", default=[],
+                            help="Lobby id to target (repeatable; default: every lobby)")
+        load_p.add_argument("--no-seats", action="store_true", help="Only log in and listen; do not join games")
+        load_p.add_argument("--start-games", action="store_true", help="Start a game in each lobby once users are in")
+        load_p.add_argument("--call-ms", type=int, help="Number call interval for started games")
+        load_p.add_argument("--poll", type=float, default=0.0, help="Seconds between snapshot polls per user (0 = off)")
+        load_p.add_argument("--connections", type=int, default=256, help="HTTP keep-alive connections")
+        load_p.add_argument("--password", default=DEFAULT_PASSWORD)
+        load_p.add_argument("--prefix", default=DEFAULT_PREFIX, help="Synthetic account name prefix")
+        load_p.add_argument("--seed", type=int, help="Random seed for seat choice")
+        load_p.add_argument("--report", help="Also write the JSON report to this file")
+        load_p.add_argument("--json", action="store_true")
+    if wants("bench"):
+        from bingo_manager.benchmark import DEFAULT_ALPHA, DEFAULT_THRESHOLD, SCENARIOS
+        bench_p = sub.add_parser("bench", help="REST API benchmarks with regression tracking")
+        bench_sub = bench_p.add_subparsers(dest="bench_cmd")
+        bench_run_p = bench_sub.add_parser("run", help="Benchmark a throwaway server (default)")
+        bench_run_p.add_argument("--scenario", action="append", choices=[s.name for s in SCENARIOS],
+                                 help="Scenario to run (repeatable; default: all)")
+        bench_run_p.add_argument("--ref", help="Benchmark this git commit/branch from a temporary worktree")
+        bench_run_p.add_argument("--concurrency", type=int, default=16, help="Concurrent closed-loop clients")
+        bench_run_p.add_argument("--duration", type=float, default=10.0, help="Seconds per measured round")
+        bench_run_p.add_argument("--rounds", type=int, default=3)
+        bench_run_p.add_argument("--warmup", type=float, default=3.0, help="Warm-up seconds per scenario")
+        bench_run_p.add_argument("--scale", type=float, default=1.0, help="Fixture size multiplier")
+        bench_run_p.add_argument("--seed", type=int, default=1, help="Fixture RNG seed")
+        bench_p.set_defaults(scenario=None, ref=None, concurrency=16, duration=10.0, rounds=3, warmup=3.0,
+                             scale=1.0, seed=1)
+        bench_sub.add_parser("list")
+        bench_cmp_p = bench_sub.add_parser("compare", help="Flag regressions against a baseline commit")
+        bench_cmp_p.add_argument("baseline", help="Baseline git ref")
+        bench_cmp_p.add_argument("--candidate", help="Candidate git ref (default: the newest result)")
+        bench_cmp_p.add_argument("--alpha", type=float, default=DEFAULT_ALPHA, help="Significance level")
+        bench_cmp_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                 help="Minimum relative p50 change to report")
+    if wants("env"):
+        env_p = sub.add_parser("env")
+        env_p.add_argument("--refresh", action="store_true", help="Forget cached npm path/version and probe again")
+    if wants("reap"):
+        from bingo_manager.proctree import TERM_TIMEOUT_S
+        reap_p = sub.add_parser("reap", help="Stop orphaned node processes bound to PORT or holding bingo.db open")
+        reap_p.add_argument("--port", type=int, help="Port to check (default: PORT from .env)")
+        reap_p.add_argument("--dry-run", action="store_true", help="Only list what would be stopped")
+        reap_p.add_argument("--timeout", type=float, default=TERM_TIMEOUT_S,
+                            help="Seconds between SIGTERM and SIGKILL")
+    if wants("cleanup"):
+        sub.add_parser("cleanup")
+    return parser
+
 
-    args = parser.parse_args()
+def requested_command(argv: list[str]) -> str | None:
+    """The subcommand named in argv, if it is one we know (None: build every parser)."""
+    for arg in argv:
+        if arg in ("-h", "--help"):
+            return None
+        if not arg.startswith("-"):
+            return arg if arg in COMMANDS else None
+    return "status"
+
+
+def main() -> None:
+    TIMINGS.mark("imports")
+    # Accepted anywhere on the command line, not just before the subcommand
+    timings = "--timings" in sys.argv[1:]
+    argv = [arg for arg in sys.argv[1:] if arg != "--timings"]
+    parser = build_parser(requested_command(argv))
+    args = parser.parse_args(argv)
+    TIMINGS.mark("argparse")
     cmd = args.cmd or "status"
     try:
         if cmd == "start":
-            start_server(env=getattr(args, "env", "development"))
+            start_server(env=args.env, timeout=args.timeout, wait=not args.no_wait, proxy=args.proxy)
         elif cmd == "stop":
             stop_server()
+        elif cmd == "restart":
+            restart_server(env=args.env, timeout=args.timeout, drain=args.drain, cold=args.cold)
+        elif cmd == "ready":
+            ready(args.wait)
         elif cmd == "status":
             status()
+        elif cmd == "proxy":
+            proxy_cmd(args)
+        elif cmd == "cluster":
+            cluster_cmd(args)
+        elif cmd == "top" and args.replay:
+            replay_series(Path(args.replay))
+        elif cmd == "top":
+            top(args.interval, args.history, args.record, args.once)
+        elif cmd == "logs" and args.logs_cmd == "query":
+            query_log_records(args)
+        elif cmd == "logs" and args.logs_cmd == "archive":
+            archive_logs(args)
         elif cmd == "logs":
-            tail_logs(lines=getattr(args, "lines", 200))
+            tail_logs(lines=args.lines, follow=args.follow, interval=args.interval, file=args.log_file)
+        elif cmd == "backup":
+            backup_db(args.dest, args.step_pages, args.sleep_ms, verify=not args.no_verify)
+        elif cmd == "snapshot":
+            snapshot_cmd(args)
+        elif cmd == "wal-ship":
+            wal_ship_cmd(args)
+        elif cmd == "db-stats":
+            db_stats(args.json, args.refresh, args.ttl)
+        elif cmd == "db-advise":
+            db_advise(args)
+        elif cmd == "loadtest":
+            loadtest(args)
+        elif cmd == "bench":
+            bench_cmd(args)
         elif cmd == "env":
-            env_info()
+            env_info(args.refresh)
+        elif cmd == "reap":
+            reap(args.port, args.dry_run, args.timeout)
         elif cmd == "cleanup":
             cleanup()
         else:
@@ -216,6 +1444,10 @@ def main() -> None:
     except Exception as e:
         print("❌", e)
         sys.exit(1)
+    finally:
+        if timings:
+            TIMINGS.mark(cmd)
+            print(TIMINGS.report(), file=sys.stderr)
 
 
 if __name__ == "__main__":
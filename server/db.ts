@@ -26,6 +26,16 @@ try {
     sqlite.exec('PRAGMA foreign_keys = ON;');
     sqlite.exec('PRAGMA journal_mode = WAL;');
     sqlite.exec('PRAGMA synchronous = NORMAL;');
+    // Cluster workers share this file: wait for the write lock instead of failing
+    // with SQLITE_BUSY, and leave WAL checkpoints to one worker (the others get 0)
+    const busyTimeout = Number(process.env.SQLITE_BUSY_TIMEOUT_MS);
+    if (Number.isInteger(busyTimeout) && busyTimeout > 0) {
+        sqlite.exec(`PRAGMA busy_timeout = ${busyTimeout};`);
+    }
+    const autoCheckpoint = Number(process.env.SQLITE_WAL_AUTOCHECKPOINT);
+    if (process.env.SQLITE_WAL_AUTOCHECKPOINT && Number.isInteger(autoCheckpoint) && autoCheckpoint >= 0) {
+        sqlite.exec(`PRAGMA wal_autocheckpoint = ${autoCheckpoint};`);
+    }
     // Ensure new tables/columns exist (dev convenience). For production, use migrations.
     sqlite.exec(`
       CREATE TABLE IF NOT EXISTS winners (
@@ -49,7 +59,9 @@ try {
     }
     
     // Create database connection with Drizzle
-    db = drizzle(sqlite, { schema });
+    // DB_LOG_QUERIES=1 logs every statement ("Query: ... -- params: [...]") so
+    // `server_manager_cli.py db-advise --from-logs` can replay the real workload
+    db = drizzle(sqlite, { schema, logger: process.env.DB_LOG_QUERIES === '1' });
     console.log('[DB] SQLite database initialized successfully');
 } catch (error) {
     console.error('[DB] Failed to initialize SQLite database:', error);
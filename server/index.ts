@@ -14,9 +14,19 @@ app.use(express.json());
 app.use(express.urlencoded({ extended: false }));
 
 // Request logging middleware
-// Generate a unique server session ID on startup to detect restarts
-const serverSessionId = `${Date.now()}-${Math.random().toString(36).substring(2, 15)}`;
-console.log('[SERVER] Started with session ID:', serverSessionId);
+// Generate a unique server session ID on startup to detect restarts. The server
+// manager passes SERVER_SESSION_ID when several processes serve one logical
+// session (cluster workers, the replacement in a rolling restart), so clients
+// are not logged out just because a request reached another process
+const serverSessionId = process.env.SERVER_SESSION_ID || `${Date.now()}-${Math.random().toString(36).substring(2, 15)}`;
+console.log('[SERVER] Started with session ID:', serverSessionId, process.env.SERVER_SESSION_ID ? '(shared)' : '');
+
+// Cluster mode: the server manager pins lobby N to worker (N % CLUSTER_WORKERS) + 1
+// (lobby_slot in scripts/bingo_manager/proxy.py)
+const clusterWorkers = parseInt(process.env.CLUSTER_WORKERS || '1', 10);
+const workerSlot = parseInt(process.env.WORKER_ID || '1', 10) - 1;
+const runsLobby = (lobbyId: number) =>
+  clusterWorkers <= 1 || !Number.isInteger(lobbyId) || lobbyId % clusterWorkers === workerSlot;
 
 // Database cleanup on startup
 import { db } from './db';
@@ -49,8 +59,13 @@ async function cleanupStaleData() {
   }
 }
 
-// Run cleanup immediately
-cleanupStaleData();
+// Run cleanup immediately, unless this instance is replacing a live one during
+// a rolling restart (the previous instance still owns those seats and games)
+if (process.env.SKIP_STARTUP_CLEANUP === '1') {
+  console.log('[DB CLEANUP] Skipped: replacing a running instance (rolling restart)');
+} else {
+  cleanupStaleData();
+}
 
 app.use((req, res, next) => {
   const start = Date.now();
@@ -126,6 +141,11 @@ app.use((req, res, next) => {
     // Handle lobby-specific events
     socket.on('join_lobby', (data) => {
       const lobbyId = typeof data === 'object' ? data.lobbyId : data;
+      if (!runsLobby(Number(lobbyId))) {
+        // Its games and room live in another worker; the client reconnects through the proxy to it
+        socket.emit('lobby_elsewhere', { lobbyId });
+        return;
+      }
       const lobbyRoom = `lobby_${lobbyId}`;
       socket.join(lobbyRoom);
       console.log(`[SOCKET] User ${userEmail} joined lobby room: ${lobbyRoom}`);
@@ -230,7 +250,7 @@ app.use((req, res, next) => {
   const port = parseInt(process.env.PORT || '5000', 10);
   httpServer.listen({
     port,
-    host: "0.0.0.0",
+    host: process.env.BIND_HOST || "0.0.0.0",
   }, () => {
     log(`Server with Socket.IO listening on port ${port}`);
   });
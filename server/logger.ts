@@ -16,9 +16,12 @@ const getTimestamp = () => {
 // Current session timestamp
 const sessionTimestamp = getTimestamp();
 
+// Cluster workers start within the same second; keep their files apart
+const workerSuffix = process.env.WORKER_ID ? `-w${process.env.WORKER_ID}` : '';
+
 // Log file paths
-const serverLogFile = path.join(debuggingDir, `server-${sessionTimestamp}.log`);
-const consoleLogFile = path.join(debuggingDir, `console-${sessionTimestamp}.log`);
+const serverLogFile = path.join(debuggingDir, `server-${sessionTimestamp}${workerSuffix}.log`);
+const consoleLogFile = path.join(debuggingDir, `console-${sessionTimestamp}${workerSuffix}.log`);
 
 // Original console methods
 const originalLog = console.log;
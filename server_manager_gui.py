@@ -1,17 +1,38 @@
+import time
+STARTED = time.perf_counter()  # cold-start clock, reported once the window is drawn
 import sys
 import subprocess
+import importlib.util
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import threading
 import os
-import time
 from datetime import datetime
 import glob
+from pathlib import Path
 from typing import Optional
 import queue
+from collections import deque
 import json
 import shutil
 
+# Shared server-manager modules live next to the console CLI in scripts/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from bingo_manager.backupstore import DEFAULT_RETENTION, BackupStore
+from bingo_manager.dbbackup import default_backup_path, format_rate, online_backup
+from bingo_manager.dbstats import StatsCollector
+from bingo_manager.envprobe import EnvironmentProbe, default_probes
+from bingo_manager.logarchive import DEFAULT_BUDGET_MB, DEFAULT_MAX_AGE_DAYS, LogArchiver
+from bingo_manager.logtail import is_archive
+from bingo_manager.logview import MappedLog
+from bingo_manager.procmon import ProcessMonitor, supported as procmon_supported
+from bingo_manager.proctree import session_kwargs, stop_popen
+from bingo_manager.proxy import ProxyControl, ProxyError, backend_env, launch_proxy, rolling_restart, stop_process
+from bingo_manager.readiness import (HEALTH_PATH, current_session, free_port, read_env_port, wait_port_released,
+                                     wait_ready)
+from bingo_manager.tasks import TaskCancelled, TaskEvent, TaskExecutor
+from bingo_manager.toolchain import ToolCache
+
 # Utility functions for Windows compatibility
 def find_executable(name):
     """Find executable in PATH, with Windows-specific extensions"""
@@ -27,53 +48,54 @@ def find_executable(name):
         return shutil.which(name)
     return None
 
-def run_command_safe(cmd, **kwargs):
-    """Run command with better Windows compatibility"""
-    try:
-        if isinstance(cmd, str):
-            # For shell commands, use shell=True on Windows
-            return subprocess.run(cmd, shell=True, **kwargs)
-        else:
-            # For command lists, find the executable first
-            if sys.platform == 'win32' and cmd:
-                exe_path = find_executable(cmd[0])
-                if exe_path:
-                    cmd[0] = exe_path
-            return subprocess.run(cmd, **kwargs)
-    except FileNotFoundError as e:
-        raise FileNotFoundError(f"Command not found: {cmd[0] if isinstance(cmd, list) else cmd}")
-
-# Function to install a package if not available
-def install_if_missing(package_name):
-    try:
-        subprocess.check_output([sys.executable, '-m', 'pip', 'show', package_name], 
-                               stderr=subprocess.DEVNULL)
-        return True
-    except subprocess.CalledProcessError:
-        print(f"Installing {package_name}...")
-        try:
-            subprocess.check_call([sys.executable, '-m', 'pip', 'install', package_name])
-            print(f"Successfully installed {package_name}")
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to install {package_name}: {e}")
-            return False
-
-# Try to install customtkinter, but fall back to regular tkinter if it fails
+# Optional modern UI. Only ask whether it is importable (a finder lookup, no
+# pip subprocess): the window is built straight away with plain Tk when it is
+# missing, and installing it is offered as a background task from Setup Tools.
+OPTIONAL_UI_PACKAGE = 'customtkinter'
 USE_CUSTOM_TK = False
-if install_if_missing('customtkinter'):
+if importlib.util.find_spec(OPTIONAL_UI_PACKAGE) is not None:
     try:
         import customtkinter as ctk
         USE_CUSTOM_TK = True
         print("Using CustomTkinter for modern UI")
     except ImportError:
         print("CustomTkinter not available, using standard tkinter")
-        USE_CUSTOM_TK = False
 else:
-    print("Could not install CustomTkinter, using standard tkinter")
+    print("CustomTkinter not installed, using standard tkinter")
 
 class ServerManagerGUI:
+    # Console output pump tuning
+    PUMP_INTERVAL_MS = 100
+    PUMP_BUDGET_S = 0.025          # max time spent draining the queue per tick
+    PUMP_BACKLOG_LIMIT = 20000     # queued items beyond this go to the spill file only
+    CONSOLE_MAX_LINES = 5000       # ring-buffer size of the console widget
+    CONSOLE_TRIM_CHUNK = 500
+    # Log preview paging (lines per page / max lines kept in the widget)
+    LOG_PAGE_LINES = 400
+    LOG_WINDOW_LINES = 2000
+    DB_STATS_TTL_S = 30.0
+    DB_STATS_REFRESH_MS = 30000
+    # Server process-tree resource sparklines
+    MONITOR_INTERVAL_S = 1.0
+    MONITOR_REFRESH_MS = 1000
+    MONITOR_HISTORY = 300
+    SPARK_WIDTH = 220
+    SPARK_HEIGHT = 28
+    READY_DEADLINE_S = 90.0
+    PORT_RELEASE_DEADLINE_S = 15.0
+    # Zero-downtime restarts: reverse proxy on PORT, node on a spare loopback port
+    PROXY_STATE = '.server_proxy.json'
+    PROXY_LOG = os.path.join('debugging', 'proxy.log')
+    PROXY_DRAIN_S = 30.0
+    # Same PID file as the console CLI, so its stop/status/reap see a GUI-started server
+    PID_FILE = '.server_pid'
+    # Session logs in debugging/: gzip inactive ones, keep within a size/age budget
+    LOG_ARCHIVE_INTERVAL_MS = 15 * 60 * 1000
+    LOG_BUDGET_MB = DEFAULT_BUDGET_MB
+    LOG_MAX_AGE_DAYS = DEFAULT_MAX_AGE_DAYS
+
     def __init__(self):
+        self.startup_marks = [('imports', time.perf_counter())]
         if USE_CUSTOM_TK:
             self.root = ctk.CTk()
             ctk.set_appearance_mode("dark")
@@ -90,10 +112,34 @@ class ServerManagerGUI:
         self.server_process: Optional[subprocess.Popen] = None
         self.output_queue = queue.Queue()
         self.is_server_running = False
+        self.console_paused = False
+        self.console_pending = deque()
+        self.console_dropped = 0
+        self.console_spill = None
+        self.console_spill_path = None
+        self.log_view: Optional[MappedLog] = None
+        self.log_pages = deque()       # (start offset, end offset, line count) per rendered page
+        self.log_paging = False
+        self.log_search_pos = 0
+        # Long-running work (npm, migrations, restarts) runs off the Tk thread
+        self.tasks = TaskExecutor(self.output_queue.put)
+        self.db_stats = StatsCollector(Path(os.getcwd()) / 'data' / 'bingo.db', ttl=self.DB_STATS_TTL_S)
+        # node/npm/file checks run concurrently; versions are cached in data/.toolchain.json
+        self.env_probe = EnvironmentProbe(default_probes(
+            Path(os.getcwd()), ToolCache(Path(os.getcwd()) / 'data' / '.toolchain.json'), find_executable))
+        # Samples the running server's process tree on its own thread
+        self.monitor = ProcessMonitor(self.server_pid, interval=self.MONITOR_INTERVAL_S,
+                                      capacity=self.MONITOR_HISTORY).start()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         self.create_gui()
         self.setup_auto_refresh()
-        self.check_environment_status()
+        self.check_environment_status()  # non-blocking: labels fill in as probes finish
+        self.startup_marks.append(('window build', time.perf_counter()))
+        self.root.after_idle(self.report_startup)
+        self.root.after(self.DB_STATS_REFRESH_MS, self.poll_db_stats)
+        self.root.after(self.MONITOR_REFRESH_MS, self.poll_monitor)
+        self.root.after(self.LOG_ARCHIVE_INTERVAL_MS, self.poll_log_archive)
 
     def create_frame(self, parent, **kwargs):
         if USE_CUSTOM_TK:
@@ -124,7 +170,17 @@ class ServerManagerGUI:
         if USE_CUSTOM_TK:
             return ctk.CTkLabel(parent, text=text, **kwargs)
         else:
-            return tk.Label(parent, text=text, bg='#404040', fg='white', font=('Arial', 12), **kwargs)
+            label_kwargs = {'bg': '#404040', 'fg': 'white', 'font': ('Arial', 12)}
+            label_kwargs.update(kwargs)
+            return tk.Label(parent, text=text, **label_kwargs)
+
+    def create_checkbox(self, parent, text, variable):
+        if USE_CUSTOM_TK:
+            return ctk.CTkCheckBox(parent, text=text, variable=variable)
+        else:
+            return tk.Checkbutton(parent, text=text, variable=variable, bg='#404040', fg='white',
+                                  selectcolor='#2b2b2b', activebackground='#404040',
+                                  activeforeground='white', font=('Arial', 10))
 
     def create_gui(self):
         # Create main container with three columns
@@ -182,6 +238,13 @@ class ServerManagerGUI:
         self.env_mode = self.create_label(self.env_frame, "", font=('Consolas', 9))
         self.env_mode.pack(side=tk.RIGHT, pady=2)
 
+        # Database statistics (read-only introspection, refreshed in the background)
+        self.db_stats_frame = self.create_frame(self.env_status_frame)
+        self.db_stats_frame.pack(fill=tk.X, pady=2)
+        self.db_stats_label = self.create_label(self.db_stats_frame, "📊 DB stats: Checking...",
+                                                font=('Consolas', 9), justify=tk.LEFT, anchor='w')
+        self.db_stats_label.pack(fill=tk.X, pady=2)
+
         # Progress Bar
         self.progress_frame = self.create_frame(env_panel)
         self.progress_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -195,6 +258,8 @@ class ServerManagerGUI:
         self.operation_frame.pack(fill=tk.X, padx=5, pady=5)
         self.operation_status = self.create_label(self.operation_frame, "Ready", font=('Arial', 10))
         self.operation_status.pack(fill=tk.X)
+        self.cancel_task_btn = self.create_button(self.operation_frame, "Cancel Running Task", self.cancel_tasks, 'red', state="disabled")
+        self.cancel_task_btn.pack(fill=tk.X, pady=(2, 0))
 
         # Database Control Panel
         db_panel = self.create_frame(left_column)
@@ -212,6 +277,9 @@ class ServerManagerGUI:
         self.backup_btn = self.create_button(db_panel, "Backup Database", self.backup_database)
         self.backup_btn.pack(fill=tk.X, padx=5, pady=2)
 
+        self.snapshots_btn = self.create_button(db_panel, "Incremental Snapshots...", self.open_snapshot_manager)
+        self.snapshots_btn.pack(fill=tk.X, padx=5, pady=2)
+
         self.reset_db_btn = self.create_button(db_panel, "Reset Database", self.reset_database, 'red')
         self.reset_db_btn.pack(fill=tk.X, padx=5, pady=2)
 
@@ -234,6 +302,11 @@ class ServerManagerGUI:
         self.mock_mode_btn = self.create_button(setup_panel, "Start in Mock DB Mode", self.start_mock_mode)
         self.mock_mode_btn.pack(fill=tk.X, padx=5, pady=2)
 
+        if not USE_CUSTOM_TK:
+            self.install_ui_btn = self.create_button(setup_panel, "Install Modern UI (customtkinter)",
+                                                     self.install_optional_ui)
+            self.install_ui_btn.pack(fill=tk.X, padx=5, pady=2)
+
         # Middle Column (Server Control and Console)
         middle_column = self.create_frame(main_container)
         middle_column.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -258,12 +331,36 @@ class ServerManagerGUI:
         self.restart_btn = self.create_button(server_buttons, "Restart Server", self.restart_server, state="disabled")
         self.restart_btn.pack(side=tk.LEFT, padx=5, pady=5)
 
+        # With the proxy in front, Restart hands connections over instead of dropping them
+        self.proxy_var = tk.BooleanVar(value=self.proxy_control() is not None)
+        self.proxy_check = self.create_checkbox(server_buttons, "Zero-downtime restarts (proxy)", self.proxy_var)
+        self.proxy_check.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Resource sparklines for the server process tree (CPU, RSS, open fds)
+        resources = self.create_frame(control_panel)
+        resources.pack(fill=tk.X, padx=5, pady=(0, 5))
+        self.resource_label = self.create_label(resources, "📈 Resources: server not running",
+                                                font=('Consolas', 9), justify=tk.LEFT, anchor='w')
+        self.resource_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.sparklines = {}
+        for metric, color in (('fds', '#b8860b'), ('rss_kb', '#4169E1'), ('cpu_percent', '#2E8B57')):
+            canvas = tk.Canvas(resources, width=self.SPARK_WIDTH, height=self.SPARK_HEIGHT,
+                               background='black', highlightthickness=0)
+            canvas.pack(side=tk.RIGHT, padx=2)
+            self.sparklines[metric] = (canvas, color)
+
         # Console Output
         console_frame = self.create_frame(middle_column)
         console_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-        console_label = self.create_label(console_frame, "📟 Live Console Output")
-        console_label.pack(pady=5)
+        console_header = self.create_frame(console_frame)
+        console_header.pack(fill=tk.X, padx=5)
+        console_label = self.create_label(console_header, "📟 Live Console Output")
+        console_label.pack(side=tk.LEFT, pady=5)
+        self.console_pause_btn = self.create_button(console_header, "⏸ Pause Console", self.toggle_console_pause)
+        self.console_pause_btn.pack(side=tk.RIGHT, padx=5, pady=5)
+        self.console_stats = self.create_label(console_header, "dropped: 0", font=('Consolas', 9))
+        self.console_stats.pack(side=tk.RIGHT, padx=5)
 
         from tkinter import scrolledtext
         self.console_output = scrolledtext.ScrolledText(
@@ -294,6 +391,9 @@ class ServerManagerGUI:
         refresh_btn = self.create_button(log_actions, "Refresh Logs", self.refresh_logs)
         refresh_btn.pack(side=tk.LEFT, padx=5)
 
+        archive_btn = self.create_button(log_actions, "Archive Old Logs", self.archive_logs)
+        archive_btn.pack(side=tk.LEFT, padx=5)
+
         clear_btn = self.create_button(log_actions, "Clear All Logs", self.clear_logs, 'red')
         clear_btn.pack(side=tk.LEFT, padx=5)
 
@@ -312,6 +412,18 @@ class ServerManagerGUI:
         preview_label = self.create_label(log_panel, "Log Preview")
         preview_label.pack(pady=5)
 
+        log_search = self.create_frame(log_panel)
+        log_search.pack(fill=tk.X, padx=5)
+        self.log_search_var = tk.StringVar()
+        self.log_search_entry = tk.Entry(log_search, textvariable=self.log_search_var, font=('Consolas', 10))
+        self.log_search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        self.log_search_entry.bind('<Return>', self.find_in_log)
+        find_btn = self.create_button(log_search, "Find Next", self.find_in_log)
+        find_btn.pack(side=tk.RIGHT)
+
+        self.log_view_status = self.create_label(log_panel, "", font=('Consolas', 9))
+        self.log_view_status.pack(fill=tk.X, padx=5)
+
         self.log_preview = scrolledtext.ScrolledText(
             log_panel,
             wrap=tk.WORD,
@@ -321,22 +433,149 @@ class ServerManagerGUI:
             font=('Consolas', 10)
         )
         self.log_preview.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.log_preview.configure(yscrollcommand=self.on_log_preview_scroll)
+        self.log_preview.tag_configure('match', background='#b8860b', foreground='black')
 
         # Initial log refresh
         self.refresh_logs()
 
     def setup_auto_refresh(self):
-        def check_queue():
-            while True:
-                try:
-                    line = self.output_queue.get_nowait()
-                    self.console_output.insert(tk.END, line)
-                    self.console_output.see(tk.END)
-                except queue.Empty:
-                    break
-            self.root.after(100, check_queue)
-        
-        self.root.after(100, check_queue)
+        """Start the output pump that renders queued console text and task events"""
+        self.root.after(self.PUMP_INTERVAL_MS, self.pump_output_queue)
+
+    def console_write(self, text):
+        """Queue text for the console; rendered (and spilled to disk) by the pump"""
+        self.output_queue.put(text)
+
+    def pump_output_queue(self):
+        """Drain output_queue within a per-frame time budget.
+
+        Text is coalesced into one insert per tick and appended to the spill
+        file, so the widget can stay bounded without losing anything. When
+        the backlog exceeds PUMP_BACKLOG_LIMIT the oldest text is written to
+        the spill file only and counted as dropped.
+        """
+        deadline = time.perf_counter() + self.PUMP_BUDGET_S
+        shed = []
+        batch = []
+        overflow = self.output_queue.qsize() - self.PUMP_BACKLOG_LIMIT
+        while True:
+            try:
+                item = self.output_queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, TaskEvent):
+                self.handle_task_event(item)
+            elif overflow > 0:
+                shed.append(item)
+            else:
+                batch.append(item)
+            overflow -= 1
+            if overflow < 0 and time.perf_counter() >= deadline:
+                break
+
+        if shed:
+            self.spill_console(shed)
+            self.console_dropped += sum(max(1, text.count('\n')) for text in shed)
+        if batch:
+            self.spill_console(batch)
+            if self.console_paused:
+                self.console_pending.extend(batch)
+                while len(self.console_pending) > self.CONSOLE_MAX_LINES:
+                    self.console_pending.popleft()
+                    self.console_dropped += 1
+            else:
+                self.render_console(batch)
+        if shed or batch:
+            self.update_console_stats()
+        self.root.after(self.PUMP_INTERVAL_MS, self.pump_output_queue)
+
+    def render_console(self, texts):
+        """Insert texts in one call and trim the widget to CONSOLE_MAX_LINES"""
+        follow = self.console_output.yview()[1] >= 0.999
+        self.console_output.insert(tk.END, ''.join(texts))
+        line_count = int(self.console_output.index('end-1c').split('.')[0])
+        # Trim in chunks so the (expensive) delete runs rarely
+        if line_count > self.CONSOLE_MAX_LINES + self.CONSOLE_TRIM_CHUNK:
+            self.console_output.delete('1.0', f'{line_count - self.CONSOLE_MAX_LINES}.0')
+        if follow:
+            self.console_output.see(tk.END)
+
+    def spill_console(self, texts):
+        if self.console_spill is None:
+            try:
+                os.makedirs('debugging', exist_ok=True)
+                timestamp = datetime.now().strftime('%Y-%m-%dT%H-%M-%S')
+                self.console_spill_path = os.path.join('debugging', f'gui-console-{timestamp}.log')
+                self.console_spill = open(self.console_spill_path, 'a', encoding='utf-8', errors='replace')
+            except OSError:
+                return
+        try:
+            self.console_spill.write(''.join(texts))
+            self.console_spill.flush()
+        except OSError:
+            pass
+
+    def update_console_stats(self):
+        text = f"dropped: {self.console_dropped}"
+        if self.console_paused:
+            text = f"⏸ paused ({len(self.console_pending)} waiting) | " + text
+        if self.console_spill_path:
+            text += f" | full log: {os.path.basename(self.console_spill_path)}"
+        self.console_stats.configure(text=text)
+
+    def toggle_console_pause(self):
+        self.console_paused = not self.console_paused
+        if self.console_paused:
+            self.console_pause_btn.configure(text="▶ Resume Console")
+        else:
+            self.console_pause_btn.configure(text="⏸ Pause Console")
+            if self.console_pending:
+                self.render_console(list(self.console_pending))
+                self.console_pending.clear()
+        self.update_console_stats()
+
+    def handle_task_event(self, event):
+        """Apply a progress/status/result event posted by a background task"""
+        if event.kind == "progress":
+            self.progress_bar["value"] = event.data["value"]
+            if event.data["label"] is not None:
+                self.progress_label.configure(text=event.data["label"])
+        elif event.kind == "status":
+            self.operation_status.configure(text=event.data["text"])
+        elif event.kind == "call":
+            try:
+                event.data["fn"](*event.data["args"], **event.data["kwargs"])
+            except Exception as e:
+                self.console_write(f"❌ UI update from '{event.task}' failed: {str(e)}\n")
+        elif event.kind == "finished":
+            error = event.data["error"]
+            if error is not None:
+                self.console_write(f"❌ {event.task} failed: {str(error)}\n")
+            self.update_task_controls()
+
+    def update_task_controls(self):
+        state = "normal" if self.tasks.active else "disabled"
+        self.cancel_task_btn.configure(state=state)
+
+    def run_task(self, name, fn, *args, **kwargs):
+        """Submit fn(ctx, *args) to the task executor and refresh task controls"""
+        handle = self.tasks.submit(name, fn, *args, **kwargs)
+        self.update_task_controls()
+        return handle
+
+    def cancel_tasks(self):
+        cancelled = self.tasks.cancel_all()
+        if cancelled:
+            self.console_write(f"🛑 Cancelling: {', '.join(cancelled)}\n")
+
+    def on_close(self):
+        self.monitor.stop()
+        self.tasks.shutdown()
+        self.env_probe.shutdown()
+        if self.console_spill is not None:
+            self.console_spill.close()
+        self.root.destroy()
 
     def output_reader(self, pipe, queue):
         try:
@@ -353,7 +592,7 @@ class ServerManagerGUI:
             except:
                 pass
 
-    def start_server(self):
+    def start_server(self, previous_session=None):
         if not self.is_server_running:
             try:
                 # Clear console and update status
@@ -361,16 +600,15 @@ class ServerManagerGUI:
                 self.operation_status.configure(text="🚀 Starting Server")
                 self.progress_bar["value"] = 0
                 self.progress_label.configure(text="Pre-flight checks...")
-                self.root.update()
+                self.root.update_idletasks()
                 
                 # Pre-flight checks
-                self.console_output.insert(tk.END, "🔍 Running pre-flight checks...\n")
-                self.console_output.see(tk.END)
+                self.console_write("🔍 Running pre-flight checks...\n")
                 
                 # Check Node.js and npm
                 npm_path = find_executable('npm')
                 if not npm_path:
-                    self.console_output.insert(tk.END, "❌ npm not found. Please install Node.js first.\n")
+                    self.console_write("❌ npm not found. Please install Node.js first.\n")
                     self.operation_status.configure(text="❌ Start Failed")
                     self.progress_label.configure(text="npm not found")
                     messagebox.showerror("Environment Error", "npm not found!\n\nPlease install Node.js and restart your terminal.")
@@ -378,11 +616,11 @@ class ServerManagerGUI:
                 
                 self.progress_bar["value"] = 20
                 self.progress_label.configure(text="Checking environment...")
-                self.root.update()
+                self.root.update_idletasks()
                 
                 # Check .env file and determine mode
                 if not os.path.exists('.env'):
-                    self.console_output.insert(tk.END, "❌ .env file missing! Create it first.\n")
+                    self.console_write("❌ .env file missing! Create it first.\n")
                     self.operation_status.configure(text="❌ Start Failed")
                     self.progress_label.configure(text=".env file missing")
                     messagebox.showerror("Environment Error", ".env file is missing!\n\nUse 'Create .env File' or 'Start in Mock DB Mode'")
@@ -394,94 +632,209 @@ class ServerManagerGUI:
                         env_content = f.read()
                         is_mock_mode = 'USE_MOCK_DB=true' in env_content
                 except:
-                    self.console_output.insert(tk.END, "⚠️ Warning: Could not read .env file\n")
+                    self.console_write("⚠️ Warning: Could not read .env file\n")
                     is_mock_mode = False
                 
                 self.progress_bar["value"] = 40
-                self.root.update()
+                self.root.update_idletasks()
                 
                 # Check SQLite database
                 self.progress_label.configure(text="Checking SQLite database...")
                 data_dir = os.path.join(os.getcwd(), 'data')
                 if not os.path.exists(data_dir):
                     os.makedirs(data_dir)
-                    self.console_output.insert(tk.END, "✅ Created data directory\n")
+                    self.console_write("✅ Created data directory\n")
                 else:
-                    self.console_output.insert(tk.END, "✅ SQLite database ready\n")
+                    self.console_write("✅ SQLite database ready\n")
                 
                 self.progress_bar["value"] = 60
                 self.progress_label.configure(text="Starting Node.js server...")
-                self.root.update()
+                self.root.update_idletasks()
                 
+                # Behind the proxy node gets a spare loopback port and the proxy keeps PORT
+                port = self.server_port()
+                control = self.proxy_control()
+                if control is None and self.proxy_var.get():
+                    control = launch_proxy(port, free_port(), Path(self.PROXY_STATE), Path(self.PROXY_LOG))
+                    self.console_write(f"🔀 Proxy listening on :{port}\n")
+                target = free_port() if control else port
+
                 # Start the server
-                self.console_output.insert(tk.END, f"🚀 Starting server in {'Mock DB' if is_mock_mode else 'SQLite'} mode...\n")
-                self.console_output.see(tk.END)
-                
-                # Find npm executable and start server
-                self.server_process = subprocess.Popen(
-                    f'"{npm_path}" run dev',
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,  # Combine stderr with stdout
-                    stdin=subprocess.PIPE,     # Provide stdin to prevent EPIPE
-                    bufsize=0,                 # Unbuffered
-                    universal_newlines=True,
-                    encoding='utf-8',          # Explicit UTF-8 encoding
-                    errors='replace',          # Replace invalid characters
-                    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
-                )
-
-                # Start output reader
-                threading.Thread(target=self.output_reader, 
-                               args=(self.server_process.stdout, self.output_queue), 
-                               daemon=True).start()
-
-                self.is_server_running = True
-                self.update_button_states()
+                self.console_write(f"🚀 Starting server in {'Mock DB' if is_mock_mode else 'SQLite'} mode...\n")
+                self.adopt_server_process(self.spawn_server_process(backend_env(target) if control else None))
+                if control:
+                    control.switch(target, self.server_process.pid)
                 
-                self.progress_bar["value"] = 100
-                self.operation_status.configure(text="✅ Server Running")
-                self.progress_label.configure(text="SQLite Mode")
-                self.console_output.insert(tk.END, "✅ Server process started. Waiting for initialization...\n")
-                self.console_output.insert(tk.END, "💡 Running with SQLite database\n")
+                self.progress_bar["value"] = 80
+                self.operation_status.configure(text="⏳ Waiting for server")
+                self.progress_label.configure(text="Waiting for port...")
+                self.console_write("✅ Server process started. Waiting for it to answer...\n")
+                self.run_task("wait ready", self._wait_ready_task, self.server_process, target,
+                              None if control else previous_session)
                 
             except Exception as e:
                 self.operation_status.configure(text="❌ Start Failed")
                 self.progress_label.configure(text=str(e)[:50])
                 messagebox.showerror("Error", f"Failed to start server: {str(e)}")
 
+    def spawn_server_process(self, overrides=None):
+        """Start `npm run dev` with its output streamed to the console"""
+        env = None
+        if overrides:
+            env = os.environ.copy()
+            env.update(overrides)
+        proc = subprocess.Popen(
+            f'"{find_executable("npm")}" run dev',
+            shell=True,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,  # Combine stderr with stdout
+            stdin=subprocess.PIPE,     # Provide stdin to prevent EPIPE
+            bufsize=0,                 # Unbuffered
+            universal_newlines=True,
+            encoding='utf-8',          # Explicit UTF-8 encoding
+            errors='replace',          # Replace invalid characters
+            **session_kwargs()         # own group/session so stop reaches node, not just the shell
+        )
+
+        # Start output reader
+        threading.Thread(target=self.output_reader, 
+                       args=(proc.stdout, self.output_queue), 
+                       daemon=True).start()
+        return proc
+
+    def adopt_server_process(self, proc):
+        """Make proc the server the buttons and resource monitor act on"""
+        self.server_process = proc
+        self.is_server_running = True
+        self.record_server_pid(proc.pid)
+        self.update_button_states()
+
+    def proxy_control(self):
+        return ProxyControl.find(Path(self.PROXY_STATE))
+
+    def detach_server_process(self):
+        """Hand the running server process over to a task for shutdown"""
+        proc = self.server_process
+        self.server_process = None
+        self.is_server_running = False
+        if proc is not None:
+            self.forget_server_pid(proc.pid)
+        self.update_button_states()
+        return proc
+
+    def record_server_pid(self, pid):
+        try:
+            Path(self.PID_FILE).write_text(str(pid))
+        except OSError as e:
+            self.console_write(f"⚠️ Could not write {self.PID_FILE}: {e}\n")
+
+    def forget_server_pid(self, pid):
+        """Remove the PID file unless it already names another server"""
+        path = Path(self.PID_FILE)
+        try:
+            if path.read_text().strip() == str(pid):
+                path.unlink()
+        except OSError:
+            pass
+
+    def terminate_server_process(self, ctx, proc):
+        """Stop the server's whole process tree (blocking; runs in a task)"""
+        result = stop_popen(proc)
+        ctx.log(f"Server stopped ({result.describe()})." if result else "Server stopped.")
+        return result
+
     def stop_server(self):
         if self.server_process and self.is_server_running:
-            try:
-                self.console_output.insert(tk.END, "Stopping server...\n")
-                self.console_output.see(tk.END)
-                
-                # On Windows, we need to terminate the process group
-                if sys.platform == 'win32':
-                    subprocess.run(['taskkill', '/F', '/T', '/PID', str(self.server_process.pid)], 
-                                 capture_output=True)
-                else:
-                    self.server_process.terminate()
-                    try:
-                        self.server_process.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        self.server_process.kill()
-                        self.server_process.wait()
-                
-                self.is_server_running = False
-                self.server_process = None
-                self.update_button_states()
-                self.console_output.insert(tk.END, "Server stopped.\n")
-                self.console_output.see(tk.END)
-                
-            except Exception as e:
-                self.console_output.insert(tk.END, f"Error stopping server: {str(e)}\n")
-                messagebox.showerror("Error", f"Failed to stop server: {str(e)}")
+            self.console_write("Stopping server...\n")
+            self.run_task("stop server", self._stop_server_task, self.detach_server_process(),
+                          not self.proxy_var.get())
+
+    def _stop_server_task(self, ctx, proc, stop_proxy=False):
+        try:
+            self.terminate_server_process(ctx, proc)
+            control = self.proxy_control() if stop_proxy else None
+            if control:
+                control.stop()
+                ctx.log("Proxy stopped.")
+        except Exception as e:
+            ctx.log(f"Error stopping server: {str(e)}")
+            ctx.call(messagebox.showerror, "Error", f"Failed to stop server: {str(e)}")
 
     def restart_server(self):
-        self.stop_server()
-        time.sleep(2)  # Wait for ports to be released
-        self.start_server()
+        control = self.proxy_control() if self.is_server_running else None
+        if control:
+            self.console_write("🔁 Rolling restart: the current server keeps serving until the new one is ready\n")
+            self.run_task("restart server", self._rolling_restart_task, control, self.server_process)
+            return
+        proc = self.detach_server_process() if self.is_server_running else None
+        if proc:
+            self.console_write("Stopping server...\n")
+        self.run_task("restart server", self._restart_server_task, proc)
+
+    def _rolling_restart_task(self, ctx, control, old_proc):
+        ctx.status("🔁 Rolling restart")
+        ctx.progress(10, "Starting replacement...")
+
+        def switched(proc):
+            ctx.progress(70, "Draining old instance...")
+            ctx.call(self.adopt_server_process, proc)
+
+        def retire():
+            ctx.progress(90, "Stopping old instance...")
+            stop_process(old_proc)
+
+        try:
+            result = rolling_restart(control, self.spawn_server_process, retire, Path('data') / 'bingo.db',
+                                     drain=self.PROXY_DRAIN_S, ready_deadline=self.READY_DEADLINE_S,
+                                     log=ctx.log, sleep=ctx.sleep, on_switch=switched)
+        except ProxyError as e:
+            ctx.status("❌ Restart failed")
+            ctx.progress(0, "Old server still serving")
+            ctx.log(f"❌ {e}")
+            return
+        ctx.progress(100, f"Rolled over in {result.elapsed:.1f}s")
+        ctx.status("✅ Server Running")
+        ctx.log(f"✅ Rolled over {result.describe()}")
+
+    def _restart_server_task(self, ctx, proc):
+        port = self.server_port()
+        # The new server takes over the same port; only a new session id proves it is the one answering
+        previous = current_session(port) if 'SERVER_SESSION_ID' not in os.environ else None
+        if proc:
+            self.terminate_server_process(ctx, proc)
+        ctx.status(f"⏳ Waiting for port {port}")
+        released = wait_port_released(port, deadline=self.PORT_RELEASE_DEADLINE_S, sleep=ctx.sleep)
+        if released is None:
+            ctx.log(f"⚠️ Port {port} still in use after {self.PORT_RELEASE_DEADLINE_S:.0f}s; starting anyway")
+        else:
+            ctx.log(f"Port {port} released after {released:.1f}s")
+        ctx.call(self.start_server, previous)
+
+    def server_port(self):
+        return read_env_port(Path('.env'))
+
+    def _wait_ready_task(self, ctx, proc, port, previous_session=None):
+        phases = {'tcp': (85, "Waiting for port..."), 'http': (95, f"Probing {HEALTH_PATH}...")}
+        result = wait_ready(port, deadline=self.READY_DEADLINE_S, alive=lambda: proc.poll() is None,
+                            previous_session=previous_session, sleep=ctx.sleep, on_phase=lambda phase, t: ctx.progress(*phases[phase]))
+        if result.ready:
+            ctx.progress(100, f"Ready in {result.elapsed:.1f}s")
+            ctx.status("✅ Server Running")
+            ctx.log(f"✅ Server {result.describe()}")
+            ctx.log("💡 Running with SQLite database")
+        elif proc.poll() is not None:
+            ctx.status("❌ Server exited")
+            ctx.progress(0, f"Exited with code {proc.returncode}")
+            ctx.log(f"❌ Server exited with code {proc.returncode} before becoming ready")
+            ctx.call(self.server_exited, proc)
+        else:
+            ctx.status("⚠️ Server not responding")
+            ctx.log(f"⚠️ Server {result.describe()}")
+
+    def server_exited(self, proc):
+        if self.server_process is proc:
+            self.detach_server_process()
 
     def update_button_states(self):
         if self.is_server_running:
@@ -505,16 +858,23 @@ class ServerManagerGUI:
 
     def refresh_logs(self):
         self.log_list.delete(0, tk.END)
-        log_files = glob.glob("debugging/*.log")
+        log_files = glob.glob("debugging/*.log") + glob.glob("debugging/*.log.gz")
         for log_file in sorted(log_files, reverse=True):
             self.log_list.insert(tk.END, os.path.basename(log_file))
 
     def clear_logs(self):
         if messagebox.askyesno("Confirm", "Are you sure you want to delete all log files?"):
             try:
-                log_files = glob.glob("debugging/*.log")
+                # Release the mapping so the viewed file can be deleted on Windows
+                self.close_log_view()
+                log_files = glob.glob("debugging/*.log") + glob.glob("debugging/*.log.gz")
                 for log_file in log_files:
+                    # The GUI's own console spill file is still open
+                    if self.console_spill_path and os.path.samefile(log_file, self.console_spill_path):
+                        continue
                     os.remove(log_file)
+                # Sidecar query indexes written by server_manager_cli.py logs query
+                shutil.rmtree(os.path.join("debugging", ".index"), ignore_errors=True)
                 self.refresh_logs()
                 self.log_preview.delete(1.0, tk.END)
                 messagebox.showinfo("Success", "All log files have been deleted.")
@@ -525,92 +885,306 @@ class ServerManagerGUI:
         selection = self.log_list.curselection()
         if selection:
             log_name = self.log_list.get(selection[0])
+            path = os.path.join('debugging', log_name)
+            self.close_log_view()
+            if is_archive(Path(path)):
+                # Inflating takes a while for big sessions; keep the window responsive
+                self.log_view_status.configure(text=f"{log_name} | decompressing...")
+                self.run_task(f"open {log_name}", self._open_archived_log_task, path)
+                return
             try:
-                with open(f"debugging/{log_name}", 'r') as f:
-                    content = f.read()
-                    self.log_preview.delete(1.0, tk.END)
-                    self.log_preview.insert(tk.END, content)
+                view = MappedLog(path)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to read log file: {str(e)}")
+                return
+            self.show_log_view(view)
 
-    def check_environment_status(self):
-        """Check the status of various environment components"""
-        # Check Node.js and npm
-        node_path = find_executable('node')
-        npm_path = find_executable('npm')
-        
-        if node_path:
-            try:
-                result = run_command_safe([node_path, '--version'], capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    self.node_status.configure(text="⚙️ Node.js: ✅")
-                    self.node_version.configure(text=result.stdout.strip())
-                else:
-                    self.node_status.configure(text="⚙️ Node.js: ❌")
-                    self.node_version.configure(text="Error running")
-            except:
-                self.node_status.configure(text="⚙️ Node.js: ❌")
-                self.node_version.configure(text="Error checking")
-        else:
-            self.node_status.configure(text="⚙️ Node.js: ❌")
-            self.node_version.configure(text="Not installed")
-        
-        if npm_path:
-            try:
-                result = run_command_safe([npm_path, '--version'], capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    self.npm_status.configure(text="📦 npm: ✅")
-                    self.npm_version.configure(text=f"v{result.stdout.strip()}")
-                else:
-                    self.npm_status.configure(text="📦 npm: ❌")
-                    self.npm_version.configure(text="Error running")
-            except:
-                self.npm_status.configure(text="📦 npm: ❌")
-                self.npm_version.configure(text="Error checking")
-        else:
-            self.npm_status.configure(text="📦 npm: ❌")
-            self.npm_version.configure(text="Not found")
-
-        # Check SQLite database
-        self.check_sqlite_status()
-        
-        # Update SQLite status in main panel
-        data_dir = os.path.join(os.getcwd(), 'data')
-        db_path = os.path.join(data_dir, 'bingo.db')
-        if os.path.exists(db_path):
-            size = os.path.getsize(db_path) / 1024
-            self.sqlite_status.configure(text="🗄️ SQLite: ✅")
-            self.sqlite_version.configure(text=f"{size:.1f}KB")
-        else:
-            self.sqlite_status.configure(text="🗄️ SQLite: ⚠️")
-            self.sqlite_version.configure(text="Not initialized")
-        
-        # Check .env file
-        if os.path.exists('.env'):
-            self.env_file_status.configure(text="📄 .env: ✅")
-            self.env_mode.configure(text="SQLite Mode")
+    def _open_archived_log_task(self, ctx, path):
+        try:
+            view = MappedLog(path)
+        except Exception as e:
+            ctx.call(self.log_view_status.configure, text="")
+            ctx.call(messagebox.showerror, "Error", f"Failed to read log file: {str(e)}")
+            return
+        if ctx.token.cancelled:
+            view.close()
+            return
+        ctx.call(self.show_log_view, view)
+
+    def show_log_view(self, view):
+        """Display a freshly opened log and index its lines in the background"""
+        self.close_log_view()
+        self.log_view = view
+        self.log_search_pos = 0
+        self.load_log_window(0)
+        self.update_log_view_status(view)
+        # Line numbers only; the first page is already on screen
+        self.run_task(f"index {view.path.name}", self._index_log_task, view)
+
+    def archive_logs(self):
+        """Compress inactive session logs and apply the size/age retention"""
+        if not self.tasks.is_running("archive logs"):
+            self.run_task("archive logs", self._archive_logs_task, True)
+
+    def poll_log_archive(self):
+        if not self.tasks.is_running("archive logs"):
+            self.run_task("archive logs", self._archive_logs_task, False)
+        self.root.after(self.LOG_ARCHIVE_INTERVAL_MS, self.poll_log_archive)
+
+    def _archive_logs_task(self, ctx, verbose):
+        archiver = LogArchiver(Path('debugging'), budget_bytes=self.LOG_BUDGET_MB * 1048576,
+                               max_age_s=self.LOG_MAX_AGE_DAYS * 86400)
+        report = archiver.run(log=ctx.log if verbose else None, should_stop=lambda: ctx.token.cancelled)
+        if verbose or report.compressed or report.deleted or report.failed:
+            ctx.log(f"📦 Logs: {report.describe()}")
+        if report.compressed or report.deleted:
+            ctx.call(self.refresh_logs)
+
+    def close_log_view(self):
+        view = self.log_view
+        if view is None:
+            return
+        self.log_view = None
+        self.log_pages.clear()
+        self.tasks.cancel(f"index {view.path.name}")
+        self.tasks.cancel(f"open {view.path.name}")
+        self.tasks.cancel("log search")
+        view.close()
+        self.log_preview.delete(1.0, tk.END)
+        self.log_view_status.configure(text="")
+
+    def _index_log_task(self, ctx, view):
+        try:
+            view.build_index(should_stop=lambda: ctx.token.cancelled,
+                             on_progress=lambda fraction: ctx.call(self.update_log_view_status, view, fraction))
+        except ValueError:
+            return  # mapping closed because another log was opened
+        ctx.call(self.update_log_view_status, view)
+
+    def update_log_view_status(self, view, fraction=None, note=""):
+        if view is not self.log_view:
+            return
+        size_mb = view.size / (1024 * 1024)
+        if view.total_lines is not None:
+            lines = f"{view.total_lines:,} lines"
         else:
-            self.env_file_status.configure(text="📄 .env: ❌")
-            self.env_mode.configure(text="Not configured")
-
-    def check_sqlite_status(self):
-        """Check SQLite database status"""
+            lines = f"indexing {fraction or 0:.0%}"
+        text = f"{view.path.name} | {size_mb:.1f}MB | {lines}"
+        if note:
+            text += f" | {note}"
+        self.log_view_status.configure(text=text)
+
+    def decode_log(self, data):
+        return data.decode('utf-8', errors='replace')
+
+    def load_log_window(self, offset):
+        """Render the page around offset; returns the widget line (0-based) of offset"""
+        view = self.log_view
+        start = view.line_start(offset)
+        before, window_start, lines_before = view.read_lines_before(start, self.LOG_PAGE_LINES // 2)
+        after, window_end, lines_after = view.read_lines(start, self.LOG_PAGE_LINES)
+        self.log_pages = deque(page for page in [(window_start, start, lines_before), (start, window_end, lines_after)]
+                               if page[2])
+        self.log_paging = True
+        self.log_preview.delete(1.0, tk.END)
+        self.log_preview.insert(tk.END, self.decode_log(before) + self.decode_log(after))
+        self.log_paging = False
+        return lines_before
+
+    def on_log_preview_scroll(self, first, last):
+        """Scrollbar hook: page in more of the file near either edge of the window"""
+        self.log_preview.vbar.set(first, last)
+        if self.log_view is None or self.log_paging or not self.log_pages:
+            return
+        if float(last) >= 0.98 and self.log_pages[-1][1] < self.log_view.size:
+            self.log_paging = True
+            self.root.after_idle(self.page_log_preview, 1)
+        elif float(first) <= 0.02 and self.log_pages[0][0] > 0:
+            self.log_paging = True
+            self.root.after_idle(self.page_log_preview, -1)
+
+    def page_log_preview(self, direction):
         try:
-            data_dir = os.path.join(os.getcwd(), 'data')
-            db_path = os.path.join(data_dir, 'bingo.db')
-            
-            if os.path.exists(db_path):
-                size = os.path.getsize(db_path) / 1024  # Convert to KB
-                modified = datetime.fromtimestamp(os.path.getmtime(db_path)).strftime('%Y-%m-%d %H:%M')
+            view = self.log_view
+            if view is None or not self.log_pages:
+                return
+            top = int(self.log_preview.index('@0,0').split('.')[0])
+            if direction > 0:
+                end = self.log_pages[-1][1]
+                data, new_end, count = view.read_lines(end, self.LOG_PAGE_LINES)
+                if not count:
+                    return
+                self.log_preview.insert(tk.END, self.decode_log(data))
+                self.log_pages.append((end, new_end, count))
+                while len(self.log_pages) > 1 and sum(p[2] for p in self.log_pages) > self.LOG_WINDOW_LINES:
+                    _, _, dropped = self.log_pages.popleft()
+                    self.log_preview.delete('1.0', f'{dropped + 1}.0')
+                    top -= dropped
+                self.log_preview.yview(f'{max(top, 1)}.0')
+            else:
+                start = self.log_pages[0][0]
+                data, new_start, count = view.read_lines_before(start, self.LOG_PAGE_LINES)
+                if not count:
+                    return
+                self.log_preview.insert('1.0', self.decode_log(data))
+                self.log_pages.appendleft((new_start, start, count))
+                while len(self.log_pages) > 1 and sum(p[2] for p in self.log_pages) > self.LOG_WINDOW_LINES:
+                    self.log_pages.pop()
+                    keep = sum(p[2] for p in self.log_pages)
+                    self.log_preview.delete(f'{keep + 1}.0', tk.END)
+                self.log_preview.yview(f'{top + count}.0')
+        finally:
+            self.log_paging = False
+
+    def find_in_log(self, event=None):
+        needle = self.log_search_var.get()
+        if not needle or self.log_view is None:
+            return
+        if self.tasks.is_running("log search"):
+            return
+        self.run_task("log search", self._find_in_log_task, self.log_view, needle, self.log_search_pos)
+
+    def _find_in_log_task(self, ctx, view, needle, start):
+        needle_bytes = needle.encode('utf-8')
+        try:
+            found = view.find(needle_bytes, start, should_stop=lambda: ctx.token.cancelled,
+                              on_progress=lambda fraction: ctx.call(self.update_log_view_status, view, None,
+                                                                    f"searching {fraction:.0%}"))
+        except ValueError:
+            return  # mapping closed because another log was opened
+        ctx.token.raise_if_cancelled()
+        ctx.call(self.show_log_match, view, needle, found, start)
+
+    def show_log_match(self, view, needle, offset, start):
+        if view is not self.log_view:
+            return
+        if offset == -1:
+            # Wrap around on the next search
+            self.log_search_pos = 0
+            note = f"'{needle}' not found" if start == 0 else f"no more matches for '{needle}'"
+            self.update_log_view_status(view, note=note)
+            return
+        widget_line = self.load_log_window(offset)
+        column = len(self.decode_log(view.mm[view.line_start(offset):offset]))
+        index = f'{widget_line + 1}.{column}'
+        self.log_preview.tag_add('match', index, f'{index}+{len(needle)}c')
+        self.log_preview.see(index)
+        self.log_search_pos = offset + len(needle.encode('utf-8'))
+        line = view.line_number(offset)
+        self.update_log_view_status(view, note=f"match at line {line + 1:,}" if line is not None else "match")
+
+    def check_environment_status(self, force=False):
+        """Refresh the environment panel on a task; labels update as each probe finishes"""
+        if not self.tasks.is_running("environment check"):
+            self.run_task("environment check", self._environment_task, force)
+        self.refresh_db_stats(force=True)
+
+    def _environment_task(self, ctx, force):
+        self.env_probe.run(lambda result: ctx.call(self.show_probe_result, result), force=force)
+
+    def show_probe_result(self, result):
+        """Apply one environment probe result to its status labels"""
+        mark = "✅" if result.ok else "⚠️" if result.ok is None else "❌"
+        if result.name == 'node':
+            self.node_status.configure(text=f"⚙️ Node.js: {mark}")
+            self.node_version.configure(text=result.summary)
+        elif result.name == 'npm':
+            self.npm_status.configure(text=f"📦 npm: {mark}")
+            self.npm_version.configure(text=result.summary)
+        elif result.name == 'sqlite':
+            self.sqlite_status.configure(text=f"🗄️ SQLite: {mark}")
+            self.sqlite_version.configure(text=result.summary)
+            if result.ok:
                 self.database_status.configure(text="🗄️ SQLite: ✅ Ready")
-                self.database_version.configure(text=f"{size:.1f}KB, {modified}")
+                self.database_version.configure(text=f"{result.summary}, {result.data['modified']}")
             else:
-                self.database_status.configure(text="🗄️ SQLite: ⚠️ Not initialized")
+                self.database_status.configure(text=f"🗄️ SQLite: {mark} {result.summary}")
                 self.database_version.configure(text="Run initialization")
-                
+        elif result.name == '.env':
+            self.env_file_status.configure(text=f"📄 .env: {mark}")
+            self.env_mode.configure(text=result.summary if result.ok is not False else "Not configured")
+
+    def refresh_db_stats(self, force=False):
+        """Collect database statistics on a task; cached for DB_STATS_TTL_S"""
+        if not self.tasks.is_running("db stats"):
+            self.run_task("db stats", self._db_stats_task, force)
+
+    def poll_db_stats(self):
+        self.refresh_db_stats()
+        self.root.after(self.DB_STATS_REFRESH_MS, self.poll_db_stats)
+
+    def _db_stats_task(self, ctx, force):
+        try:
+            stats = self.db_stats.collect(force=force)
+        except FileNotFoundError:
+            ctx.call(self.db_stats_label.configure, text="📊 DB stats: no database yet")
+            return
         except Exception as e:
-            self.database_status.configure(text="🗄️ SQLite: ❌ Error")
-            self.database_version.configure(text=str(e)[:30])
+            ctx.call(self.db_stats_label.configure, text=f"📊 DB stats: ❌ {str(e)[:40]}")
+            return
+        ctx.call(self.show_db_stats, stats)
+
+    def show_db_stats(self, stats):
+        def count(table):
+            value = stats.rows.get(table)
+            return f"{value:,}" if value is not None else "-"
+
+        lines = [
+            f"📊 users {count('users')} · games {count('games')} · players {count('game_participants')}",
+            f"   wallet tx {count('wallet_transactions')} · winners {count('winners')} · "
+            f"achievements {count('user_achievements')}",
+            f"   {stats.page_count:,} pages × {stats.page_size // 1024}KB, free {stats.freelist_count:,} "
+            f"({stats.free_fraction:.0%}) · WAL {stats.wal_size / 1024:.0f}KB",
+        ]
+        indexes = stats.indexes()
+        if indexes:
+            biggest = indexes[0]
+            lines.append(f"   {len(indexes)} indexes, largest {biggest.name} "
+                         f"{biggest.size / 1024:.0f}KB ({biggest.fill:.0%} full)")
+        elif not stats.dbstat:
+            lines.append("   index stats unavailable (no dbstat)")
+        self.db_stats_label.configure(text="\n".join(lines))
+
+    def server_pid(self):
+        """Root of the process tree to monitor (read from the monitor thread)"""
+        proc = self.server_process
+        return proc.pid if proc is not None and proc.poll() is None else None
+
+    def poll_monitor(self):
+        self.show_resources()
+        self.root.after(self.MONITOR_REFRESH_MS, self.poll_monitor)
+
+    def show_resources(self):
+        if not procmon_supported():
+            self.resource_label.configure(text="📈 Resources: needs Linux /proc")
+            return
+        sample = self.monitor.latest
+        if sample is None:
+            self.resource_label.configure(text="📈 Resources: server not running")
+        else:
+            io = (f" · disk r {sample.read_rate / 1024:.0f}KB/s w {sample.write_rate / 1024:.0f}KB/s"
+                  if sample.io else "")
+            self.resource_label.configure(
+                text=f"📈 CPU {sample.cpu_percent:.0f}% · RSS {sample.rss_kb / 1024:.0f}MB · "
+                     f"fds {sample.fds} · threads {sample.threads} · {sample.procs} procs{io}")
+        for metric, (canvas, color) in self.sparklines.items():
+            self.draw_sparkline(canvas, self.monitor.ring.values(metric), color,
+                                floor=0.0 if metric == 'cpu_percent' else None)
+
+    def draw_sparkline(self, canvas, values, color, floor=None):
+        canvas.delete('all')
+        values = values[-self.SPARK_WIDTH // 2:]
+        if len(values) < 2:
+            return
+        lo = min(values) if floor is None else floor
+        hi = max(values)
+        span = (hi - lo) or 1.0
+        step = self.SPARK_WIDTH / (len(values) - 1)
+        usable = self.SPARK_HEIGHT - 4
+        points = []
+        for i, value in enumerate(values):
+            points += [i * step, self.SPARK_HEIGHT - 2 - (value - lo) / span * usable]
+        canvas.create_line(*points, fill=color, width=1)
 
     def check_database_status(self):
         """Check SQLite database status"""
@@ -633,174 +1207,293 @@ class ServerManagerGUI:
 
     def run_migrations(self):
         """Run database migrations"""
+        self.run_task("migrations", self._migrations_task)
+
+    def _migrations_task(self, ctx):
         try:
-            self.console_output.insert(tk.END, "🔄 Running database migrations...\n")
-            self.console_output.see(tk.END)
+            ctx.log("🔄 Running database migrations...")
             
             npm_path = find_executable('npm')
             if not npm_path:
-                self.console_output.insert(tk.END, "❌ npm not found. Node.js installation may be incomplete.\n")
-                self.console_output.insert(tk.END, "💡 Try restarting your terminal or reinstalling Node.js\n")
-                return
+                ctx.log("❌ npm not found. Node.js installation may be incomplete.")
+                ctx.log("💡 Try restarting your terminal or reinstalling Node.js")
+                return False
             
             # First install dependencies if needed
             if not os.path.exists('node_modules'):
-                self.console_output.insert(tk.END, "📦 Installing dependencies first...\n")
-                install_result = run_command_safe([npm_path, 'install'], 
-                                                capture_output=True, text=True, timeout=120)
-                if install_result.returncode != 0:
-                    self.console_output.insert(tk.END, f"❌ Failed to install dependencies:\n{install_result.stderr}\n")
-                    return
-                self.console_output.insert(tk.END, "✅ Dependencies installed\n")
+                ctx.log("📦 Installing dependencies first...")
+                returncode, _ = ctx.run([npm_path, 'install'], timeout=120)
+                if returncode != 0:
+                    ctx.log(f"❌ Failed to install dependencies (exit code {returncode})")
+                    return False
+                ctx.log("✅ Dependencies installed")
             
-            result = run_command_safe([npm_path, 'run', 'db:push'], 
-                                    capture_output=True, text=True, timeout=60)
+            returncode, _ = ctx.run([npm_path, 'run', 'db:push'], timeout=60)
             
-            if result.returncode == 0:
-                self.console_output.insert(tk.END, "✅ Migrations completed successfully\n")
-                if result.stdout.strip():
-                    self.console_output.insert(tk.END, result.stdout + "\n")
-                self.check_environment_status()  # Refresh status
-            else:
-                self.console_output.insert(tk.END, f"❌ Migration failed:\n")
-                if result.stderr.strip():
-                    self.console_output.insert(tk.END, f"Error: {result.stderr}\n")
-                if result.stdout.strip():
-                    self.console_output.insert(tk.END, f"Output: {result.stdout}\n")
-                self.console_output.insert(tk.END, "💡 Try running 'npm install' first or check your Node.js installation\n")
+            if returncode == 0:
+                ctx.log("✅ Migrations completed successfully")
+                ctx.call(self.check_environment_status)  # Refresh status
+                return True
+            ctx.log(f"❌ Migration failed (exit code {returncode})")
+            ctx.log("💡 Try running 'npm install' first or check your Node.js installation")
                 
         except subprocess.TimeoutExpired:
-            self.console_output.insert(tk.END, "⏰ Migration timed out\n")
+            ctx.log("⏰ Migration timed out")
         except FileNotFoundError as e:
-            self.console_output.insert(tk.END, f"❌ Command not found: {str(e)}\n")
+            ctx.log(f"❌ Command not found: {str(e)}")
         except Exception as e:
-            self.console_output.insert(tk.END, f"❌ Error running migrations: {str(e)}\n")
-        
-        self.console_output.see(tk.END)
+            ctx.log(f"❌ Error running migrations: {str(e)}")
+        return False
 
     def seed_database(self):
         """Seed the database with initial data"""
+        self.run_task("seed", self._seed_task)
+
+    def _seed_task(self, ctx):
         try:
-            self.console_output.insert(tk.END, "🌱 Seeding database with initial data...\n")
-            self.console_output.see(tk.END)
+            ctx.log("🌱 Seeding database with initial data...")
             
             npm_path = find_executable('npm')
             if not npm_path:
-                self.console_output.insert(tk.END, "❌ npm not found. Node.js installation may be incomplete.\n")
-                self.console_output.insert(tk.END, "💡 Try restarting your terminal or reinstalling Node.js\n")
-                return
+                ctx.log("❌ npm not found. Node.js installation may be incomplete.")
+                ctx.log("💡 Try restarting your terminal or reinstalling Node.js")
+                return False
             
-            result = run_command_safe([npm_path, 'run', 'db:seed'], 
-                                    capture_output=True, text=True, timeout=60)
+            returncode, _ = ctx.run([npm_path, 'run', 'db:seed'], timeout=60)
             
-            if result.returncode == 0:
-                self.console_output.insert(tk.END, "✅ Database seeded successfully\n")
-                if result.stdout.strip():
-                    self.console_output.insert(tk.END, result.stdout + "\n")
-            else:
-                self.console_output.insert(tk.END, f"❌ Seeding failed:\n")
-                if result.stderr.strip():
-                    self.console_output.insert(tk.END, f"Error: {result.stderr}\n")
-                if result.stdout.strip():
-                    self.console_output.insert(tk.END, f"Output: {result.stdout}\n")
+            if returncode == 0:
+                ctx.log("✅ Database seeded successfully")
+                return True
+            ctx.log(f"❌ Seeding failed (exit code {returncode})")
                 
+        except subprocess.TimeoutExpired:
+            ctx.log("⏰ Seeding timed out")
         except FileNotFoundError as e:
-            self.console_output.insert(tk.END, f"❌ Command not found: {str(e)}\n")
+            ctx.log(f"❌ Command not found: {str(e)}")
         except Exception as e:
-            self.console_output.insert(tk.END, f"❌ Error seeding database: {str(e)}\n")
-        
-        self.console_output.see(tk.END)
+            ctx.log(f"❌ Error seeding database: {str(e)}")
+        return False
+
+    def copy_database_backup(self, ctx):
+        """Online backup of data/bingo.db into data/backups (runs in a task)"""
+        data_dir = os.path.join(os.getcwd(), 'data')
+        db_path = os.path.join(data_dir, 'bingo.db')
+        backup_path = default_backup_path(Path(data_dir) / 'backups')
+
+        def report(progress):
+            ctx.progress(progress.fraction * 100,
+                         f"Backup {progress.pages_done}/{progress.pages_total} pages, {format_rate(progress.throughput)}")
+
+        # Stepped copy through SQLite's backup API so a running server keeps writing
+        result = online_backup(Path(db_path), backup_path, on_progress=report,
+                               should_stop=lambda: ctx.token.cancelled)
+        ctx.log(f"📁 Location: {result.path}")
+        ctx.log(f"📊 Size: {result.size / 1024:.1f}KB in {result.elapsed:.2f}s ({format_rate(result.throughput)})")
+        ctx.log("🔎 Integrity check: ok")
+        return result
 
     def backup_database(self):
         """Backup the SQLite database"""
+        db_path = os.path.join(os.getcwd(), 'data', 'bingo.db')
+        
+        if not os.path.exists(db_path):
+            messagebox.showerror("Backup Error", "Database file not found!\nInitialize the database first.")
+            return
+        
+        self.run_task("backup", self._backup_database_task)
+
+    def _backup_database_task(self, ctx):
         try:
-            data_dir = os.path.join(os.getcwd(), 'data')
-            db_path = os.path.join(data_dir, 'bingo.db')
-            
-            if not os.path.exists(db_path):
-                messagebox.showerror("Backup Error", "Database file not found!\nInitialize the database first.")
-                return
-            
-            # Create backups directory if it doesn't exist
-            backup_dir = os.path.join(data_dir, 'backups')
-            if not os.path.exists(backup_dir):
-                os.makedirs(backup_dir)
-            
-            # Create backup filename with timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_path = os.path.join(backup_dir, f'bingo_backup_{timestamp}.db')
-            
-            # Copy database file
-            import shutil
-            shutil.copy2(db_path, backup_path)
-            
-            size_kb = os.path.getsize(backup_path) / 1024
-            self.console_output.insert(tk.END, f"✅ Database backed up successfully!\n")
-            self.console_output.insert(tk.END, f"📁 Location: {backup_path}\n")
-            self.console_output.insert(tk.END, f"📊 Size: {size_kb:.1f}KB\n")
-            
-            messagebox.showinfo("Backup Complete", 
-                              f"Database backed up successfully!\nSize: {size_kb:.1f}KB\nLocation: {backup_path}")
+            ctx.status("💾 Backing up database")
+            ctx.log("💾 Starting online database backup...")
+            result = self.copy_database_backup(ctx)
+            ctx.log("✅ Database backed up successfully!")
+            ctx.status("✅ Backup complete")
+            ctx.call(messagebox.showinfo, "Backup Complete",
+                     f"Database backed up successfully!\nSize: {result.size / 1024:.1f}KB\n"
+                     f"Throughput: {format_rate(result.throughput)}\nLocation: {result.path}")
             
         except Exception as e:
-            self.console_output.insert(tk.END, f"❌ Backup failed: {str(e)}\n")
-            messagebox.showerror("Backup Error", f"Failed to backup database:\n{str(e)}")
-        
-        self.console_output.see(tk.END)
+            ctx.log(f"❌ Backup failed: {str(e)}")
+            ctx.status("❌ Backup failed")
+            ctx.call(messagebox.showerror, "Backup Error", f"Failed to backup database:\n{str(e)}")
     
+    def snapshot_store(self):
+        return BackupStore(Path(os.getcwd()) / 'data' / 'backups' / 'store')
+
+    def open_snapshot_manager(self):
+        """Window listing incremental snapshots with create/verify/restore/prune actions"""
+        if getattr(self, 'snapshot_window', None) is not None and self.snapshot_window.winfo_exists():
+            self.snapshot_window.lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("Incremental Snapshots")
+        window.geometry("640x400")
+        window.configure(bg='#2b2b2b')
+        self.snapshot_window = window
+
+        self.snapshot_list = tk.Listbox(window, background='black', foreground='white',
+                                        selectmode=tk.SINGLE, font=('Consolas', 10))
+        self.snapshot_list.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.snapshot_summary = tk.Label(window, text="", bg='#2b2b2b', fg='white', font=('Consolas', 9))
+        self.snapshot_summary.pack(fill=tk.X, padx=5)
+
+        actions = tk.Frame(window, bg='#2b2b2b')
+        actions.pack(fill=tk.X, padx=5, pady=5)
+        for text, command, color in [("Create Snapshot", self.create_snapshot, 'green'),
+                                     ("Verify All", self.verify_snapshots, None),
+                                     ("Restore Selected...", self.restore_snapshot, None),
+                                     ("Prune", self.prune_snapshots, 'red')]:
+            # Plain Tk buttons: this window is a tk.Toplevel even under CustomTkinter
+            btn_color = '#2E8B57' if color == 'green' else '#DC143C' if color == 'red' else '#4169E1'
+            tk.Button(actions, text=text, command=command, bg=btn_color, fg='white', relief='flat',
+                      font=('Arial', 10, 'bold')).pack(side=tk.LEFT, padx=5)
+        self.refresh_snapshots()
+
+    def refresh_snapshots(self):
+        if getattr(self, 'snapshot_window', None) is None or not self.snapshot_window.winfo_exists():
+            return
+        store = self.snapshot_store()
+        snapshots = store.list()
+        self.snapshot_list.delete(0, tk.END)
+        for snap in reversed(snapshots):
+            self.snapshot_list.insert(tk.END, f"{snap.id:<20} {snap.created}  {snap.size / 1024:>9.1f}KB  "
+                                              f"+{snap.stored_bytes / 1024:.1f}KB")
+        self.snapshot_summary.configure(
+            text=f"{len(snapshots)} snapshot(s), {store.stored_size() / 1024:.1f}KB stored")
+
+    def selected_snapshot_id(self):
+        selection = self.snapshot_list.curselection()
+        if not selection:
+            return None
+        return self.snapshot_list.get(selection[0]).split()[0]
+
+    def create_snapshot(self):
+        if not os.path.exists(os.path.join(os.getcwd(), 'data', 'bingo.db')):
+            messagebox.showerror("Snapshot Error", "Database file not found!\nInitialize the database first.")
+            return
+        self.run_task("snapshot store", self._create_snapshot_task)
+
+    def _create_snapshot_task(self, ctx):
+        def report(phase, fraction):
+            ctx.progress(fraction * 100, f"Snapshot: {phase} {fraction:.0%}")
+
+        try:
+            ctx.log("📸 Creating incremental snapshot...")
+            snap = self.snapshot_store().create(Path(os.getcwd()) / 'data' / 'bingo.db', on_progress=report,
+                                                should_stop=lambda: ctx.token.cancelled)
+            ctx.log(f"✅ Snapshot {snap.id}: {snap.new_chunks}/{len(snap.chunks)} new chunks, "
+                    f"{snap.stored_bytes / 1024:.1f}KB written")
+        except Exception as e:
+            ctx.log(f"❌ Snapshot failed: {str(e)}")
+        ctx.call(self.refresh_snapshots)
+
+    def verify_snapshots(self):
+        self.run_task("snapshot store", self._verify_snapshots_task)
+
+    def _verify_snapshots_task(self, ctx):
+        ctx.log("🔎 Verifying snapshots...")
+        reports = self.snapshot_store().verify()
+        for report in reports:
+            if report.ok:
+                ctx.log(f"✅ {report.snapshot}")
+            else:
+                ctx.log(f"❌ {report.snapshot}: {len(report.missing)} missing, {len(report.corrupt)} corrupt chunk(s)")
+        failed = sum(1 for r in reports if not r.ok)
+        ctx.call(messagebox.showinfo if not failed else messagebox.showerror, "Snapshot Verification",
+                 f"{len(reports) - failed}/{len(reports)} snapshot(s) verified OK")
+
+    def restore_snapshot(self):
+        snapshot_id = self.selected_snapshot_id()
+        if not snapshot_id:
+            messagebox.showinfo("Restore", "Select a snapshot first.")
+            return
+        dest = filedialog.asksaveasfilename(parent=self.snapshot_window, title="Restore snapshot to",
+                                            initialfile=f"bingo_restore_{snapshot_id}.db",
+                                            defaultextension=".db")
+        if not dest:
+            return
+        if os.path.abspath(dest) == os.path.abspath(os.path.join('data', 'bingo.db')) and self.is_server_running:
+            messagebox.showerror("Restore", "Stop the server before restoring over the live database.")
+            return
+        self.run_task("snapshot store", self._restore_snapshot_task, snapshot_id, dest)
+
+    def _restore_snapshot_task(self, ctx, snapshot_id, dest):
+        try:
+            self.snapshot_store().restore(snapshot_id, Path(dest), overwrite=True,
+                                          on_progress=lambda f: ctx.progress(f * 100, f"Restoring {f:.0%}"))
+            ctx.log(f"✅ Restored snapshot {snapshot_id} to {dest} (integrity ok)")
+        except Exception as e:
+            ctx.log(f"❌ Restore failed: {str(e)}")
+            ctx.call(messagebox.showerror, "Restore Error", str(e))
+
+    def prune_snapshots(self):
+        policy = ", ".join(f"{k.replace('keep_', '')} {v}" for k, v in DEFAULT_RETENTION.items())
+        if messagebox.askyesno("Prune Snapshots", f"Apply retention policy ({policy}) and delete the rest?"):
+            self.run_task("snapshot store", self._prune_snapshots_task)
+
+    def _prune_snapshots_task(self, ctx):
+        removed, chunks, freed = self.snapshot_store().prune(**DEFAULT_RETENTION)
+        ctx.log(f"🧹 Removed {len(removed)} snapshot(s), {chunks} chunk(s), {freed / 1024:.1f}KB")
+        ctx.call(self.refresh_snapshots)
+
     def reset_database(self):
         """Reset the SQLite database"""
         if messagebox.askyesno("Confirm Reset", 
                              "⚠️ This will DELETE ALL DATA in the database.\n\n" +
                              "A backup will be created first.\n\n" +
                              "Are you sure you want to continue?"):
-            try:
-                self.console_output.insert(tk.END, "🔄 Resetting database...\n")
-                self.console_output.see(tk.END)
-                
-                # Stop server first if running
-                if self.is_server_running:
-                    self.console_output.insert(tk.END, "🛑 Stopping server first...\n")
-                    self.stop_server()
-                    time.sleep(2)
-                
-                # Create backup first
-                self.backup_database()
-                
-                # Delete database file
-                data_dir = os.path.join(os.getcwd(), 'data')
-                db_path = os.path.join(data_dir, 'bingo.db')
-                if os.path.exists(db_path):
-                    os.remove(db_path)
-                
-                # Run migrations to recreate database
-                self.run_migrations()
-                time.sleep(1)
-                
-                # Seed with fresh data
-                self.seed_database()
-                
-                self.console_output.insert(tk.END, "✅ Database reset completed!\n")
-                messagebox.showinfo("Reset Complete", "Database has been reset and reinitialized with fresh data.")
-                
-            except Exception as e:
-                self.console_output.insert(tk.END, f"❌ Error resetting database: {str(e)}\n")
-                messagebox.showerror("Reset Error", f"Failed to reset database:\n{str(e)}")
-            
-            self.console_output.see(tk.END)
+            # Stop server first if running
+            proc = self.detach_server_process() if self.is_server_running else None
+            self.run_task("reset database", self._reset_database_task, proc)
 
-    def create_env_file(self):
-        """Create a .env file with SQLite settings"""
-        if os.path.exists('.env'):
-            if not messagebox.askyesno("File Exists", ".env file already exists.\n\nDo you want to overwrite it?"):
-                return
-        
+    def _reset_database_task(self, ctx, proc):
         try:
-            # Generate a random JWT secret
-            import secrets
-            jwt_secret = secrets.token_hex(32)
+            ctx.log("🔄 Resetting database...")
+            
+            if proc:
+                ctx.log("🛑 Stopping server first...")
+                result = self.terminate_server_process(ctx, proc)
+                if result and result.survivors:
+                    ctx.log("❌ Server processes still running; database left untouched")
+                    return
+                port = self.server_port()
+                released = wait_port_released(port, deadline=self.PORT_RELEASE_DEADLINE_S, sleep=ctx.sleep)
+                if released is None:
+                    ctx.log(f"⚠️ Port {port} still in use after {self.PORT_RELEASE_DEADLINE_S:.0f}s")
+            
+            # Create backup first
+            data_dir = os.path.join(os.getcwd(), 'data')
+            db_path = os.path.join(data_dir, 'bingo.db')
+            if os.path.exists(db_path):
+                self.copy_database_backup(ctx)
+                ctx.log("✅ Database backed up")
             
-            env_content = f"""# Server Configuration
+            # Delete database file (and its WAL/shared-memory files, which would
+            # otherwise be replayed into the fresh database)
+            for path in (db_path, db_path + '-wal', db_path + '-shm'):
+                if os.path.exists(path):
+                    os.remove(path)
+            
+            # Run migrations to recreate database, then seed with fresh data
+            if not self._migrations_task(ctx) or not self._seed_task(ctx):
+                ctx.log("❌ Database reset did not complete")
+                return
+            
+            ctx.log("✅ Database reset completed!")
+            ctx.call(messagebox.showinfo, "Reset Complete", "Database has been reset and reinitialized with fresh data.")
+            
+        except Exception as e:
+            ctx.log(f"❌ Error resetting database: {str(e)}")
+            ctx.call(messagebox.showerror, "Reset Error", f"Failed to reset database:\n{str(e)}")
+
+    def write_env_file(self):
+        """Write a .env file with SQLite settings and a fresh JWT secret"""
+        # Generate a random JWT secret
+        import secrets
+        jwt_secret = secrets.token_hex(32)
+        
+        env_content = f"""# Server Configuration
 PORT=5000
 JWT_SECRET={jwt_secret}
 
@@ -810,18 +1503,27 @@ NODE_ENV=development
 # Database Settings
 DB_TYPE=sqlite
 """
+        
+        with open('.env', 'w') as f:
+            f.write(env_content)
+        
+        # Create data directory if it doesn't exist
+        data_dir = os.path.join(os.getcwd(), 'data')
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+
+    def create_env_file(self):
+        """Create a .env file with SQLite settings"""
+        if os.path.exists('.env'):
+            if not messagebox.askyesno("File Exists", ".env file already exists.\n\nDo you want to overwrite it?"):
+                return
+        
+        try:
+            self.write_env_file()
             
-            with open('.env', 'w') as f:
-                f.write(env_content)
-            
-            # Create data directory if it doesn't exist
-            data_dir = os.path.join(os.getcwd(), 'data')
-            if not os.path.exists(data_dir):
-                os.makedirs(data_dir)
-            
-            self.console_output.insert(tk.END, "✅ Environment configured for SQLite\n")
-            self.console_output.insert(tk.END, "📁 Database location: ./data/bingo.db\n")
-            self.console_output.insert(tk.END, "🔑 New JWT secret generated\n")
+            self.console_write("✅ Environment configured for SQLite\n")
+            self.console_write("📁 Database location: ./data/bingo.db\n")
+            self.console_write("🔑 New JWT secret generated\n")
             self.check_environment_status()
             
             messagebox.showinfo("Setup Complete", 
@@ -832,154 +1534,90 @@ DB_TYPE=sqlite
                               "3. Start the server")
             
         except Exception as e:
-            self.console_output.insert(tk.END, f"❌ Error creating .env file: {str(e)}\n")
+            self.console_write(f"❌ Error creating .env file: {str(e)}\n")
             messagebox.showerror("Error", f"Failed to create .env file: {str(e)}")
         
-        self.console_output.see(tk.END)
+
+    def install_optional_ui(self):
+        """Install customtkinter in the background; it is picked up on the next launch"""
+        self.run_task("install modern UI", self._install_ui_task)
+
+    def _install_ui_task(self, ctx):
+        if importlib.util.find_spec('pip') is None:
+            ctx.log(f"❌ pip is not available for {sys.executable}")
+            ctx.status("❌ Install Failed")
+            return
+        ctx.status("📦 Installing Modern UI...")
+        ctx.progress(0, f"pip install {OPTIONAL_UI_PACKAGE}...")
+        ctx.log(f"📦 Installing {OPTIONAL_UI_PACKAGE} (the current window keeps working)...")
+        try:
+            code, _ = ctx.run([sys.executable, '-m', 'pip', 'install', OPTIONAL_UI_PACKAGE], timeout=600)
+        except subprocess.TimeoutExpired:
+            code = None
+            ctx.log("❌ pip timed out (no network?)")
+        if code == 0:
+            ctx.log(f"✅ {OPTIONAL_UI_PACKAGE} installed - restart the manager to use the modern UI")
+            ctx.status("✅ Modern UI Installed")
+            ctx.progress(100, "Restart to apply")
+            ctx.call(self.install_ui_btn.configure, text="Modern UI installed (restart to apply)", state="disabled")
+        else:
+            if code is not None:
+                ctx.log(f"❌ pip install {OPTIONAL_UI_PACKAGE} failed (exit {code})")
+            ctx.status("❌ Install Failed")
+            ctx.progress(0, "Install failed")
 
     def check_dependencies(self):
         """Check if all required dependencies are installed"""
+        self.run_task("dependency check", self._check_dependencies_task)
+
+    def _check_dependencies_task(self, ctx):
+        hints = {
+            'node': "💡 Download from: https://nodejs.org/",
+            'npm': "💡 npm comes with Node.js - try restarting terminal",
+        }
         try:
-            self.operation_status.configure(text="🔍 Checking Dependencies...")
-            self.progress_bar["value"] = 0
-            self.progress_label.configure(text="Starting dependency check...")
-            self.root.update()
-            
-            total_checks = 6  # Node.js, npm, Docker, Docker Compose, package.json, node_modules
-            current_check = 0
-            
-            def update_progress(step_name):
-                nonlocal current_check
-                current_check += 1
-                self.progress_bar["value"] = (current_check / total_checks) * 100
-                self.progress_label.configure(text=f"Checking {step_name}...")
-                self.root.update()
-            
-            # Check Node.js
-            update_progress("Node.js")
-            node_path = find_executable('node')
-            if node_path:
-                try:
-                    result = run_command_safe([node_path, '--version'], capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        version = result.stdout.strip()
-                        self.node_status.configure(text="⚙️ Node.js: ✅")
-                        self.node_version.configure(text=f"{version}")
-                        self.console_output.insert(tk.END, f"✅ Node.js: {version} (at {node_path})\n")
-                    else:
-                        self.node_status.configure(text="⚙️ Node.js: ❌ Error")
-                        self.node_version.configure(text="Not working")
-                except:
-                    self.node_status.configure(text="⚙️ Node.js: ❌ Error")
-                    self.node_version.configure(text="Runtime error")
-            else:
-                self.node_status.configure(text="⚙️ Node.js: ❌ Missing")
-                self.node_version.configure(text="Download required")
-                self.console_output.insert(tk.END, "❌ Node.js: Not found in PATH\n")
-                self.console_output.insert(tk.END, "💡 Download from: https://nodejs.org/\n")
-            
-            # Check npm
-            update_progress("npm")
-            npm_path = find_executable('npm')
-            if npm_path:
-                try:
-                    result = run_command_safe([npm_path, '--version'], capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        version = result.stdout.strip()
-                        self.npm_status.configure(text="📦 npm: ✅")
-                        self.npm_version.configure(text=f"v{version}")
-                        self.console_output.insert(tk.END, f"✅ npm: {version} (at {npm_path})\n")
-                    else:
-                        self.npm_status.configure(text="📦 npm: ❌ Error")
-                        self.npm_version.configure(text="Not working")
-                except:
-                    self.npm_status.configure(text="📦 npm: ❌ Error")
-                    self.npm_version.configure(text="Runtime error")
-            else:
-                self.npm_status.configure(text="📦 npm: ❌ Missing")
-                self.npm_version.configure(text="Restart terminal")
-                self.console_output.insert(tk.END, "❌ npm: Not found in PATH\n")
-                self.console_output.insert(tk.END, "💡 npm comes with Node.js - try restarting terminal\n")
-            
-            # Check SQLite
-            update_progress("SQLite Database")
-            data_dir = os.path.join(os.getcwd(), 'data')
-            db_path = os.path.join(data_dir, 'bingo.db')
-            if os.path.exists(db_path):
-                size = os.path.getsize(db_path) / 1024
-                modified = datetime.fromtimestamp(os.path.getmtime(db_path)).strftime('%Y-%m-%d %H:%M')
-                self.sqlite_status.configure(text="🗄️ SQLite: ✅")
-                self.sqlite_version.configure(text=f"{size:.1f}KB")
-                self.database_status.configure(text="🗄️ Database: ✅ Ready")
-                self.database_version.configure(text=f"{size:.1f}KB, {modified}")
-                self.console_output.insert(tk.END, f"✅ SQLite Database: {size:.1f}KB (last modified: {modified})\n")
-            else:
-                self.sqlite_status.configure(text="🗄️ SQLite: ⚠️")
-                self.sqlite_version.configure(text="Not initialized")
-                self.database_status.configure(text="🗄️ Database: ⚠️ Not initialized")
-                self.database_version.configure(text="Run initialization")
-                self.console_output.insert(tk.END, "⚠️ SQLite Database: Not initialized (run migrations first)\n")
-            
-            # Check package.json
-            update_progress("package.json")
-            if os.path.exists('package.json'):
-                self.console_output.insert(tk.END, "✅ package.json: Found\n")
-            else:
-                self.console_output.insert(tk.END, "❌ package.json: Not found\n")
-            
-            # Check node_modules
-            update_progress("node_modules")
-            if os.path.exists('node_modules'):
-                self.console_output.insert(tk.END, "✅ node_modules: Found\n")
-            else:
-                self.console_output.insert(tk.END, "❌ node_modules: Not found (run 'npm install')\n")
-            
-            # Check .env and determine mode
-            if os.path.exists('.env'):
-                try:
-                    with open('.env', 'r') as f:
-                        env_content = f.read()
-                        if 'USE_MOCK_DB=true' in env_content:
-                            self.env_file_status.configure(text="📄 .env: ✅")
-                            self.env_mode.configure(text="Mock DB Mode")
-                        else:
-                            self.env_file_status.configure(text="📄 .env: ✅")
-                            self.env_mode.configure(text="SQLite Mode")
-                except:
-                    self.env_file_status.configure(text="📄 .env: ⚠️")
-                    self.env_mode.configure(text="Read error")
-            else:
-                self.env_file_status.configure(text="📄 .env: ❌")
-                self.env_mode.configure(text="Not found")
-            
+            ctx.status("🔍 Checking Dependencies...")
+            ctx.progress(0, "Starting dependency check...")
+            total_checks = len(self.env_probe.probes)
+            done = 0
+
+            def on_result(result):
+                nonlocal done
+                done += 1
+                ctx.call(self.show_probe_result, result)
+                ctx.progress((done / total_checks) * 100, f"Checked {result.name}")
+                mark = "✅" if result.ok else "⚠️" if result.ok is None else "❌"
+                ctx.log(f"{mark} {result.detail}")
+                if result.ok is False and result.name in hints:
+                    ctx.log(hints[result.name])
+
+            # Every probe runs at once; re-probe even if nothing changed on disk
+            results = self.env_probe.run(on_result, force=True)
+
             # Summary and recommendations
-            self.console_output.insert(tk.END, "\n💡 Setup Guide:\n")
+            ctx.log("\n💡 Setup Guide:")
             missing_deps = []
-            if not node_path:
+            if not results['node'].ok:
                 missing_deps.append("Node.js (https://nodejs.org/)")
-            if node_path and not npm_path:
+            if results['node'].ok and not results['npm'].ok:
                 missing_deps.append("Restart terminal for npm")
-            if not os.path.exists(db_path):
+            if not results['sqlite'].ok:
                 missing_deps.append("Initialize database (click 'Initialize/Update Database')")
             
             if missing_deps:
-                self.operation_status.configure(text="⚠️ Setup Required")
-                self.console_output.insert(tk.END, "Required actions:\n")
+                ctx.status("⚠️ Setup Required")
+                ctx.log("Required actions:")
                 for i, dep in enumerate(missing_deps, 1):
-                    self.console_output.insert(tk.END, f"{i}. {dep}\n")
+                    ctx.log(f"{i}. {dep}")
             else:
-                self.operation_status.configure(text="✅ Environment Ready")
+                ctx.status("✅ Environment Ready")
             
-            self.progress_bar["value"] = 100
-            self.progress_label.configure(text="Dependency check complete")
+            ctx.progress(100, "Dependency check complete")
                 
         except Exception as e:
-            self.console_output.insert(tk.END, f"❌ Error checking dependencies: {str(e)}\n")
-            self.operation_status.configure(text="❌ Check Failed")
-            self.progress_label.configure(text="Error during dependency check")
-        
-        self.console_output.see(tk.END)
-        self.root.update()
+            ctx.log(f"❌ Error checking dependencies: {str(e)}")
+            ctx.status("❌ Check Failed")
+            ctx.progress(0, "Error during dependency check")
 
     def full_setup(self):
         """Perform a complete environment setup"""
@@ -992,97 +1630,97 @@ DB_TYPE=sqlite
                              "5️⃣ Seed initial data\n\n" +
                              "✅ No Docker required!\n\n" +
                              "Continue?"):
+            self.run_task("full setup", self._full_setup_task)
+
+    def _full_setup_task(self, ctx):
+        ctx.status("🚀 Starting Full Setup")
+        ctx.progress(0, "Initializing setup...")
+        ctx.log("🚀 Starting full environment setup...")
+        
+        total_steps = 5
+        current_step = 0
+        
+        def update_progress(step_name, progress_text):
+            nonlocal current_step
+            current_step += 1
+            ctx.progress((current_step / total_steps) * 100, progress_text)
+            ctx.status(f"Step {current_step}/{total_steps}: {step_name}")
+        
+        def fail(progress_text):
+            ctx.status("❌ Setup Failed")
+            ctx.progress(current_step / total_steps * 100, progress_text)
+        
+        try:
+            # Step 1: Create .env file
+            update_progress("Environment File", "Creating .env configuration...")
+            if not os.path.exists('.env'):
+                self.write_env_file()
+                ctx.log("✅ Environment configured for SQLite")
+                ctx.log("🔑 New JWT secret generated")
+            else:
+                ctx.log("✅ Using existing .env file")
             
-            self.operation_status.configure(text="🚀 Starting Full Setup")
-            self.progress_bar["value"] = 0
-            self.progress_label.configure(text="Initializing setup...")
-            self.console_output.insert(tk.END, "🚀 Starting full environment setup...\n")
-            self.console_output.see(tk.END)
-            self.root.update()
-            
-            total_steps = 5
-            current_step = 0
-            
-            def update_progress(step_name, progress_text):
-                nonlocal current_step
-                current_step += 1
-                self.progress_bar["value"] = (current_step / total_steps) * 100
-                self.operation_status.configure(text=f"Step {current_step}/{total_steps}: {step_name}")
-                self.progress_label.configure(text=progress_text)
-                self.root.update()
-            
+            # Step 2: Install dependencies
+            update_progress("Dependencies", "Installing npm packages...")
+            npm_path = find_executable('npm')
+            if not npm_path:
+                ctx.log("❌ npm not found. Please install Node.js first.")
+                fail("npm not found - install Node.js")
+                return
+                
             try:
-                # Step 1: Create .env file
-                update_progress("Environment File", "Creating .env configuration...")
-                if not os.path.exists('.env'):
-                    self.create_env_file()
-                    time.sleep(1)
-                else:
-                    self.console_output.insert(tk.END, "✅ Using existing .env file\n")
+                ctx.log("📦 Installing npm dependencies...")
+                returncode, _ = ctx.run([npm_path, 'install'], timeout=120)
                 
-                # Step 2: Install dependencies
-                update_progress("Dependencies", "Installing npm packages...")
-                npm_path = find_executable('npm')
-                if not npm_path:
-                    self.console_output.insert(tk.END, "❌ npm not found. Please install Node.js first.\n")
-                    self.operation_status.configure(text="❌ Setup Failed")
-                    self.progress_label.configure(text="npm not found - install Node.js")
+                if returncode == 0:
+                    ctx.log("✅ Dependencies installed")
+                else:
+                    ctx.log(f"❌ npm install failed (exit code {returncode})")
+                    fail("npm install failed")
                     return
                     
-                try:
-                    self.console_output.insert(tk.END, "📦 Installing npm dependencies...\n")
-                    self.console_output.see(tk.END)
-                    
-                    result = run_command_safe([npm_path, 'install'], 
-                                            capture_output=True, text=True, timeout=120)
-                    
-                    if result.returncode == 0:
-                        self.console_output.insert(tk.END, "✅ Dependencies installed\n")
-                    else:
-                        self.console_output.insert(tk.END, f"❌ npm install failed:\n{result.stderr}\n")
-                        self.operation_status.configure(text="❌ Setup Failed")
-                        self.progress_label.configure(text="npm install failed")
-                        return
-                        
-                except Exception as e:
-                    self.console_output.insert(tk.END, f"❌ Error installing dependencies: {str(e)}\n")
-                    self.operation_status.configure(text="❌ Setup Failed")
-                    self.progress_label.configure(text="Dependency installation error")
-                    return
-                
-                # Step 3: Initialize SQLite Database
-                update_progress("SQLite Database", "Creating database directory...")
-                data_dir = os.path.join(os.getcwd(), 'data')
-                if not os.path.exists(data_dir):
-                    os.makedirs(data_dir)
-                    self.console_output.insert(tk.END, "✅ Created data directory\n")
-                else:
-                    self.console_output.insert(tk.END, "✅ Data directory exists\n")
-                
-                # Step 4: Run migrations
-                update_progress("Database Schema", "Running migrations...")
-                self.run_migrations()
-                time.sleep(2)
-                
-                # Step 5: Seed database
-                update_progress("Initial Data", "Seeding database...")
-                self.seed_database()
-                
-                # Success!
-                self.operation_status.configure(text="✅ Setup Complete")
-                self.progress_label.configure(text="Environment ready!")
-                self.console_output.insert(tk.END, "\n🎉 Full setup completed successfully!\n")
-                self.console_output.insert(tk.END, "💡 You can now start the server with SQLite.\n")
-                self.console_output.see(tk.END)
-                
-                # Refresh status
-                self.check_environment_status()
-                
             except Exception as e:
-                self.console_output.insert(tk.END, f"❌ Setup error: {str(e)}\n")
-                self.operation_status.configure(text="❌ Setup Failed")
-                self.progress_label.configure(text=f"Error: {str(e)[:50]}...")
-                self.console_output.see(tk.END)
+                ctx.log(f"❌ Error installing dependencies: {str(e)}")
+                fail("Dependency installation error")
+                return
+            
+            # Step 3: Initialize SQLite Database
+            update_progress("SQLite Database", "Creating database directory...")
+            data_dir = os.path.join(os.getcwd(), 'data')
+            if not os.path.exists(data_dir):
+                os.makedirs(data_dir)
+                ctx.log("✅ Created data directory")
+            else:
+                ctx.log("✅ Data directory exists")
+            
+            # Step 4: Run migrations
+            update_progress("Database Schema", "Running migrations...")
+            if not self._migrations_task(ctx):
+                fail("Migrations failed")
+                return
+            
+            # Step 5: Seed database
+            update_progress("Initial Data", "Seeding database...")
+            if not self._seed_task(ctx):
+                fail("Seeding failed")
+                return
+            
+            # Success!
+            ctx.status("✅ Setup Complete")
+            ctx.progress(100, "Environment ready!")
+            ctx.log("\n🎉 Full setup completed successfully!")
+            ctx.log("💡 You can now start the server with SQLite.")
+            
+            # Refresh status
+            ctx.call(self.check_environment_status)
+            
+        except Exception as e:
+            ctx.log(f"❌ Setup error: {str(e)}")
+            ctx.status("❌ Setup Failed")
+            ctx.progress(0, f"Error: {str(e)[:50]}...")
+        except TaskCancelled:
+            ctx.status("🛑 Setup Cancelled")
+            raise
 
     def start_mock_mode(self):
         """Start the server in mock database mode (no SQLite required)"""
@@ -1093,8 +1731,7 @@ DB_TYPE=sqlite
                              "🎯 Good for development and testing\n\n" +
                              "Continue?"):
             
-            self.console_output.insert(tk.END, "🔧 Setting up Mock Database Mode...\n")
-            self.console_output.see(tk.END)
+            self.console_write("🔧 Setting up Mock Database Mode...\n")
             
             # Create .env file with mock database enabled
             try:
@@ -1111,39 +1748,51 @@ NODE_ENV=development
                 with open('.env', 'w') as f:
                     f.write(env_content)
                 
-                self.console_output.insert(tk.END, "✅ .env file configured for Mock Database Mode\n")
-                self.console_output.insert(tk.END, "🔧 USE_MOCK_DB=true set\n")
+                self.console_write("✅ .env file configured for Mock Database Mode\n")
+                self.console_write("🔧 USE_MOCK_DB=true set\n")
                 
             except Exception as e:
-                self.console_output.insert(tk.END, f"❌ Error creating .env file: {str(e)}\n")
+                self.console_write(f"❌ Error creating .env file: {str(e)}\n")
                 return
             
-            # Install dependencies if needed
-            npm_path = find_executable('npm')
-            if npm_path and not os.path.exists('node_modules'):
-                try:
-                    self.console_output.insert(tk.END, "📦 Installing npm dependencies...\n")
-                    self.console_output.see(tk.END)
-                    
-                    result = run_command_safe([npm_path, 'install'], 
-                                            capture_output=True, text=True, timeout=120)
-                    
-                    if result.returncode == 0:
-                        self.console_output.insert(tk.END, "✅ Dependencies installed\n")
-                    else:
-                        self.console_output.insert(tk.END, f"❌ npm install failed:\n{result.stderr}\n")
-                        return
-                        
-                except Exception as e:
-                    self.console_output.insert(tk.END, f"❌ Error installing dependencies: {str(e)}\n")
+            self.run_task("mock mode setup", self._mock_mode_task)
+
+    def _mock_mode_task(self, ctx):
+        # Install dependencies if needed
+        npm_path = find_executable('npm')
+        if npm_path and not os.path.exists('node_modules'):
+            try:
+                ctx.log("📦 Installing npm dependencies...")
+                returncode, _ = ctx.run([npm_path, 'install'], timeout=120)
+                
+                if returncode == 0:
+                    ctx.log("✅ Dependencies installed")
+                else:
+                    ctx.log(f"❌ npm install failed (exit code {returncode})")
                     return
-            
-            # Update status
-            self.check_environment_status()
-            
-            self.console_output.insert(tk.END, "🎉 Mock Database Mode ready! You can now start the server.\n")
-            self.console_output.insert(tk.END, "💡 The server will use in-memory database with test data.\n")
-            self.console_output.see(tk.END)
+                    
+            except Exception as e:
+                ctx.log(f"❌ Error installing dependencies: {str(e)}")
+                return
+        
+        # Update status
+        ctx.call(self.check_environment_status)
+        
+        ctx.log("🎉 Mock Database Mode ready! You can now start the server.")
+        ctx.log("💡 The server will use in-memory database with test data.")
+
+    def report_startup(self):
+        """Cold start: module import to the first idle event-loop tick (window drawn)"""
+        self.startup_marks.append(('first draw', time.perf_counter()))
+        phases, last = [], STARTED
+        for label, mark in self.startup_marks:
+            phases.append(f"{label} {(mark - last) * 1000:.0f} ms")
+            last = mark
+        total = (last - STARTED) * 1000
+        toolkit = "CustomTkinter" if USE_CUSTOM_TK else "standard Tk"
+        self.console_write(f"⏱️ Cold start {total:.0f} ms ({', '.join(phases)}) · {toolkit}\n")
+        if self.operation_status.cget('text') == "Ready":
+            self.operation_status.configure(text=f"Ready (started in {total:.0f} ms)")
 
     def run(self):
         self.root.mainloop()